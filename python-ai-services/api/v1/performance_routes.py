@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 
 from python_ai_services.models.performance_models import PerformanceMetrics
 from python_ai_services.services.performance_calculation_service import PerformanceCalculationService
@@ -13,14 +14,18 @@ from python_ai_services.api.v1.dashboard_data_routes import get_trading_data_ser
 router = APIRouter()
 
 # Dependency for PerformanceCalculationService
+_performance_calculation_service_instance: Optional[PerformanceCalculationService] = None
 def get_performance_calculation_service(
     trading_data_service: TradingDataService = Depends(get_trading_data_service)
 ) -> PerformanceCalculationService:
     """
-    Provides a PerformanceCalculationService instance,
-    injecting the TradingDataService dependency.
+    Provides the PerformanceCalculationService singleton, injecting the TradingDataService dependency.
+    A single instance keeps the per-agent metric checkpoints between requests.
     """
-    return PerformanceCalculationService(trading_data_service=trading_data_service)
+    global _performance_calculation_service_instance
+    if _performance_calculation_service_instance is None:
+        _performance_calculation_service_instance = PerformanceCalculationService(trading_data_service=trading_data_service)
+    return _performance_calculation_service_instance
 
 
 @router.get("/agents/{agent_id}/performance", response_model=PerformanceMetrics)
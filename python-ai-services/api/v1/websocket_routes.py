@@ -1,7 +1,9 @@
+import json
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 # Adjust path based on actual project structure if core is not directly under python_ai_services
 # Assuming 'python_ai_services' is the root package in PYTHONPATH
-from python_ai_services.core.websocket_manager import connection_manager
+from python_ai_services.core.websocket_manager import connection_manager, agent_topic
 from loguru import logger
 
 router = APIRouter()
@@ -10,9 +12,12 @@ router = APIRouter()
 async def websocket_dashboard_endpoint(websocket: WebSocket, client_id: str):
     """
     WebSocket endpoint for real-time dashboard updates.
-    A unique client_id should be provided by each connecting client.
+    A unique client_id should be provided by each connecting client; several
+    sockets (e.g. browser tabs) may share it. Each socket starts subscribed to the
+    agent:<client_id> topic; clients change what they receive with
+    {"action": "subscribe" | "unsubscribe", "topics": ["symbol:BTC-USD", "agent:<id>"]}.
     """
-    await connection_manager.connect(websocket, client_id)
+    await connection_manager.connect(websocket, client_id, topics=[agent_topic(client_id)])
     try:
         while True:
             # This loop keeps the connection alive.
@@ -20,6 +25,16 @@ async def websocket_dashboard_endpoint(websocket: WebSocket, client_id: str):
             data = await websocket.receive_text()
             logger.debug(f"WebSocket client '{client_id}' sent message: {data}")
 
+            try:
+                command = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(command, dict) and isinstance(command.get("topics"), list):
+                if command.get("action") == "subscribe":
+                    connection_manager.subscribe(client_id, command["topics"], websocket)
+                elif command.get("action") == "unsubscribe":
+                    connection_manager.unsubscribe(client_id, command["topics"], websocket)
+
             # Example: Echoing message back or processing client commands
             # if data == "ping":
             #     await websocket.send_text("pong")
@@ -0,0 +1,102 @@
+"""
+Streaming latency histogram with fixed memory and bounded relative error.
+
+Values are counted in log-spaced buckets (HDR-histogram style), so recording is
+O(1) and a percentile query scans a few hundred counters regardless of how many
+samples were recorded.
+"""
+
+import math
+from typing import Dict, Iterable, List
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram; percentiles are accurate to about relative_error."""
+
+    def __init__(self, min_value: float = 0.001, max_value: float = 60_000.0, relative_error: float = 0.01):
+        if not 0 < min_value < max_value:
+            raise ValueError("Expected 0 < min_value < max_value")
+        self.min_value = min_value
+        self.max_value = max_value
+        # A bucket spans [b, b * growth); reporting its geometric midpoint keeps error within relative_error
+        self._growth = (1 + relative_error) ** 2
+        self._log_growth = math.log(self._growth)
+        # Bucket 0 holds values <= min_value, the last bucket everything >= max_value
+        self.num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 2
+        self.reset()
+
+    def reset(self):
+        self.counts: List[int] = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(self.num_buckets - 1, int(math.log(value / self.min_value) / self._log_growth) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        return self.percentiles([q])[q]
+
+    def percentiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        """Several percentiles (0-100) from one pass over the buckets."""
+        qs = sorted(qs)
+        results = {q: 0.0 for q in qs}
+        if not self.count:
+            return results
+
+        targets = iter((q, max(1, math.ceil(q / 100 * self.count))) for q in qs)
+        q, rank = next(targets)
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            while cumulative >= rank:
+                results[q] = self._bucket_value(index)
+                try:
+                    q, rank = next(targets)
+                except StopIteration:
+                    return results
+        return results
+
+    def _bucket_value(self, index: int) -> float:
+        # The out-of-range buckets are unbounded, so report the exact extreme seen
+        if index == 0:
+            return self.min
+        if index == self.num_buckets - 1:
+            return self.max
+        value = self.min_value * self._growth ** (index - 1) * math.sqrt(self._growth)
+        return min(max(value, self.min), self.max)
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.num_buckets != self.num_buckets or other.min_value != self.min_value:
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def summary(self) -> Dict[str, float]:
+        quantiles = self.percentiles([50, 95, 99])
+        return {
+            "count": self.count,
+            "avg": self.mean(),
+            "p50": quantiles[50],
+            "p95": quantiles[95],
+            "p99": quantiles[99],
+            "max": self.max if self.count else 0.0,
+        }
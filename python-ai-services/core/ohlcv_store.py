@@ -0,0 +1,310 @@
+"""
+Local columnar store for OHLCV bars, one directory per symbol and timeframe.
+
+Each column is a raw little-endian file (timestamps as int64 nanoseconds, prices and
+volume as float64) read through np.memmap, so a range read only touches the rows it
+returns and new bars are appended to the end of the files. meta.json holds the row
+count, written after the column data so a torn append is never visible, and the date
+range already fetched from the data provider, which lets get_bars answer repeated
+requests without going back to the network.
+"""
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+logger = getLogger(__name__)
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+TIMESTAMP_FILE = "timestamp.i8"
+META_FILE = "meta.json"
+
+# Fetches a symbol's bars for an inclusive [start, end] range, e.g. openbb_bar_fetcher("yfinance")
+BarFetcher = Callable[[str, pd.Timestamp, pd.Timestamp], Optional[pd.DataFrame]]
+
+
+def bar_interval(timeframe: str) -> Optional[pd.Timedelta]:
+    """Spacing of consecutive bars for "1m", "15min", "1h", "1w", ...; None for daily bars, which follow trading days"""
+    match = re.fullmatch(r"(\d*)(min|m|h|d|w)", timeframe.lower())
+    if match is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    count, unit = int(match.group(1) or 1), match.group(2)
+    if unit == "d" and count == 1:
+        return None
+    units = {"min": "min", "m": "min", "h": "h", "d": "D", "w": "W"}
+    return pd.Timedelta(count, units[unit])
+
+
+def normalize_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bars as float columns Open/High/Low/Close/Volume on a sorted, timezone-naive UTC
+    DatetimeIndex. Accepts lower- or title-case columns and the timestamps either as the
+    index or as a 'timestamp'/'date' column.
+    """
+    frame = bars.rename(columns={column: column.title() for column in bars.columns if isinstance(column, str)})
+    for column in ("Timestamp", "Date"):
+        if column in frame.columns:
+            frame = frame.set_index(column)
+            break
+    missing = [column for column in PRICE_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Bars are missing columns: {missing}")
+
+    index = pd.DatetimeIndex(pd.to_datetime(frame.index))
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    frame = frame[list(PRICE_COLUMNS)].astype(float).set_axis(index.rename("date"))
+    frame = frame[~frame.index.duplicated(keep="last")]
+    return frame.sort_index()
+
+
+def _nanoseconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Bar times as int64 nanoseconds whatever the index resolution"""
+    return index.values.astype("datetime64[ns]").view("<i8")
+
+
+def openbb_bar_fetcher(data_provider: str = "yfinance", interval: str = "1d") -> BarFetcher:
+    """BarFetcher backed by obb.equity.price.historical"""
+    def fetch(symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        from openbb import obb
+        data_obb = obb.equity.price.historical(
+            symbol=symbol, start_date=start.strftime("%Y-%m-%d"), end_date=end.strftime("%Y-%m-%d"),
+            provider=data_provider, interval=interval
+        )
+        if not data_obb or not hasattr(data_obb, 'to_df'):
+            return None
+        return data_obb.to_df()
+
+    return fetch
+
+
+def _range_start(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+def _range_end(value) -> Optional[pd.Timestamp]:
+    """Inclusive end; a bare date covers the whole day"""
+    if value is None:
+        return None
+    end = pd.Timestamp(value)
+    if end == end.normalize():
+        end += pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    return end
+
+
+class OHLCVStore:
+    """
+    Memory-mapped bar store rooted at a local directory, safe to share between processes
+    (appends take a file lock where fcntl is available).
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._maps: Dict[Path, Tuple[int, Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    def _series_path(self, symbol: str, timeframe: str) -> Path:
+        return self.root / quote(symbol, safe="") / quote(timeframe, safe="")
+
+    @staticmethod
+    def _column_file(column: str) -> str:
+        return TIMESTAMP_FILE if column == "timestamp" else f"{column.lower()}.f8"
+
+    def _read_meta(self, path: Path) -> Dict:
+        try:
+            with open(path / META_FILE) as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return {"rows": 0, "covered": None}
+
+    def _write_meta(self, path: Path, meta: Dict) -> None:
+        temporary = path / f"{META_FILE}.tmp"
+        with open(temporary, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temporary, path / META_FILE)
+
+    @contextmanager
+    def _writing(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(path / ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield self._read_meta(path)
+            finally:
+                self._maps.pop(path, None)
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _columns(self, path: Path, rows: int) -> Dict[str, np.ndarray]:
+        """Memory maps of every column, reopened when another writer changed the row count"""
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        columns = {}
+        for column in ("timestamp",) + PRICE_COLUMNS:
+            dtype = "<i8" if column == "timestamp" else "<f8"
+            if rows:
+                columns[column] = np.memmap(path / self._column_file(column), dtype=dtype, mode="r", shape=(rows,))
+            else:
+                columns[column] = np.empty(0, dtype=dtype)
+        self._maps[path] = (rows, columns)
+        return columns
+
+    def rows(self, symbol: str, timeframe: str) -> int:
+        return self._read_meta(self._series_path(symbol, timeframe))["rows"]
+
+    def bounds(self, symbol: str, timeframe: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """First and last stored bar times, or None when nothing is stored"""
+        path = self._series_path(symbol, timeframe)
+        rows = self._read_meta(path)["rows"]
+        if not rows:
+            return None
+        timestamps = self._columns(path, rows)["timestamp"]
+        return pd.Timestamp(timestamps[0]), pd.Timestamp(timestamps[-1])
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Bars with start <= time <= end (both optional; a bare end date includes that whole day)"""
+        path = self._series_path(symbol, timeframe)
+        columns = self._columns(path, self._read_meta(path)["rows"])
+        timestamps = columns["timestamp"]
+        start, end = _range_start(start), _range_end(end)
+        first = 0 if start is None else int(np.searchsorted(timestamps, start.value, side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end.value, side="right"))
+        index = pd.DatetimeIndex(np.array(timestamps[first:last]).astype("datetime64[ns]"), name="date")
+        return pd.DataFrame({column: np.array(columns[column][first:last]) for column in PRICE_COLUMNS}, index=index)
+
+    def append(self, symbol: str, timeframe: str, bars: pd.DataFrame) -> int:
+        """
+        Append bars newer than the last stored one and return how many were written.
+        Older bars are ignored; use merge to backfill or correct history.
+        """
+        bars = normalize_bars(bars)
+        path = self._series_path(symbol, timeframe)
+        with self._writing(path) as meta:
+            rows = meta["rows"]
+            if rows:
+                last = self._columns(path, rows)["timestamp"][-1]
+                bars = bars[_nanoseconds(bars.index) > last]
+            if bars.empty:
+                return 0
+            data = {"timestamp": _nanoseconds(bars.index), **{c: bars[c].to_numpy(dtype="<f8") for c in PRICE_COLUMNS}}
+            for column, values in data.items():
+                with open(path / self._column_file(column), "ab") as column_file:
+                    column_file.truncate(rows * 8)  # Drop the tail of an append that never reached meta.json
+                    column_file.write(values.tobytes())
+            meta["rows"] = rows + len(bars)
+            self._write_meta(path, meta)
+        return len(bars)
+
+    def merge(self, symbol: str, timeframe: str, bars: pd.DataFrame) -> int:
+        """Rewrite the series with bars merged in (new values win on equal times); returns the new row count"""
+        path = self._series_path(symbol, timeframe)
+        with self._writing(path) as meta:
+            stored = self.read(symbol, timeframe)
+            merged = normalize_bars(pd.concat([stored, normalize_bars(bars)]))
+            data = {"timestamp": _nanoseconds(merged.index), **{c: merged[c].to_numpy(dtype="<f8") for c in PRICE_COLUMNS}}
+            for column, values in data.items():
+                temporary = path / f"{self._column_file(column)}.tmp"
+                values.tofile(temporary)
+                os.replace(temporary, path / self._column_file(column))
+            meta["rows"] = len(merged)
+            self._write_meta(path, meta)
+        return len(merged)
+
+    def write(self, symbol: str, timeframe: str, bars: pd.DataFrame) -> int:
+        """Append bars that all follow the stored ones, merge anything else; returns the stored row count"""
+        bars = normalize_bars(bars)
+        if bars.empty:
+            return self.rows(symbol, timeframe)
+        stored = self.bounds(symbol, timeframe)
+        if stored is None or bars.index[0] > stored[1]:
+            self.append(symbol, timeframe, bars)
+            return self.rows(symbol, timeframe)
+        return self.merge(symbol, timeframe, bars)
+
+    def find_gaps(self, symbol: str, timeframe: str, start=None, end=None,
+                  holidays=None) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Missing stretches between stored bars as (bar before, bar after) pairs. Daily bars
+        are expected on every weekday that is not in holidays; other timeframes every
+        bar_interval(timeframe).
+        """
+        times = self.read(symbol, timeframe, start, end).index
+        if len(times) < 2:
+            return []
+        interval = bar_interval(timeframe)
+        if interval is None:
+            days = times.values.astype("datetime64[D]")
+            holidays = [] if holidays is None else pd.to_datetime(list(holidays)).values.astype("datetime64[D]")
+            missing = np.busday_count(days[:-1] + 1, days[1:], holidays=holidays) > 0
+        else:
+            missing = np.diff(_nanoseconds(times)) > interval.value
+        return [(times[i], times[i + 1]) for i in np.flatnonzero(missing)]
+
+    def get_bars(self, symbol: str, timeframe: str, start=None, end=None, fetch: Optional[BarFetcher] = None) -> pd.DataFrame:
+        """
+        Bars for [start, end], fetching only the parts outside the range already covered by
+        earlier fetches. Without fetch, or when fetching fails, whatever is stored is returned,
+        so repeated backtests run fully offline once their range has been loaded. An omitted
+        start or end defaults to the covered range; fetching with one needs a covered range.
+        """
+        path = self._series_path(symbol, timeframe)
+        start, end = _range_start(start), _range_end(end)
+        covered = self._read_meta(path).get("covered")
+        if covered is None:
+            if fetch is not None and (start is None or end is None):
+                raise ValueError(
+                    f"No {symbol} {timeframe} bars have been fetched yet; pass both start and end to fetch them"
+                )
+            missing = [(start, end)]
+        else:
+            covered_start, covered_end = pd.Timestamp(covered[0]), pd.Timestamp(covered[1])
+            start = covered_start if start is None else start
+            end = covered_end if end is None else end
+            missing = [(start, covered_start)] if start < covered_start else []
+            if end > covered_end:
+                missing.append((covered_end, end))
+
+        if fetch is not None:
+            for fetch_start, fetch_end in missing:
+                self._fetch_range(path, symbol, timeframe, fetch, fetch_start, fetch_end)
+        return self.read(symbol, timeframe, start, end)
+
+    def _fetch_range(self, path: Path, symbol: str, timeframe: str, fetch: BarFetcher,
+                     start: pd.Timestamp, end: pd.Timestamp) -> None:
+        try:
+            bars = fetch(symbol, start, end)
+            bars = normalize_bars(bars) if bars is not None and not bars.empty else None
+        except Exception as e:
+            logger.error(f"Failed to fetch {symbol} {timeframe} bars from {start} to {end}: {e}", exc_info=True)
+            return
+
+        if bars is not None:
+            self.write(symbol, timeframe, bars)
+            logger.info(f"Stored {len(bars)} {symbol} {timeframe} bars from {bars.index[0]} to {bars.index[-1]}")
+
+        # A range reaching into the still-open present is only covered up to its last bar
+        if end >= pd.Timestamp.now("UTC").tz_localize(None).normalize():
+            end = bars.index[-1] if bars is not None else start
+        with self._writing(path) as meta:
+            covered = meta.get("covered")
+            if covered is not None:
+                start, end = min(start, pd.Timestamp(covered[0])), max(end, pd.Timestamp(covered[1]))
+            meta["covered"] = [start.isoformat(), end.isoformat()]
+            self._write_meta(path, meta)
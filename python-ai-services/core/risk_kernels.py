@@ -0,0 +1,189 @@
+"""
+Vectorized return, risk and correlation kernels over many series at once.
+
+Every function takes a 2-D array with one series per row (a 1-D input is treated
+as a single row) and reduces along the time axis, matching the per-series loops
+in CalculationService. Returns after a zero price are NaN and, like the loops,
+are left out of every statistic.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def as_matrix(series) -> np.ndarray:
+    """Float matrix with one series per row; rows must have the same length."""
+    matrix = np.asarray(series, dtype=float)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 1-D series or a 2-D array of series, got shape {matrix.shape}")
+    return matrix
+
+
+def simple_returns(prices) -> np.ndarray:
+    """Period-over-period returns, shape (rows, n - 1)."""
+    prices = as_matrix(prices)
+    previous = prices[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[:, 1:] / previous - 1
+    returns[previous == 0] = np.nan
+    return returns
+
+
+def _valid_counts(returns: np.ndarray) -> Optional[np.ndarray]:
+    """Valid returns per row, or None when there are no NaNs (the common case, which takes faster paths)."""
+    missing = np.isnan(returns)
+    if not missing.any():
+        return None
+    return returns.shape[1] - missing.sum(axis=1)
+
+
+def _row_counts(returns: np.ndarray, counts) -> np.ndarray:
+    return np.full(len(returns), returns.shape[1]) if counts is None else counts
+
+
+def _mean(returns: np.ndarray, counts) -> np.ndarray:
+    if counts is None:
+        return returns.mean(axis=1) if returns.shape[1] else np.zeros(len(returns))
+    return np.divide(np.nansum(returns, axis=1), counts, out=np.zeros(len(returns)), where=counts > 0)
+
+
+def _volatility(returns: np.ndarray, counts, means: np.ndarray) -> np.ndarray:
+    deviations = returns - means[:, np.newaxis]
+    if counts is not None:
+        deviations = np.nan_to_num(deviations, nan=0.0)
+    counts = _row_counts(returns, counts)
+    squares = np.einsum("ij,ij->i", deviations, deviations)
+    return np.sqrt(np.divide(squares, counts - 1, out=np.zeros(len(returns)), where=counts >= 2))
+
+
+def _sharpe(means: np.ndarray, vol: np.ndarray, risk_free_rate: float, periods_per_year: int) -> np.ndarray:
+    excess = means - risk_free_rate / periods_per_year
+    return np.divide(excess, vol, out=np.zeros(len(means)), where=vol != 0)
+
+
+def _value_at_risk(returns: np.ndarray, counts, confidences) -> Dict[float, np.ndarray]:
+    row_counts = _row_counts(returns, counts)
+    indices = {confidence: ((1 - confidence) * row_counts).astype(int) for confidence in confidences}
+    last = max(returns.shape[1] - 1, 0)
+    if counts is None:
+        # Every row has the same length, so a partition around the wanted ranks replaces the sort
+        kth = sorted({min(int(index[0]), last) for index in indices.values()}) if len(returns) else [0]
+        ordered = np.partition(returns, kth, axis=1) if returns.shape[1] else returns
+    else:
+        ordered = np.sort(returns, axis=1) # NaNs sort last, so the first `counts` entries are the valid ones
+    results = {}
+    for confidence, index in indices.items():
+        if not returns.shape[1]:
+            results[confidence] = np.zeros(len(returns))
+            continue
+        picked = np.take_along_axis(ordered, np.minimum(index, last)[:, np.newaxis], axis=1)[:, 0]
+        results[confidence] = np.where(index < row_counts, picked, 0.0)
+    return results
+
+
+def _win_metrics(returns: np.ndarray, counts) -> Dict[str, np.ndarray]:
+    filled = returns if counts is None else np.nan_to_num(returns, nan=0.0)
+    row_counts = _row_counts(returns, counts)
+    wins = np.count_nonzero(filled > 0, axis=1)
+    gains = np.clip(filled, 0.0, None).sum(axis=1)
+    losses = -np.clip(filled, None, 0.0).sum(axis=1)
+    win_rate = np.divide(wins * 100.0, row_counts, out=np.zeros(len(returns)), where=row_counts > 0)
+    profit_factor = np.divide(gains, losses, out=np.full(len(returns), np.inf), where=losses != 0)
+    return {
+        "win_rate": win_rate,
+        "profit_factor": np.where(row_counts > 0, profit_factor, 0.0)
+    }
+
+
+def mean_returns(returns) -> np.ndarray:
+    """Mean of the valid returns per row; 0 for rows without any."""
+    returns = as_matrix(returns)
+    return _mean(returns, _valid_counts(returns))
+
+
+def volatility(returns) -> np.ndarray:
+    """Sample standard deviation (ddof=1) per row; 0 for rows with fewer than 2 returns."""
+    returns = as_matrix(returns)
+    counts = _valid_counts(returns)
+    return _volatility(returns, counts, _mean(returns, counts))
+
+
+def sharpe_ratio(returns, risk_free_rate: float, periods_per_year: int = 252) -> np.ndarray:
+    """Per-period excess return over volatility (not annualized); 0 where volatility is 0."""
+    returns = as_matrix(returns)
+    counts = _valid_counts(returns)
+    means = _mean(returns, counts)
+    return _sharpe(means, _volatility(returns, counts, means), risk_free_rate, periods_per_year)
+
+
+def max_drawdown(prices) -> np.ndarray:
+    """Largest peak-to-trough fall as a fraction of the peak; NaN where a peak is 0."""
+    prices = as_matrix(prices)
+    if prices.shape[1] < 2:
+        return np.zeros(len(prices))
+    peaks = np.maximum.accumulate(prices, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = (peaks - prices) / peaks
+    return np.max(drawdowns, axis=1)
+
+
+def value_at_risk(returns, confidence: float) -> np.ndarray:
+    """Historical VaR: the int((1 - confidence) * n)-th smallest valid return per row."""
+    returns = as_matrix(returns)
+    return _value_at_risk(returns, _valid_counts(returns), [confidence])[confidence]
+
+
+def win_metrics(returns) -> Dict[str, np.ndarray]:
+    """Win rate (percent of valid returns above 0) and profit factor (inf without losses) per row."""
+    returns = as_matrix(returns)
+    return _win_metrics(returns, _valid_counts(returns))
+
+
+def correlation_matrix(series) -> np.ndarray:
+    """Pearson correlation between every pair of rows in one product; 0 where a row is constant."""
+    series = as_matrix(series)
+    centered = series - series.mean(axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum("ij,ij->i", centered, centered))
+    denominator = np.outer(norms, norms)
+    correlations = np.divide(centered @ centered.T, denominator, out=np.zeros_like(denominator), where=denominator != 0)
+    np.fill_diagonal(correlations, 1.0)
+    return correlations
+
+
+def performance_summary(values, risk_free_rate: float, periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """
+    The CalculationService.calculate_portfolio_performance figures for every row, unrounded and in
+    percent where it reports percent. Rows whose figures are undefined (a zero starting value,
+    a negative value ratio, a zero peak) come back as NaN.
+    """
+    values = as_matrix(values)
+    returns = simple_returns(values)
+    counts = _valid_counts(returns)
+    means = _mean(returns, counts)
+    vol = _volatility(returns, counts, means)
+    var = _value_at_risk(returns, counts, (0.95, 0.99))
+    wins = _win_metrics(returns, counts)
+    periods = values.shape[1] - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value_ratio = values[:, -1] / values[:, 0]
+        value_ratio[values[:, 0] == 0] = np.nan
+        annualized_return = (np.power(value_ratio, periods_per_year / periods) - 1) * 100
+        drawdown = max_drawdown(values) * 100
+        calmar_ratio = np.divide(annualized_return, np.abs(drawdown),
+                                 out=np.zeros(len(values)), where=drawdown != 0)
+    calmar_ratio[np.isnan(drawdown)] = np.nan
+    return {
+        "total_return": (value_ratio - 1) * 100,
+        "annualized_return": annualized_return,
+        "volatility": vol * np.sqrt(periods_per_year) * 100,
+        "sharpe_ratio": _sharpe(means, vol, risk_free_rate, periods_per_year),
+        "max_drawdown": drawdown,
+        "calmar_ratio": calmar_ratio,
+        "win_rate": wins["win_rate"],
+        "profit_factor": wins["profit_factor"],
+        "var_95": var[0.95] * 100,
+        "var_99": var[0.99] * 100
+    }
@@ -4,7 +4,8 @@ Handles the initialization of all platform services with proper dependency injec
 """
 
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Callable
 import asyncio
 
 from .service_registry import registry
@@ -105,13 +106,32 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Services whose failure stops the remaining startup
+CRITICAL_SERVICES = {"market_data", "trading_engine", "portfolio_tracker"}
+
+# Services with a cheap synchronous constructor that nothing needs at startup;
+# they are registered as factories and built on first registry.get_service
+DEFERRABLE_SERVICES = {
+    "hyperliquid_execution",
+    "strategy_config",
+    "watchlist",
+    "user_preference",
+    "crew_trading_analysis",
+    "autogen_trading_system"
+}
+
 class ServiceInitializer:
     """
     Handles the initialization of all platform services
     Manages service dependencies and startup order
+    
+    Each service starts as soon as the services it depends on are up, so
+    independent services initialize concurrently and cold start follows the
+    longest dependency chain rather than the sum of all init times.
     """
     
     def __init__(self):
+        # Canonical order; used for tie-breaking and reporting
         self.initialization_order = [
             # Phase 1: Core Infrastructure Services
             "market_data",
@@ -119,7 +139,7 @@ class ServiceInitializer:
             
             # Phase 2: Trading Engine Services (dependent on core infrastructure)
             "portfolio_tracker",
-            "trading_engine", 
+            "trading_engine",
             "order_management",
             "risk_management",
             
@@ -129,7 +149,7 @@ class ServiceInitializer:
             "sentiment_analysis",
             "ml_portfolio_optimizer",
             
-            # Phase 4: Agent and Execution Services (dependent on trading engine)
+            # Phase 4: Agent and Execution Services
             "execution_specialist",
             "hyperliquid_execution",
             "agent_management",
@@ -153,15 +173,47 @@ class ServiceInitializer:
             
             # Phase 8: Autonomous Services (new)
             "autonomous_state_persistence",
-            "blockchain_provider_service", 
+            "blockchain_provider_service",
             "enhanced_agent_wallet_service",
             "universal_trading_mode_service",
             "apscheduler_agent_service",
             "autonomous_health_monitor"
         ]
+        
+        # Services each one looks up from the registry while initializing
+        self.service_dependencies: Dict[str, List[str]] = {
+            "portfolio_tracker": ["market_data"],
+            "trading_engine": ["market_data"],
+            "risk_management": ["portfolio_tracker"],
+            "goal_capital_manager": ["farm_agent_orchestrator"],
+            "performance_attribution_engine": ["farm_agent_orchestrator", "goal_capital_manager"],
+            "orchestration_scheduler": [
+                "enhanced_event_propagation", "performance_attribution_engine",
+                "goal_capital_manager", "farm_agent_orchestrator"
+            ],
+            # Recovery and the health monitor watch every service in their group
+            "orchestration_recovery": [
+                "farm_agent_orchestrator", "goal_capital_manager", "performance_attribution_engine",
+                "enhanced_event_propagation", "orchestration_scheduler"
+            ],
+            "enhanced_agent_wallet_service": ["blockchain_provider_service"],
+            "apscheduler_agent_service": ["autonomous_state_persistence", "enhanced_agent_wallet_service"],
+            "autonomous_health_monitor": [
+                "autonomous_state_persistence", "blockchain_provider_service", "enhanced_agent_wallet_service",
+                "universal_trading_mode_service", "apscheduler_agent_service"
+            ]
+        }
+        
+        self.lazy_services = set(DEFERRABLE_SERVICES)
+        self.default_timeout = 30.0
+        self.service_timeouts: Dict[str, float] = {
+            "agent_management": 60.0,  # Loads every agent status from the database
+            "autonomous_health_monitor": 60.0
+        }
+        self.startup_report: Dict[str, Any] = {}
     
     async def initialize_all_services(self) -> Dict[str, str]:
-        """Initialize all services in the correct order"""
+        """Initialize all services, starting each once its dependencies are ready"""
         logger.info("🔧 Starting service initialization...")
         
         # Ensure database connections are ready
@@ -170,32 +222,161 @@ class ServiceInitializer:
         
         results = {}
         
+        # Deferred services only need their factories in place
         for service_name in self.initialization_order:
+            if service_name in self.lazy_services:
+                factory = self._lazy_factory(service_name)
+                if factory:
+                    registry.register_service_factory(service_name, factory)
+                    results[service_name] = "deferred - initialized on first use"
+                else:
+                    results[service_name] = "skipped - service not available"
+        
+        eager_services = [name for name in self.initialization_order if name not in self.lazy_services]
+        timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        failed = set()
+        abort_reason: Optional[str] = None
+        started = time.perf_counter()
+        
+        async def run(service_name: str):
+            nonlocal abort_reason
+            dependencies = [d for d in self.service_dependencies.get(service_name, []) if d in tasks]
+            if dependencies:
+                await asyncio.wait([tasks[d] for d in dependencies])
+            
+            failed_dependencies = [d for d in dependencies if d in failed]
+            if abort_reason or failed_dependencies:
+                failed.add(service_name)
+                reason = abort_reason or f"dependency failed: {', '.join(failed_dependencies)}"
+                results[service_name] = f"skipped - {reason}"
+                return
+            
+            timeout = self.service_timeouts.get(service_name, self.default_timeout)
+            service_started = time.perf_counter()
             try:
-                result = await self._initialize_service(service_name)
-                results[service_name] = result
+                results[service_name] = await asyncio.wait_for(self._initialize_service(service_name), timeout)
                 logger.info(f"✅ {service_name} initialized successfully")
             except Exception as e:
-                results[service_name] = f"failed: {str(e)}"
-                logger.error(f"❌ Failed to initialize {service_name}: {e}")
+                failed.add(service_name)
+                error = f"timed out after {timeout:g}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+                results[service_name] = f"failed: {error}"
+                logger.error(f"❌ Failed to initialize {service_name}: {error}")
                 
                 # Check if this is a critical service
-                if service_name in ["market_data", "trading_engine", "portfolio_tracker"]:
+                if service_name in CRITICAL_SERVICES and not abort_reason:
                     logger.error(f"Critical service {service_name} failed - stopping initialization")
-                    break
+                    abort_reason = f"critical service {service_name} failed"
+            finally:
+                timings[service_name] = {
+                    "start": service_started - started,
+                    "end": time.perf_counter() - started
+                }
+        
+        # Tasks are created in dependency order so every dependency's task already exists
+        for service_name in self._dependency_order(eager_services):
+            tasks[service_name] = asyncio.create_task(run(service_name))
+        if tasks:
+            await asyncio.wait(tasks.values())
         
         # Register all connections in the registry
         self._register_connections()
         
+        self.startup_report = self._build_startup_report(timings, time.perf_counter() - started)
+        self._log_startup_report(self.startup_report)
+        
         registry.mark_initialized()
         logger.info("✅ Service initialization completed")
         
-        return results
+        return {name: results[name] for name in self.initialization_order if name in results}
+    
+    def _dependency_order(self, service_names: List[str]) -> List[str]:
+        """Topological order of service_names, stable with respect to their given order"""
+        pending = {
+            name: {d for d in self.service_dependencies.get(name, []) if d in service_names}
+            for name in service_names
+        }
+        ordered = []
+        while pending:
+            ready = [name for name in service_names if name in pending and not pending[name]]
+            if not ready:
+                raise ValueError(f"Circular service dependencies between: {', '.join(sorted(pending))}")
+            for name in ready:
+                del pending[name]
+                ordered.append(name)
+            for dependencies in pending.values():
+                dependencies.difference_update(ready)
+        return ordered
+    
+    def _build_startup_report(self, timings: Dict[str, Dict[str, float]], wall_time: float) -> Dict[str, Any]:
+        """Per-service timings plus the dependency chain that determined total startup time"""
+        durations = {name: t["end"] - t["start"] for name, t in timings.items()}
+        
+        # Walk back from the last service to finish through whichever dependency released it
+        critical_path = []
+        current = max(timings, key=lambda name: timings[name]["end"]) if timings else None
+        while current:
+            critical_path.append(current)
+            dependencies = [d for d in self.service_dependencies.get(current, []) if d in timings]
+            current = max(dependencies, key=lambda name: timings[name]["end"]) if dependencies else None
+        critical_path.reverse()
+        
+        return {
+            "wall_time": wall_time,
+            "total_init_time": sum(durations.values()),
+            "durations": durations,
+            "critical_path": critical_path,
+            "critical_path_time": sum(durations[name] for name in critical_path)
+        }
+    
+    def _log_startup_report(self, report: Dict[str, Any]):
+        durations = report["durations"]
+        overlap = report["total_init_time"] / report["wall_time"] if report["wall_time"] > 0 else 1.0
+        logger.info(
+            f"⏱️ Service startup took {report['wall_time']:.2f}s for {report['total_init_time']:.2f}s "
+            f"of init work ({overlap:.1f}x overlap)"
+        )
+        if report["critical_path"]:
+            logger.info("Critical path: " + " -> ".join(
+                f"{name} ({durations[name]:.2f}s)" for name in report["critical_path"]
+            ))
+        for name, duration in sorted(durations.items(), key=lambda item: item[1], reverse=True)[:5]:
+            logger.info(f"  {name}: {duration:.2f}s")
     
+    def _lazy_factory(self, service_name: str) -> Optional[Callable[[], Any]]:
+        """Synchronous constructor for a deferrable service, or None if it is not available"""
+        if service_name == "hyperliquid_execution":
+            return HyperliquidExecutionService
+        elif service_name == "strategy_config":
+            if StrategyConfigService:
+                return lambda: StrategyConfigService(session_factory=db_manager.get_session_factory())
+        elif service_name == "watchlist":
+            if WatchlistService:
+                return lambda: WatchlistService(supabase_client=db_manager.get_supabase_client())
+        elif service_name == "user_preference":
+            if UserPreferenceService:
+                return lambda: UserPreferenceService(supabase_client=db_manager.get_supabase_client())
+        elif service_name == "crew_trading_analysis":
+            if trading_analysis_crew:
+                return lambda: trading_analysis_crew
+        elif service_name == "autogen_trading_system":
+            if autogen_trading_system:
+                return lambda: autogen_trading_system
+        else:
+            raise ValueError(f"Service {service_name} cannot be initialized lazily")
+        return None
+
     async def _initialize_service(self, service_name: str) -> str:
         """Initialize a single service"""
         
-        if service_name == "market_data":
+        if service_name in DEFERRABLE_SERVICES:
+            factory = self._lazy_factory(service_name)
+            if not factory:
+                return "skipped - service not available"
+            registry.register_service(service_name, factory())
+            return "initialized"
+        
+        elif service_name == "market_data":
             if MarketDataService:
                 service = MarketDataService(redis_client=db_manager.get_redis_client())
                 registry.register_service("market_data", service)
@@ -261,14 +442,6 @@ class ServiceInitializer:
             else:
                 return "skipped - service not available"
         
-        elif service_name == "hyperliquid_execution":
-            if HyperliquidExecutionService:
-                service = HyperliquidExecutionService()
-                registry.register_service("hyperliquid_execution", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
         elif service_name == "agent_management":
             if AgentManagementService:
                 service = AgentManagementService(session_factory=db_manager.get_session_factory())
@@ -282,46 +455,6 @@ class ServiceInitializer:
             else:
                 return "skipped - service not available"
         
-        elif service_name == "strategy_config":
-            if StrategyConfigService:
-                service = StrategyConfigService(session_factory=db_manager.get_session_factory())
-                registry.register_service("strategy_config", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "watchlist":
-            if WatchlistService:
-                service = WatchlistService(supabase_client=db_manager.get_supabase_client())
-                registry.register_service("watchlist", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "user_preference":
-            if UserPreferenceService:
-                service = UserPreferenceService(supabase_client=db_manager.get_supabase_client())
-                registry.register_service("user_preference", service)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "crew_trading_analysis":
-            if trading_analysis_crew:
-                # Initialize CrewAI framework
-                registry.register_service("crew_trading_analysis", trading_analysis_crew)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
-        elif service_name == "autogen_trading_system":
-            if autogen_trading_system:
-                # Initialize AutoGen framework
-                registry.register_service("autogen_trading_system", autogen_trading_system)
-                return "initialized"
-            else:
-                return "skipped - service not available"
-        
         elif service_name == "realtime_price_aggregator":
             try:
                 from services.realtime_price_aggregator import create_realtime_price_aggregator
@@ -539,28 +672,7 @@ class ServiceInitializer:
     
     async def get_service_dependencies(self, service_name: str) -> List[str]:
         """Get the dependencies for a service"""
-        dependencies = {
-            "market_data": [],
-            "historical_data": [],
-            "portfolio_tracker": ["market_data"],
-            "trading_engine": ["market_data"],
-            "order_management": [],
-            "risk_management": ["portfolio_tracker"],
-            "ai_prediction": [],
-            "technical_analysis": [],
-            "sentiment_analysis": [],
-            "ml_portfolio_optimizer": [],
-            "execution_specialist": [],
-            "hyperliquid_execution": [],
-            "agent_management": [],
-            "strategy_config": [],
-            "watchlist": [],
-            "user_preference": [],
-            "crew_trading_analysis": [],
-            "autogen_trading_system": []
-        }
-        
-        return dependencies.get(service_name, [])
+        return list(self.service_dependencies.get(service_name, []))
     
     async def health_check_all_services(self) -> Dict[str, Any]:
         """Perform health check on all initialized services"""
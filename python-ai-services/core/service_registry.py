@@ -4,6 +4,7 @@ Centralized service and connection management for the monorepo
 """
 
 import logging
+import time
 from typing import Dict, Any, Optional, Callable
 import asyncio
 from contextlib import asynccontextmanager
@@ -52,9 +53,10 @@ class ServiceRegistry:
         
         # Check if factory exists to create service
         if name in self._factories:
-            logger.info(f"Creating service '{name}' from factory")
+            started = time.perf_counter()
             service = self._factories[name]()
             self._services[name] = service
+            logger.info(f"Created service '{name}' from factory in {(time.perf_counter() - started) * 1000:.1f}ms")
             return service
         
         logger.warning(f"Service '{name}' not found")
@@ -1,106 +1,331 @@
-from collections import defaultdict
-from typing import Dict, List, Optional
+from collections import OrderedDict, defaultdict
+from enum import Enum
+from itertools import count
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
 from fastapi import WebSocket
 from loguru import logger
-import json
-import asyncio # For asyncio.gather in broadcast
+import asyncio
 
 # Adjust path if models are structured differently, e.g. from ..models.websocket_models
 # Assuming 'python_ai_services' is the root package in PYTHONPATH
 from python_ai_services.models.websocket_models import WebSocketEnvelope
 
+
+def symbol_topic(symbol: str) -> str:
+    return f"symbol:{symbol}"
+
+
+def agent_topic(agent_id: str) -> str:
+    return f"agent:{agent_id}"
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full."""
+    DROP_OLDEST = "drop_oldest"   # discard the oldest pending message
+    DROP_NEWEST = "drop_newest"   # discard the incoming message
+    COALESCE = "coalesce"         # newer message with the same key replaces the pending one
+    DISCONNECT = "disconnect"     # close the connection
+
+
+class ClientConnection:
+    """
+    One WebSocket with its own bounded outbound queue and writer task.
+
+    The queue is an OrderedDict so a pending message can be replaced in place
+    (coalescing) and the oldest one dropped in O(1). Messages without a
+    coalesce key get a unique sequence number as their key.
+    """
+
+    _sequence = count()
+
+    def __init__(self, client_id: str, websocket: WebSocket, max_queue_size: int, policy: SlowConsumerPolicy):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.topics: Set[str] = set()
+        self.pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.closed = False
+        self.sending_since: Optional[float] = None  # loop time of the in-flight send, for the send-timeout watchdog
+        self.stats = {'enqueued': 0, 'sent': 0, 'dropped': 0, 'coalesced': 0}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.writer_task: Optional[asyncio.Task] = None
+
+    def enqueue(self, message_json: str, coalesce_key: Optional[Hashable] = None) -> bool:
+        """Queue a pre-serialized message without awaiting the socket. Returns False if it was dropped."""
+        if self.closed:
+            return False
+
+        # Keys only merge messages under the COALESCE policy; every other policy queues each message
+        if self.policy != SlowConsumerPolicy.COALESCE:
+            coalesce_key = None
+        elif coalesce_key is not None and coalesce_key in self.pending:
+            self.pending[coalesce_key] = message_json
+            self.stats['coalesced'] += 1
+            return True
+
+        if len(self.pending) >= self.max_queue_size:
+            if self.policy == SlowConsumerPolicy.DROP_NEWEST:
+                self.stats['dropped'] += 1
+                return False
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                self.close()
+                return False
+            self.pending.popitem(last=False)
+            self.stats['dropped'] += 1
+
+        self.pending[coalesce_key if coalesce_key is not None else next(self._sequence)] = message_json
+        self.stats['enqueued'] += 1
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def close(self):
+        """Stop accepting messages; the writer closes the socket and exits."""
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.clear()
+        self._wakeup.set()
+
+    async def wait_idle(self):
+        await self._idle.wait()
+
+    async def run_writer(self, on_failure):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                if not self.pending:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                _, message_json = self.pending.popitem(last=False)
+                self.sending_since = loop.time()
+                try:
+                    await self.websocket.send_text(message_json)
+                    self.stats['sent'] += 1
+                except Exception as e:
+                    logger.error(f"Error sending WebSocket message to client '{self.client_id}': {e}. Removing connection.")
+                    on_failure(self)
+                    return
+                finally:
+                    self.sending_since = None
+
+            try:
+                await self.websocket.close(code=1013)  # Try again later
+            except Exception:
+                pass
+        finally:
+            self.pending.clear()
+            self._idle.set()
+
+
 class ConnectionManager:
-    def __init__(self):
-        # client_id -> WebSocket connection
-        # Using a simple dict for now, assuming one connection per client_id.
-        # For multiple connections per client_id (e.g., multiple browser tabs from same user),
-        # this could be Dict[str, List[WebSocket]].
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
+    """
+    Fan-out broadcaster for dashboard WebSockets.
+
+    Each connection gets a bounded queue drained by its own writer task, so a
+    broadcast only serializes the envelope once and enqueues it; a slow socket
+    never delays the others. A client_id may hold several connections (browser
+    tabs), and connections can subscribe to topics such as ``symbol:BTC-USD``
+    or ``agent:<agent_id>`` to receive only targeted updates via publish().
+    """
+
+    def __init__(self, max_queue_size: int = 1000,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+                 send_timeout: Optional[float] = 10.0):
+        self.max_queue_size = max_queue_size
+        self.slow_consumer_policy = SlowConsumerPolicy(slow_consumer_policy)
+        self.send_timeout = send_timeout
+        # client_id -> connections for that client (one per socket)
+        self.active_connections: Dict[str, List[ClientConnection]] = {}
+        self.topic_subscribers: Dict[str, Set[ClientConnection]] = defaultdict(set)
+        self.disconnected_slow_consumers = 0
+        self._watchdog_task: Optional[asyncio.Task] = None
+
+    async def connect(self, websocket: WebSocket, client_id: str,
+                      topics: Optional[Iterable[str]] = None) -> ClientConnection:
         await websocket.accept()
-        # If allowing multiple connections per client_id, this logic would append to a list:
-        # if client_id not in self.active_connections:
-        #     self.active_connections[client_id] = []
-        # self.active_connections[client_id].append(websocket)
-        self.active_connections[client_id] = websocket
-        logger.info(f"WebSocket client '{client_id}' connected. Total clients: {len(self.active_connections)}")
-
-    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None): # Added websocket to handle specific instance if multiple per client
-        # If self.active_connections stores a list:
-        # if client_id in self.active_connections:
-        #     if websocket and websocket in self.active_connections[client_id]:
-        #         self.active_connections[client_id].remove(websocket)
-        #         if not self.active_connections[client_id]: # If list is empty
-        #             del self.active_connections[client_id]
-        #         logger.info(f"WebSocket instance for client '{client_id}' disconnected.")
-        #     elif not websocket: # Disconnect all for this client_id if specific websocket not provided
-        #         del self.active_connections[client_id]
-        #         logger.info(f"All WebSocket connections for client '{client_id}' disconnected.")
-        # else: logger.warning(...)
-
-        # Current simple implementation (one connection per client_id):
-        if client_id in self.active_connections:
-            # Optionally, verify if the disconnecting websocket is the one stored, if passed
-            if websocket and self.active_connections[client_id] != websocket:
-                logger.warning(f"Disconnect request for client '{client_id}' but different WebSocket instance provided. Disconnecting stored instance.")
-            del self.active_connections[client_id]
-            logger.info(f"WebSocket client '{client_id}' disconnected. Total clients: {len(self.active_connections)}")
-        else:
+        connection = ClientConnection(client_id, websocket, self.max_queue_size, self.slow_consumer_policy)
+        connection.writer_task = asyncio.create_task(connection.run_writer(self._on_send_failure))
+        if self.send_timeout and (self._watchdog_task is None or self._watchdog_task.done()):
+            self._watchdog_task = asyncio.create_task(self._send_timeout_watchdog())
+        self.active_connections.setdefault(client_id, []).append(connection)
+        if topics:
+            self._subscribe_connection(connection, topics)
+        logger.info(
+            f"WebSocket client '{client_id}' connected ({len(self.active_connections[client_id])} connection(s)). "
+            f"Total clients: {len(self.active_connections)}"
+        )
+        return connection
+
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """Disconnect one socket of a client, or all of its sockets if websocket is not given."""
+        connections = self.active_connections.get(client_id)
+        if not connections:
             logger.warning(f"Attempted to disconnect unknown or already disconnected client_id: {client_id}")
+            return
 
+        targets = [c for c in connections if websocket is None or c.websocket is websocket]
+        if not targets:
+            logger.warning(f"Disconnect request for client '{client_id}' with an unknown WebSocket instance. Ignoring.")
+            return
+        for connection in targets:
+            self._remove_connection(connection)
+        logger.info(f"WebSocket client '{client_id}' disconnected. Total clients: {len(self.active_connections)}")
 
-    async def send_to_client(self, client_id: str, message: WebSocketEnvelope):
-        websocket = self.active_connections.get(client_id)
-        if websocket:
-            try:
-                await websocket.send_text(message.model_dump_json())
-                logger.debug(f"Sent WebSocket message to client '{client_id}': {message.event_type}")
-            except Exception as e:
-                logger.error(f"Error sending WebSocket message to client '{client_id}': {e}. Removing connection.")
-                # Pass the specific websocket instance to disconnect if applicable
-                self.disconnect(client_id, websocket)
+    def _remove_connection(self, connection: ClientConnection, cancel_writer: bool = True):
+        connections = self.active_connections.get(connection.client_id, [])
+        if connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[connection.client_id]
+        for topic in connection.topics:
+            subscribers = self.topic_subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.topic_subscribers[topic]
+        connection.topics.clear()
+        if cancel_writer and connection.writer_task is not None and connection.writer_task is not asyncio.current_task():
+            connection.writer_task.cancel()
+        connection.closed = True
+
+    def _on_send_failure(self, connection: ClientConnection):
+        self._remove_connection(connection)
+
+    async def _send_timeout_watchdog(self):
+        """
+        Drop connections whose current send has been stuck longer than send_timeout.
+        One periodic scan is much cheaper than wrapping every send in wait_for.
+        """
+        loop = asyncio.get_running_loop()
+        while self.active_connections:
+            await asyncio.sleep(min(1.0, self.send_timeout / 2))
+            deadline = loop.time() - self.send_timeout
+            stalled = [
+                c for client_connections in self.active_connections.values() for c in client_connections
+                if c.sending_since is not None and c.sending_since < deadline
+            ]
+            for connection in stalled:
+                logger.warning(f"WebSocket send to client '{connection.client_id}' timed out after {self.send_timeout}s. Removing connection.")
+                self._remove_connection(connection)
+                self.disconnected_slow_consumers += 1
+
+    def subscribe(self, client_id: str, topics: Iterable[str], websocket: Optional[WebSocket] = None) -> bool:
+        """Subscribe a client's connections (or one specific socket) to topics"""
+        topics = list(topics)
+        connections = [
+            c for c in self.active_connections.get(client_id, [])
+            if websocket is None or c.websocket is websocket
+        ]
+        if not connections:
+            return False
+        for connection in connections:
+            self._subscribe_connection(connection, topics)
+        logger.debug(f"WebSocket client '{client_id}' subscribed to: {list(topics)}")
+        return True
+
+    def unsubscribe(self, client_id: str, topics: Iterable[str], websocket: Optional[WebSocket] = None) -> bool:
+        """Unsubscribe a client's connections (or one specific socket) from topics"""
+        topics = list(topics)
+        connections = [
+            c for c in self.active_connections.get(client_id, [])
+            if websocket is None or c.websocket is websocket
+        ]
+        if not connections:
+            return False
+        for connection in connections:
+            for topic in topics:
+                connection.topics.discard(topic)
+                subscribers = self.topic_subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(connection)
+                    if not subscribers:
+                        del self.topic_subscribers[topic]
+        return True
+
+    def _subscribe_connection(self, connection: ClientConnection, topics: Iterable[str]):
+        for topic in topics:
+            connection.topics.add(topic)
+            self.topic_subscribers[topic].add(connection)
+
+    def _enqueue(self, connections: Iterable[ClientConnection], message_json: str,
+                 coalesce_key: Optional[Hashable] = None) -> int:
+        delivered = 0
+        for connection in connections:
+            if connection.enqueue(message_json, coalesce_key):
+                delivered += 1
+            elif connection.closed:
+                # DISCONNECT policy tripped on a full queue; the writer closes the socket
+                self._remove_connection(connection, cancel_writer=False)
+                self.disconnected_slow_consumers += 1
+                logger.warning(f"Disconnected slow WebSocket consumer '{connection.client_id}' (queue full)")
+        return delivered
+
+    async def send_to_client(self, client_id: str, message: WebSocketEnvelope,
+                             coalesce_key: Optional[Hashable] = None):
+        connections = self.active_connections.get(client_id)
+        if connections:
+            self._enqueue(list(connections), message.model_dump_json(), coalesce_key)
+            logger.debug(f"Queued WebSocket message for client '{client_id}': {message.event_type}")
         else:
             logger.debug(f"No active WebSocket connection for client_id '{client_id}'. Message not sent.")
 
-    async def broadcast_to_all(self, message: WebSocketEnvelope):
+    async def broadcast_to_all(self, message: WebSocketEnvelope, coalesce_key: Optional[Hashable] = None):
         if not self.active_connections:
             logger.info("No active WebSocket clients to broadcast to.")
             return
 
-        logger.info(f"Broadcasting WebSocket message to all ({len(self.active_connections)}) clients: {message.event_type}")
         message_json = message.model_dump_json()
+        connections = [c for client_connections in self.active_connections.values() for c in client_connections]
+        delivered = self._enqueue(connections, message_json, coalesce_key)
+        logger.debug(f"Broadcast WebSocket message to {delivered}/{len(connections)} connections: {message.event_type}")
 
-        # Iterate over a copy of items in case disconnect modifies the dict during iteration
-        active_connections_copy = list(self.active_connections.items())
-
-        tasks = []
-        for client_id, websocket in active_connections_copy:
-            # Check if connection still exists, as it might have been removed by a concurrent send_to_client error
-            if client_id in self.active_connections and self.active_connections[client_id] == websocket:
-                tasks.append(self._send_text_to_websocket(websocket, message_json, client_id))
+    async def publish(self, topic: str, message: WebSocketEnvelope, coalesce: bool = True) -> int:
+        """
+        Send to connections subscribed to topic. With coalescing on, a pending
+        message for the same topic and event type is replaced rather than queued
+        behind, so slow consumers only see the latest state.
+        """
+        subscribers = self.topic_subscribers.get(topic)
+        if not subscribers:
+            return 0
+        coalesce_key = (topic, message.event_type) if coalesce else None
+        return self._enqueue(list(subscribers), message.model_dump_json(), coalesce_key)
 
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    # The client_id for this failed task
-                    failed_client_id = active_connections_copy[i][0]
-                    # _send_text_to_websocket already handles disconnect on error,
-                    # but good to log overall broadcast issues here.
-                    logger.warning(f"Broadcast to client '{failed_client_id}' failed with exception: {result}")
+    async def broadcast(self, message: WebSocketEnvelope, topic: Optional[str] = None):
+        """Publish to a topic if given, otherwise broadcast to every connection."""
+        if topic is not None:
+            await self.publish(topic, message)
+        else:
+            await self.broadcast_to_all(message)
 
+    async def drain(self):
+        """Wait until every connection has flushed its queue (tests and graceful shutdown)."""
+        connections = [c for client_connections in self.active_connections.values() for c in client_connections]
+        await asyncio.gather(*(c.wait_idle() for c in connections))
 
-    async def _send_text_to_websocket(self, websocket: WebSocket, message_json: str, client_id: str):
-        """Helper to send text and handle potential disconnection for a single websocket."""
-        try:
-            await websocket.send_text(message_json)
-        except Exception as e:
-            logger.error(f"Error sending during broadcast to client '{client_id}': {e}. Removing connection.")
-            self.disconnect(client_id, websocket)
-            # Optionally, raise the exception if gather should handle it,
-            # or return it to be logged by the gather loop.
-            raise
+    def get_stats(self) -> Dict[str, Any]:
+        connections = [c for client_connections in self.active_connections.values() for c in client_connections]
+        totals = {'enqueued': 0, 'sent': 0, 'dropped': 0, 'coalesced': 0}
+        for connection in connections:
+            for key in totals:
+                totals[key] += connection.stats[key]
+        return {
+            'clients': len(self.active_connections),
+            'connections': len(connections),
+            'topics': len(self.topic_subscribers),
+            'queued_messages': sum(len(c.pending) for c in connections),
+            'max_queue_depth': max((len(c.pending) for c in connections), default=0),
+            'disconnected_slow_consumers': self.disconnected_slow_consumers,
+            'slow_consumer_policy': self.slow_consumer_policy.value,
+            **totals
+        }
 
 # Singleton instance
 connection_manager = ConnectionManager()
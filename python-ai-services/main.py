@@ -294,10 +294,14 @@ async def lifespan(app: FastAPI):
     # Initialize AgentStateManager (refactored)
     try:
         redis_ttl = int(os.getenv("REDIS_REALTIME_STATE_TTL_SECONDS", "3600"))
+        coalescing_interval = float(os.getenv("AGENT_STATE_WRITE_COALESCING_SECONDS", "0"))
         agent_state_manager = AgentStateManager(
             persistence_service=persistence_service,
-            redis_realtime_ttl_seconds=redis_ttl
+            redis_realtime_ttl_seconds=redis_ttl,
+            cache_max_size=int(os.getenv("AGENT_STATE_CACHE_SIZE", "10000")),
+            write_coalescing_interval=coalescing_interval or None
         )
+        await agent_state_manager.start()
         services["agent_state_manager"] = agent_state_manager
         logger.info("Refactored AgentStateManager initialized.")
     except Exception as e:
@@ -355,6 +359,14 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing MemoryService Letta client: {e}")
 
+    # Flush coalesced agent-state writes while the persistence clients are still open
+    if services.get("agent_state_manager"):
+        try:
+            await services["agent_state_manager"].cleanup()
+            logger.info("AgentStateManager flushed pending writes.")
+        except Exception as e:
+            logger.error(f"Error cleaning up AgentStateManager: {e}")
+
     if services.get("agent_persistence_service"):
         try:
             await services["agent_persistence_service"].close_clients()
@@ -366,7 +378,7 @@ async def lifespan(app: FastAPI):
     # Note: TradingCoordinator, MarketAnalyst etc. don't have explicit cleanup in provided code
     for service_name, service_instance in services.items():
         # Avoid double cleanup for services already handled explicitly
-        if service_name not in ["agent_persistence_service", "memory_service"] and hasattr(service_instance, 'cleanup'):
+        if service_name not in ["agent_persistence_service", "memory_service", "agent_state_manager"] and hasattr(service_instance, 'cleanup'):
             try:
                 await service_instance.cleanup()
                 logger.info(f"Service '{service_name}' cleaned up.")
@@ -18,6 +18,12 @@ from pydantic import BaseModel, Field
 import websockets
 from dataclasses import dataclass, asdict
 
+# Import the shared quote coalescer
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.quote_coalescer import QuoteCoalescer
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -95,6 +101,8 @@ class MarketDataService:
         self.session: Optional[aiohttp.ClientSession] = None
         self.websocket_connections = set()
         self.real_time_data = {}
+        # Quote requests from concurrent clients are batched into one latest-quotes call
+        self.quote_coalescer = QuoteCoalescer("alpaca", self._fetch_latest_quotes)
         
     async def initialize(self):
         """Initialize the market data service"""
@@ -118,6 +126,11 @@ class MarketDataService:
         if not self.session:
             raise HTTPException(status_code=500, detail="Service not initialized")
 
+        quotes = await self.quote_coalescer.get_many(symbols)
+        return {symbol: quote for symbol, quote in quotes.items() if quote is not None}
+
+    async def _fetch_latest_quotes(self, symbols: List[str]) -> Dict[str, MarketQuote]:
+        """Fetch latest quotes for a batch of symbols in one request"""
         try:
             symbol_list = ','.join(symbols)
             url = f"{ALPACA_DATA_URL}/v2/stocks/quotes/latest"
@@ -10,7 +10,7 @@ import logging
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterable
 from dataclasses import dataclass, asdict
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,6 +18,8 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import math
+import time
+from bisect import bisect_left
 from enum import Enum
 from collections import deque, defaultdict
 import heapq
@@ -195,6 +197,402 @@ class MarketRegimeAnalysis:
     regime_transitions: List[Dict[str, Any]]  # Recent transitions
     stability_score: float
 
+class BookSide:
+    """
+    One side of an L2 book as parallel sorted arrays.
+
+    Levels are ordered so the best price is always at the end of the arrays
+    (bids ascending by price, asks ascending by negated price). Most updates
+    hit the top of the book, so inserts and deletes there only move a few
+    tail elements.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.keys: List[float] = []  # price for bids, -price for asks
+        self.sizes: List[float] = []
+        self.orders: List[int] = []
+        self.total_size = 0.0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def set_level(self, price: float, size: float, orders: int = 1):
+        """Apply one L2 delta; size <= 0 removes the level."""
+        key = price if self.is_bid else -price
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size > 0:
+                self.total_size += size - self.sizes[i]
+                self.sizes[i] = size
+                self.orders[i] = orders
+            else:
+                self.total_size -= self.sizes[i]
+                del keys[i], self.sizes[i], self.orders[i]
+        elif size > 0:
+            keys.insert(i, key)
+            self.sizes.insert(i, size)
+            self.orders.insert(i, orders)
+            self.total_size += size
+
+    def load(self, levels: List[Tuple[float, float, int]]):
+        """Replace the side with a full snapshot."""
+        merged = {}
+        for price, size, orders in levels:
+            if size > 0:
+                merged[price if self.is_bid else -price] = (size, orders)
+        self.keys = sorted(merged)
+        self.sizes = [merged[key][0] for key in self.keys]
+        self.orders = [merged[key][1] for key in self.keys]
+        self.total_size = math.fsum(self.sizes)
+
+    def best_price(self) -> Optional[float]:
+        if not self.keys:
+            return None
+        return self.keys[-1] if self.is_bid else -self.keys[-1]
+
+    def best_size(self) -> float:
+        return self.sizes[-1] if self.sizes else 0.0
+
+    def top_size(self, levels: int) -> float:
+        return sum(self.sizes[-levels:])
+
+    def size_within(self, limit_price: float) -> float:
+        """Cumulative size of levels at or better than limit_price, walking down from the top."""
+        limit_key = limit_price if self.is_bid else -limit_price
+        start = bisect_left(self.keys, limit_key)
+        return sum(self.sizes[start:])
+
+    def levels(self, timestamp: str, max_levels: Optional[int] = None) -> List[OrderBookLevel]:
+        """Materialize OrderBookLevel objects, best first."""
+        count = len(self.keys) if max_levels is None else min(max_levels, len(self.keys))
+        sign = 1 if self.is_bid else -1
+        return [
+            OrderBookLevel(price=sign * self.keys[i], size=self.sizes[i], orders=self.orders[i], timestamp=timestamp)
+            for i in range(len(self.keys) - 1, len(self.keys) - 1 - count, -1)
+        ]
+
+
+class L2OrderBook:
+    """
+    Incrementally maintained L2 order book for one symbol.
+
+    Top-of-book, spread, imbalance and per-side totals are O(1) reads after
+    each delta. Band depths, signals and OrderBookLevel lists are derived on
+    first read and cached until the next update, so a burst of deltas does
+    not pay for analytics nobody asked for. Exposes the same attributes as the
+    OrderBook dataclass; use to_order_book() for a serializable copy.
+    """
+
+    DEPTH_BANDS_BPS = (5, 10, 25, 50)
+    DEFAULT_SPREAD = 0.01
+
+    def __init__(self, symbol: str, reference_price: float = 100.0, timestamp: Optional[str] = None):
+        self.symbol = symbol
+        self.bid_side = BookSide(is_bid=True)
+        self.ask_side = BookSide(is_bid=False)
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.reference_price = reference_price  # mid fallback while a side is empty
+        self.version = 0
+        self._derived_version = -1
+        self._derived: Dict[str, Any] = {}
+
+    def apply_delta(self, bids: Iterable[Tuple[float, float, int]] = (),
+                    asks: Iterable[Tuple[float, float, int]] = (), timestamp: Optional[str] = None):
+        for price, size, orders in bids:
+            self.bid_side.set_level(price, size, orders)
+        for price, size, orders in asks:
+            self.ask_side.set_level(price, size, orders)
+        if timestamp is not None:
+            self.timestamp = timestamp
+        self.version += 1
+
+    def load_snapshot(self, bids: List[Tuple[float, float, int]], asks: List[Tuple[float, float, int]],
+                      timestamp: Optional[str] = None):
+        self.bid_side.load(bids)
+        self.ask_side.load(asks)
+        if timestamp is not None:
+            self.timestamp = timestamp
+        self.version += 1
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bid_side.best_price()
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.ask_side.best_price()
+
+    @property
+    def mid_price(self) -> float:
+        if self.bid_side.keys and self.ask_side.keys:
+            return (self.bid_side.keys[-1] - self.ask_side.keys[-1]) / 2
+        return self.reference_price
+
+    @mid_price.setter
+    def mid_price(self, price: float):
+        # Last trade price; used as the mid while the book has an empty side
+        self.reference_price = price
+
+    @property
+    def spread(self) -> float:
+        if self.bid_side.keys and self.ask_side.keys:
+            return -self.ask_side.keys[-1] - self.bid_side.keys[-1]
+        return self.DEFAULT_SPREAD
+
+    @property
+    def imbalance(self) -> float:
+        """Size imbalance at the best levels, in [-1, 1]"""
+        if not self.bid_side.keys or not self.ask_side.keys:
+            return 0.0
+        best_bid_size = self.bid_side.sizes[-1]
+        best_ask_size = self.ask_side.sizes[-1]
+        total_size = best_bid_size + best_ask_size
+        return (best_bid_size - best_ask_size) / total_size if total_size else 0.0
+
+    def _cached(self, name: str, compute):
+        if self._derived_version != self.version:
+            self._derived = {}
+            self._derived_version = self.version
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    @property
+    def depth(self) -> Dict[str, float]:
+        return self._cached("depth", self._compute_depth)
+
+    def _compute_depth(self) -> Dict[str, float]:
+        mid_price = self.mid_price
+        depth = {"bbo": self.bid_side.best_size() + self.ask_side.best_size()}
+        for bps in self.DEPTH_BANDS_BPS:
+            price_range = mid_price * (bps / 10000)
+            depth[f"{bps}bps"] = (self.bid_side.size_within(mid_price - price_range) +
+                                  self.ask_side.size_within(mid_price + price_range))
+        return depth
+
+    @property
+    def microstructure_signals(self) -> Dict[str, float]:
+        return self._cached("signals", self._compute_signals)
+
+    def _compute_signals(self) -> Dict[str, float]:
+        signals = {"order_imbalance": self.imbalance}
+
+        # Spread signal (tight spread = good liquidity)
+        if self.bid_side.keys and self.ask_side.keys:
+            relative_spread = self.spread / self.mid_price
+            signals["liquidity_signal"] = max(-1, min(1, 1 - relative_spread * 1000))
+
+        # Order book depth signal
+        bid_top = self.bid_side.top_size(5)
+        ask_top = self.ask_side.top_size(5)
+        signals["depth_signal"] = min(1.0, (bid_top + ask_top) / 10000)  # Normalize
+
+        # Price level concentration
+        if len(self.bid_side) > 1 and len(self.ask_side) > 1:
+            bid_concentration = self.bid_side.best_size() / bid_top
+            ask_concentration = self.ask_side.best_size() / ask_top
+            signals["concentration_signal"] = (bid_concentration + ask_concentration) / 2
+
+        return signals
+
+    @property
+    def bids(self) -> List[OrderBookLevel]:
+        return self._cached("bids", lambda: self.bid_side.levels(self.timestamp))
+
+    @property
+    def asks(self) -> List[OrderBookLevel]:
+        return self._cached("asks", lambda: self.ask_side.levels(self.timestamp))
+
+    def to_order_book(self, max_levels: Optional[int] = None) -> OrderBook:
+        return OrderBook(
+            symbol=self.symbol,
+            timestamp=self.timestamp,
+            bids=self.bid_side.levels(self.timestamp, max_levels),
+            asks=self.ask_side.levels(self.timestamp, max_levels),
+            mid_price=self.mid_price,
+            spread=self.spread,
+            depth=dict(self.depth),
+            imbalance=self.imbalance,
+            microstructure_signals=dict(self.microstructure_signals)
+        )
+
+
+class BookSnapshotRing:
+    """Fixed-size ring of top-of-book summaries, stored as one float array."""
+
+    FIELDS = ("epoch", "mid_price", "spread", "best_bid", "best_ask", "bid_size", "ask_size", "imbalance", "bbo_depth")
+    _COLUMN = {name: i for i, name in enumerate(FIELDS)}
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._rows = np.zeros((capacity, len(self.FIELDS)))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, book: L2OrderBook, epoch: Optional[float] = None):
+        bid_size = book.bid_side.best_size()
+        ask_size = book.ask_side.best_size()
+        self._rows[self._next] = (
+            time.time() if epoch is None else epoch,
+            book.mid_price,
+            book.spread,
+            book.best_bid or 0.0,
+            book.best_ask or 0.0,
+            bid_size,
+            ask_size,
+            book.imbalance,
+            bid_size + ask_size
+        )
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """Last n rows (all by default) in chronological order, as a copy."""
+        n = self._count if n is None else min(n, self._count)
+        indices = (self._next - n + np.arange(n)) % self.capacity
+        return self._rows[indices]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        return self.latest(n)[:, self._COLUMN[name]]
+
+TRADE_WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+
+
+def parse_epoch(timestamp: str) -> float:
+    """ISO-8601 timestamp to epoch seconds; naive values are local time, as datetime.now() produces."""
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+
+class TradeRing:
+    """Columnar ring of recent trades with rolling per-window aggregates.
+
+    Epochs are kept non-decreasing (a late trade takes the newest epoch seen), so a
+    window start is a binary search. Each window in TRADE_WINDOWS keeps running sums
+    that are adjusted as trades arrive and age out, so volume/VWAP/count queries are
+    O(1); the sums are rebuilt from the columns every RESYNC_INTERVAL trades to shed
+    floating point drift.
+    """
+
+    FIELDS = ("epoch", "price", "size", "side", "market_impact", "vwap_deviation")
+    AGGREGATES = ("count", "buy_count", "buy_volume", "sell_volume", "notional",
+                  "impact", "impact_sq", "abs_impact", "abs_deviation")
+    _COLUMN = {name: i for i, name in enumerate(FIELDS)}
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, capacity: int = 10000, windows: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.windows = dict(TRADE_WINDOWS if windows is None else windows)
+        self._values = np.zeros((capacity, len(self.FIELDS)))
+        self._contributions = np.zeros((capacity, len(self.AGGREGATES)))
+        self._records: List[Optional[Trade]] = [None] * capacity
+        self._head = 0  # Sequence number of the next trade
+        self._tails = {label: 0 for label in self.windows}  # First sequence inside each window
+        self._sums = {label: np.zeros(len(self.AGGREGATES)) for label in self.windows}
+        self.last_epoch = 0.0
+
+    def __len__(self) -> int:
+        return min(self._head, self.capacity)
+
+    def append(self, trade: Trade, epoch: Optional[float] = None):
+        epoch = max(parse_epoch(trade.timestamp) if epoch is None else epoch, self.last_epoch)
+        self.last_epoch = epoch
+
+        sequence = self._head
+        slot = sequence % self.capacity
+        if sequence >= self.capacity:
+            # The slot is about to be reused, so windows still counting its trade drop it first
+            evicted = sequence - self.capacity
+            for label, tail in self._tails.items():
+                if tail <= evicted:
+                    self._sums[label] -= self._contributions[slot]
+                    self._tails[label] = evicted + 1
+
+        is_buy = trade.side == OrderSide.BUY
+        size = trade.size
+        impact = trade.market_impact
+        self._values[slot] = (epoch, trade.price, size, 1.0 if is_buy else -1.0, impact, trade.vwap_deviation)
+        contribution = self._contributions[slot]
+        contribution[:] = (
+            1.0,
+            1.0 if is_buy else 0.0,
+            size if is_buy else 0.0,
+            0.0 if is_buy else size,
+            trade.price * size,
+            impact,
+            impact * impact,
+            abs(impact),
+            abs(trade.vwap_deviation)
+        )
+        self._records[slot] = trade
+        self._head = sequence + 1
+
+        for sums in self._sums.values():
+            sums += contribution
+        if self._head % self.RESYNC_INTERVAL == 0:
+            for label in self.windows:
+                self._sums[label] = self._range_sum(self._tails[label], self._head)
+
+    def window_totals(self, label: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Running aggregates for one of the configured windows, ending at now."""
+        self._expire(label, time.time() if now is None else now)
+        return dict(zip(self.AGGREGATES, self._sums[label].tolist()))
+
+    def window_column(self, name: str, label: str, now: Optional[float] = None) -> np.ndarray:
+        self._expire(label, time.time() if now is None else now)
+        return self._rows(self._values, self._tails[label], self._head)[:, self._COLUMN[name]]
+
+    def since(self, epoch: float) -> int:
+        """Number of retained trades stamped at or after epoch."""
+        return self._head - self._search(epoch, max(0, self._head - self.capacity))
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Last n values (all by default) of a field in chronological order."""
+        n = len(self) if n is None else min(n, len(self))
+        return self._rows(self._values, self._head - n, self._head)[:, self._COLUMN[name]]
+
+    def latest_trades(self, n: Optional[int] = None) -> List[Trade]:
+        n = len(self) if n is None else max(0, min(n, len(self)))
+        return [self._records[sequence % self.capacity] for sequence in range(self._head - n, self._head)]
+
+    def _expire(self, label: str, now: float):
+        tail = self._tails[label]
+        start = self._search(now - self.windows[label], tail)
+        if start > tail:
+            self._sums[label] -= self._range_sum(tail, start)
+            self._tails[label] = start
+
+    def _search(self, cutoff: float, low: int) -> int:
+        """First sequence in [low, head) whose epoch is >= cutoff."""
+        high = self._head
+        epochs = self._values[:, 0]
+        while low < high:
+            middle = (low + high) // 2
+            if epochs[middle % self.capacity] < cutoff:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _rows(self, array: np.ndarray, start: int, end: int) -> np.ndarray:
+        if start >= end:
+            return array[:0]
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return array[first:last]
+        return np.concatenate((array[first:], array[:last - self.capacity]))
+
+    def _range_sum(self, start: int, end: int) -> np.ndarray:
+        return self._rows(self._contributions, start, end).sum(axis=0)
+
 class MarketDataFeed(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     price: float = Field(..., description="Current price")
@@ -207,6 +605,7 @@ class OrderBookUpdate(BaseModel):
     bids: List[Dict[str, float]] = Field(..., description="Bid levels [price, size, orders]")
     asks: List[Dict[str, float]] = Field(..., description="Ask levels [price, size, orders]")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    is_delta: bool = Field(default=False, description="Apply levels as incremental changes (size 0 removes a level) instead of replacing the book")
 
 class ImpactAnalysisRequest(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
@@ -227,10 +626,11 @@ class MarketMicrostructure:
         self.active_websockets = []
         
         # Real-time data structures
-        self.trade_streams = defaultdict(lambda: deque(maxlen=10000))
-        self.order_book_snapshots = defaultdict(lambda: deque(maxlen=1000))
+        self.trade_streams = defaultdict(lambda: TradeRing(capacity=10000))
+        self.order_book_snapshots = defaultdict(lambda: BookSnapshotRing(capacity=1000))
         self.volume_profiles = defaultdict(lambda: defaultdict(float))
         self.tick_data = defaultdict(lambda: deque(maxlen=50000))
+        self.broadcast_book_levels = 20
         
         # Market making and liquidity provision tracking
         self.liquidity_providers = defaultdict(dict)
@@ -240,32 +640,29 @@ class MarketMicrostructure:
         self._initialize_sample_symbols()
         self._initialize_impact_models()
         
-        # Background processing
+        # Background processing, started from the app startup hook
         self.processing_active = True
-        asyncio.create_task(self._process_microstructure_signals())
-        asyncio.create_task(self._analyze_market_regimes())
-        asyncio.create_task(self._calculate_liquidity_metrics())
-        asyncio.create_task(self._generate_sample_data())
+        self.background_tasks = []
         
         logger.info("Market Microstructure Analysis system initialized")
     
+    def start_background_tasks(self):
+        """Start the signal, regime, liquidity and sample data loops; needs a running event loop"""
+        if not self.background_tasks:
+            self.background_tasks = [
+                asyncio.create_task(self._process_microstructure_signals()),
+                asyncio.create_task(self._analyze_market_regimes()),
+                asyncio.create_task(self._calculate_liquidity_metrics()),
+                asyncio.create_task(self._generate_sample_data())
+            ]
+    
     def _initialize_sample_symbols(self):
         """Initialize tracking for sample symbols"""
         symbols = ["AAPL", "GOOGL", "MSFT", "TSLA", "AMZN", "NVDA", "SPY", "QQQ"]
         
         for symbol in symbols:
-            # Initialize with basic order book
-            self.order_books[symbol] = OrderBook(
-                symbol=symbol,
-                timestamp=datetime.now().isoformat(),
-                bids=[],
-                asks=[],
-                mid_price=np.random.uniform(100, 500),
-                spread=0.01,
-                depth={},
-                imbalance=0.0,
-                microstructure_signals={}
-            )
+            # Initialize with an empty book around a reference price
+            self.order_books[symbol] = L2OrderBook(symbol, reference_price=np.random.uniform(100, 500))
             
             # Initialize regime analysis
             self.regime_analysis[symbol] = MarketRegimeAnalysis(
@@ -364,140 +761,33 @@ class MarketMicrostructure:
         
         return trade
     
-    async def update_order_book(self, update: OrderBookUpdate) -> OrderBook:
-        """Update order book with new levels"""
-        symbol = update.symbol
-        
-        # Create order book levels
-        bids = []
-        for bid_data in update.bids:
-            level = OrderBookLevel(
-                price=bid_data["price"],
-                size=bid_data["size"],
-                orders=int(bid_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            bids.append(level)
-        
-        asks = []
-        for ask_data in update.asks:
-            level = OrderBookLevel(
-                price=ask_data["price"],
-                size=ask_data["size"],
-                orders=int(ask_data.get("orders", 1)),
-                timestamp=update.timestamp
-            )
-            asks.append(level)
-        
-        # Sort levels
-        bids.sort(key=lambda x: x.price, reverse=True)  # Highest first
-        asks.sort(key=lambda x: x.price)  # Lowest first
-        
-        # Calculate mid price and spread
-        if bids and asks:
-            best_bid = bids[0].price
-            best_ask = asks[0].price
-            mid_price = (best_bid + best_ask) / 2
-            spread = best_ask - best_bid
-        else:
-            mid_price = self.order_books.get(symbol, {}).get("mid_price", 100.0)
-            spread = 0.01
-        
-        # Calculate depth at various levels
-        depth = await self._calculate_order_book_depth(bids, asks, mid_price)
-        
-        # Calculate order imbalance
-        imbalance = await self._calculate_order_imbalance(bids, asks)
-        
-        # Generate microstructure signals
-        microstructure_signals = await self._generate_microstructure_signals(symbol, bids, asks, imbalance)
-        
-        # Create updated order book
-        order_book = OrderBook(
-            symbol=symbol,
-            timestamp=update.timestamp,
-            bids=bids,
-            asks=asks,
-            mid_price=mid_price,
-            spread=spread,
-            depth=depth,
-            imbalance=imbalance,
-            microstructure_signals=microstructure_signals
-        )
+    async def update_order_book(self, update: OrderBookUpdate) -> L2OrderBook:
+        """Apply an order book snapshot or incremental update"""
+        bids = [(level["price"], level["size"], int(level.get("orders", 1))) for level in update.bids]
+        asks = [(level["price"], level["size"], int(level.get("orders", 1))) for level in update.asks]
         
-        # Store order book
-        self.order_books[symbol] = order_book
-        self.order_book_snapshots[symbol].append(order_book)
+        order_book = self.apply_book_update(update.symbol, bids, asks, update.timestamp, is_delta=update.is_delta)
         
         # Broadcast update
         await self._broadcast_order_book(order_book)
         
         return order_book
     
-    async def _calculate_order_book_depth(self, bids: List[OrderBookLevel], 
-                                        asks: List[OrderBookLevel], mid_price: float) -> Dict[str, float]:
-        """Calculate order book depth at various price levels"""
-        depth = {}
-        
-        # Depth at best bid/offer
-        depth["bbo"] = (bids[0].size if bids else 0) + (asks[0].size if asks else 0)
-        
-        # Depth within basis points
-        for bps in [5, 10, 25, 50]:
-            price_range = mid_price * (bps / 10000)
-            
-            bid_depth = sum(level.size for level in bids 
-                           if level.price >= mid_price - price_range)
-            ask_depth = sum(level.size for level in asks 
-                           if level.price <= mid_price + price_range)
-            
-            depth[f"{bps}bps"] = bid_depth + ask_depth
-        
-        return depth
-    
-    async def _calculate_order_imbalance(self, bids: List[OrderBookLevel], 
-                                       asks: List[OrderBookLevel]) -> float:
-        """Calculate order book imbalance"""
-        if not bids or not asks:
-            return 0.0
-        
-        # Volume imbalance at best levels
-        best_bid_size = bids[0].size
-        best_ask_size = asks[0].size
-        
-        total_size = best_bid_size + best_ask_size
-        if total_size == 0:
-            return 0.0
-        
-        imbalance = (best_bid_size - best_ask_size) / total_size
-        return imbalance
-    
-    async def _generate_microstructure_signals(self, symbol: str, bids: List[OrderBookLevel],
-                                             asks: List[OrderBookLevel], imbalance: float) -> Dict[str, float]:
-        """Generate microstructure trading signals"""
-        signals = {}
-        
-        # Order imbalance signal
-        signals["order_imbalance"] = imbalance
-        
-        # Spread signal (tight spread = good liquidity)
-        if bids and asks:
-            spread = asks[0].price - bids[0].price
-            mid_price = (bids[0].price + asks[0].price) / 2
-            relative_spread = spread / mid_price
-            signals["liquidity_signal"] = max(-1, min(1, 1 - relative_spread * 1000))
-        
-        # Order book depth signal
-        total_depth = sum(level.size for level in bids[:5]) + sum(level.size for level in asks[:5])
-        signals["depth_signal"] = min(1.0, total_depth / 10000)  # Normalize
+    def apply_book_update(self, symbol: str, bids: List[Tuple[float, float, int]],
+                          asks: List[Tuple[float, float, int]], timestamp: Optional[str] = None,
+                          is_delta: bool = True) -> L2OrderBook:
+        """Apply (price, size, orders) levels to the symbol's book and record a compact snapshot"""
+        order_book = self.order_books.get(symbol)
+        if order_book is None:
+            order_book = self.order_books[symbol] = L2OrderBook(symbol)
         
-        # Price level concentration
-        if len(bids) > 1 and len(asks) > 1:
-            bid_concentration = bids[0].size / sum(level.size for level in bids[:5])
-            ask_concentration = asks[0].size / sum(level.size for level in asks[:5])
-            signals["concentration_signal"] = (bid_concentration + ask_concentration) / 2
+        if is_delta:
+            order_book.apply_delta(bids, asks, timestamp)
+        else:
+            order_book.load_snapshot(bids, asks, timestamp)
         
-        return signals
+        self.order_book_snapshots[symbol].record(order_book)
+        return order_book
     
     async def _calculate_immediate_impact(self, symbol: str, size: float, 
                                         side: OrderSide, price: float) -> float:
@@ -517,26 +807,13 @@ class MarketMicrostructure:
     
     async def calculate_order_flow_metrics(self, symbol: str, timeframe: str = "5m") -> OrderFlowMetrics:
         """Calculate order flow metrics for specified timeframe"""
-        # Parse timeframe
-        if timeframe == "1m":
-            minutes = 1
-        elif timeframe == "5m":
-            minutes = 5
-        elif timeframe == "15m":
-            minutes = 15
-        elif timeframe == "1h":
-            minutes = 60
-        else:
-            minutes = 5
-        
-        # Get trades in timeframe
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        recent_trades = [
-            trade for trade in self.trade_streams[symbol]
-            if datetime.fromisoformat(trade.timestamp.replace('Z', '+00:00').replace('+00:00', '')) >= cutoff_time
-        ]
+        window = timeframe if timeframe in TRADE_WINDOWS else "5m"
+        trades = self.trade_streams[symbol]
+        now = time.time()
+        totals = trades.window_totals(window, now)
+        trade_count = int(totals["count"])
         
-        if not recent_trades:
+        if not trade_count:
             # Return empty metrics
             return OrderFlowMetrics(
                 symbol=symbol,
@@ -549,40 +826,40 @@ class MarketMicrostructure:
                 market_impact_metrics={}, flow_toxicity=0, pin_risk=0
             )
         
-        # Calculate metrics
-        total_volume = sum(trade.size for trade in recent_trades)
-        buy_volume = sum(trade.size for trade in recent_trades if trade.side == OrderSide.BUY)
-        sell_volume = sum(trade.size for trade in recent_trades if trade.side == OrderSide.SELL)
+        # Calculate metrics from the rolling window sums
+        buy_volume = totals["buy_volume"]
+        sell_volume = totals["sell_volume"]
+        total_volume = buy_volume + sell_volume
         
         order_imbalance = (buy_volume - sell_volume) / total_volume if total_volume > 0 else 0
-        trade_count = len(recent_trades)
-        avg_trade_size = total_volume / trade_count if trade_count > 0 else 0
+        avg_trade_size = total_volume / trade_count
         
         # Volume weighted average price
-        total_value = sum(trade.price * trade.size for trade in recent_trades)
-        vwap = total_value / total_volume if total_volume > 0 else 0
+        vwap = totals["notional"] / total_volume if total_volume > 0 else 0
         
         # Price improvement (simplified)
-        price_improvement = np.mean([abs(trade.vwap_deviation) for trade in recent_trades])
+        price_improvement = totals["abs_deviation"] / trade_count
         
         # Effective spread
-        effective_spread = np.mean([abs(trade.market_impact) for trade in recent_trades]) * 2
+        effective_spread = totals["abs_impact"] / trade_count * 2
         
         # Realized spread (simplified - would need future price data)
         realized_spread = effective_spread * 0.7  # Estimate
         
         # Market impact metrics
+        avg_impact = totals["impact"] / trade_count
+        impacts = trades.window_column("market_impact", window, now)
         market_impact_metrics = {
-            "avg_impact": np.mean([trade.market_impact for trade in recent_trades]),
-            "impact_volatility": np.std([trade.market_impact for trade in recent_trades]),
-            "max_impact": max([abs(trade.market_impact) for trade in recent_trades]) if recent_trades else 0
+            "avg_impact": avg_impact,
+            "impact_volatility": math.sqrt(max(0.0, totals["impact_sq"] / trade_count - avg_impact ** 2)),
+            "max_impact": float(np.abs(impacts).max())
         }
         
         # Flow toxicity (adverse selection measure)
-        flow_toxicity = await self._calculate_flow_toxicity(recent_trades)
+        flow_toxicity = await self._calculate_flow_toxicity(impacts)
         
         # PIN risk (probability of informed trading)
-        pin_risk = await self._calculate_pin_risk(symbol, recent_trades)
+        pin_risk = await self._calculate_pin_risk(symbol, trade_count, int(totals["buy_count"]))
         
         metrics = OrderFlowMetrics(
             symbol=symbol,
@@ -609,35 +886,28 @@ class MarketMicrostructure:
         
         return metrics
     
-    async def _calculate_flow_toxicity(self, trades: List[Trade]) -> float:
+    async def _calculate_flow_toxicity(self, impacts: np.ndarray) -> float:
         """Calculate flow toxicity (adverse selection measure)"""
-        if len(trades) < 2:
+        if len(impacts) < 2:
             return 0.0
         
         # Simplified toxicity measure based on price impact persistence
-        impacts = [trade.market_impact for trade in trades]
-        
         # Calculate autocorrelation of impacts
         if len(impacts) > 5:
-            impacts_array = np.array(impacts)
-            correlation = np.corrcoef(impacts_array[:-1], impacts_array[1:])[0, 1]
+            correlation = np.corrcoef(impacts[:-1], impacts[1:])[0, 1]
             toxicity = max(0, correlation)  # Positive correlation indicates toxicity
         else:
             toxicity = 0.0
         
         return toxicity
     
-    async def _calculate_pin_risk(self, symbol: str, trades: List[Trade]) -> float:
+    async def _calculate_pin_risk(self, symbol: str, trade_count: int, buy_count: int) -> float:
         """Calculate PIN (Probability of Informed Trading) risk"""
-        if len(trades) < 10:
+        if trade_count < 10:
             return 0.0
         
         # Simplified PIN calculation
-        buy_trades = [t for t in trades if t.side == OrderSide.BUY]
-        sell_trades = [t for t in trades if t.side == OrderSide.SELL]
-        
-        buy_count = len(buy_trades)
-        sell_count = len(sell_trades)
+        sell_count = trade_count - buy_count
         total_count = buy_count + sell_count
         
         if total_count == 0:
@@ -658,9 +928,9 @@ class MarketMicrostructure:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
         # Bid-ask spreads
-        if order_book.bids and order_book.asks:
-            best_bid = order_book.bids[0].price
-            best_ask = order_book.asks[0].price
+        if order_book.best_bid is not None and order_book.best_ask is not None:
+            best_bid = order_book.best_bid
+            best_ask = order_book.best_ask
             mid_price = order_book.mid_price
             
             bid_ask_spread = best_ask - best_bid
@@ -670,9 +940,9 @@ class MarketMicrostructure:
             mid_price = order_book.mid_price
         
         # Effective spread (from recent trades)
-        recent_trades = list(self.trade_streams[symbol])[-100:]  # Last 100 trades
-        if recent_trades:
-            effective_spread = np.mean([abs(trade.market_impact) for trade in recent_trades]) * 2
+        recent_impacts = np.abs(self.trade_streams[symbol].column("market_impact", 100))  # Last 100 trades
+        if recent_impacts.size:
+            effective_spread = recent_impacts.mean() * 2
         else:
             effective_spread = quoted_spread
         
@@ -685,9 +955,9 @@ class MarketMicrostructure:
         market_depth_ratio = depth_at_5bps / depth_at_bbo if depth_at_bbo > 0 else 1.0
         
         # Price impact per dollar
-        if recent_trades and depth_at_bbo > 0:
-            avg_trade_size = np.mean([trade.size for trade in recent_trades])
-            avg_impact = np.mean([abs(trade.market_impact) for trade in recent_trades])
+        if recent_impacts.size and depth_at_bbo > 0:
+            avg_trade_size = self.trade_streams[symbol].column("size", 100).mean()
+            avg_impact = recent_impacts.mean()
             price_impact_per_dollar = avg_impact / avg_trade_size if avg_trade_size > 0 else 0
         else:
             price_impact_per_dollar = 0.001
@@ -733,17 +1003,17 @@ class MarketMicrostructure:
     async def _calculate_resilience(self, symbol: str) -> float:
         """Calculate order book resilience (recovery speed after trades)"""
         # Simplified resilience calculation
-        recent_snapshots = list(self.order_book_snapshots[symbol])[-10:]
+        snapshots = self.order_book_snapshots[symbol]
         
-        if len(recent_snapshots) < 2:
+        if len(snapshots) < 2:
             return 0.5  # Default moderate resilience
         
         # Calculate spread stability
-        spreads = [snapshot.spread for snapshot in recent_snapshots]
+        spreads = snapshots.column("spread", 10)
         spread_stability = 1 - (np.std(spreads) / np.mean(spreads)) if np.mean(spreads) > 0 else 0
         
         # Calculate depth stability
-        depths = [snapshot.depth.get("bbo", 0) for snapshot in recent_snapshots]
+        depths = snapshots.column("bbo_depth", 10)
         depth_stability = 1 - (np.std(depths) / np.mean(depths)) if np.mean(depths) > 0 else 0
         
         resilience = (spread_stability + depth_stability) / 2
@@ -751,14 +1021,14 @@ class MarketMicrostructure:
     
     async def _calculate_amihud_illiquidity(self, symbol: str) -> float:
         """Calculate Amihud illiquidity measure"""
-        recent_trades = list(self.trade_streams[symbol])[-100:]
+        trades = self.trade_streams[symbol]
         
-        if len(recent_trades) < 10:
+        if len(trades) < 10:
             return 0.001  # Default low illiquidity
         
-        # Group trades by day (simplified - use all recent trades)
-        total_volume = sum(trade.size * trade.price for trade in recent_trades)
-        total_price_impact = sum(abs(trade.market_impact) for trade in recent_trades)
+        # Group trades by day (simplified - use the last 100 trades)
+        total_volume = float(np.dot(trades.column("size", 100), trades.column("price", 100)))
+        total_price_impact = float(np.abs(trades.column("market_impact", 100)).sum())
         
         if total_volume > 0:
             amihud = total_price_impact / total_volume * 1000000  # Scale factor
@@ -769,21 +1039,14 @@ class MarketMicrostructure:
     
     async def _calculate_kyle_lambda(self, symbol: str) -> float:
         """Calculate Kyle's lambda (adverse selection component)"""
-        recent_trades = list(self.trade_streams[symbol])[-50:]
+        trades = self.trade_streams[symbol]
         
-        if len(recent_trades) < 10:
+        if len(trades) < 10:
             return 0.1  # Default moderate adverse selection
         
         # Simplified Kyle's lambda: price impact vs order flow
-        price_changes = []
-        order_flows = []
-        
-        for i in range(1, len(recent_trades)):
-            price_change = recent_trades[i].price - recent_trades[i-1].price
-            order_flow = recent_trades[i].size * (1 if recent_trades[i].side == OrderSide.BUY else -1)
-            
-            price_changes.append(price_change)
-            order_flows.append(order_flow)
+        price_changes = np.diff(trades.column("price", 50))
+        order_flows = (trades.column("size", 50) * trades.column("side", 50))[1:]
         
         if len(price_changes) > 5 and np.std(order_flows) > 0:
             # Simple regression slope
@@ -874,13 +1137,13 @@ class MarketMicrostructure:
         
         return impact
     
-    async def _linear_impact_model(self, order_size: float, order_book: OrderBook,
+    async def _linear_impact_model(self, order_size: float, order_book: L2OrderBook,
                                  participation_rate: float, params: Dict[str, Any]) -> float:
         """Linear market impact model"""
         alpha = params.get("alpha", 0.1)
         
         # Get market data
-        recent_volume = sum(trade.size for trade in list(self.trade_streams[order_book.symbol])[-100:])
+        recent_volume = self.trade_streams[order_book.symbol].column("size", 100).sum()
         avg_volume = recent_volume / 100 if recent_volume > 0 else 1000
         
         # Linear impact: alpha * (order_size / avg_volume)
@@ -888,17 +1151,17 @@ class MarketMicrostructure:
         
         return min(0.1, impact)  # Cap at 10%
     
-    async def _square_root_impact_model(self, order_size: float, order_book: OrderBook,
+    async def _square_root_impact_model(self, order_size: float, order_book: L2OrderBook,
                                       participation_rate: float, params: Dict[str, Any]) -> float:
         """Square root market impact model (most common)"""
         alpha = params.get("alpha", 0.314)
         beta = params.get("beta", 0.5)
         
         # Get market data
-        recent_trades = list(self.trade_streams[order_book.symbol])[-100:]
-        if recent_trades:
-            avg_volume = np.mean([trade.size for trade in recent_trades])
-            volatility = np.std([trade.market_impact for trade in recent_trades])
+        trades = self.trade_streams[order_book.symbol]
+        if len(trades):
+            avg_volume = trades.column("size", 100).mean()
+            volatility = np.std(trades.column("market_impact", 100))
         else:
             avg_volume = 1000
             volatility = 0.02
@@ -912,7 +1175,7 @@ class MarketMicrostructure:
         
         return min(0.15, impact)  # Cap at 15%
     
-    async def _logarithmic_impact_model(self, order_size: float, order_book: OrderBook,
+    async def _logarithmic_impact_model(self, order_size: float, order_book: L2OrderBook,
                                       participation_rate: float, params: Dict[str, Any]) -> float:
         """Logarithmic market impact model"""
         alpha = params.get("alpha", 0.1)
@@ -920,24 +1183,28 @@ class MarketMicrostructure:
         
         # Get market data
         depth = order_book.depth.get("5bps", 1000)
-        
+
+        # No depth within 5bps means nothing absorbs the order, so it takes the full cap
+        if depth <= 0:
+            return 0.1
+
         # Logarithmic model: alpha * log(1 + beta * order_size / depth)
         size_ratio = order_size / depth
         impact = alpha * math.log(1 + beta * size_ratio)
         
         return min(0.1, impact)  # Cap at 10%
     
-    async def _almgren_chriss_impact_model(self, order_size: float, order_book: OrderBook,
+    async def _almgren_chriss_impact_model(self, order_size: float, order_book: L2OrderBook,
                                          participation_rate: float, params: Dict[str, Any]) -> float:
         """Almgren-Chriss market impact model"""
         gamma = params.get("gamma", 2e-7)  # Permanent impact parameter
         eta = params.get("eta", 2.5e-6)     # Temporary impact parameter
         
         # Get market data
-        recent_trades = list(self.trade_streams[order_book.symbol])[-100:]
-        if recent_trades:
-            avg_volume = np.mean([trade.size for trade in recent_trades])
-            volatility = np.std([trade.price for trade in recent_trades]) / order_book.mid_price
+        trades = self.trade_streams[order_book.symbol]
+        if len(trades):
+            avg_volume = trades.column("size", 100).mean()
+            volatility = np.std(trades.column("price", 100)) / order_book.mid_price
         else:
             avg_volume = 1000
             volatility = 0.02
@@ -953,10 +1220,10 @@ class MarketMicrostructure:
     async def analyze_market_regime(self, symbol: str) -> MarketRegimeAnalysis:
         """Analyze current market regime"""
         # Get recent market data
-        recent_trades = list(self.trade_streams[symbol])[-200:]
+        trades = self.trade_streams[symbol]
         order_book = self.order_books.get(symbol)
         
-        if not recent_trades or not order_book:
+        if not len(trades) or not order_book:
             # Return default regime
             return self.regime_analysis.get(symbol, MarketRegimeAnalysis(
                 symbol=symbol,
@@ -972,19 +1239,19 @@ class MarketMicrostructure:
             ))
         
         # Calculate regime indicators
-        price_changes = [trade.market_impact for trade in recent_trades]
-        volumes = [trade.size for trade in recent_trades]
-        spreads = [snapshot.spread for snapshot in list(self.order_book_snapshots[symbol])[-50:]]
+        price_changes = trades.column("market_impact", 200)
+        volumes = trades.column("size", 200)
+        spreads = self.order_book_snapshots[symbol].column("spread", 50)
         
         # Volatility level
-        volatility_level = np.std(price_changes) if price_changes else 0.02
+        volatility_level = np.std(price_changes)
         
         # Liquidity level (inverse of spread)
-        avg_spread = np.mean(spreads) if spreads else 0.01
+        avg_spread = np.mean(spreads) if spreads.size else 0.01
         liquidity_level = max(0, 1 - avg_spread * 1000)  # Normalize
         
         # Volume pattern
-        volume_pattern = np.std(volumes) / np.mean(volumes) if volumes and np.mean(volumes) > 0 else 1
+        volume_pattern = np.std(volumes) / np.mean(volumes) if np.mean(volumes) > 0 else 1
         
         # Stress indicators
         stress_indicators = {
@@ -1066,14 +1333,16 @@ class MarketMicrostructure:
     async def _generate_enhanced_signals(self, symbol: str):
         """Generate enhanced microstructure signals"""
         order_book = self.order_books.get(symbol)
-        recent_trades = list(self.trade_streams[symbol])[-50:]
+        trades = self.trade_streams[symbol]
         
-        if not order_book or not recent_trades:
+        if not order_book or not len(trades):
             return
         
         # Order flow imbalance signal
-        buy_volume = sum(t.size for t in recent_trades if t.side == OrderSide.BUY)
-        sell_volume = sum(t.size for t in recent_trades if t.side == OrderSide.SELL)
+        sizes = trades.column("size", 50)
+        buys = trades.column("side", 50) > 0
+        buy_volume = float(sizes[buys].sum())
+        sell_volume = float(sizes[~buys].sum())
         total_volume = buy_volume + sell_volume
         
         if total_volume > 0:
@@ -1200,12 +1469,12 @@ class MarketMicrostructure:
             }
             await self._broadcast_message(message)
     
-    async def _broadcast_order_book(self, order_book: OrderBook):
+    async def _broadcast_order_book(self, order_book: L2OrderBook):
         """Broadcast order book update to WebSocket clients"""
         if self.active_websockets:
             message = {
                 "type": "order_book",
-                "data": asdict(order_book)
+                "data": asdict(order_book.to_order_book(max_levels=self.broadcast_book_levels))
             }
             await self._broadcast_message(message)
     
@@ -1224,6 +1493,10 @@ class MarketMicrostructure:
 # Initialize the market microstructure system
 microstructure = MarketMicrostructure()
 
+@app.on_event("startup")
+async def startup_event():
+    microstructure.start_background_tasks()
+
 # API Endpoints
 @app.get("/health")
 async def health_check():
@@ -1283,7 +1556,7 @@ async def update_order_book(update: OrderBookUpdate):
     """Update order book"""
     try:
         order_book = await microstructure.update_order_book(update)
-        return {"order_book": asdict(order_book)}
+        return {"order_book": asdict(order_book.to_order_book())}
         
     except Exception as e:
         logger.error(f"Error updating order book: {e}")
@@ -1295,7 +1568,7 @@ async def get_order_book(symbol: str):
     if symbol not in microstructure.order_books:
         raise HTTPException(status_code=404, detail="Symbol not found")
     
-    return {"order_book": asdict(microstructure.order_books[symbol])}
+    return {"order_book": asdict(microstructure.order_books[symbol].to_order_book())}
 
 @app.get("/order-flow/{symbol}")
 async def get_order_flow_metrics(symbol: str, timeframe: str = "5m"):
@@ -1363,7 +1636,7 @@ async def get_microstructure_signals(symbol: str, limit: int = 50):
 @app.get("/trades/{symbol}")
 async def get_trades(symbol: str, limit: int = 100):
     """Get recent trades"""
-    trades = list(microstructure.trade_streams[symbol])[-limit:]
+    trades = microstructure.trade_streams[symbol].latest_trades(limit)
     
     return {
         "trades": [asdict(trade) for trade in trades],
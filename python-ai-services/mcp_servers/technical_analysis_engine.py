@@ -18,7 +18,10 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 import math
+from collections import OrderedDict
 from enum import Enum
+from functools import partial
+from numpy.lib.stride_tricks import as_strided
 
 # Configure logging
 logging.basicConfig(
@@ -124,6 +127,73 @@ class TechnicalAnalysis:
     confidence_score: float
     recommendations: List[str]
 
+@dataclass
+class IndicatorState:
+    """Indicator columns for one symbol's bars, kept current bar by bar instead of recomputed per request"""
+    length: int
+    last_bar: Tuple[Any, float]
+    config_key: str
+    tail: Dict[str, np.ndarray]  # Last INDICATOR_TAIL values of every column
+    ema: Dict[str, Tuple[float, float]]  # MACD EMAs as (weighted sum, weight total) carries
+    cumulative: Dict[str, float]  # Running sums behind VWAP
+    recent_obv: np.ndarray  # Enough OBV history for its trend average
+    
+    def latest(self, column: str) -> float:
+        return self.tail[column][-1]
+    
+    def previous(self, column: str) -> float:
+        values = self.tail[column]
+        return values[-2] if len(values) > 1 else np.nan
+
+# Indicator computation helpers
+TREND_WINDOW = 20
+INDICATOR_TAIL = 2
+INDICATOR_RESULT_CACHE_SIZE = 4096
+BAR_COLUMNS = ("high", "low", "close", "volume")
+
+_sample_std = partial(np.std, ddof=1)
+
+def _bar_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {column: df[column].to_numpy(dtype=float) for column in BAR_COLUMNS}
+
+def _last_bar(df: pd.DataFrame, position: int = -1) -> Tuple[Any, float]:
+    """Identity of a bar: its timestamp and close, so a revised last bar is not mistaken for a cached one"""
+    return df['timestamp'].iat[position], float(df['close'].iat[position])
+
+def _rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Same as pandas rolling(window) with the given reducer: NaN until the window is full"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        # Read-only strided view of every window; cheaper than sliding_window_view on short tails
+        values = np.ascontiguousarray(values)
+        windows = as_strided(values, shape=(len(values) - window + 1, window),
+                             strides=values.strides * 2, writeable=False)
+        result[window - 1:] = reducer(windows, axis=-1)
+    return result
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    if periods < len(values):
+        result[periods:] = values[:len(values) - periods]
+    return result
+
+def _ewm_carry(last_value: float, count: int, span: int) -> Tuple[float, float]:
+    """Recover the running state of pandas' ewm(span).mean() (adjust=True) from its last value"""
+    decay = 1 - 2 / (span + 1)
+    weight = (1 - decay ** count) / (1 - decay)
+    return last_value * weight, weight
+
+def _ewm_step(carry: Tuple[float, float], values: np.ndarray, span: int) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """Continue an adjusted EWM over new values"""
+    decay = 1 - 2 / (span + 1)
+    weighted_sum, weight = carry
+    result = np.empty(len(values))
+    for i, value in enumerate(values):
+        weighted_sum = value + decay * weighted_sum
+        weight = 1 + decay * weight
+        result[i] = weighted_sum / weight
+    return result, (weighted_sum, weight)
+
 class AnalysisRequest(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
     timeframe: str = Field(default="1h", description="Analysis timeframe")
@@ -154,6 +224,24 @@ class TechnicalAnalysisEngine:
             "vwap": {},
             "ichimoku": {"tenkan": 9, "kijun": 26, "senkou": 52}
         }
+        self._indicator_interpreters = {
+            "rsi": self._calculate_rsi,
+            "macd": self._calculate_macd,
+            "bollinger": self._calculate_bollinger_bands,
+            "stochastic": self._calculate_stochastic,
+            "williams_r": self._calculate_williams_r,
+            "adx": self._calculate_adx,
+            "atr": self._calculate_atr,
+            "obv": self._calculate_obv,
+            "vwap": self._calculate_vwap,
+            "ichimoku": self._calculate_ichimoku
+        }
+        
+        # Indicator columns per (symbol, timeframe) and interpreted results per
+        # (symbol, timeframe, indicator, params, last bar), shared across requests
+        self._indicator_states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._indicator_results: "OrderedDict[tuple, TechnicalIndicator]" = OrderedDict()
+        self.indicator_cache_stats = {"hits": 0, "misses": 0, "incremental_updates": 0, "full_recomputes": 0}
         
         logger.info("Technical Analysis Engine initialized")
     
@@ -217,7 +305,7 @@ class TechnicalAnalysisEngine:
         current_price = df['close'].iloc[-1]
         
         # Calculate technical indicators
-        indicators = await self._calculate_indicators(df, request.indicators)
+        indicators = await self._calculate_indicators(df, request.indicators, request.symbol, request.timeframe)
         
         # Detect patterns
         patterns = []
@@ -269,66 +357,255 @@ class TechnicalAnalysisEngine:
         return analysis
     
     async def _calculate_indicators(self, df: pd.DataFrame, 
-                                  requested_indicators: List[str]) -> List[TechnicalIndicator]:
-        """Calculate technical indicators"""
+                                  requested_indicators: List[str],
+                                  symbol: Optional[str] = None,
+                                  timeframe: str = "1h") -> List[TechnicalIndicator]:
+        """Calculate technical indicators, reusing cached results while the symbol's last bar is unchanged"""
         indicators = []
         
         # Default indicators if none specified
         if not requested_indicators:
             requested_indicators = ["rsi", "macd", "bollinger", "stochastic", "adx"]
         
+        if df.empty:
+            return indicators
+        
+        state = None
+        last_bar = _last_bar(df)
         for indicator_name in requested_indicators:
-            if indicator_name in self.indicator_configs:
-                indicator = await self._calculate_single_indicator(df, indicator_name)
-                if indicator:
-                    indicators.append(indicator)
+            if indicator_name not in self.indicator_configs:
+                continue
+            
+            cache_key = None
+            if symbol is not None:
+                params = json.dumps(self.indicator_configs[indicator_name], sort_keys=True)
+                cache_key = (symbol, timeframe, indicator_name, params, last_bar)
+                cached = self._indicator_results.get(cache_key)
+                if cached is not None:
+                    self._indicator_results.move_to_end(cache_key)
+                    self.indicator_cache_stats["hits"] += 1
+                    indicators.append(cached)
+                    continue
+                self.indicator_cache_stats["misses"] += 1
+            
+            # All indicators are read from one shared set of columns, computed at most once per request
+            if state is None:
+                state = self._get_indicator_state(df, symbol, timeframe, last_bar)
+            indicator = self._calculate_single_indicator(state, indicator_name)
+            if indicator:
+                indicators.append(indicator)
+                if cache_key is not None:
+                    self._indicator_results[cache_key] = indicator
+                    if len(self._indicator_results) > INDICATOR_RESULT_CACHE_SIZE:
+                        self._indicator_results.popitem(last=False)
         
         return indicators
     
-    async def _calculate_single_indicator(self, df: pd.DataFrame, 
-                                        indicator_name: str) -> Optional[TechnicalIndicator]:
-        """Calculate a single technical indicator"""
-        config = self.indicator_configs[indicator_name]
+    def _calculate_single_indicator(self, state: IndicatorState, 
+                                  indicator_name: str) -> Optional[TechnicalIndicator]:
+        """Interpret a single technical indicator from precomputed columns"""
+        interpreter = self._indicator_interpreters.get(indicator_name)
+        if interpreter is None:
+            return None
         
         try:
-            if indicator_name == "rsi":
-                return await self._calculate_rsi(df, config)
-            elif indicator_name == "macd":
-                return await self._calculate_macd(df, config)
-            elif indicator_name == "bollinger":
-                return await self._calculate_bollinger_bands(df, config)
-            elif indicator_name == "stochastic":
-                return await self._calculate_stochastic(df, config)
-            elif indicator_name == "williams_r":
-                return await self._calculate_williams_r(df, config)
-            elif indicator_name == "adx":
-                return await self._calculate_adx(df, config)
-            elif indicator_name == "atr":
-                return await self._calculate_atr(df, config)
-            elif indicator_name == "obv":
-                return await self._calculate_obv(df)
-            elif indicator_name == "vwap":
-                return await self._calculate_vwap(df)
-            elif indicator_name == "ichimoku":
-                return await self._calculate_ichimoku(df, config)
-            
+            return interpreter(state, self.indicator_configs[indicator_name])
         except Exception as e:
             logger.error(f"Error calculating {indicator_name}: {e}")
             return None
+    
+    def append_market_bars(self, symbol: str, bars) -> None:
+        """Append new OHLCV bars for a symbol; cached indicators advance incrementally on the next request"""
+        bars = pd.DataFrame(bars)
+        current = self.market_data.get(symbol)
+        if current is None:
+            self.market_data[symbol] = bars.reset_index(drop=True)
+        else:
+            self.market_data[symbol] = pd.concat([current, bars], ignore_index=True)
+    
+    def _get_indicator_state(self, df: pd.DataFrame, symbol: Optional[str], timeframe: str,
+                           last_bar: Tuple[Any, float]) -> IndicatorState:
+        """Indicator columns for df, advanced from the cached state when only new bars were appended"""
+        if symbol is None:
+            return self._build_indicator_state(df)
+        
+        key = (symbol, timeframe)
+        state = self._indicator_states.get(key)
+        if state is not None and state.config_key == json.dumps(self.indicator_configs, sort_keys=True):
+            new_bars = len(df) - state.length
+            if new_bars == 0 and last_bar == state.last_bar:
+                return state
+            if 0 < new_bars <= self._indicator_lookback() and _last_bar(df, state.length - 1) == state.last_bar:
+                self._advance_indicator_state(state, df)
+                state.last_bar = last_bar
+                self.indicator_cache_stats["incremental_updates"] += 1
+                return state
+        
+        state = self._build_indicator_state(df)
+        self._indicator_states[key] = state
+        self.indicator_cache_stats["full_recomputes"] += 1
+        return state
+    
+    def _indicator_lookback(self) -> int:
+        """Number of trailing bars the newest value of every window-based column depends on"""
+        cfg = self.indicator_configs
+        ichimoku = cfg["ichimoku"]
+        return max(
+            cfg["rsi"]["period"] + 1,
+            cfg["bollinger"]["period"],
+            cfg["stochastic"]["k_period"] + cfg["stochastic"]["d_period"] - 1,
+            cfg["williams_r"]["period"],
+            2 * cfg["adx"]["period"] + 1,
+            cfg["atr"]["period"] + 1,
+            TREND_WINDOW + 1,
+            ichimoku["kijun"] + max(ichimoku.values())
+        )
+    
+    def _indicator_columns(self, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Compute every window-based indicator column in one vectorized pass over the bars"""
+        cfg = self.indicator_configs
+        high, low, close, volume = bars["high"], bars["low"], bars["close"], bars["volume"]
+        previous_close = _shift(close, 1)
+        change = close - previous_close
+        
+        # Rolling windows shared between indicators (closes, highs/lows, true range) are computed once
+        shared = {}
+        def rolling(name: str, values: np.ndarray, window: int, reducer=np.mean) -> np.ndarray:
+            if (name, window) not in shared:
+                shared[name, window] = _rolling(values, window, reducer)
+            return shared[name, window]
+        
+        def midpoint(window: int) -> np.ndarray:
+            return (rolling("high", high, window, np.max) + rolling("low", low, window, np.min)) / 2
+        
+        columns = {"close": close}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # RSI
+            period = cfg["rsi"]["period"]
+            gain = _rolling(np.where(change > 0, change, 0.0), period, np.mean)
+            loss = _rolling(np.where(change < 0, -change, 0.0), period, np.mean)
+            columns["rsi"] = 100 - (100 / (1 + gain / loss))
+            
+            # Bollinger Bands
+            period, std_dev = cfg["bollinger"]["period"], cfg["bollinger"]["std_dev"]
+            sma = rolling("close", close, period)
+            std = _rolling(close, period, _sample_std)
+            columns["bollinger_upper"] = sma + (std * std_dev)
+            columns["bollinger_lower"] = sma - (std * std_dev)
+            
+            # Stochastic and Williams %R
+            period = cfg["stochastic"]["k_period"]
+            low_min, high_max = rolling("low", low, period, np.min), rolling("high", high, period, np.max)
+            columns["stochastic_k"] = 100 * ((close - low_min) / (high_max - low_min))
+            columns["stochastic_d"] = _rolling(columns["stochastic_k"], cfg["stochastic"]["d_period"], np.mean)
+            
+            period = cfg["williams_r"]["period"]
+            low_min, high_max = rolling("low", low, period, np.min), rolling("high", high, period, np.max)
+            columns["williams_r"] = -100 * ((high_max - close) / (high_max - low_min))
+            
+            # ADX and ATR share the true range
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+            period = cfg["adx"]["period"]
+            high_diff = high - _shift(high, 1)
+            low_diff = np.abs(low - _shift(low, 1))
+            plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0.0)
+            minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0.0)
+            atr = rolling("true_range", true_range, period)
+            plus_di = 100 * (_rolling(plus_dm, period, np.mean) / atr)
+            minus_di = 100 * (_rolling(minus_dm, period, np.mean) / atr)
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            columns.update(adx=_rolling(dx, period, np.mean), plus_di=plus_di, minus_di=minus_di)
+            columns["atr"] = rolling("true_range", true_range, cfg["atr"]["period"])
+            
+            # Per-bar inputs of the cumulative OBV and VWAP columns
+            columns["obv_step"] = np.nan_to_num(np.sign(change) * volume)
+            columns["close_trend"] = rolling("close", close, TREND_WINDOW)
+            columns["typical_volume"] = ((high + low + close) / 3) * volume
+            
+            # Ichimoku
+            ichimoku = cfg["ichimoku"]
+            tenkan_sen, kijun_sen = midpoint(ichimoku["tenkan"]), midpoint(ichimoku["kijun"])
+            columns.update(tenkan_sen=tenkan_sen, kijun_sen=kijun_sen)
+            columns["senkou_a"] = _shift((tenkan_sen + kijun_sen) / 2, ichimoku["kijun"])
+            columns["senkou_b"] = _shift(midpoint(ichimoku["senkou"]), ichimoku["kijun"])
+        
+        return columns
+    
+    def _build_indicator_state(self, df: pd.DataFrame) -> IndicatorState:
+        """Compute all indicator columns over the full history"""
+        bars = _bar_arrays(df)
+        columns = self._indicator_columns(bars)
+        count = len(df)
+        
+        macd_config = self.indicator_configs["macd"]
+        close = pd.Series(bars["close"])
+        ema_fast = close.ewm(span=macd_config["fast"]).mean().to_numpy()
+        ema_slow = close.ewm(span=macd_config["slow"]).mean().to_numpy()
+        macd_line = ema_fast - ema_slow
+        signal_line = pd.Series(macd_line).ewm(span=macd_config["signal"]).mean().to_numpy()
+        
+        obv = np.cumsum(columns.pop("obv_step"))
+        price_volume = np.cumsum(columns.pop("typical_volume"))
+        volume = np.cumsum(bars["volume"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = price_volume / volume
+        columns.update(
+            macd=macd_line, macd_signal=signal_line, macd_histogram=macd_line - signal_line,
+            obv=obv, obv_trend=_rolling(obv, TREND_WINDOW, np.mean), vwap=vwap
+        )
+        
+        return IndicatorState(
+            length=count,
+            last_bar=_last_bar(df),
+            config_key=json.dumps(self.indicator_configs, sort_keys=True),
+            tail={name: values[-INDICATOR_TAIL:] for name, values in columns.items()},
+            ema={
+                "fast": _ewm_carry(ema_fast[-1], count, macd_config["fast"]),
+                "slow": _ewm_carry(ema_slow[-1], count, macd_config["slow"]),
+                "signal": _ewm_carry(signal_line[-1], count, macd_config["signal"])
+            },
+            cumulative={"price_volume": price_volume[-1], "volume": volume[-1]},
+            recent_obv=obv[-TREND_WINDOW:]
+        )
+    
+    def _advance_indicator_state(self, state: IndicatorState, df: pd.DataFrame) -> None:
+        """
+        Fold the bars appended since the state was built into it. Window-based columns are
+        recomputed over the lookback only; EMAs and cumulative sums continue from their carries.
+        """
+        new_bars = len(df) - state.length
+        bars = _bar_arrays(df.iloc[-(self._indicator_lookback() + new_bars):])
+        columns = {name: values[-new_bars:] for name, values in self._indicator_columns(bars).items()}
+        
+        macd_config = self.indicator_configs["macd"]
+        ema_fast, state.ema["fast"] = _ewm_step(state.ema["fast"], columns["close"], macd_config["fast"])
+        ema_slow, state.ema["slow"] = _ewm_step(state.ema["slow"], columns["close"], macd_config["slow"])
+        macd_line = ema_fast - ema_slow
+        signal_line, state.ema["signal"] = _ewm_step(state.ema["signal"], macd_line, macd_config["signal"])
+        
+        obv = np.cumsum(np.append(state.latest("obv"), columns.pop("obv_step")))[1:]
+        recent_obv = np.concatenate([state.recent_obv, obv])
+        price_volume = np.cumsum(np.append(state.cumulative["price_volume"], columns.pop("typical_volume")))[1:]
+        volume = np.cumsum(np.append(state.cumulative["volume"], bars["volume"][-new_bars:]))[1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = price_volume / volume
+        columns.update(
+            macd=macd_line, macd_signal=signal_line, macd_histogram=macd_line - signal_line,
+            obv=obv, obv_trend=_rolling(recent_obv, TREND_WINDOW, np.mean)[-new_bars:], vwap=vwap
+        )
         
-        return None
+        state.tail = {
+            name: np.concatenate([state.tail[name], values])[-INDICATOR_TAIL:]
+            for name, values in columns.items()
+        }
+        state.cumulative = {"price_volume": price_volume[-1], "volume": volume[-1]}
+        state.recent_obv = recent_obv[-TREND_WINDOW:]
+        state.length = len(df)
     
-    async def _calculate_rsi(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_rsi(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate RSI indicator"""
         period = config["period"]
-        
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
+        current_rsi = state.latest("rsi")
         
         # Generate signal
         if current_rsi > config["overbought"]:
@@ -351,32 +628,23 @@ class TechnicalAnalysisEngine:
             description=f"RSI({period}) indicates {'overbought' if current_rsi > 70 else 'oversold' if current_rsi < 30 else 'neutral'} conditions"
         )
     
-    async def _calculate_macd(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_macd(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate MACD indicator"""
-        fast_period = config["fast"]
-        slow_period = config["slow"]
-        signal_period = config["signal"]
-        
-        ema_fast = df['close'].ewm(span=fast_period).mean()
-        ema_slow = df['close'].ewm(span=slow_period).mean()
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal_period).mean()
-        histogram = macd_line - signal_line
-        
-        current_macd = macd_line.iloc[-1]
-        current_signal = signal_line.iloc[-1]
-        current_histogram = histogram.iloc[-1]
+        current_macd = state.latest("macd")
+        current_signal = state.latest("macd_signal")
+        current_histogram = state.latest("macd_histogram")
+        previous_histogram = state.previous("macd_histogram")
         
         # Generate signal
-        if current_macd > current_signal and histogram.iloc[-2] <= 0:
+        if current_macd > current_signal and previous_histogram <= 0:
             signal = "BUY"
             strength = SignalStrength.STRONG
-        elif current_macd < current_signal and histogram.iloc[-2] >= 0:
+        elif current_macd < current_signal and previous_histogram >= 0:
             signal = "SELL"
             strength = SignalStrength.STRONG
         else:
             signal = "HOLD"
-            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(histogram.iloc[-2]) else SignalStrength.WEAK
+            strength = SignalStrength.MODERATE if abs(current_histogram) > abs(previous_histogram) else SignalStrength.WEAK
         
         return TechnicalIndicator(
             name="MACD",
@@ -388,21 +656,11 @@ class TechnicalAnalysisEngine:
             description=f"MACD shows {'bullish' if current_macd > current_signal else 'bearish'} momentum"
         )
     
-    async def _calculate_bollinger_bands(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_bollinger_bands(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Bollinger Bands"""
-        period = config["period"]
-        std_dev = config["std_dev"]
-        
-        sma = df['close'].rolling(window=period).mean()
-        std = df['close'].rolling(window=period).std()
-        
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
-        
-        current_price = df['close'].iloc[-1]
-        current_upper = upper_band.iloc[-1]
-        current_lower = lower_band.iloc[-1]
-        current_sma = sma.iloc[-1]
+        current_price = state.latest("close")
+        current_upper = state.latest("bollinger_upper")
+        current_lower = state.latest("bollinger_lower")
         
         # Calculate position relative to bands
         band_position = (current_price - current_lower) / (current_upper - current_lower)
@@ -434,19 +692,10 @@ class TechnicalAnalysisEngine:
             description=f"Price is at {band_position*100:.1f}% of Bollinger Band range"
         )
     
-    async def _calculate_stochastic(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_stochastic(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Stochastic Oscillator"""
-        k_period = config["k_period"]
-        d_period = config["d_period"]
-        
-        low_min = df['low'].rolling(window=k_period).min()
-        high_max = df['high'].rolling(window=k_period).max()
-        
-        k_percent = 100 * ((df['close'] - low_min) / (high_max - low_min))
-        d_percent = k_percent.rolling(window=d_period).mean()
-        
-        current_k = k_percent.iloc[-1]
-        current_d = d_percent.iloc[-1]
+        current_k = state.latest("stochastic_k")
+        current_d = state.latest("stochastic_d")
         
         # Generate signal
         if current_k > 80 and current_d > 80:
@@ -475,15 +724,9 @@ class TechnicalAnalysisEngine:
             description=f"Stochastic %K at {current_k:.1f}%, %D at {current_d:.1f}%"
         )
     
-    async def _calculate_williams_r(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_williams_r(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Williams %R"""
-        period = config["period"]
-        
-        high_max = df['high'].rolling(window=period).max()
-        low_min = df['low'].rolling(window=period).min()
-        
-        williams_r = -100 * ((high_max - df['close']) / (high_max - low_min))
-        current_wr = williams_r.iloc[-1]
+        current_wr = state.latest("williams_r")
         
         # Generate signal
         if current_wr > -20:
@@ -506,33 +749,11 @@ class TechnicalAnalysisEngine:
             description=f"Williams %R indicates {'overbought' if current_wr > -20 else 'oversold' if current_wr < -80 else 'neutral'} conditions"
         )
     
-    async def _calculate_adx(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_adx(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Average Directional Index (ADX)"""
-        period = config["period"]
-        
-        # Simplified ADX calculation
-        high_diff = df['high'].diff()
-        low_diff = df['low'].diff().abs()
-        
-        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
-        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
-        
-        tr = pd.concat([
-            df['high'] - df['low'],
-            (df['high'] - df['close'].shift()).abs(),
-            (df['low'] - df['close'].shift()).abs()
-        ], axis=1).max(axis=1)
-        
-        atr = tr.rolling(window=period).mean()
-        plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-        minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-        
-        dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
-        adx = dx.rolling(window=period).mean()
-        
-        current_adx = adx.iloc[-1]
-        current_plus_di = plus_di.iloc[-1]
-        current_minus_di = minus_di.iloc[-1]
+        current_adx = state.latest("adx")
+        current_plus_di = state.latest("plus_di")
+        current_minus_di = state.latest("minus_di")
         
         # Generate signal based on trend strength
         if current_adx > 25:
@@ -556,19 +777,10 @@ class TechnicalAnalysisEngine:
             description=f"ADX shows {'strong' if current_adx > 25 else 'weak'} trend strength"
         )
     
-    async def _calculate_atr(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_atr(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Average True Range (ATR)"""
-        period = config["period"]
-        
-        tr = pd.concat([
-            df['high'] - df['low'],
-            (df['high'] - df['close'].shift()).abs(),
-            (df['low'] - df['close'].shift()).abs()
-        ], axis=1).max(axis=1)
-        
-        atr = tr.rolling(window=period).mean()
-        current_atr = atr.iloc[-1]
-        current_price = df['close'].iloc[-1]
+        current_atr = state.latest("atr")
+        current_price = state.latest("close")
         
         atr_percentage = (current_atr / current_price) * 100
         
@@ -593,17 +805,15 @@ class TechnicalAnalysisEngine:
             description=f"ATR indicates {'high' if atr_percentage > 2.5 else 'normal' if atr_percentage > 1 else 'low'} volatility"
         )
     
-    async def _calculate_obv(self, df: pd.DataFrame) -> TechnicalIndicator:
+    def _calculate_obv(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate On-Balance Volume (OBV)"""
-        obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        current_obv = obv.iloc[-1]
+        current_obv = state.latest("obv")
         
         # Calculate OBV trend
-        obv_ma = obv.rolling(window=20).mean()
-        obv_trend = "rising" if obv.iloc[-1] > obv_ma.iloc[-1] else "falling"
+        obv_trend = "rising" if current_obv > state.latest("obv_trend") else "falling"
         
         # Generate signal based on price-volume relationship
-        price_trend = "rising" if df['close'].iloc[-1] > df['close'].rolling(window=20).mean().iloc[-1] else "falling"
+        price_trend = "rising" if state.latest("close") > state.latest("close_trend") else "falling"
         
         if obv_trend == "rising" and price_trend == "rising":
             signal = "BUY"
@@ -628,13 +838,10 @@ class TechnicalAnalysisEngine:
             description=f"OBV shows {obv_trend} volume trend"
         )
     
-    async def _calculate_vwap(self, df: pd.DataFrame) -> TechnicalIndicator:
+    def _calculate_vwap(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Volume Weighted Average Price (VWAP)"""
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-        
-        current_vwap = vwap.iloc[-1]
-        current_price = df['close'].iloc[-1]
+        current_vwap = state.latest("vwap")
+        current_price = state.latest("close")
         
         # Generate signal based on price relative to VWAP
         if current_price > current_vwap * 1.005:  # 0.5% above VWAP
@@ -657,35 +864,13 @@ class TechnicalAnalysisEngine:
             description=f"Price is {'above' if current_price > current_vwap else 'below'} VWAP"
         )
     
-    async def _calculate_ichimoku(self, df: pd.DataFrame, config: Dict) -> TechnicalIndicator:
+    def _calculate_ichimoku(self, state: IndicatorState, config: Dict) -> TechnicalIndicator:
         """Calculate Ichimoku Cloud"""
-        tenkan_period = config["tenkan"]
-        kijun_period = config["kijun"]
-        senkou_period = config["senkou"]
-        
-        # Tenkan-sen (Conversion Line)
-        tenkan_high = df['high'].rolling(window=tenkan_period).max()
-        tenkan_low = df['low'].rolling(window=tenkan_period).min()
-        tenkan_sen = (tenkan_high + tenkan_low) / 2
-        
-        # Kijun-sen (Base Line)
-        kijun_high = df['high'].rolling(window=kijun_period).max()
-        kijun_low = df['low'].rolling(window=kijun_period).min()
-        kijun_sen = (kijun_high + kijun_low) / 2
-        
-        # Senkou Span A (Leading Span A)
-        senkou_a = ((tenkan_sen + kijun_sen) / 2).shift(kijun_period)
-        
-        # Senkou Span B (Leading Span B)
-        senkou_high = df['high'].rolling(window=senkou_period).max()
-        senkou_low = df['low'].rolling(window=senkou_period).min()
-        senkou_b = ((senkou_high + senkou_low) / 2).shift(kijun_period)
-        
-        current_price = df['close'].iloc[-1]
-        current_tenkan = tenkan_sen.iloc[-1]
-        current_kijun = kijun_sen.iloc[-1]
-        current_senkou_a = senkou_a.iloc[-1] if not pd.isna(senkou_a.iloc[-1]) else current_price
-        current_senkou_b = senkou_b.iloc[-1] if not pd.isna(senkou_b.iloc[-1]) else current_price
+        current_price = state.latest("close")
+        current_tenkan = state.latest("tenkan_sen")
+        current_kijun = state.latest("kijun_sen")
+        current_senkou_a = state.latest("senkou_a") if not pd.isna(state.latest("senkou_a")) else current_price
+        current_senkou_b = state.latest("senkou_b") if not pd.isna(state.latest("senkou_b")) else current_price
         
         # Generate signal
         cloud_top = max(current_senkou_a, current_senkou_b)
@@ -714,6 +899,7 @@ class TechnicalAnalysisEngine:
             description=f"Price is {'above' if current_price > cloud_top else 'below' if current_price < cloud_bottom else 'within'} Ichimoku cloud"
         )
     
+    
     async def _detect_patterns(self, df: pd.DataFrame, symbol: str, timeframe: str) -> List[PatternDetection]:
         """Detect chart patterns"""
         patterns = []
@@ -1202,7 +1388,7 @@ async def get_indicators(symbol: str, indicators: str = ""):
     requested_indicators = indicators.split(",") if indicators else []
     
     df = technical_engine.market_data[symbol]
-    calculated_indicators = await technical_engine._calculate_indicators(df, requested_indicators)
+    calculated_indicators = await technical_engine._calculate_indicators(df, requested_indicators, symbol)
     
     return {
         "symbol": symbol,
@@ -1265,6 +1451,7 @@ async def get_metrics():
         "symbols_tracked": len(technical_engine.market_data),
         "indicators_available": len(technical_engine.indicator_configs),
         "active_websockets": len(technical_engine.active_websockets),
+        "indicator_cache": technical_engine.indicator_cache_stats,
         "cpu_usage": np.random.uniform(15, 50),
         "memory_usage": np.random.uniform(25, 65),
         "analysis_latency_ms": np.random.uniform(100, 300),
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, ForeignKey # Added Float, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, Integer, ForeignKey, Index # Added Float, ForeignKey
 # For SQLAlchemy's built-in JSON type, if available and preferred over Text for JSON strings:
 # from sqlalchemy import JSON as DB_JSON_TYPE
 from python_ai_services.core.database import Base # Adjusted import path
@@ -54,6 +54,52 @@ class TradeFillDB(Base):
     exchange_trade_id = Column(String, nullable=True, index=True) # Exchange's own fill/trade ID
 
 
+class TradeLotDB(Base):
+    """Open (not yet fully sold) quantity of a buy fill, consumed FIFO by later sells."""
+    __tablename__ = "trade_lots"
+    __table_args__ = (Index("ix_trade_lots_agent_asset_timestamp", "agent_id", "asset", "timestamp"),)
+
+    lot_id = Column(String, primary_key=True) # fill_id of the opening buy
+    agent_id = Column(String, nullable=False)
+    asset = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    price = Column(Float, nullable=False)
+    quantity = Column(Float, nullable=False) # Original fill quantity, used to prorate the fee
+    remaining_quantity = Column(Float, nullable=False)
+    fee = Column(Float, default=0.0)
+
+
+class ClosedTradeDB(Base):
+    """Materialized FIFO match between a buy lot and a sell fill; columns mirror TradeLogItem."""
+    __tablename__ = "closed_trades"
+    __table_args__ = (Index("ix_closed_trades_agent_exit", "agent_id", "exit_timestamp"),)
+
+    trade_id = Column(String, primary_key=True) # closed_{buy fill_id}_{sell fill_id}
+    agent_id = Column(String, nullable=False)
+    asset = Column(String, nullable=False, index=True)
+    opening_side = Column(String, nullable=False)
+    order_type = Column(String, nullable=False)
+    quantity = Column(Float, nullable=False)
+    entry_price_avg = Column(Float, nullable=False)
+    exit_price_avg = Column(Float, nullable=False)
+    entry_timestamp = Column(DateTime, nullable=True)
+    exit_timestamp = Column(DateTime, nullable=False)
+    holding_period_seconds = Column(Float, nullable=True)
+    initial_value_usd = Column(Float, nullable=True)
+    final_value_usd = Column(Float, nullable=True)
+    realized_pnl = Column(Float, nullable=True)
+    percentage_pnl = Column(Float, nullable=True)
+    total_fees = Column(Float, nullable=True)
+
+
+class TradeLedgerRevisionDB(Base):
+    """Per-agent counter bumped in the same transaction as every ledger replay, so all processes see it."""
+    __tablename__ = "trade_ledger_revisions"
+
+    agent_id = Column(String, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+
+
 class OrderDB(Base):
     __tablename__ = "orders"
 
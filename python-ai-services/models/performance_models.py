@@ -26,6 +26,7 @@ class PerformanceMetrics(BaseModel):
     profit_factor: Optional[float] = None # gross_profit / abs(gross_loss)
 
     max_drawdown_percentage: Optional[float] = Field(default=None, description="Maximum drawdown percentage from a peak to a subsequent trough in equity.")
+    max_drawdown_amount: Optional[float] = Field(default=None, description="Largest drop in cumulative realized PnL from a peak to a subsequent trough.")
     annualized_sharpe_ratio: Optional[float] = Field(default=None, description="Annualized Sharpe ratio, assuming a risk-free rate of 0 and daily periodic returns.")
 
     # Add new fields:
@@ -60,3 +60,15 @@ class TradeFillData(BaseModel):
     fee_currency: Optional[str] = None # e.g., "USD" or the asset itself
     exchange_order_id: Optional[str] = None
     exchange_trade_id: Optional[str] = None # Often exchanges have a separate trade/fill ID
+
+
+class OpenLot(BaseModel):
+    """Unmatched remainder of a buy fill, as tracked by the FIFO lot ledger."""
+    lot_id: str # fill_id of the opening buy
+    agent_id: str
+    asset: str
+    timestamp: datetime
+    price: float
+    quantity: float # Original fill quantity
+    remaining_quantity: float
+    fee: float = 0.0
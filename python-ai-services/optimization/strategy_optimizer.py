@@ -1,47 +1,218 @@
 import pandas as pd
 import numpy as np
+import hashlib
 import itertools
-from typing import Dict, Any, List, Callable, Optional
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Callable, Optional, Tuple
 from logging import getLogger
 import vectorbt as vbt # For StatsEntry type hint if needed, and for backtesting
 
 # Assuming strategies and their parameter models are importable
 # This might require careful path management or ensuring python-ai-services is in PYTHONPATH
 from ..strategies.darvas_box import get_darvas_signals as get_darvas_signals_func, run_darvas_backtest as run_darvas_backtest_func
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
 # from ..models.strategy_models import DarvasBoxParams # Import Pydantic model if used for validation or defaults
 # For now, param_model is for future use, so direct model import might not be strictly needed yet.
 
+try:
+    from openbb import obb
+except ImportError:
+    obb = None
+
 logger = getLogger(__name__)
 
 class StrategyOptimizerError(Exception):
     """Custom exception for strategy optimizer errors."""
     pass
 
+
+def fetch_ohlcv_data(symbol: str, start_date: str, end_date: str, data_provider: str = "yfinance",
+                     bar_store: Optional['OHLCVStore'] = None) -> Optional[pd.DataFrame]:
+    """
+    Fetches daily OHLCV bars via OpenBB, normalised to Open/High/Low/Close/Volume columns.
+    Used by the optimizer to fetch price data once per search and share it across runs.
+    With a bar_store, bars already stored locally are read from it and only the rest is fetched.
+    """
+    if bar_store is not None:
+        from ..core.ohlcv_store import openbb_bar_fetcher
+        fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+        price_data = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
+        return None if price_data.empty else price_data
+
+    if obb is None:
+        logger.error("OpenBB SDK not available. Cannot fetch price data for optimization.")
+        return None
+
+    data_obb = obb.equity.price.historical(
+        symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
+    )
+    if not data_obb or not hasattr(data_obb, 'to_df'):
+        logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
+        return None
+
+    price_data = data_obb.to_df()
+    rename_map = {}
+    for col_map_from, col_map_to in {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}.items():
+        if col_map_from in price_data.columns:
+            rename_map[col_map_from] = col_map_to
+        elif col_map_from.title() in price_data.columns and col_map_to not in price_data.columns:
+            rename_map[col_map_from.title()] = col_map_to
+    price_data = price_data.rename(columns=rename_map)
+
+    required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if price_data.empty or not all(col in price_data.columns for col in required_cols):
+        logger.warning(f"Price data for {symbol} is empty or missing one of {required_cols}.")
+        return None
+    return price_data[required_cols].copy()
+
+
+# Evaluation of a single parameter combination. Kept at module level so it can run in
+# worker processes; the search context (functions, fixed kwargs, shared price data) is
+# shipped once per worker through the pool initializer rather than once per task.
+
+_WORKER_CONTEXT: Dict[str, Any] = {}
+
+
+def _init_worker(context: Dict[str, Any]):
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = context
+
+
+def _evaluate_in_worker(params: Dict[str, Any], data_fraction: float) -> Dict[str, Any]:
+    return _evaluate_params(_WORKER_CONTEXT, params, data_fraction)
+
+
+def _evaluate_params(context: Dict[str, Any], params: Dict[str, Any], data_fraction: float = 1.0) -> Dict[str, Any]:
+    """Runs signal generation and backtest for one combination; returns metric_value/stats/error."""
+    optimization_metric = context["optimization_metric"]
+    current_metric_value = -np.inf
+    stats_for_run = None
+    error_for_run = None
+
+    try:
+        signal_func_params = {**params, **context["signal_func_kwargs"]}
+        price_data = context.get("price_data")
+        if price_data is not None:
+            if data_fraction < 1.0:
+                price_data = price_data.iloc[:max(1, int(len(price_data) * data_fraction))]
+            signal_func_params["price_data"] = price_data
+
+        # Signal functions return either (signals_df, shapes_df or None) or just signals_df
+        signal_output = context["signal_func"](
+            symbol=context["symbol"],
+            start_date=context["start_date"],
+            end_date=context["end_date"],
+            **signal_func_params
+        )
+        price_data_with_signals = signal_output[0] if isinstance(signal_output, tuple) else signal_output
+
+        if price_data_with_signals is None or price_data_with_signals.empty:
+            logger.warning(f"No signal data generated for params: {params}. Skipping.")
+            error_for_run = "No signal data"
+        elif price_data_with_signals['entries'].sum() == 0:
+            logger.warning(f"No entry signals for params: {params}. Assigning poor performance.")
+            # No error, but no trades, so metric remains -np.inf
+        else:
+            stats_vbt = context["backtest_func"]( # vectorbt stats object
+                price_data_with_signals=price_data_with_signals,
+                init_cash=context["init_cash"],
+                commission_pct=context["commission_pct"],
+                **context["backtest_func_kwargs"]
+            )
+
+            if stats_vbt is None:
+                logger.warning(f"Backtest failed for params: {params}.")
+                error_for_run = "Backtest failed"
+            elif not isinstance(stats_vbt, pd.Series) and not isinstance(stats_vbt, dict):
+                # Assuming stats_vbt is a vectorbt StatsEntry which is Series-like or Dict-like
+                logger.warning(f"Backtest stats for params: {params} is not a Series or Dict. Type: {type(stats_vbt)}")
+                error_for_run = "Non-standard stats format"
+            elif optimization_metric not in stats_vbt:
+                logger.warning(f"Metric '{optimization_metric}' not found in stats for params: {params}. Available: {list(stats_vbt.keys())}")
+                error_for_run = f"Metric '{optimization_metric}' not found"
+            else:
+                current_metric_value = stats_vbt[optimization_metric]
+                if pd.isna(current_metric_value):
+                    logger.warning(f"Metric '{optimization_metric}' is NaN for params: {params}. Treating as poor performance.")
+                    current_metric_value = -np.inf
+                stats_for_run = dict(stats_vbt) # Convert to dict for storing
+
+    except Exception as e:
+        logger.error(f"Error during optimization run with params {params}: {e}", exc_info=True)
+        error_for_run = str(e)
+
+    return {
+        "params": params,
+        "metric_value": float(current_metric_value),
+        "stats": stats_for_run,
+        "error": error_for_run
+    }
+
+
+def _param_key(params: Dict[str, Any], data_fraction: float = 1.0) -> str:
+    key = json.dumps(params, sort_keys=True, default=str)
+    return key if data_fraction >= 1.0 else f"{data_fraction:.6f}|{key}"
+
+
+def _checkpoint_header(strategy_name: str, context: Dict[str, Any], param_grid: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """
+    Identifies a search for checkpoint resumption: every input in the context except the price
+    data itself, which is represented by a content hash alongside a hash of the parameter grid.
+    Normalised through JSON so it compares equal to the header read back from the file.
+    """
+    header = {"strategy_name": strategy_name}
+    for name, value in context.items():
+        if name == "price_data":
+            continue
+        header[name] = f"{value.__module__}.{value.__qualname__}" if callable(value) else value
+    header["param_grid_hash"] = hashlib.sha256(
+        json.dumps(param_grid, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    price_data = context.get("price_data")
+    header["price_data_hash"] = None if price_data is None else hashlib.sha256(
+        pd.util.hash_pandas_object(price_data, index=True).values.tobytes()
+        + json.dumps(list(map(str, price_data.columns))).encode()
+    ).hexdigest()
+    return json.loads(json.dumps(header, sort_keys=True, default=str))
+
+
 class StrategyOptimizer:
     def __init__(self, strategy_name: str,
                  signal_func: Callable, # Requires symbol, start_date, end_date, **params
                  backtest_func: Callable, # Requires price_data_with_signals, init_cash, etc.
                  param_model: Optional[Any] = None, # Pydantic model for strategy params (e.g. DarvasBoxParams)
-                 data_fetch_func: Optional[Callable] = None): # Optional: if signal_func doesn't fetch data
+                 data_fetch_func: Optional[Callable] = None, # Optional: fetches price data once per search
+                 bar_store: Optional['OHLCVStore'] = None): # Optional: local bar store behind fetch_ohlcv_data
         """
         Initializes the StrategyOptimizer.
 
         Args:
             strategy_name (str): Name of the strategy to optimize.
             signal_func (Callable): Function that takes symbol, start_date, end_date, and strategy parameters,
-                                    returns a Tuple[pd.DataFrame with signals, Optional[pd.DataFrame for plotting]].
+                                    returns a Tuple[pd.DataFrame with signals, Optional[pd.DataFrame for plotting]]
+                                    (or just the signals DataFrame).
             backtest_func (Callable): Function that takes price data with signals and runs a backtest,
                                       returning performance stats (e.g., vectorbt Portfolio.stats()).
             param_model (Optional[Any]): The Pydantic model for the strategy's parameters.
                                          (Currently for informational/future use).
-            data_fetch_func (Optional[Callable]): Function to fetch historical data. Not used if signal_func
-                                                  handles its own data fetching (as current strategies do).
+            data_fetch_func (Optional[Callable]): Function (symbol, start_date, end_date) -> OHLCV DataFrame.
+                                                  If signal_func accepts a `price_data` argument, data is fetched
+                                                  once per search and shared by every run; defaults to
+                                                  fetch_ohlcv_data in that case.
+            bar_store (Optional['OHLCVStore']): Local bar store passed to fetch_ohlcv_data, so repeated searches
+                                              over the same range run without refetching.
         """
         self.strategy_name = strategy_name
         self.signal_func = signal_func
         self.backtest_func = backtest_func
         self.param_model = param_model # For future use (e.g. deriving default grid)
-        self.data_fetch_func = data_fetch_func # For strategies not fetching their own data
+        self.accepts_price_data = "price_data" in inspect.signature(signal_func).parameters
+        self.data_fetch_func = data_fetch_func or (fetch_ohlcv_data if self.accepts_price_data else None)
+        self.bar_store = bar_store
         logger.info(f"StrategyOptimizer initialized for strategy: {self.strategy_name}")
 
     def _generate_param_combinations(self, param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
@@ -67,6 +238,8 @@ class StrategyOptimizer:
         param_combinations = [dict(zip(keys, combo)) for combo in combinations]
         return param_combinations
 
+    # Search entry points
+
     def run_grid_search(
         self,
         symbol: str,
@@ -76,6 +249,8 @@ class StrategyOptimizer:
         optimization_metric: str = "Sharpe Ratio",
         init_cash: float = 100000,
         commission_pct: float = 0.001,
+        n_jobs: int = 1,
+        checkpoint_path: Optional[str] = None,
         # Pass other fixed args required by signal_func or backtest_func if any
         **kwargs
     ) -> Optional[Dict[str, Any]]:
@@ -88,87 +263,230 @@ class StrategyOptimizer:
             logger.warning("No parameter combinations generated. Check param_grid structure and values.")
             return {"error": "No parameter combinations generated.", "all_run_results": []}
 
-        best_performance = -np.inf
-        best_params = None
-        best_stats_dict = None # Store stats as dict for easier JSON later
+        with self._search_session(symbol, start_date, end_date, optimization_metric, init_cash,
+                                  commission_pct, n_jobs, checkpoint_path, param_grid, kwargs) as session:
+            records = session.evaluate(param_combinations)
 
-        results_summary = []
+        return self._build_search_result("grid", symbol, optimization_metric, records)
+
+    def run_random_search(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        param_grid: Dict[str, List[Any]],
+        n_iter: int = 50,
+        seed: Optional[int] = None,
+        optimization_metric: str = "Sharpe Ratio",
+        init_cash: float = 100000,
+        commission_pct: float = 0.001,
+        n_jobs: int = 1,
+        checkpoint_path: Optional[str] = None,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """Evaluates n_iter combinations sampled without replacement from the grid."""
+        param_combinations = self._generate_param_combinations(param_grid)
+        rng = np.random.default_rng(seed)
+        sample = rng.permutation(len(param_combinations))[:n_iter]
+        logger.info(f"Starting random search for {self.strategy_name} on {symbol}: {len(sample)} of {len(param_combinations)} combinations")
 
-        for i, params in enumerate(param_combinations):
-            logger.info(f"Testing combination {i+1}/{len(param_combinations)}: {params}")
-            current_metric_value = -np.inf # Default for this run
-            stats_for_run = None
-            error_for_run = None
+        with self._search_session(symbol, start_date, end_date, optimization_metric, init_cash,
+                                  commission_pct, n_jobs, checkpoint_path, param_grid, kwargs) as session:
+            records = session.evaluate([param_combinations[i] for i in sample])
 
-            try:
-                # Merge fixed kwargs into current params for the signal function
-                signal_func_params = {**params, **kwargs.get("signal_func_kwargs", {})}
-
-                # Signal function is expected to return: (signals_df, shapes_df or None)
-                price_data_with_signals, _ = self.signal_func(
-                    symbol=symbol,
-                    start_date=start_date,
-                    end_date=end_date,
-                    **signal_func_params
-                )
-
-                if price_data_with_signals is None or price_data_with_signals.empty:
-                    logger.warning(f"No signal data generated for params: {params}. Skipping.")
-                    error_for_run = "No signal data"
-                elif price_data_with_signals['entries'].sum() == 0:
-                    logger.warning(f"No entry signals for params: {params}. Assigning poor performance.")
-                    # No error, but no trades, so metric remains -np.inf
+        return self._build_search_result("random", symbol, optimization_metric, records)
+
+    def run_successive_halving(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        param_grid: Dict[str, List[Any]],
+        n_candidates: Optional[int] = None,
+        min_data_fraction: float = 0.25,
+        reduction_factor: int = 3,
+        seed: Optional[int] = None,
+        optimization_metric: str = "Sharpe Ratio",
+        init_cash: float = 100000,
+        commission_pct: float = 0.001,
+        n_jobs: int = 1,
+        checkpoint_path: Optional[str] = None,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Successive halving: evaluates all candidates on the earliest min_data_fraction of the
+        price history, keeps the best 1/reduction_factor, and repeats with reduction_factor
+        times more data until the survivors are evaluated on the full period.
+        Requires a signal_func that accepts shared `price_data`.
+        """
+        if not self.accepts_price_data:
+            raise StrategyOptimizerError(f"Successive halving needs a signal_func that accepts price_data; {self.strategy_name} does not.")
+        if reduction_factor < 2 or not 0 < min_data_fraction <= 1:
+            raise StrategyOptimizerError("reduction_factor must be >= 2 and min_data_fraction in (0, 1].")
+
+        candidates = self._generate_param_combinations(param_grid)
+        if n_candidates is not None and n_candidates < len(candidates):
+            rng = np.random.default_rng(seed)
+            candidates = [candidates[i] for i in rng.permutation(len(candidates))[:n_candidates]]
+        logger.info(f"Starting successive halving for {self.strategy_name} on {symbol} with {len(candidates)} candidates")
+
+        rungs = []
+        pruned = []
+        data_fraction = min_data_fraction
+        with self._search_session(symbol, start_date, end_date, optimization_metric, init_cash,
+                                  commission_pct, n_jobs, checkpoint_path, param_grid, kwargs) as session:
+            while True:
+                records = session.evaluate(candidates, data_fraction)
+                rungs.append({"data_fraction": data_fraction, "candidates": len(candidates)})
+                if data_fraction >= 1.0 or len(candidates) <= 1:
+                    break
+
+                ranked = sorted(records, key=lambda r: r["metric_value"], reverse=True)
+                keep = max(1, len(ranked) // reduction_factor)
+                pruned.extend(r["params"] for r in ranked[keep:])
+                candidates = [r["params"] for r in ranked[:keep]]
+                data_fraction = min(1.0, data_fraction * reduction_factor)
+
+            if data_fraction < 1.0:
+                # A single survivor before the last rung still gets scored on the full period
+                records = session.evaluate(candidates, 1.0)
+                rungs.append({"data_fraction": 1.0, "candidates": len(candidates)})
+
+        result = self._build_search_result("successive_halving", symbol, optimization_metric, records)
+        result["rungs"] = rungs
+        result["pruned_count"] = len(pruned)
+        return result
+
+    def run_bayesian_search(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        param_grid: Dict[str, List[Any]],
+        n_iter: int = 50,
+        n_initial: int = 10,
+        batch_size: Optional[int] = None,
+        seed: Optional[int] = None,
+        optimization_metric: str = "Sharpe Ratio",
+        init_cash: float = 100000,
+        commission_pct: float = 0.001,
+        n_jobs: int = 1,
+        checkpoint_path: Optional[str] = None,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gaussian-process Bayesian search over the grid. Starts from n_initial random
+        combinations, then repeatedly evaluates the batch of unevaluated combinations with
+        the highest expected improvement until n_iter combinations have been evaluated.
+        """
+        try:
+            from scipy.stats import norm
+            from sklearn.gaussian_process import GaussianProcessRegressor
+            from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+        except ImportError as e:
+            raise StrategyOptimizerError(f"Bayesian search requires scikit-learn and scipy: {e}")
+
+        valid_grid = {k: v for k, v in param_grid.items() if v}
+        candidates = self._generate_param_combinations(valid_grid)
+        # Encode each combination by the normalised position of each value in its grid list
+        positions = np.array(list(itertools.product(*[range(len(v)) for v in valid_grid.values()])), dtype=float)
+        encoded = positions / np.maximum(np.array([len(v) - 1 for v in valid_grid.values()], dtype=float), 1.0)
+
+        n_iter = min(n_iter, len(candidates))
+        batch_size = batch_size or max(1, n_jobs)
+        rng = np.random.default_rng(seed)
+        evaluated_idx = list(rng.permutation(len(candidates))[:min(n_initial, n_iter)])
+        logger.info(f"Starting Bayesian search for {self.strategy_name} on {symbol}: {n_iter} of {len(candidates)} combinations")
+
+        with self._search_session(symbol, start_date, end_date, optimization_metric, init_cash,
+                                  commission_pct, n_jobs, checkpoint_path, param_grid, kwargs) as session:
+            records = session.evaluate([candidates[i] for i in evaluated_idx])
+
+            while len(evaluated_idx) < n_iter:
+                scores = np.array([r["metric_value"] for r in records], dtype=float)
+                finite = np.isfinite(scores)
+                remaining = np.setdiff1d(np.arange(len(candidates)), evaluated_idx)
+                take = min(batch_size, n_iter - len(evaluated_idx))
+
+                if finite.sum() < 2:
+                    next_idx = list(rng.permutation(remaining)[:take])
                 else:
-                    backtest_func_params = {**kwargs.get("backtest_func_kwargs", {})}
-                    stats_vbt = self.backtest_func( # vectorbt stats object
-                        price_data_with_signals=price_data_with_signals,
-                        init_cash=init_cash,
-                        commission_pct=commission_pct,
-                        **backtest_func_params
+                    # Failed runs are modelled as slightly worse than the worst successful one
+                    floor = scores[finite].min() - (np.ptp(scores[finite]) or 1.0)
+                    targets = np.where(finite, scores, floor)
+                    gp = GaussianProcessRegressor(
+                        kernel=Matern(nu=2.5) + WhiteKernel(), normalize_y=True, random_state=seed
                     )
+                    gp.fit(encoded[evaluated_idx], targets)
+                    mean, std = gp.predict(encoded[remaining], return_std=True)
+                    improvement = mean - targets.max()
+                    z = np.divide(improvement, std, out=np.zeros_like(std), where=std > 0)
+                    expected_improvement = improvement * norm.cdf(z) + std * norm.pdf(z)
+                    next_idx = list(remaining[np.argsort(-expected_improvement)[:take]])
+
+                evaluated_idx.extend(next_idx)
+                records.extend(session.evaluate([candidates[i] for i in next_idx]))
+
+        return self._build_search_result("bayesian", symbol, optimization_metric, records)
 
-                    if stats_vbt is None:
-                        logger.warning(f"Backtest failed for params: {params}.")
-                        error_for_run = "Backtest failed"
-                    elif not isinstance(stats_vbt, pd.Series) and not isinstance(stats_vbt, dict):
-                        # Assuming stats_vbt is a vectorbt StatsEntry which is Series-like or Dict-like
-                        logger.warning(f"Backtest stats for params: {params} is not a Series or Dict. Type: {type(stats_vbt)}")
-                        error_for_run = "Non-standard stats format"
-                    elif optimization_metric not in stats_vbt:
-                        logger.warning(f"Metric '{optimization_metric}' not found in stats for params: {params}. Available: {list(stats_vbt.keys())}")
-                        error_for_run = f"Metric '{optimization_metric}' not found"
-                    else:
-                        current_metric_value = stats_vbt[optimization_metric]
-                        if pd.isna(current_metric_value):
-                            logger.warning(f"Metric '{optimization_metric}' is NaN for params: {params}. Treating as poor performance.")
-                            current_metric_value = -np.inf
-                        stats_for_run = dict(stats_vbt) # Convert to dict for storing
-
-                if current_metric_value > best_performance:
-                    best_performance = current_metric_value
-                    best_params = params
-                    best_stats_dict = stats_for_run
-                    logger.info(f"New best performance: {optimization_metric} = {best_performance:.4f} with params: {best_params}")
-
-            except Exception as e:
-                logger.error(f"Error during optimization run with params {params}: {e}", exc_info=True)
-                error_for_run = str(e)
+    # Search machinery
 
+    def _search_session(self, symbol, start_date, end_date, optimization_metric, init_cash,
+                        commission_pct, n_jobs, checkpoint_path, param_grid, kwargs) -> "_SearchSession":
+        price_data = None
+        if self.accepts_price_data and self.data_fetch_func is not None:
+            data_fetch_kwargs = dict(kwargs.get("data_fetch_kwargs", {}))
+            if self.data_fetch_func is fetch_ohlcv_data and "data_provider" in kwargs.get("signal_func_kwargs", {}):
+                data_fetch_kwargs.setdefault("data_provider", kwargs["signal_func_kwargs"]["data_provider"])
+            if self.data_fetch_func is fetch_ohlcv_data and self.bar_store is not None:
+                data_fetch_kwargs.setdefault("bar_store", self.bar_store)
+            price_data = self.data_fetch_func(symbol, start_date, end_date, **data_fetch_kwargs)
+            if price_data is None or price_data.empty:
+                raise StrategyOptimizerError(f"Could not fetch price data for {symbol} ({start_date} to {end_date}).")
+            logger.info(f"Fetched {len(price_data)} bars for {symbol} once; sharing across all optimization runs")
+
+        context = {
+            "signal_func": self.signal_func,
+            "backtest_func": self.backtest_func,
+            "symbol": symbol,
+            "start_date": start_date,
+            "end_date": end_date,
+            "price_data": price_data,
+            "optimization_metric": optimization_metric,
+            "init_cash": init_cash,
+            "commission_pct": commission_pct,
+            "signal_func_kwargs": kwargs.get("signal_func_kwargs", {}),
+            "backtest_func_kwargs": kwargs.get("backtest_func_kwargs", {}),
+        }
+        checkpoint_header = _checkpoint_header(self.strategy_name, context, param_grid)
+        return _SearchSession(context, n_jobs, checkpoint_path, checkpoint_header)
+
+    def _build_search_result(self, search_method: str, symbol: str, optimization_metric: str,
+                             records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        best_performance = -np.inf
+        best_params = None
+        best_stats_dict = None
+        results_summary = []
+
+        for record in records:
+            if record["metric_value"] > best_performance:
+                best_performance = record["metric_value"]
+                best_params = record["params"]
+                best_stats_dict = record["stats"]
             results_summary.append({
-                "params": params,
-                "metric_value": current_metric_value if current_metric_value != -np.inf else "N/A",
-                "error": error_for_run,
-                # "full_stats_preview": {k: v for k, v in stats_for_run.items() if k in ['Total Return [%]', 'Sharpe Ratio', 'Sortino Ratio', 'Win Rate [%]', 'Total Trades']} if stats_for_run else None
+                "params": record["params"],
+                "metric_value": record["metric_value"] if record["metric_value"] != -np.inf else "N/A",
+                "error": record["error"],
             })
 
-
         if best_params is not None:
-            logger.info(f"Grid search completed for {self.strategy_name} on {symbol}.")
+            logger.info(f"{search_method} search completed for {self.strategy_name} on {symbol}.")
             logger.info(f"Best parameters found: {best_params}")
             logger.info(f"Best {optimization_metric}: {best_performance:.4f}")
             return {
                 "strategy_name": self.strategy_name,
                 "symbol": symbol,
+                "search_method": search_method,
                 "best_parameters": best_params,
                 "optimized_metric": optimization_metric,
                 "best_metric_value": best_performance if best_performance != -np.inf else None, # Return None if still -np.inf
@@ -176,9 +494,119 @@ class StrategyOptimizer:
                 "all_run_results": results_summary
             }
         else:
-            logger.warning(f"Grid search for {self.strategy_name} on {symbol} did not find any successful parameter combination yielding positive performance improvement.")
+            logger.warning(f"{search_method} search for {self.strategy_name} on {symbol} did not find any successful parameter combination yielding positive performance improvement.")
             return {"error": "No successful parameter combination found or performance did not improve.", "all_run_results": results_summary}
 
+
+class _SearchSession:
+    """
+    Evaluates parameter batches for one search: optional process-pool fan-out with the
+    shared context loaded once per worker, and a JSONL checkpoint (a header line, then one
+    line per evaluated combination) so an interrupted search resumes without re-running
+    completed combinations.
+    """
+
+    def __init__(self, context: Dict[str, Any], n_jobs: int, checkpoint_path: Optional[str], checkpoint_header: Dict[str, Any]):
+        self.context = context
+        self.n_jobs = max(1, n_jobs if n_jobs > 0 else (os.cpu_count() or 1))
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_header = checkpoint_header
+        self.completed: Dict[str, Dict[str, Any]] = self._load_checkpoint()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.checkpoint_file = None
+
+    def __enter__(self) -> "_SearchSession":
+        if self.checkpoint_path:
+            self.checkpoint_file = self._open_checkpoint()
+        if self.n_jobs > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.n_jobs, initializer=_init_worker, initargs=(self.context,)
+            )
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.checkpoint_file is not None:
+            self.checkpoint_file.close()
+            self.checkpoint_file = None
+
+    def evaluate(self, param_list: List[Dict[str, Any]], data_fraction: float = 1.0) -> List[Dict[str, Any]]:
+        """Evaluates combinations (skipping checkpointed ones) and returns records in input order."""
+        keys = [_param_key(params, data_fraction) for params in param_list]
+        pending = [(key, params) for key, params in zip(keys, param_list) if key not in self.completed]
+        if len(pending) < len(param_list):
+            logger.info(f"Resuming from checkpoint: {len(param_list) - len(pending)} of {len(param_list)} combinations already evaluated")
+
+        pending_params = [params for _, params in pending]
+        if self.executor is not None:
+            records = self.executor.map(_evaluate_in_worker, pending_params, itertools.repeat(data_fraction))
+        else:
+            records = (_evaluate_params(self.context, params, data_fraction) for params in pending_params)
+
+        # Each result is checkpointed as it arrives, so at most the in-flight runs are lost on interruption
+        log_every = max(self.n_jobs * 4, 1)
+        for done, ((key, _), record) in enumerate(zip(pending, records), start=1):
+            self.completed[key] = record
+            self._append_checkpoint(key, record)
+            if done % log_every == 0 or done == len(pending):
+                logger.info(f"Evaluated {done}/{len(pending)} combinations")
+
+        return [self.completed[key] for key in keys]
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                lines = f.read().splitlines()
+            header = json.loads(lines[0])["header"] if lines else None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable optimizer checkpoint {self.checkpoint_path}: {e}")
+            return {}
+        if header is None:
+            return {}
+
+        if header != self.checkpoint_header:
+            raise StrategyOptimizerError(f"Checkpoint {self.checkpoint_path} belongs to a different search: {header}")
+        completed = {}
+        for line_number, line in enumerate(lines[1:], start=2):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Only the last line can be cut short by an interruption mid-write
+                logger.warning(f"Skipping truncated line {line_number} of optimizer checkpoint {self.checkpoint_path}")
+                continue
+            record = entry["record"]
+            record["metric_value"] = float(record["metric_value"])
+            completed[entry["key"]] = record
+        return completed
+
+    def _open_checkpoint(self):
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        if self.completed:
+            f = open(self.checkpoint_path, "a")
+            # Drop a line cut short by an interruption so appends start on a fresh line
+            if f.tell() > 0:
+                with open(self.checkpoint_path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b"\n":
+                        f.write("\n")
+            return f
+        f = open(self.checkpoint_path, "w")
+        f.write(json.dumps({"header": self.checkpoint_header}) + "\n")
+        f.flush()
+        return f
+
+    def _append_checkpoint(self, key: str, record: Dict[str, Any]):
+        if self.checkpoint_file is None:
+            return
+        # vectorbt Timestamps/Timedeltas in stats are stored as strings
+        self.checkpoint_file.write(json.dumps({"key": key, "record": record}, default=str) + "\n")
+        self.checkpoint_file.flush()
+
 # Example of how to use it (conceptual, would be in a script or service)
 # if __name__ == "__main__":
 #     # This example assumes DarvasBox strategy functions are correctly imported and work.
@@ -212,6 +640,8 @@ class StrategyOptimizer:
 #         end_date="2023-06-30",
 #         param_grid=darvas_param_grid,
 #         optimization_metric="Sharpe Ratio", # Ensure this matches key in vbt stats
+#         n_jobs=4, # Fan out across processes; price data is fetched once and shared
+#         checkpoint_path="darvas_aapl_search.jsonl", # Re-running resumes from completed combinations
 #         # Example of passing fixed kwargs to signal_func if needed:
 #         # signal_func_kwargs={"data_provider": "fmp"}
 #     )
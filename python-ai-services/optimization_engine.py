@@ -5,13 +5,21 @@ Advanced caching, optimization, and performance monitoring system
 """
 
 import asyncio
-import json
+import heapq
 import logging
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
+import zlib
 import psutil
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -19,8 +27,8 @@ import uvicorn
 from pydantic import BaseModel, Field
 import uuid
 from enum import Enum
-import redis
-from collections import defaultdict, deque
+import redis.asyncio as aioredis
+from collections import OrderedDict, defaultdict, deque
 import numpy as np
 
 # Configure logging
@@ -128,6 +136,563 @@ class OptimizationRequest(BaseModel):
     metrics: List[MetricType] = Field(default=[], description="Metrics to optimize")
     constraints: Dict[str, Any] = Field(default={}, description="Optimization constraints")
 
+# Cache tiers
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate in-memory footprint of a value without serializing it"""
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
+class LRUEviction:
+    """Least-recently-used ordering; every operation is O(1)"""
+    name = "lru"
+
+    def __init__(self):
+        self.order = OrderedDict()
+
+    def on_insert(self, key: str, entry: CacheEntry):
+        self.order[key] = None
+        self.order.move_to_end(key)
+
+    def on_access(self, key: str, entry: CacheEntry):
+        self.order.move_to_end(key)
+
+    def on_remove(self, key: str):
+        self.order.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        return next(iter(self.order), None)
+
+class LFUEviction:
+    """Least-frequently-used with frequency buckets (LRU within a bucket); O(1) per operation"""
+    name = "lfu"
+
+    def __init__(self):
+        self.frequencies: Dict[str, int] = {}
+        self.buckets: Dict[int, OrderedDict] = defaultdict(OrderedDict)
+        self.min_frequency = 0
+
+    def on_insert(self, key: str, entry: CacheEntry):
+        if key in self.frequencies:
+            self.on_access(key, entry)
+            return
+        self.frequencies[key] = 1
+        self.buckets[1][key] = None
+        self.min_frequency = 1
+
+    def on_access(self, key: str, entry: CacheEntry):
+        frequency = self.frequencies[key]
+        bucket = self.buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[frequency]
+            if self.min_frequency == frequency:
+                self.min_frequency = frequency + 1
+        self.frequencies[key] = frequency + 1
+        self.buckets[frequency + 1][key] = None
+
+    def on_remove(self, key: str):
+        frequency = self.frequencies.pop(key, None)
+        if frequency is None:
+            return
+        bucket = self.buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[frequency]
+
+    def victim(self) -> Optional[str]:
+        if not self.frequencies:
+            return None
+        if self.min_frequency not in self.buckets:
+            # Only happens after the minimum bucket was emptied by a removal
+            self.min_frequency = min(self.buckets)
+        return next(iter(self.buckets[self.min_frequency]))
+
+class TTLEviction:
+    """Evicts the entry closest to expiry using a lazily-invalidated heap"""
+    name = "ttl"
+
+    def __init__(self):
+        self.heap: List[tuple] = []
+        self.expiry: Dict[str, float] = {}
+        self._sequence = 0
+
+    def on_insert(self, key: str, entry: CacheEntry):
+        expires_at = entry.created_at + entry.ttl if entry.ttl else float('inf')
+        self.expiry[key] = expires_at
+        self._sequence += 1
+        heapq.heappush(self.heap, (expires_at, self._sequence, key))
+
+    def on_access(self, key: str, entry: CacheEntry):
+        pass
+
+    def on_remove(self, key: str):
+        self.expiry.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        while self.heap:
+            expires_at, _, key = self.heap[0]
+            if self.expiry.get(key) == expires_at:
+                return key
+            heapq.heappop(self.heap)  # stale: key removed or re-inserted
+        return None
+
+EVICTION_POLICIES = {
+    'lru': LRUEviction,
+    'lfu': LFUEviction,
+    'ttl': TTLEviction
+}
+
+class CacheTier(ABC):
+    """Common stats and latency bookkeeping for a cache layer"""
+
+    def __init__(self, name: str, cache_type: CacheType, config: Dict[str, Any]):
+        if config.get('eviction_policy', 'lru') not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {config['eviction_policy']}")
+        self.name = name
+        self.type = cache_type
+        self.config = config
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'sets': 0, 'errors': 0}
+        self.get_latencies = deque(maxlen=1000)
+        self.set_latencies = deque(maxlen=1000)
+
+    @property
+    def eviction_policy(self) -> str:
+        return self.config.get('eviction_policy', 'lru')
+
+    async def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
+        try:
+            value = await self._get(key)
+        except Exception as e:
+            logger.warning(f"Cache layer {self.name} get failed: {e}")
+            self.stats['errors'] += 1
+            value = None
+        self.get_latencies.append((time.perf_counter() - started) * 1000)
+        self.stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        started = time.perf_counter()
+        try:
+            stored = await self._set(key, value, ttl or self.config['ttl'])
+        except Exception as e:
+            logger.warning(f"Cache layer {self.name} set failed: {e}")
+            self.stats['errors'] += 1
+            stored = False
+        self.set_latencies.append((time.perf_counter() - started) * 1000)
+        if stored:
+            self.stats['sets'] += 1
+        return stored
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Counters, hit rate and latency percentiles (milliseconds) for this layer"""
+        stats = self.stats.copy()
+        total_ops = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total_ops if total_ops > 0 else 0
+        for operation, latencies in (('get', self.get_latencies), ('set', self.set_latencies)):
+            if latencies:
+                samples = np.fromiter(latencies, dtype=float)
+                stats[f'{operation}_latency_ms'] = {
+                    'avg': float(samples.mean()),
+                    'p50': float(np.percentile(samples, 50)),
+                    'p99': float(np.percentile(samples, 99))
+                }
+        stats.update(await self._usage())
+        stats['type'] = self.type
+        stats['config'] = self.config
+        return stats
+
+    def _serialize(self, value: Any) -> bytes:
+        # Pickled so L2/L3 hits return the same types as L1 (Decimal, datetime, ...)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.config.get('compression'):
+            return b'z' + zlib.compress(payload)
+        return b'p' + payload
+
+    @staticmethod
+    def _deserialize(payload: bytes) -> Any:
+        if payload[:1] == b'z':
+            return pickle.loads(zlib.decompress(payload[1:]))
+        return pickle.loads(payload[1:])
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+        pass
+
+    @abstractmethod
+    async def _set(self, key: str, value: Any, ttl: int) -> bool:
+        """Store a value for ttl seconds; returns False if it was not stored"""
+        pass
+
+    @abstractmethod
+    async def _usage(self) -> Dict[str, Any]:
+        """Entry and byte counts reported by get_stats"""
+        pass
+
+class MemoryCacheTier(CacheTier):
+    """In-process L1 with O(1) eviction and an entry/byte budget"""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        super().__init__(name, CacheType.MEMORY, config)
+        self.entries: Dict[str, CacheEntry] = {}
+        self.policy = EVICTION_POLICIES[self.eviction_policy]()
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        now = time.time()
+        if entry.ttl and now > entry.created_at + entry.ttl:
+            self._remove(key)
+            return None
+        entry.last_accessed = now
+        entry.access_count += 1
+        self.policy.on_access(key, entry)
+        return entry.value
+
+    async def _set(self, key: str, value: Any, ttl: int) -> bool:
+        size_bytes = estimate_size(value)
+        max_bytes = self.config.get('max_bytes')
+        if max_bytes and size_bytes > max_bytes:
+            return False
+        if key in self.entries:
+            self._remove(key)
+
+        while self.entries and (
+            len(self.entries) >= self.config['max_size']
+            or (max_bytes and self.total_bytes + size_bytes > max_bytes)
+        ):
+            victim = self.policy.victim()
+            if victim is None:
+                # The policy has no live candidate left (e.g. an exhausted TTL heap); fall back to the oldest insert
+                victim = next(iter(self.entries))
+            self._remove(victim)
+            self.stats['evictions'] += 1
+
+        now = time.time()
+        entry = CacheEntry(
+            key=key,
+            value=value,
+            created_at=now,
+            last_accessed=now,
+            access_count=1,
+            ttl=ttl,
+            size_bytes=size_bytes,
+            metadata={'layer': self.name}
+        )
+        self.entries[key] = entry
+        self.total_bytes += size_bytes
+        self.policy.on_insert(key, entry)
+        return True
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size_bytes
+        self.policy.on_remove(key)
+
+    async def _usage(self) -> Dict[str, Any]:
+        return {'entries': len(self.entries), 'bytes': self.total_bytes}
+
+class RedisCacheTier(CacheTier):
+    """Shared L2 backed by Redis.
+
+    Values live under ``<namespace>:v:<key>`` with a native expiry; a sorted-set
+    index scored by the eviction policy (last access, hit count or expiry time)
+    keeps the entry budget and byte budget enforceable with ZPOPMIN. When Redis
+    is unreachable the layer degrades to misses and retries after a backoff.
+    """
+
+    RECONNECT_BACKOFF_SECONDS = 30
+
+    def __init__(self, name: str, config: Dict[str, Any], redis_url: str, namespace: str = "optimization_cache"):
+        super().__init__(name, CacheType.REDIS, config)
+        self.redis_url = redis_url
+        self.namespace = f"{namespace}:{name}"
+        self.index_key = f"{self.namespace}:idx"
+        self.sizes_key = f"{self.namespace}:sizes"
+        self.bytes_key = f"{self.namespace}:bytes"
+        self.client = None
+        self._unavailable_until = 0.0
+
+    def _value_key(self, key: str) -> str:
+        return f"{self.namespace}:v:{key}"
+
+    async def _client(self):
+        if self.client is not None:
+            return self.client
+        if time.time() < self._unavailable_until:
+            return None
+        client = aioredis.from_url(self.redis_url)
+        try:
+            await client.ping()
+        except Exception as e:
+            logger.warning(f"Redis cache layer {self.name} unavailable ({e}); retrying in {self.RECONNECT_BACKOFF_SECONDS}s")
+            self._unavailable_until = time.time() + self.RECONNECT_BACKOFF_SECONDS
+            await client.aclose()
+            return None
+        self.client = client
+        return client
+
+    def _mark_unavailable(self):
+        self.client = None
+        self._unavailable_until = time.time() + self.RECONNECT_BACKOFF_SECONDS
+
+    async def _get(self, key: str) -> Optional[Any]:
+        client = await self._client()
+        if client is None:
+            return None
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(self._value_key(key))
+                if self.eviction_policy == 'lru':
+                    pipe.zadd(self.index_key, {key: time.time()}, xx=True)
+                elif self.eviction_policy == 'lfu':
+                    pipe.zincrby(self.index_key, 1, key)
+                results = await pipe.execute()
+        except aioredis.ConnectionError:
+            self._mark_unavailable()
+            raise
+
+        payload = results[0]
+        if payload is None:
+            # Expired in Redis; drop the stale index entry
+            await self._forget([key])
+            return None
+        return self._deserialize(payload)
+
+    async def _set(self, key: str, value: Any, ttl: int) -> bool:
+        client = await self._client()
+        if client is None:
+            return False
+        payload = self._serialize(value)
+        max_bytes = self.config.get('max_bytes')
+        if max_bytes and len(payload) > max_bytes:
+            return False
+
+        if self.eviction_policy == 'ttl':
+            score = time.time() + ttl
+        elif self.eviction_policy == 'lfu':
+            score = 1
+        else:
+            score = time.time()
+
+        try:
+            previous_size = await client.hget(self.sizes_key, key)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(self._value_key(key), payload, ex=ttl)
+                pipe.zadd(self.index_key, {key: score})
+                pipe.hset(self.sizes_key, key, len(payload))
+                pipe.incrby(self.bytes_key, len(payload) - int(previous_size or 0))
+                pipe.zcard(self.index_key)
+                results = await pipe.execute()
+            await self._enforce_budget(client, key, entries=results[-1], total_bytes=results[-2])
+        except aioredis.ConnectionError:
+            self._mark_unavailable()
+            raise
+        return True
+
+    async def _enforce_budget(self, client, key: str, entries: int, total_bytes: int):
+        """Evict lowest-scored entries until within budget, never the key just written.
+
+        A new LFU entry scores lowest, so popping blindly would evict it first.
+        """
+        max_bytes = self.config.get('max_bytes')
+        while entries > self.config['max_size'] or (max_bytes and total_bytes > max_bytes):
+            popped = await client.zpopmin(self.index_key, 2)
+            victims = [member for member, _ in popped if self._decode(member) != key][:1]
+            kept = {member: score for member, score in popped if member not in victims}
+            if kept:
+                await client.zadd(self.index_key, kept)
+            if not victims:
+                break
+            total_bytes -= await self._forget(victims, indexed=False)
+            entries -= 1
+
+    async def _forget(self, keys: List[Any], indexed: bool = True) -> int:
+        """Remove keys and their bookkeeping; returns the bytes released"""
+        if not keys:
+            return 0
+        client = await self._client()
+        if client is None:
+            return 0
+        keys = [self._decode(k) for k in keys]
+        try:
+            sizes = await client.hmget(self.sizes_key, keys)
+            released = sum(int(size or 0) for size in sizes)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(*[self._value_key(k) for k in keys])
+                pipe.hdel(self.sizes_key, *keys)
+                pipe.decrby(self.bytes_key, released)
+                if indexed:
+                    pipe.zrem(self.index_key, *keys)
+                await pipe.execute()
+        except aioredis.ConnectionError:
+            self._mark_unavailable()
+            raise
+        if not indexed:
+            self.stats['evictions'] += len(keys)
+        return released
+
+    @staticmethod
+    def _decode(member: Any) -> str:
+        return member.decode() if isinstance(member, bytes) else member
+
+    async def _usage(self) -> Dict[str, Any]:
+        client = await self._client()
+        if client is None:
+            return {'entries': 0, 'bytes': 0, 'available': False}
+        try:
+            entries = await client.zcard(self.index_key)
+            total_bytes = await client.get(self.bytes_key)
+        except aioredis.ConnectionError:
+            self._mark_unavailable()
+            return {'entries': 0, 'bytes': 0, 'available': False}
+        return {'entries': entries, 'bytes': int(total_bytes or 0), 'available': True}
+
+class DiskCacheTier(CacheTier):
+    """Persistent L3 stored in SQLite (WAL, memory-mapped reads).
+
+    Eviction uses indexed ORDER BY on the policy column, so it never scans the
+    whole table. Blocking SQLite calls run in a worker thread.
+    """
+
+    POLICY_COLUMNS = {
+        'lru': 'last_accessed',
+        'lfu': 'access_count',
+        'ttl': 'expires_at'
+    }
+
+    def __init__(self, name: str, config: Dict[str, Any], path: str):
+        super().__init__(name, CacheType.DISK, config)
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(f"PRAGMA mmap_size={config.get('mmap_bytes', 256 * 1024 * 1024)}")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                access_count INTEGER NOT NULL
+            )
+            """
+        )
+        for column in self.POLICY_COLUMNS.values():
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_cache_entries_{column} ON cache_entries ({column})"
+            )
+        self.entry_count, self.total_bytes = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    async def _get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def _set(self, key: str, value: Any, ttl: int) -> bool:
+        payload = self._serialize(value)
+        return await asyncio.to_thread(self._set_sync, key, payload, ttl)
+
+    def _get_sync(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value, expires_at, size_bytes FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at, size_bytes = row
+            if now > expires_at:
+                self.connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self.entry_count -= 1
+                self.total_bytes -= size_bytes
+                return None
+            self.connection.execute(
+                "UPDATE cache_entries SET last_accessed = ?, access_count = access_count + 1 WHERE key = ?",
+                (now, key)
+            )
+        return self._deserialize(payload)
+
+    def _set_sync(self, key: str, payload: bytes, ttl: int) -> bool:
+        max_bytes = self.config.get('max_bytes')
+        if max_bytes and len(payload) > max_bytes:
+            return False
+        now = time.time()
+        with self._lock:
+            self.connection.execute("BEGIN")
+            try:
+                previous = self.connection.execute(
+                    "SELECT size_bytes FROM cache_entries WHERE key = ?", (key,)
+                ).fetchone()
+                if previous is not None:
+                    self.entry_count -= 1
+                    self.total_bytes -= previous[0]
+                    self.connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._evict_for(len(payload), now)
+                self.connection.execute(
+                    "INSERT INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now + ttl, now, 1)
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.entry_count += 1
+            self.total_bytes += len(payload)
+        return True
+
+    def _evict_for(self, incoming_bytes: int, now: float):
+        """Make room for one more entry; caller holds the lock inside a transaction"""
+        max_bytes = self.config.get('max_bytes')
+        order_column = self.POLICY_COLUMNS[self.eviction_policy]
+        expired = True
+        while self.entry_count and (
+            self.entry_count >= self.config['max_size']
+            or (max_bytes and self.total_bytes + incoming_bytes > max_bytes)
+        ):
+            if expired:
+                # Expired rows go first regardless of policy
+                rows = self.connection.execute(
+                    "SELECT key, size_bytes FROM cache_entries WHERE expires_at < ? LIMIT 256", (now,)
+                ).fetchall()
+                expired = bool(rows)
+            if not expired:
+                rows = self.connection.execute(
+                    f"SELECT key, size_bytes FROM cache_entries ORDER BY {order_column} LIMIT 1"
+                ).fetchall()
+                self.stats['evictions'] += len(rows)
+            if not rows:
+                break
+            self.connection.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k, _ in rows])
+            self.entry_count -= len(rows)
+            self.total_bytes -= sum(size for _, size in rows)
+
+    async def _usage(self) -> Dict[str, Any]:
+        return {'entries': self.entry_count, 'bytes': self.total_bytes, 'path': self.path}
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
 class PerformanceOptimizationEngine:
     def __init__(self):
         self.cache_layers = {}
@@ -146,39 +711,47 @@ class PerformanceOptimizationEngine:
         # Initialize optimization algorithms
         self._initialize_optimization_algorithms()
         
-        # Start background monitoring
+        # Background monitoring starts with the event loop (see startup_event)
         self.monitoring_active = True
-        asyncio.create_task(self._monitor_performance())
+        self.monitor_task: Optional[asyncio.Task] = None
         
         logger.info("Performance Optimization Engine initialized")
     
+    def start_monitoring(self):
+        """Start the background monitoring loop; needs a running event loop"""
+        if self.monitor_task is None:
+            self.monitor_task = asyncio.create_task(self._monitor_performance())
+    
     def _initialize_cache_layers(self):
         """Initialize multi-layer caching system"""
+        eviction_policy = os.getenv("CACHE_EVICTION_POLICY", "lru")
+        
         # L1 Cache: In-memory for hot data
-        self.cache_layers['l1'] = {
-            'type': CacheType.MEMORY,
-            'data': {},
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 1000, 'ttl': 300}  # 5 minutes
-        }
+        self.cache_layers['l1'] = MemoryCacheTier('l1', {
+            'max_size': 1000,
+            'max_bytes': 64 * 1024 * 1024,
+            'ttl': 300,  # 5 minutes
+            'eviction_policy': eviction_policy
+        })
         
         # L2 Cache: Redis for shared cache
-        self.cache_layers['l2'] = {
-            'type': CacheType.REDIS,
-            'data': {},  # Mock Redis interface
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 10000, 'ttl': 3600}  # 1 hour
-        }
+        self.cache_layers['l2'] = RedisCacheTier('l2', {
+            'max_size': 10000,
+            'max_bytes': 256 * 1024 * 1024,
+            'ttl': 3600,  # 1 hour
+            'eviction_policy': eviction_policy
+        }, redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
         
         # L3 Cache: Disk for large data
-        self.cache_layers['l3'] = {
-            'type': CacheType.DISK,
-            'data': {},  # Mock disk cache
-            'stats': {'hits': 0, 'misses': 0, 'evictions': 0},
-            'config': {'max_size': 100000, 'ttl': 86400}  # 24 hours
-        }
-        
-        logger.info("Multi-layer cache system initialized")
+        cache_dir = os.getenv("OPTIMIZATION_CACHE_DIR", tempfile.gettempdir())
+        self.cache_layers['l3'] = DiskCacheTier('l3', {
+            'max_size': 100000,
+            'max_bytes': 1024 * 1024 * 1024,
+            'ttl': 86400,  # 24 hours
+            'eviction_policy': eviction_policy
+        }, path=os.path.join(cache_dir, "optimization_engine_l3.sqlite"))
+        
+        logger.info(f"Multi-layer cache system initialized ({eviction_policy} eviction)")
     
     def _initialize_optimization_algorithms(self):
         """Initialize optimization algorithms"""
@@ -238,77 +811,11 @@ class PerformanceOptimizationEngine:
     
     async def _get_from_specific_layer(self, key: str, layer: str) -> Optional[Any]:
         """Get value from specific cache layer"""
-        cache_layer = self.cache_layers[layer]
-        
-        if key in cache_layer['data']:
-            entry = cache_layer['data'][key]
-            
-            # Check TTL
-            if entry.ttl and time.time() > entry.created_at + entry.ttl:
-                del cache_layer['data'][key]
-                cache_layer['stats']['misses'] += 1
-                return None
-            
-            # Update access statistics
-            entry.last_accessed = time.time()
-            entry.access_count += 1
-            cache_layer['stats']['hits'] += 1
-            
-            return entry.value
-        
-        cache_layer['stats']['misses'] += 1
-        return None
+        return await self.cache_layers[layer].get(key)
     
     async def _set_to_specific_layer(self, key: str, value: Any, layer: str, ttl: int = None) -> bool:
         """Set value to specific cache layer"""
-        cache_layer = self.cache_layers[layer]
-        config = cache_layer['config']
-        
-        # Check size limits
-        if len(cache_layer['data']) >= config['max_size']:
-            await self._evict_cache_entries(layer)
-        
-        # Calculate entry size (simplified)
-        try:
-            size_bytes = len(json.dumps(value, default=str))
-        except:
-            size_bytes = 1024  # Default size
-        
-        # Create cache entry
-        entry = CacheEntry(
-            key=key,
-            value=value,
-            created_at=time.time(),
-            last_accessed=time.time(),
-            access_count=1,
-            ttl=ttl or config['ttl'],
-            size_bytes=size_bytes,
-            metadata={'layer': layer}
-        )
-        
-        cache_layer['data'][key] = entry
-        return True
-    
-    async def _evict_cache_entries(self, layer: str):
-        """Evict cache entries using LRU policy"""
-        cache_layer = self.cache_layers[layer]
-        
-        if not cache_layer['data']:
-            return
-        
-        # Sort by last access time (LRU)
-        sorted_entries = sorted(
-            cache_layer['data'].items(),
-            key=lambda x: x[1].last_accessed
-        )
-        
-        # Remove 10% of entries
-        evict_count = max(1, len(sorted_entries) // 10)
-        
-        for i in range(evict_count):
-            key, _ = sorted_entries[i]
-            del cache_layer['data'][key]
-            cache_layer['stats']['evictions'] += 1
+        return await self.cache_layers[layer].set(key, value, ttl)
     
     def _generate_cache_key(self, key: str) -> str:
         """Generate consistent cache key"""
@@ -367,8 +874,8 @@ class PerformanceOptimizationEngine:
             metrics['p99_latency'] = np.percentile(list(self.request_latencies), 99)
         
         # Calculate cache hit rates
-        total_hits = sum(layer['stats']['hits'] for layer in self.cache_layers.values())
-        total_requests = total_hits + sum(layer['stats']['misses'] for layer in self.cache_layers.values())
+        total_hits = sum(layer.stats['hits'] for layer in self.cache_layers.values())
+        total_requests = total_hits + sum(layer.stats['misses'] for layer in self.cache_layers.values())
         
         if total_requests > 0:
             metrics['cache_hit_rate'] = total_hits / total_requests
@@ -478,8 +985,7 @@ class PerformanceOptimizationEngine:
     
     def _calculate_cache_efficiency(self, layer: str) -> float:
         """Calculate cache layer efficiency"""
-        cache_layer = self.cache_layers[layer]
-        stats = cache_layer['stats']
+        stats = self.cache_layers[layer].stats
         
         total_operations = stats['hits'] + stats['misses']
         if total_operations == 0:
@@ -720,7 +1226,7 @@ class PerformanceOptimizationEngine:
                 
                 # Calculate and record cache hit rates
                 for layer_name, layer in self.cache_layers.items():
-                    stats = layer['stats']
+                    stats = layer.stats
                     total_ops = stats['hits'] + stats['misses']
                     
                     if total_ops > 0:
@@ -773,8 +1279,8 @@ class PerformanceOptimizationEngine:
             if action == "increase_cache_size":
                 # Increase cache sizes
                 multiplier = recommendation.parameters.get("l1_size_multiplier", 1.5)
-                self.cache_layers['l1']['config']['max_size'] = int(
-                    self.cache_layers['l1']['config']['max_size'] * multiplier
+                self.cache_layers['l1'].config['max_size'] = int(
+                    self.cache_layers['l1'].config['max_size'] * multiplier
                 )
                 
                 logger.info(f"Applied cache size optimization: L1 cache increased by {multiplier}x")
@@ -782,7 +1288,7 @@ class PerformanceOptimizationEngine:
             elif action == "optimize_memory":
                 # Enable compression for cache layers
                 for layer in self.cache_layers.values():
-                    layer['config']['compression'] = True
+                    layer.config['compression'] = True
                 
                 logger.info("Applied memory optimization: enabled compression")
             
@@ -796,6 +1302,10 @@ class PerformanceOptimizationEngine:
 optimization_engine = PerformanceOptimizationEngine()
 
 # API Endpoints
+@app.on_event("startup")
+async def startup_event():
+    optimization_engine.start_monitoring()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -822,15 +1332,7 @@ async def get_cache_stats():
     stats = {}
     
     for layer_name, layer in optimization_engine.cache_layers.items():
-        layer_stats = layer['stats'].copy()
-        layer_stats['entries'] = len(layer['data'])
-        layer_stats['config'] = layer['config']
-        
-        # Calculate hit rate
-        total_ops = layer_stats['hits'] + layer_stats['misses']
-        layer_stats['hit_rate'] = layer_stats['hits'] / total_ops if total_ops > 0 else 0
-        
-        stats[layer_name] = layer_stats
+        stats[layer_name] = await layer.get_stats()
     
     return {"cache_stats": stats}
 
@@ -4,7 +4,7 @@ Abstract base class for all market data providers with standardized interface
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, AsyncIterator, Tuple
 from datetime import datetime, timedelta
 import asyncio
 from loguru import logger
@@ -14,6 +14,7 @@ from python_ai_services.models.enhanced_market_data_models import (
     TechnicalIndicators, MarketOverview, ProviderStatus,
     MarketDataProvider, AssetType, TimeFrame
 )
+from python_ai_services.providers.quote_coalescer import QuoteCoalescer
 
 class MarketDataProviderError(Exception):
     """Base exception for market data provider errors"""
@@ -254,10 +255,24 @@ class ProviderManager:
     Handles provider selection, failover, and load balancing
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        quote_batch_window: float = 0.005,
+        quote_cache_ttl: float = 2.0,
+        max_quotes_per_request: int = 100
+    ):
         self.providers: Dict[MarketDataProvider, BaseMarketDataProvider] = {}
         self.primary_provider: Optional[MarketDataProvider] = None
         self.fallback_order: List[MarketDataProvider] = []
+        
+        # Concurrent quote requests are coalesced into batched get_quotes calls
+        self.quote_coalescer = QuoteCoalescer(
+            "provider_manager",
+            self._fetch_quote_batch,
+            batch_window=quote_batch_window,
+            max_batch_size=max_quotes_per_request,
+            ttl=quote_cache_ttl
+        )
     
     def register_provider(self, provider: BaseMarketDataProvider, is_primary: bool = False):
         """Register a market data provider"""
@@ -273,12 +288,19 @@ class ProviderManager:
         logger.info(f"Registered provider: {provider_name}")
     
     async def get_quote(self, symbol: str) -> PriceData:
-        """Get quote with automatic failover"""
-        return await self._execute_with_failover("get_quote", symbol)
+        """Get quote with automatic failover, batched with concurrent quote requests"""
+        quote = await self.quote_coalescer.get(symbol)
+        if quote is None:
+            raise MarketDataProviderError(f"All providers failed for get_quote: no quote for {symbol}")
+        return quote
     
     async def get_quotes(self, symbols: List[str]) -> List[PriceData]:
-        """Get multiple quotes with automatic failover"""
-        return await self._execute_with_failover("get_quotes", symbols)
+        """Get multiple quotes with automatic failover, batched with concurrent quote requests"""
+        quotes = await self.quote_coalescer.get_many(symbols)
+        found = [quote for quote in quotes.values() if quote is not None]
+        if quotes and not found:
+            raise MarketDataProviderError(f"All providers failed for get_quotes: no quotes for {', '.join(quotes)}")
+        return found
     
     async def get_historical_data(
         self, 
@@ -298,14 +320,43 @@ class ProviderManager:
             limit
         )
     
-    async def _execute_with_failover(self, method_name: str, *args, **kwargs) -> Any:
-        """Execute method with automatic provider failover"""
+    async def _fetch_quote_batch(self, symbols: List[str]) -> Dict[str, PriceData]:
+        """
+        Fetch one coalesced batch of quotes with a single get_quotes call per provider
+        Symbols a provider returns no quote for are retried on the next provider in failover order
+        """
+        quotes: Dict[str, PriceData] = {}
+        remaining = list(symbols)
+        last_exception = None
+        tried = False
+        
+        async for provider_name, provider in self._available_providers():
+            tried = True
+            try:
+                for quote in await provider.get_quotes(remaining):
+                    quotes[quote.symbol] = quote
+            except Exception as e:
+                last_exception = e
+                logger.warning(f"Provider {provider_name} failed for get_quotes: {e}")
+                continue
+            
+            remaining = [symbol for symbol in remaining if symbol not in quotes]
+            if not remaining:
+                break
+        
+        if not tried:
+            raise MarketDataProviderError("All providers failed for get_quotes: no active provider with rate limit headroom")
+        if not quotes and last_exception is not None:
+            raise MarketDataProviderError(f"All providers failed for get_quotes: {last_exception}")
+        
+        return quotes
+    
+    async def _available_providers(self) -> AsyncIterator[Tuple[MarketDataProvider, BaseMarketDataProvider]]:
+        """Yield active providers with rate limit headroom, primary first"""
         providers_to_try = [self.primary_provider] + [
             p for p in self.fallback_order if p != self.primary_provider
         ]
         
-        last_exception = None
-        
         for provider_name in providers_to_try:
             if provider_name not in self.providers:
                 continue
@@ -315,6 +366,17 @@ class ProviderManager:
             if not provider.status.is_active:
                 continue
             
+            # Skip providers that would reject the request rather than spend a retry on them
+            if not await provider._check_rate_limit():
+                continue
+            
+            yield provider_name, provider
+    
+    async def _execute_with_failover(self, method_name: str, *args, **kwargs) -> Any:
+        """Execute method with automatic provider failover"""
+        last_exception = None
+        
+        async for provider_name, provider in self._available_providers():
             try:
                 method = getattr(provider, method_name)
                 return await method(*args, **kwargs)
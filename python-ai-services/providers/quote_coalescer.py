@@ -0,0 +1,164 @@
+"""
+Quote Request Coalescer
+Single-flight, micro-batched quote fetching behind a short-TTL cache shared across services
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from loguru import logger
+
+# Fetches quotes for a batch of symbols in one upstream call; symbols without a quote are left out
+QuoteBatchFetcher = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+class QuoteCache:
+    """
+    Short-TTL quote cache keyed by (source, symbol)
+    One instance is shared by every coalescer in the process, so services reading the same
+    source reuse each other's quotes instead of refetching them
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+
+    def get(self, source: str, symbol: str) -> Optional[Any]:
+        """Return the cached quote, or None if missing or expired"""
+        entry = self._entries.get((source, symbol))
+        if entry is None:
+            return None
+        expires_at, quote = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[(source, symbol)]
+            return None
+        return quote
+
+    def put(self, source: str, symbol: str, quote: Any, ttl: float):
+        """Cache a quote for ttl seconds"""
+        key = (source, symbol)
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + ttl, quote)
+
+    def clear(self, source: Optional[str] = None):
+        """Drop every cached quote, or only those of one source"""
+        if source is None:
+            self._entries.clear()
+        else:
+            for key in [key for key in self._entries if key[0] == source]:
+                del self._entries[key]
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones until there is room"""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+shared_quote_cache = QuoteCache()
+
+class QuoteCoalescer:
+    """
+    Coalesces concurrent quote requests for one source into batched upstream calls
+
+    - Cache: quotes fetched within the last `ttl` seconds are served without a request
+    - Single-flight: a symbol already queued or being fetched is not requested again;
+      later callers wait on the same result
+    - Micro-batching: symbols requested within `batch_window` seconds of each other are
+      fetched together in one call to `fetch_batch`, at most `max_batch_size` per call
+    """
+
+    def __init__(
+        self,
+        source: str,
+        fetch_batch: QuoteBatchFetcher,
+        batch_window: float = 0.005,
+        max_batch_size: int = 100,
+        ttl: float = 2.0,
+        cache: Optional[QuoteCache] = None
+    ):
+        self.source = source
+        self.fetch_batch = fetch_batch
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.ttl = ttl
+        self.cache = cache if cache is not None else shared_quote_cache
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "batches": 0, "symbols_fetched": 0}
+
+    async def get(self, symbol: str) -> Optional[Any]:
+        """Get a quote for one symbol, or None if the source returned none"""
+        self.stats["requests"] += 1
+        quote = self.cache.get(self.source, symbol)
+        if quote is not None:
+            self.stats["cache_hits"] += 1
+            return quote
+
+        future = self._in_flight.get(symbol)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._in_flight[symbol] = future
+            self._pending[symbol] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shielded so a cancelled caller does not cancel the result other callers wait on
+        return await asyncio.shield(future)
+
+    async def get_many(self, symbols: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """Get quotes for several symbols; they join the same batch as concurrent requests"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        quotes = await asyncio.gather(*(self.get(symbol) for symbol in unique_symbols))
+        return dict(zip(unique_symbols, quotes))
+
+    def _flush(self):
+        """Dispatch the queued symbols as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._fetch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _fetch(self, batch: Dict[str, asyncio.Future]):
+        """Fetch one batch and resolve the futures waiting on it"""
+        self.stats["batches"] += 1
+        self.stats["symbols_fetched"] += len(batch)
+        try:
+            try:
+                quotes = await self.fetch_batch(list(batch))
+            except Exception as e:
+                logger.warning(f"{self.source}: quote batch of {len(batch)} symbols failed: {e}")
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for symbol, future in batch.items():
+                    quote = quotes.get(symbol)
+                    if quote is not None:
+                        self.cache.put(self.source, symbol, quote, self.ttl)
+                    if not future.done():
+                        future.set_result(quote)
+        finally:
+            for symbol, future in batch.items():
+                if self._in_flight.get(symbol) is future:
+                    del self._in_flight[symbol]
+                if not future.done():
+                    future.cancel()
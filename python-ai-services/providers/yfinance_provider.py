@@ -158,12 +158,13 @@ class YFinanceProvider(BaseMarketDataProvider):
             normalized_symbols = [self._normalize_symbol(s) for s in symbols]
             symbol_map = dict(zip(normalized_symbols, symbols))
             
-            # Download data for all symbols at once
+            # Download a few daily bars for all symbols at once: the last bar carries the
+            # current price and the day's range, the one before it the previous close
             data = await asyncio.get_event_loop().run_in_executor(
                 None, lambda: yf.download(
                     normalized_symbols, 
-                    period="1d", 
-                    interval="1m",
+                    period="5d", 
+                    interval="1d",
                     group_by='ticker',
                     progress=False
                 )
@@ -173,11 +174,13 @@ class YFinanceProvider(BaseMarketDataProvider):
             
             for norm_symbol, orig_symbol in symbol_map.items():
                 try:
-                    if len(normalized_symbols) == 1:
-                        symbol_data = data
-                    else:
+                    if isinstance(data.columns, pd.MultiIndex):
                         symbol_data = data[norm_symbol]
+                    else:
+                        symbol_data = data
                     
+                    # Rows are aligned across symbols, so e.g. stocks have empty weekend rows next to crypto
+                    symbol_data = symbol_data.dropna(subset=['Close'])
                     if symbol_data.empty:
                         continue
                     
@@ -199,8 +202,8 @@ class YFinanceProvider(BaseMarketDataProvider):
                         volume=Decimal(str(latest.get('Volume', 0))),
                         change=Decimal(str(change)),
                         change_percent=Decimal(str(change_percent)),
-                        high_24h=Decimal(str(symbol_data['High'].max())),
-                        low_24h=Decimal(str(symbol_data['Low'].min())),
+                        high_24h=Decimal(str(latest['High'])),
+                        low_24h=Decimal(str(latest['Low'])),
                         timestamp=datetime.utcnow(),
                         provider=self.get_provider_name(),
                         asset_type=self._determine_asset_type(orig_symbol)
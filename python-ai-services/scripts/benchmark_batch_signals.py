@@ -0,0 +1,81 @@
+"""
+Benchmark panel signal generation against one single-symbol call per symbol.
+
+Builds a panel of --symbols synthetic daily series with --bars bars each; a third of the
+symbols list late and a third delist early, so the panel has ragged starts and ends. Then:
+
+  1. Williams Alligator and Heikin Ashi: the vectorized panel pass versus calling the
+     single-symbol function per symbol. Entries and exits are checked to be identical.
+  2. Darvas Box (a per-symbol strategy): a sequential scan versus the process-pool fan-out
+     with --jobs workers.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_batch_signals.py --symbols 100 --bars 5000 --jobs 4
+"""
+
+import argparse
+import time
+from logging import getLogger, basicConfig, INFO, WARNING
+
+from python_ai_services.strategies.batch_signals import build_panel, panel_signals, batch_signals, _per_symbol_panel
+from python_ai_services.scripts.benchmark_darvas_signals import synthetic_bars
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def build_universe(num_symbols: int, num_bars: int):
+    frames = {}
+    for i in range(num_symbols):
+        bars = synthetic_bars(num_bars, seed=i)
+        if i % 3 == 1:
+            bars = bars.iloc[num_bars // 10:]
+        elif i % 3 == 2:
+            bars = bars.iloc[:num_bars - num_bars // 10]
+        frames[f"SYM{i:03d}"] = bars
+    return build_panel(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=4, help="Worker processes for the per-symbol fan-out")
+    args = parser.parse_args()
+    getLogger("python_ai_services").setLevel(WARNING)
+
+    panel = build_universe(args.symbols, args.bars)
+
+    # 1. Vectorized strategies
+    for strategy in ("williams_alligator", "heikin_ashi"):
+        started = time.perf_counter()
+        entries, exits = panel_signals(strategy, panel)
+        panel_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        loop_entries, loop_exits = _per_symbol_panel(strategy, panel, {}, 1, None)
+        loop_elapsed = time.perf_counter() - started
+        if not (entries.equals(loop_entries) and exits.equals(loop_exits)):
+            raise AssertionError(f"{strategy}: panel signals differ from the single-symbol function")
+        logger.info(
+            f"{strategy}: per-symbol calls {loop_elapsed:.2f} s, panel {panel_elapsed * 1000:.1f} ms "
+            f"({loop_elapsed / panel_elapsed:,.0f}x); {int(entries.values.sum())} entries, {int(exits.values.sum())} exits, identical"
+        )
+
+    # 2. Per-symbol fan-out
+    params = {"breakout_confirmation_bars": 0}
+    started = time.perf_counter()
+    sequential = batch_signals("darvas_box", panel, n_jobs=1, **params)
+    sequential_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    fanned_out = batch_signals("darvas_box", panel, n_jobs=args.jobs, **params)
+    fanned_out_elapsed = time.perf_counter() - started
+    if not sequential.equals(fanned_out):
+        raise AssertionError("darvas_box: fan-out signal table differs from the sequential one")
+    logger.info(
+        f"darvas_box: sequential {sequential_elapsed:.2f} s, {args.jobs} workers {fanned_out_elapsed:.2f} s "
+        f"({sequential_elapsed / fanned_out_elapsed:.1f}x); {len(sequential)} signals"
+    )
+
+
+if __name__ == "__main__":
+    main()
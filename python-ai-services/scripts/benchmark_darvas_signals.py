@@ -0,0 +1,177 @@
+"""
+Benchmark get_darvas_signals against the per-row pandas loop it replaced.
+
+Builds --symbols synthetic daily series of --bars bars each (a random walk with occasional
+volume spikes, so boxes form, break out and get stopped out) and runs both implementations
+on every series. With consistent bars a close can never exceed the box top while the box
+holds, so the strategy's default single confirmation bar yields no entries; confirmation
+bars of 0 (the default here) exercise breakouts and stop-losses. Signal columns (box_top,
+box_bottom, entries, exits) and the plot shapes are checked to be identical before timings
+are reported. The old loop only runs on the first --old-symbols series, since it takes
+seconds per series.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_darvas_signals.py --symbols 500 --bars 5000 --confirmation-bars 0
+"""
+
+import argparse
+import time
+from logging import getLogger, basicConfig, INFO, WARNING
+
+import numpy as np
+import pandas as pd
+import vectorbt as vbt
+
+from python_ai_services.strategies.darvas_box import (
+    get_darvas_signals, DEFAULT_LOOKBACK_PERIOD_DAYS, DEFAULT_MIN_BOX_DURATION_DAYS, DEFAULT_VOLUME_INCREASE_FACTOR,
+    DEFAULT_BOX_BREAKOUT_CONFIRMATION_BARS, DEFAULT_STOP_LOSS_ATR_MULTIPLIER, DEFAULT_ATR_PERIOD
+)
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def synthetic_bars(num_bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, num_bars)))
+    open_ = close * (1 + rng.normal(0, 0.004, num_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, num_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, num_bars)))
+    volume = rng.lognormal(13, 0.3, num_bars) * np.where(rng.random(num_bars) < 0.08, 2.5, 1.0)
+    index = pd.bdate_range("2000-01-03", periods=num_bars)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+# The loop from get_darvas_signals before vectorization, kept here as the baseline
+
+def old_darvas_signals(
+    price_data: pd.DataFrame,
+    lookback_period: int = DEFAULT_LOOKBACK_PERIOD_DAYS,
+    min_box_duration: int = DEFAULT_MIN_BOX_DURATION_DAYS,
+    volume_factor: float = DEFAULT_VOLUME_INCREASE_FACTOR,
+    breakout_confirmation_bars: int = DEFAULT_BOX_BREAKOUT_CONFIRMATION_BARS,
+    stop_loss_atr_multiplier: float = DEFAULT_STOP_LOSS_ATR_MULTIPLIER,
+    atr_period: int = DEFAULT_ATR_PERIOD
+):
+    price_data = price_data.copy()
+    price_data['box_top'] = np.nan
+    price_data['box_bottom'] = np.nan
+    price_data['entries'] = False
+    price_data['exits'] = False
+    atr_indicator = vbt.ATR.run(price_data['High'], price_data['Low'], price_data['Close'], window=atr_period, ewm=False)
+    price_data['atr'] = atr_indicator.atr.values
+    avg_volume = price_data['Volume'].rolling(window=lookback_period, min_periods=1).mean()
+
+    in_box = False
+    box_start_index = -1
+    current_box_top = np.nan
+    current_box_bottom = np.nan
+    entry_box_bottom_for_stop = np.nan
+    plot_shapes_data = []
+
+    for i in range(lookback_period, len(price_data)):
+        current_high = price_data['High'].iloc[i]
+        current_low = price_data['Low'].iloc[i]
+        current_close = price_data['Close'].iloc[i]
+        current_volume = price_data['Volume'].iloc[i]
+
+        if not in_box:
+            if current_high >= price_data['High'].iloc[i-lookback_period:i].max():
+                current_box_top = current_high
+                current_box_bottom = current_low
+                in_box = True
+                box_start_index = i
+
+        if in_box:
+            price_data.loc[price_data.index[i], 'box_top'] = current_box_top
+            if current_high > current_box_top:
+                current_box_top = current_high
+                current_box_bottom = current_low
+                box_start_index = i
+                price_data.loc[price_data.index[i], 'box_top'] = current_box_top
+                price_data.loc[price_data.index[i], 'box_bottom'] = np.nan
+            elif current_low < current_box_bottom:
+                if box_start_index != -1:
+                    plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(255,0,0,0.1)", line_color="red", name="Invalidated Box Attempt"))
+                in_box = False
+                current_box_top, current_box_bottom, entry_box_bottom_for_stop = np.nan, np.nan, np.nan
+            else:
+                price_data.loc[price_data.index[i], 'box_bottom'] = current_box_bottom
+                box_duration_bars = i - box_start_index + 1
+                if box_duration_bars >= min_box_duration:
+                    confirmed_breakout = True
+                    if breakout_confirmation_bars > 0:
+                        if current_close > current_box_top:
+                            start_confirm_idx = max(box_start_index, i - breakout_confirmation_bars + 1)
+                            if not (price_data['Close'].iloc[start_confirm_idx : i+1] > current_box_top).all():
+                                confirmed_breakout = False
+                        else:
+                            confirmed_breakout = False
+                    if confirmed_breakout and current_volume > avg_volume.iloc[i-1] * volume_factor:
+                        price_data.loc[price_data.index[i], 'entries'] = True
+                        entry_box_bottom_for_stop = current_box_bottom
+                        plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(0,255,0,0.2)", line_color="green", name="Entry Box"))
+                        in_box = False
+                        current_box_top, current_box_bottom = np.nan, np.nan
+
+        if not np.isnan(entry_box_bottom_for_stop) and not price_data['entries'].iloc[i]:
+            if not np.isnan(price_data['atr'].iloc[i]):
+                stop_price_level = entry_box_bottom_for_stop - (price_data['atr'].iloc[i] * stop_loss_atr_multiplier)
+                if current_low < stop_price_level:
+                    price_data.loc[price_data.index[i], 'exits'] = True
+                    entry_box_bottom_for_stop = np.nan
+
+    plot_shapes_df = pd.DataFrame(plot_shapes_data) if plot_shapes_data else pd.DataFrame()
+    return price_data, plot_shapes_df
+
+
+def check_equal(symbol: str, old, new):
+    old_signals, old_shapes = old
+    new_signals, new_shapes = new
+    pd.testing.assert_frame_equal(new_signals, old_signals, obj=f"{symbol} signals")
+    pd.testing.assert_frame_equal(new_shapes, old_shapes, obj=f"{symbol} plot shapes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=5000, help="Bars per symbol (5000 is about 20 years of daily bars)")
+    parser.add_argument("--old-symbols", type=int, default=3, help="Symbols also run through the old loop")
+    parser.add_argument("--confirmation-bars", type=int, default=0, help="breakout_confirmation_bars for both implementations")
+    args = parser.parse_args()
+    getLogger("python_ai_services").setLevel(WARNING)
+
+    universe = {f"SYM{i:03d}": synthetic_bars(args.bars, seed=i) for i in range(args.symbols)}
+
+    new_results = {}
+    started = time.perf_counter()
+    for symbol, bars in universe.items():
+        new_results[symbol] = get_darvas_signals(
+            symbol, "", "", breakout_confirmation_bars=args.confirmation_bars, price_data=bars
+        )
+    new_elapsed = time.perf_counter() - started
+
+    old_elapsed = 0.0
+    checked = list(universe)[:args.old_symbols]
+    for symbol in checked:
+        started = time.perf_counter()
+        old = old_darvas_signals(universe[symbol], breakout_confirmation_bars=args.confirmation_bars)
+        old_elapsed += time.perf_counter() - started
+        check_equal(symbol, old, new_results[symbol])
+    entries = sum(int(result[0]['entries'].sum()) for result in new_results.values())
+    exits = sum(int(result[0]['exits'].sum()) for result in new_results.values())
+    logger.info(f"{len(checked)} symbols identical to the old loop; {entries} entries and {exits} exits over the universe")
+
+    new_per_symbol = new_elapsed / args.symbols
+    old_per_symbol = old_elapsed / max(len(checked), 1)
+    logger.info(
+        f"per symbol ({args.bars} bars): old loop {old_per_symbol * 1000:.1f} ms, new {new_per_symbol * 1000:.2f} ms "
+        f"({old_per_symbol / new_per_symbol:,.0f}x)"
+    )
+    logger.info(
+        f"universe of {args.symbols}: new {new_elapsed:.2f} s, old loop (extrapolated) {old_per_symbol * args.symbols:.0f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark the TechnicalAnalysisEngine indicator cache against per-request recomputation.
+
+Builds one symbol with --bars hourly bars and measures the default indicator request
+(RSI, MACD, Bollinger, Stochastic, ADX):
+
+  1. the old pandas code recomputing every indicator over the full history, versus a cold
+     request (one vectorized pass over all columns) and a repeated request (cache hit);
+  2. streaming: --updates bars appended one at a time, each followed by a request, with the
+     old full recompute versus the incremental update.
+
+The latest values of every indicator column are checked against the old pandas code, both
+after the cold build and after the incremental updates, before timings are reported.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_indicator_cache.py --bars 5000 --updates 500
+"""
+
+import argparse
+import asyncio
+import time
+from logging import getLogger, basicConfig, INFO, WARNING
+
+import numpy as np
+import pandas as pd
+
+from python_ai_services.mcp_servers.technical_analysis_engine import TechnicalAnalysisEngine
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+SYMBOL = "BENCH"
+DEFAULT_INDICATORS = ["rsi", "macd", "bollinger", "stochastic", "adx"]
+
+
+# The per-indicator pandas code from TechnicalAnalysisEngine, kept here as the baseline
+
+def old_rsi(df, config):
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=config["period"]).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=config["period"]).mean()
+    return {"rsi": 100 - (100 / (1 + gain / loss))}
+
+
+def old_macd(df, config):
+    ema_fast = df['close'].ewm(span=config["fast"]).mean()
+    ema_slow = df['close'].ewm(span=config["slow"]).mean()
+    macd_line = ema_fast - ema_slow
+    signal_line = macd_line.ewm(span=config["signal"]).mean()
+    return {"macd": macd_line, "macd_signal": signal_line, "macd_histogram": macd_line - signal_line}
+
+
+def old_bollinger(df, config):
+    sma = df['close'].rolling(window=config["period"]).mean()
+    std = df['close'].rolling(window=config["period"]).std()
+    return {"bollinger_upper": sma + std * config["std_dev"], "bollinger_lower": sma - std * config["std_dev"]}
+
+
+def old_stochastic(df, config):
+    low_min = df['low'].rolling(window=config["k_period"]).min()
+    high_max = df['high'].rolling(window=config["k_period"]).max()
+    k_percent = 100 * ((df['close'] - low_min) / (high_max - low_min))
+    return {"stochastic_k": k_percent, "stochastic_d": k_percent.rolling(window=config["d_period"]).mean()}
+
+
+def old_williams_r(df, config):
+    high_max = df['high'].rolling(window=config["period"]).max()
+    low_min = df['low'].rolling(window=config["period"]).min()
+    return {"williams_r": -100 * ((high_max - df['close']) / (high_max - low_min))}
+
+
+def old_true_range(df):
+    return pd.concat([
+        df['high'] - df['low'],
+        (df['high'] - df['close'].shift()).abs(),
+        (df['low'] - df['close'].shift()).abs()
+    ], axis=1).max(axis=1)
+
+
+def old_adx(df, config):
+    period = config["period"]
+    high_diff = df['high'].diff()
+    low_diff = df['low'].diff().abs()
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+    atr = old_true_range(df).rolling(window=period).mean()
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    return {"adx": dx.rolling(window=period).mean(), "plus_di": plus_di, "minus_di": minus_di}
+
+
+def old_atr(df, config):
+    return {"atr": old_true_range(df).rolling(window=config["period"]).mean()}
+
+
+def old_obv(df, config):
+    obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
+    return {"obv": obv, "obv_trend": obv.rolling(window=20).mean(), "close_trend": df['close'].rolling(window=20).mean()}
+
+
+def old_vwap(df, config):
+    typical_price = (df['high'] + df['low'] + df['close']) / 3
+    return {"vwap": (typical_price * df['volume']).cumsum() / df['volume'].cumsum()}
+
+
+def old_ichimoku(df, config):
+    def midpoint(window):
+        return (df['high'].rolling(window=window).max() + df['low'].rolling(window=window).min()) / 2
+    tenkan_sen, kijun_sen = midpoint(config["tenkan"]), midpoint(config["kijun"])
+    return {
+        "tenkan_sen": tenkan_sen, "kijun_sen": kijun_sen,
+        "senkou_a": ((tenkan_sen + kijun_sen) / 2).shift(config["kijun"]),
+        "senkou_b": midpoint(config["senkou"]).shift(config["kijun"])
+    }
+
+
+OLD_INDICATORS = {
+    "rsi": old_rsi, "macd": old_macd, "bollinger": old_bollinger, "stochastic": old_stochastic,
+    "williams_r": old_williams_r, "adx": old_adx, "atr": old_atr, "obv": old_obv, "vwap": old_vwap,
+    "ichimoku": old_ichimoku
+}
+
+
+def old_request(df, configs, indicators):
+    return {name: OLD_INDICATORS[name](df, configs[name]) for name in indicators}
+
+
+def check_state(engine, df, label):
+    state = engine._indicator_states[SYMBOL, "1h"]
+    for results in old_request(df, engine.indicator_configs, OLD_INDICATORS).values():
+        for column, series in results.items():
+            expected = series.to_numpy(dtype=float)[-2:]
+            assert np.allclose(state.tail[column], expected, rtol=1e-9, atol=1e-9, equal_nan=True), (label, column)
+
+
+def make_bars(count, start, rng):
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, count))
+    spread = np.abs(rng.normal(0, 0.005, count))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=count, freq=pd.Timedelta(hours=1)),
+        "open": closes, "high": closes * (1 + spread), "low": closes * (1 - spread), "close": closes,
+        "volume": rng.lognormal(15, 1, count).astype(int)
+    })
+
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    engine = TechnicalAnalysisEngine()
+    bars = make_bars(args.bars + args.updates, pd.Timestamp("2024-01-01"), rng)
+    engine.market_data[SYMBOL] = bars.iloc[:args.bars].reset_index(drop=True)
+    df = engine.market_data[SYMBOL]
+    logger.info(f"{args.bars:,} bars, {args.updates:,} streamed updates")
+
+    # 1. Full recompute vs cold and repeated requests
+    started = time.perf_counter()
+    for _ in range(args.repeats):
+        old_request(df, engine.indicator_configs, DEFAULT_INDICATORS)
+    old_elapsed = (time.perf_counter() - started) / args.repeats
+
+    started = time.perf_counter()
+    await engine._calculate_indicators(df, DEFAULT_INDICATORS, SYMBOL)
+    cold_elapsed = time.perf_counter() - started
+    check_state(engine, df, "cold")
+
+    started = time.perf_counter()
+    for _ in range(args.repeats):
+        await engine._calculate_indicators(df, DEFAULT_INDICATORS, SYMBOL)
+    cached_elapsed = (time.perf_counter() - started) / args.repeats
+    logger.info(
+        f"request: old recompute {old_elapsed * 1000:.2f} ms, cold {cold_elapsed * 1000:.2f} ms "
+        f"(all columns), cached {cached_elapsed * 1e6:.1f} us ({old_elapsed / cached_elapsed:,.0f}x)"
+    )
+
+    # 2. One new bar per request
+    old_total = new_total = 0.0
+    for i in range(args.updates):
+        engine.append_market_bars(SYMBOL, bars.iloc[args.bars + i:args.bars + i + 1])
+        df = engine.market_data[SYMBOL]
+        started = time.perf_counter()
+        old_request(df, engine.indicator_configs, DEFAULT_INDICATORS)
+        old_total += time.perf_counter() - started
+        started = time.perf_counter()
+        await engine._calculate_indicators(df, DEFAULT_INDICATORS, SYMBOL)
+        new_total += time.perf_counter() - started
+    check_state(engine, df, "incremental")
+    logger.info(
+        f"per new bar: old recompute {old_total / args.updates * 1000:.2f} ms, "
+        f"incremental {new_total / args.updates * 1000:.3f} ms ({old_total / new_total:,.1f}x)"
+    )
+    logger.info(f"cache stats: {engine.indicator_cache_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=50, help="Requests timed without new bars")
+    args = parser.parse_args()
+    getLogger("python_ai_services").setLevel(WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
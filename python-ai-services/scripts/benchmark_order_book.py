@@ -0,0 +1,96 @@
+"""
+Benchmark incremental L2 book updates in the market microstructure server.
+
+Generates a synthetic delta stream (1-3 level changes per update, clustered near
+the top of book, ~10% deletions) and times it through
+MarketMicrostructure.apply_book_update, which also records the compact snapshot
+ring. Target: 100k updates/sec per symbol.
+
+Run from the python-ai-services directory:
+    python scripts/benchmark_order_book.py --updates 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from logging import getLogger, basicConfig, INFO
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_servers"))
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def synthetic_deltas(num_updates: int, levels: int, tick: float = 0.01, mid: float = 100.0, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    per_update = rng.integers(1, 4, num_updates)
+    total = int(per_update.sum())
+    is_bid = rng.random(total) < 0.5
+    distance = np.minimum(rng.geometric(0.15, total) - 1, levels - 1)  # ticks away from the touch
+    sizes = np.where(rng.random(total) < 0.1, 0.0, rng.lognormal(5, 1, total))
+    prices = np.round(np.where(is_bid, mid - tick * (1 + distance), mid + tick * (1 + distance)), 2)
+
+    updates = []
+    offset = 0
+    for count in per_update.tolist():
+        bids, asks = [], []
+        for j in range(offset, offset + count):
+            (bids if is_bid[j] else asks).append((float(prices[j]), float(sizes[j]), 1))
+        updates.append((bids, asks))
+        offset += count
+    return updates
+
+
+async def run(args):
+    # The server module starts background tasks at import, so it must load inside a running loop
+    import market_microstructure
+
+    engine = market_microstructure.microstructure
+    engine.processing_active = False
+
+    initial = [(round(100.0 - 0.01 * (1 + i), 2), 100.0, 1) for i in range(args.levels)]
+    initial_asks = [(round(100.0 + 0.01 * (1 + i), 2), 100.0, 1) for i in range(args.levels)]
+    engine.apply_book_update(args.symbol, initial, initial_asks, is_delta=False)
+
+    updates = synthetic_deltas(args.updates, args.levels)
+    apply_book_update = engine.apply_book_update
+    symbol = args.symbol
+
+    started = time.perf_counter()
+    for bids, asks in updates:
+        apply_book_update(symbol, bids, asks)
+    elapsed = time.perf_counter() - started
+
+    book = engine.order_books[symbol]
+    logger.info(
+        f"{args.updates:,} deltas in {elapsed:.2f}s -> {args.updates / elapsed:,.0f} updates/sec "
+        f"({elapsed / args.updates * 1e6:.2f} us/update); book has {len(book.bid_side)} bids / {len(book.ask_side)} asks"
+    )
+
+    started = time.perf_counter()
+    reads = 10_000
+    for i in range(reads):
+        bids, asks = updates[i]
+        apply_book_update(symbol, bids, asks)
+        book.depth
+        book.microstructure_signals
+    elapsed = time.perf_counter() - started
+    logger.info(f"update + depth/signal read: {reads / elapsed:,.0f} updates/sec")
+    logger.info(f"snapshot ring holds {len(engine.order_book_snapshots[symbol])} rows, latest spread {book.spread:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=1_000_000)
+    parser.add_argument("--levels", type=int, default=500, help="Price levels per side")
+    parser.add_argument("--symbol", default="AAPL")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark RenkoBrickBuilder against the list-of-dicts calculate_renko_bricks it replaced.
+
+Builds a --bars close series (a random walk) and, for each brick size in --brick-sizes
+(multiples of the median absolute bar move):
+
+  1. backtest: the old function versus calculate_renko_bricks, which now runs extend over the
+     whole series;
+  2. streaming: feeding the same prices one at a time through update versus rerunning the
+     old function over the history after every new price, the only option it offered. The
+     rerun is timed on the last --ticks prices only.
+
+The bricks from extend, from update and from the old function are checked to be identical
+before timings are reported.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_renko_builder.py --bars 100000 --ticks 200
+"""
+
+import argparse
+import time
+from logging import getLogger, basicConfig, INFO, WARNING
+
+import numpy as np
+import pandas as pd
+
+from python_ai_services.strategies.renko import RenkoBrickBuilder, calculate_renko_bricks
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+# calculate_renko_bricks before the builder, kept here as the baseline
+
+def old_calculate_renko_bricks(price_series: pd.Series, brick_size: float) -> pd.DataFrame:
+    if price_series.empty:
+        return pd.DataFrame()
+    renko_bricks_list = []
+    last_brick_close = price_series.iloc[0]
+    brick_type = 0
+
+    for timestamp, current_price in price_series.items():
+        if brick_type == 0:
+            if current_price >= last_brick_close + brick_size:
+                brick_type = 1
+                num_bricks = int((current_price - last_brick_close) / brick_size)
+                for i in range(num_bricks):
+                    brick_open = last_brick_close + i * brick_size
+                    brick_close = brick_open + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                last_brick_close = brick_close
+            elif current_price <= last_brick_close - brick_size:
+                brick_type = -1
+                num_bricks = int((last_brick_close - current_price) / brick_size)
+                for i in range(num_bricks):
+                    brick_open = last_brick_close - i * brick_size
+                    brick_close = brick_open - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                last_brick_close = brick_close
+            continue
+
+        if brick_type == 1:
+            if current_price >= last_brick_close + brick_size:
+                num_bricks = int((current_price - last_brick_close) / brick_size)
+                for _ in range(num_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                    last_brick_close = brick_close
+            elif current_price <= last_brick_close - 2 * brick_size:
+                brick_type = -1
+                brick_open = last_brick_close - brick_size
+                brick_close = brick_open - brick_size
+                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                     'low': brick_close, 'close': brick_close, 'type': -1})
+                last_brick_close = brick_close
+                num_additional_bricks = int(np.floor((last_brick_close - current_price) / brick_size))
+                for _ in range(num_additional_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                    last_brick_close = brick_close
+
+        elif brick_type == -1:
+            if current_price <= last_brick_close - brick_size:
+                num_bricks = int((last_brick_close - current_price) / brick_size)
+                for _ in range(num_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                    last_brick_close = brick_close
+            elif current_price >= last_brick_close + 2 * brick_size:
+                brick_type = 1
+                brick_open = last_brick_close + brick_size
+                brick_close = brick_open + brick_size
+                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                     'low': brick_open, 'close': brick_close, 'type': 1})
+                last_brick_close = brick_close
+                num_additional_bricks = int(np.floor((current_price - last_brick_close) / brick_size))
+                for _ in range(num_additional_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                    last_brick_close = brick_close
+
+    if not renko_bricks_list:
+        return pd.DataFrame()
+    return pd.DataFrame(renko_bricks_list).set_index('timestamp')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=100000)
+    parser.add_argument("--ticks", type=int, default=200, help="Trailing prices timed for the old rerun-per-tick approach")
+    parser.add_argument("--brick-sizes", type=float, nargs="+", default=[1.0, 4.0, 16.0],
+                        help="Brick sizes as multiples of the median absolute bar move")
+    args = parser.parse_args()
+    getLogger("python_ai_services").setLevel(WARNING)
+
+    rng = np.random.default_rng(7)
+    moves = rng.normal(0, 0.5, args.bars)
+    closes = pd.Series(100 + np.cumsum(moves), index=pd.date_range("2020-01-01", periods=args.bars, freq="min"))
+    median_move = float(np.median(np.abs(moves)))
+
+    for multiple in args.brick_sizes:
+        brick_size = round(multiple * median_move, 8)
+
+        started = time.perf_counter()
+        old = old_calculate_renko_bricks(closes, brick_size)
+        old_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        new = calculate_renko_bricks(closes, brick_size)
+        new_elapsed = time.perf_counter() - started
+        pd.testing.assert_frame_equal(new, old)
+
+        builder = RenkoBrickBuilder(brick_size)
+        started = time.perf_counter()
+        for timestamp, price in zip(closes.index, closes.to_numpy()):
+            builder.update(price, timestamp)
+        update_elapsed = time.perf_counter() - started
+        pd.testing.assert_frame_equal(builder.to_frame(), old, check_index_type=False)
+
+        started = time.perf_counter()
+        for end in range(args.bars - args.ticks, args.bars):
+            old_calculate_renko_bricks(closes.iloc[:end + 1], brick_size)
+        rerun_per_tick = (time.perf_counter() - started) / args.ticks
+
+        update_per_tick = update_elapsed / args.bars
+        logger.info(
+            f"brick {brick_size:g} ({len(old)} bricks): backtest old {old_elapsed * 1000:.0f} ms, "
+            f"extend {new_elapsed * 1000:.1f} ms ({old_elapsed / new_elapsed:,.0f}x); per tick: old rerun "
+            f"{rerun_per_tick * 1000:.1f} ms, update {update_per_tick * 1e6:.2f} us ({rerun_per_tick / update_per_tick:,.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark event-loop stall while TradeHistoryService records fills.
+
+A ticker coroutine wakes every millisecond and records how late it ran while fills
+arrive at a steady rate and are written to a file-backed SQLite database. Compares:
+
+    inline    - the sync session work run directly on the event loop (the old path)
+    executor  - record_fill, which runs the DB work on the service's worker thread
+    batched   - fills buffered per tick of --batch-ms and written with record_fills
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_trade_history_db.py --rate 1000 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from logging import getLogger, basicConfig, INFO
+
+from loguru import logger as service_logger
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from python_ai_services.core.database import Base
+from python_ai_services.core.latency_histogram import LatencyHistogram
+from python_ai_services.models.trade_history_models import TradeFillData
+from python_ai_services.services.trade_history_service import TradeHistoryService
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+MODES = ("inline", "executor", "batched")
+
+
+def make_fill(rng: random.Random, agent_id: str) -> TradeFillData:
+    return TradeFillData(
+        fill_id=str(uuid.uuid4()),
+        agent_id=agent_id,
+        timestamp=datetime.now(timezone.utc),
+        asset=rng.choice(["BTC/USD", "ETH/USD", "SOL/USD"]),
+        side=rng.choice(["buy", "buy", "sell"]),
+        quantity=rng.uniform(0.1, 2.0),
+        price=rng.uniform(90, 110),
+        fee=0.01,
+        fee_currency="USD"
+    )
+
+
+async def measure_stall(stop: asyncio.Event, interval: float, histogram: LatencyHistogram):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.record(max(0.0, loop.time() - expected) * 1000)
+
+
+async def run_mode(mode: str, args) -> LatencyHistogram:
+    path = os.path.join(tempfile.mkdtemp(), f"fills_{mode}.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    service = TradeHistoryService(session_factory=sessionmaker(bind=engine, autoflush=False))
+    rng = random.Random(0)
+    agent_ids = [f"agent_{i}" for i in range(args.agents)]
+
+    stall = LatencyHistogram()
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_stall(stop, 0.001, stall))
+    pending = []
+    loop = asyncio.get_running_loop()
+    total = int(args.rate * args.seconds)
+    batch_every = max(1, int(args.rate * args.batch_ms / 1000))
+    buffer = []
+
+    started = loop.time()
+    for i in range(total):
+        # Fills arrive on a fixed schedule; always yielding lets the ticker observe any backlog
+        await asyncio.sleep(max(0.0, started + i / args.rate - loop.time()))
+        fill = make_fill(rng, rng.choice(agent_ids))
+
+        if mode == "inline":
+            service._record_fills_sync([fill])
+        elif mode == "executor":
+            pending.append(asyncio.create_task(service.record_fill(fill)))
+        else:
+            buffer.append(fill)
+            if len(buffer) >= batch_every:
+                pending.append(asyncio.create_task(service.record_fills(buffer)))
+                buffer = []
+    if buffer:
+        pending.append(asyncio.create_task(service.record_fills(buffer)))
+    await asyncio.gather(*pending)
+    elapsed = loop.time() - started
+
+    stop.set()
+    await ticker
+    await service.cleanup()
+    engine.dispose()
+    logger.info(f"{mode}: {total:,} fills in {elapsed:.2f}s ({total / elapsed:,.0f} fills/sec achieved)")
+    return stall
+
+
+async def run(args):
+    results = {}
+    for mode in args.modes:
+        results[mode] = await run_mode(mode, args)
+
+    logger.info(f"Event-loop stall at {args.rate:,} fills/sec (ms late per 1ms tick):")
+    for mode, stall in results.items():
+        summary = stall.summary()
+        logger.info(
+            f"  {mode:<9} p50 {summary['p50']:7.2f}  p99 {summary['p99']:7.2f}  max {summary['max']:7.2f}  "
+            f"ticks {summary['count']:,}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=1000, help="Fills per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--batch-ms", type=float, default=50, help="Buffering window for the batched mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+    # Per-fill service logging would dominate the measurement
+    service_logger.disable("python_ai_services")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
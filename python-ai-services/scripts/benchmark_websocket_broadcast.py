@@ -0,0 +1,138 @@
+"""
+Load-test the WebSocket ConnectionManager fan-out with simulated clients.
+
+Most clients yield once per send; a small fraction are slow consumers that take
+--slow-delay seconds per message. The same workload is replayed through the old
+gather-per-broadcast approach for comparison, where every broadcast waits for the
+slowest socket.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/benchmark_websocket_broadcast.py --clients 5000
+"""
+
+import argparse
+import asyncio
+import time
+from logging import getLogger, basicConfig, INFO
+
+import numpy as np
+from loguru import logger as loguru_logger
+
+from python_ai_services.core.websocket_manager import ConnectionManager, SlowConsumerPolicy
+from python_ai_services.models.websocket_models import WebSocketEnvelope
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+class SimulatedWebSocket:
+    """Minimal stand-in for starlette's WebSocket that records delivery latency."""
+
+    def __init__(self, delay: float, sent_at: dict, latencies: list):
+        self.delay = delay
+        self.sent_at = sent_at
+        self.latencies = latencies
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received += 1
+        self.latencies.append(time.perf_counter() - self.sent_at[text])
+
+
+def make_clients(num_clients: int, slow_fraction: float, slow_delay: float, sent_at: dict):
+    fast_latencies, slow_latencies = [], []
+    num_slow = int(num_clients * slow_fraction)
+    clients = [
+        SimulatedWebSocket(slow_delay if i < num_slow else 0.0, sent_at,
+                           slow_latencies if i < num_slow else fast_latencies)
+        for i in range(num_clients)
+    ]
+    return clients, fast_latencies, slow_latencies
+
+
+def summarize(label: str, broadcast_seconds: list, fast_latencies: list, total_seconds: float):
+    calls = np.array(broadcast_seconds) * 1000
+    delivery = np.array(fast_latencies) * 1000
+    logger.info(
+        f"{label}: total {total_seconds:.2f}s | broadcast call avg {calls.mean():.2f}ms p99 {np.percentile(calls, 99):.2f}ms | "
+        f"fast-client delivery p50 {np.percentile(delivery, 50):.1f}ms p99 {np.percentile(delivery, 99):.1f}ms"
+    )
+
+
+async def run_manager(args) -> None:
+    sent_at = {}
+    clients, fast_latencies, slow_latencies = make_clients(args.clients, args.slow_fraction, args.slow_delay, sent_at)
+    manager = ConnectionManager(max_queue_size=args.queue_size, slow_consumer_policy=SlowConsumerPolicy(args.policy))
+    for i, websocket in enumerate(clients):
+        await manager.connect(websocket, f"client_{i % (args.clients // 2 or 1)}")  # two sockets per client_id
+
+    broadcast_seconds = []
+    started = time.perf_counter()
+    for seq in range(args.messages):
+        envelope = WebSocketEnvelope(event_type="PRICE_UPDATE", payload={"seq": seq, "price": 100.0 + seq})
+        call_started = time.perf_counter()
+        sent_at[envelope.model_dump_json()] = call_started
+        await manager.broadcast_to_all(envelope)
+        broadcast_seconds.append(time.perf_counter() - call_started)
+        await asyncio.sleep(args.interval)
+
+    fast = [c for c in clients if not c.delay]
+    while sum(c.received for c in fast) < len(fast) * args.messages:
+        await asyncio.sleep(0.01)
+    total_seconds = time.perf_counter() - started
+    summarize("queued fan-out", broadcast_seconds, fast_latencies, total_seconds)
+    stats = manager.get_stats()
+    logger.info(
+        f"queued fan-out: {stats['connections']:,} connections, sent {stats['sent']:,}, "
+        f"dropped {stats['dropped']:,}, max queue depth {stats['max_queue_depth']}"
+    )
+    for client_connections in list(manager.active_connections.values()):
+        for connection in client_connections:
+            connection.writer_task.cancel()
+
+
+async def run_gather_baseline(args) -> None:
+    sent_at = {}
+    clients, fast_latencies, _ = make_clients(args.clients, args.slow_fraction, args.slow_delay, sent_at)
+
+    broadcast_seconds = []
+    started = time.perf_counter()
+    for seq in range(args.messages):
+        message_json = WebSocketEnvelope(event_type="PRICE_UPDATE", payload={"seq": seq}).model_dump_json()
+        call_started = time.perf_counter()
+        sent_at[message_json] = call_started
+        await asyncio.gather(*(c.send_text(message_json) for c in clients), return_exceptions=True)
+        broadcast_seconds.append(time.perf_counter() - call_started)
+        await asyncio.sleep(args.interval)
+    summarize("gather baseline", broadcast_seconds, fast_latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between broadcasts")
+    parser.add_argument("--slow-fraction", type=float, default=0.01)
+    parser.add_argument("--slow-delay", type=float, default=0.1)
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--policy", default=SlowConsumerPolicy.DROP_OLDEST.value,
+                        choices=[p.value for p in SlowConsumerPolicy])
+    args = parser.parse_args()
+
+    loguru_logger.remove()  # per-connection connect logs would dominate the timing
+    asyncio.run(run_manager(args))
+    asyncio.run(run_gather_baseline(args))
+
+
+if __name__ == "__main__":
+    main()
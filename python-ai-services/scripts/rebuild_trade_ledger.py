@@ -0,0 +1,73 @@
+"""
+Rebuild and verify the FIFO lot ledger behind TradeHistoryService.
+
+record_fill keeps closed trades and open lots up to date, but databases holding
+fills recorded before the ledger existed (or fills written directly to
+trade_fills) need a one-off rebuild. Verification replays each agent's fills with
+the full FIFO algorithm and compares the result against the stored ledger.
+
+Run from the directory containing the python_ai_services package:
+    python python_ai_services/scripts/rebuild_trade_ledger.py              # verify, rebuild agents that differ
+    python python_ai_services/scripts/rebuild_trade_ledger.py --verify-only
+    python python_ai_services/scripts/rebuild_trade_ledger.py --agent agent_1 --force
+"""
+
+import argparse
+import asyncio
+import sys
+from logging import getLogger, basicConfig, INFO
+
+from sqlalchemy import select
+
+from python_ai_services.core.database import SessionLocal, Base, engine
+from python_ai_services.models.db_models import TradeFillDB
+from python_ai_services.services.trade_history_service import TradeHistoryService
+
+basicConfig(level=INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = getLogger(__name__)
+
+
+def all_agent_ids():
+    db = SessionLocal()
+    try:
+        return list(db.execute(select(TradeFillDB.agent_id).distinct().order_by(TradeFillDB.agent_id)).scalars())
+    finally:
+        db.close()
+
+
+async def run(args) -> int:
+    Base.metadata.create_all(bind=engine)  # Adds the ledger tables to existing databases
+    service = TradeHistoryService(session_factory=SessionLocal)
+    agent_ids = args.agent or all_agent_ids()
+
+    inconsistent = []
+    for agent_id in agent_ids:
+        report = await service.verify_ledger(agent_id)
+        if (args.force or not report["consistent"]) and not args.verify_only:
+            await service.rebuild_ledger(agent_id)
+            report = await service.verify_ledger(agent_id)
+
+        status = "ok" if report["consistent"] else "MISMATCH"
+        logger.info(
+            f"{agent_id}: {status} - {report['closed_trades']} closed trades, {report['open_lots']} open lots"
+            + (f", {len(report['mismatched_trades'])} trades / {len(report['mismatched_lots'])} lots differ"
+               if not report["consistent"] else "")
+        )
+        if not report["consistent"]:
+            inconsistent.append(agent_id)
+
+    logger.info(f"Checked {len(agent_ids)} agents, {len(inconsistent)} inconsistent")
+    return 1 if inconsistent else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent", action="append", help="Agent id to check (repeatable); default is every agent with fills")
+    parser.add_argument("--verify-only", action="store_true", help="Report differences without rebuilding")
+    parser.add_argument("--force", action="store_true", help="Rebuild even when the ledger already matches")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from loguru import logger
 import json
 from datetime import datetime
@@ -39,6 +39,9 @@ except ImportError:
 
 AsyncRedis = Any
 
+# Pub/sub channel AgentStateManager instances use to invalidate each other's in-memory caches
+AGENT_STATE_INVALIDATION_CHANNEL = "agent_state_invalidations"
+
 
 class AgentPersistenceService:
     """
@@ -183,6 +186,42 @@ class AgentPersistenceService:
             logger.error(f"Unexpected error deleting state from Redis for agent '{agent_id}': {e}. Key: '{key}'")
             return False
 
+    async def publish_agent_state_invalidation(self, agent_id: str, origin: str) -> bool:
+        """Tell other AgentStateManager instances to drop their cached copy of an agent's state."""
+        if not self.redis_client:
+            return False
+        try:
+            await self.redis_client.publish(
+                AGENT_STATE_INVALIDATION_CHANNEL, json.dumps({"agent_id": agent_id, "origin": origin})
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish state invalidation for agent '{agent_id}': {e}")
+            return False
+
+    async def listen_agent_state_invalidations(self) -> AsyncIterator[Dict]:
+        """Yield invalidation messages ({"agent_id", "origin"}) until cancelled; returns at once without Redis."""
+        if not self.redis_client:
+            logger.warning("Redis client not available. Agent state cache invalidation across workers is disabled.")
+            return
+        pubsub = self.redis_client.pubsub()
+        await pubsub.subscribe(AGENT_STATE_INVALIDATION_CHANNEL)
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode('utf-8')
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring malformed agent state invalidation: {data!r}")
+        finally:
+            await pubsub.unsubscribe(AGENT_STATE_INVALIDATION_CHANNEL)
+            await pubsub.close()
+
     async def save_agent_state_to_supabase(self, agent_id: str, strategy_type: str, state: Dict, memory_references: Optional[List[str]] = None) -> Optional[Dict]:
         if not self.supabase_client:
             logger.error(f"Supabase client not available. Cannot save state for agent '{agent_id}'.")
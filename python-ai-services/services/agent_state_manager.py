@@ -1,28 +1,209 @@
 """
 Agent State Manager for persistent storage of agent trading states
 """
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import asyncio # For asyncio.Lock
+import uuid
+import weakref
 from loguru import logger
 
 # Assuming AgentPersistenceService is in the same package directory
 from .agent_persistence_service import AgentPersistenceService
 
 
+class AgentStateCache(OrderedDict):
+    """In-memory state records in least-recently-used order, evicting the oldest past max_size."""
+
+    def __init__(self, max_size: int = 10_000):
+        super().__init__()
+        self.max_size = max_size
+        self.evictions = 0
+
+    def __setitem__(self, agent_id: str, record: Dict):
+        super().__setitem__(agent_id, record)
+        self.move_to_end(agent_id)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+            self.evictions += 1
+
+    def touch(self, agent_id: str) -> Optional[Dict]:
+        """Return the cached record and mark it most recently used."""
+        record = super().get(agent_id)
+        if record is not None:
+            self.move_to_end(agent_id)
+        return record
+
+
 class AgentStateManager:
     """
     Service for managing agent states with multiple layers of caching and persistence.
     Orchestrates state retrieval and updates using AgentPersistenceService.
+
+    Updates for different agents run concurrently; each agent has its own lock. With
+    write_coalescing_interval set, update_agent_state only records the latest state per agent
+    and a background task writes it through to Supabase and Redis once per interval.
     """
     
-    def __init__(self, persistence_service: AgentPersistenceService, redis_realtime_ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        persistence_service: AgentPersistenceService,
+        redis_realtime_ttl_seconds: int = 3600,
+        cache_max_size: int = 10_000,
+        write_coalescing_interval: Optional[float] = None
+    ):
         self.persistence_service: AgentPersistenceService = persistence_service
         self.redis_realtime_ttl_seconds: int = redis_realtime_ttl_seconds
-        self.in_memory_cache: Dict[str, Dict] = {}
-        self.lock: asyncio.Lock = asyncio.Lock()
+        self.in_memory_cache: AgentStateCache = AgentStateCache(cache_max_size)
+        self.write_coalescing_interval: Optional[float] = write_coalescing_interval
+        self.instance_id: str = str(uuid.uuid4())
+        # Locks live only while some coroutine holds or waits on them
+        self._agent_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # agent_id -> (state, strategy_type, memory_references) awaiting the next coalesced flush
+        self._pending_writes: Dict[str, Tuple[Dict, str, Optional[List[str]]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self.invalidation_retry_initial: float = 1.0  # Seconds before resubscribing, doubled per failure
+        self.invalidation_retry_max: float = 60.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced_updates = 0
+        self.flushed_writes = 0
         logger.info("AgentStateManager initialized with AgentPersistenceService.")
     
+    def _lock_for(self, agent_id: str) -> asyncio.Lock:
+        lock = self._agent_locks.get(agent_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._agent_locks[agent_id] = lock
+        return lock
+    
+    async def start(self):
+        """Start listening for cache invalidations from other workers and, if enabled, the coalesced writer."""
+        if self._invalidation_task is None:
+            self._invalidation_task = asyncio.create_task(self._invalidation_listener())
+        if self.write_coalescing_interval and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def cleanup(self):
+        """Write out coalesced updates and stop the background tasks."""
+        for task in (self._flush_task, self._invalidation_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flush_task = self._invalidation_task = None
+        await self.flush_pending_writes()
+    
+    async def _invalidation_listener(self):
+        """Drop cached records other workers updated; resubscribes with backoff after a Redis error."""
+        retry_delay = self.invalidation_retry_initial
+        while True:
+            try:
+                async for message in self.persistence_service.listen_agent_state_invalidations():
+                    retry_delay = self.invalidation_retry_initial
+                    agent_id = message.get("agent_id")
+                    if message.get("origin") == self.instance_id or agent_id in self._pending_writes:
+                        continue
+                    if self.in_memory_cache.pop(agent_id, None) is not None:
+                        logger.debug(f"Dropped cached state for agent {agent_id} after an update from another worker.")
+                return  # Without Redis there is nothing to listen to
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Agent state invalidation listener lost its subscription, resubscribing in {retry_delay:g}s: {e}")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, self.invalidation_retry_max)
+            # Invalidations published while unsubscribed were missed, so any cached record may be stale
+            self._drop_cached_records()
+    
+    def _drop_cached_records(self):
+        """Clear the cache, keeping provisional records of updates still waiting for their coalesced write."""
+        kept = {agent_id: self.in_memory_cache[agent_id] for agent_id in self._pending_writes if agent_id in self.in_memory_cache}
+        dropped = len(self.in_memory_cache) - len(kept)
+        self.in_memory_cache.clear()
+        for agent_id, record in kept.items():
+            self.in_memory_cache[agent_id] = record
+        logger.info(f"Dropped {dropped} cached agent states after resubscribing to invalidations.")
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.write_coalescing_interval)
+            try:
+                await self.flush_pending_writes()
+            except Exception as e:
+                logger.exception(f"Error flushing coalesced agent state writes: {e}")
+    
+    async def flush_pending_writes(self) -> int:
+        """Write the latest pending state of every agent through to Supabase and Redis; returns how many were saved."""
+        if not self._pending_writes:
+            return 0
+        pending, self._pending_writes = self._pending_writes, {}
+        results = await asyncio.gather(*(
+            self._flush_agent(agent_id, *write) for agent_id, write in pending.items()
+        ))
+        saved = sum(1 for record in results if record)
+        self.flushed_writes += saved
+        logger.debug(f"Flushed {saved}/{len(pending)} coalesced agent state writes.")
+        return saved
+    
+    async def _flush_agent(self, agent_id: str, state: Dict, strategy_type: str,
+                           memory_references: Optional[List[str]]) -> Optional[Dict]:
+        async with self._lock_for(agent_id):
+            record = await self._write_through(agent_id, state, strategy_type, memory_references)
+        if not record:
+            # Retry on the next flush unless a newer update has already replaced it
+            self._pending_writes.setdefault(agent_id, (state, strategy_type, memory_references))
+        return record
+    
+    async def _write_through(self, agent_id: str, state: Dict, strategy_type: str,
+                             memory_references: Optional[List[str]]) -> Optional[Dict]:
+        """Save to Supabase, then Redis and the local cache, then invalidate other workers. Caller holds the agent lock."""
+        try:
+            updated_supa_record = await self.persistence_service.save_agent_state_to_supabase(
+                agent_id, strategy_type, state, memory_references
+            )
+            
+            if not updated_supa_record:
+                logger.error(f"Failed to save state to Supabase for agent {agent_id}. Aborting update.")
+                return None
+
+            redis_success = await self.persistence_service.save_realtime_state_to_redis(
+                agent_id, updated_supa_record, self.redis_realtime_ttl_seconds
+            )
+            if not redis_success:
+                logger.warning(f"Failed to save state to Redis for agent {agent_id}, but Supabase save was successful.")
+
+            # A newer coalesced update keeps its provisional record in the cache
+            if agent_id not in self._pending_writes:
+                self.in_memory_cache[agent_id] = updated_supa_record
+            await self.persistence_service.publish_agent_state_invalidation(agent_id, self.instance_id)
+
+            logger.info(f"Successfully updated state for agent: {agent_id}.")
+            return updated_supa_record
+                
+        except Exception as e:
+            logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
+            return None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Cache occupancy, hit/miss/eviction counts and coalesced write counters."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self.in_memory_cache),
+            "max_size": self.in_memory_cache.max_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "evictions": self.in_memory_cache.evictions,
+            "pending_writes": len(self._pending_writes),
+            "coalesced_updates": self.coalesced_updates,
+            "flushed_writes": self.flushed_writes
+        }
+    
     async def get_agent_state(self, agent_id: str) -> Dict:
         """
         Retrieve the agent's state, checking in-memory cache, then Redis, then Supabase.
@@ -33,10 +214,25 @@ class AgentStateManager:
         logger.debug(f"Getting state for agent: {agent_id}")
         
         # 1. Check in-memory cache first
-        if agent_id in self.in_memory_cache:
+        cached_record = self.in_memory_cache.touch(agent_id)
+        if cached_record is not None:
             logger.debug(f"In-memory cache hit for agent: {agent_id}")
-            return self.in_memory_cache[agent_id]
+            self.cache_hits += 1
+            return cached_record
         
+        self.cache_misses += 1
+        async with self._lock_for(agent_id):
+            # Another caller may have loaded it while we waited for the lock
+            cached_record = self.in_memory_cache.touch(agent_id)
+            if cached_record is not None:
+                return cached_record
+            record = await self._load_agent_state(agent_id)
+            if agent_id in self._pending_writes:
+                # Evicted before its coalesced write was flushed; the persisted copy is older
+                record = self._provisional_record(agent_id, record, *self._pending_writes[agent_id])
+            return record
+    
+    async def _load_agent_state(self, agent_id: str) -> Dict:
         # 2. Check Redis
         try:
             redis_full_record = await self.persistence_service.get_realtime_state_from_redis(agent_id)
@@ -86,33 +282,38 @@ class AgentStateManager:
         """
         Update the agent's state in Supabase (as source of truth), then update Redis and in-memory cache.
         Returns the persisted state record from Supabase, or None on failure.
+        In write-coalescing mode the update is only cached and queued, and the provisional record is returned.
         """
         logger.info(f"Updating state for agent: {agent_id}. Strategy type: {strategy_type}. State preview: {str(state)[:100]}...")
         
-        async with self.lock:
-            try:
-                updated_supa_record = await self.persistence_service.save_agent_state_to_supabase(
-                    agent_id, strategy_type, state, memory_references
-                )
-                
-                if not updated_supa_record:
-                    logger.error(f"Failed to save state to Supabase for agent {agent_id}. Aborting update.")
-                    return None
-
-                redis_success = await self.persistence_service.save_realtime_state_to_redis(
-                    agent_id, updated_supa_record, self.redis_realtime_ttl_seconds
-                )
-                if not redis_success:
-                    logger.warning(f"Failed to save state to Redis for agent {agent_id}, but Supabase save was successful.")
-
-                self.in_memory_cache[agent_id] = updated_supa_record
-
-                logger.info(f"Successfully updated state for agent: {agent_id}.")
-                return updated_supa_record
-                    
-            except Exception as e:
-                logger.exception(f"Unexpected error updating agent state for {agent_id}: {e}")
-                return None
+        if self.write_coalescing_interval:
+            return self._queue_coalesced_update(agent_id, state, strategy_type, memory_references)
+        
+        async with self._lock_for(agent_id):
+            return await self._write_through(agent_id, state, strategy_type, memory_references)
+    
+    def _queue_coalesced_update(self, agent_id: str, state: Dict, strategy_type: str,
+                                memory_references: Optional[List[str]]) -> Dict:
+        if agent_id in self._pending_writes:
+            self.coalesced_updates += 1
+        self._pending_writes[agent_id] = (state, strategy_type, memory_references)
+        return self._provisional_record(
+            agent_id, self.in_memory_cache.touch(agent_id), state, strategy_type, memory_references
+        )
+    
+    def _provisional_record(self, agent_id: str, base_record: Optional[Dict], state: Dict, strategy_type: str,
+                            memory_references: Optional[List[str]]) -> Dict:
+        """Cache what the record will look like once the pending write is flushed."""
+        now = datetime.utcnow().isoformat()
+        provisional_record = {
+            **(base_record or {"agent_id": agent_id, "created_at": now}),
+            "state": state,
+            "strategy_type": strategy_type,
+            "memory_references": memory_references,
+            "updated_at": now
+        }
+        self.in_memory_cache[agent_id] = provisional_record
+        return provisional_record
     
     async def update_state_field(self, agent_id: str, field: str, value: Any) -> Optional[Dict]:
         """Update a specific field in the agent's 'state' dictionary."""
@@ -143,7 +344,8 @@ class AgentStateManager:
         """Delete the agent's state from all persistence layers and caches."""
         logger.info(f"Attempting to delete state for agent: {agent_id}.")
         
-        async with self.lock:
+        self._pending_writes.pop(agent_id, None)
+        async with self._lock_for(agent_id):
             try:
                 supa_deleted = await self.persistence_service.delete_agent_state_from_supabase(agent_id)
                 redis_op_success = await self.persistence_service.delete_realtime_state_from_redis(agent_id)
@@ -151,6 +353,7 @@ class AgentStateManager:
                 if agent_id in self.in_memory_cache:
                     del self.in_memory_cache[agent_id]
                     logger.debug(f"Removed agent {agent_id} from in-memory cache.")
+                await self.persistence_service.publish_agent_state_invalidation(agent_id, self.instance_id)
 
                 if supa_deleted:
                     logger.info(f"Deletion process run for agent {agent_id}. Supabase main delete success: {supa_deleted}. Redis op success: {redis_op_success}.")
@@ -5,8 +5,10 @@ Handles periodic arbitrage scans, portfolio rebalancing, risk assessments, and p
 """
 
 import asyncio
+import heapq
 import logging
-from typing import Dict, List, Optional, Any, Callable, Set
+import time
+from typing import Dict, List, Optional, Any, Callable, Set, Tuple
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -22,9 +24,10 @@ except ImportError:
             self.base_time = base_time
         
         def get_next(self, ret_type):
-            # Simple fallback - return current time + 1 minute
+            # Simple fallback - advance one minute per call
             import datetime
-            return self.base_time + datetime.timedelta(minutes=1)
+            self.base_time = self.base_time + datetime.timedelta(minutes=1)
+            return self.base_time
 
 from ..core.service_registry import get_registry
 
@@ -63,6 +66,12 @@ class TaskType(Enum):
     AGENT_IDLE_MANAGEMENT = "agent_idle_management"
     FARM_COORDINATION = "farm_coordination"
 
+class MissedRunPolicy(Enum):
+    """What to do with cron occurrences that passed while the scheduler was not firing"""
+    SKIP = "skip"            # Drop them; a run later than the grace period is dropped too
+    RUN_ONCE = "run_once"    # Coalesce everything missed into a single run
+    RUN_ALL = "run_all"      # Run each missed occurrence, up to max_catchup_runs runs in all
+
 @dataclass
 class ScheduledTask:
     """Scheduled task definition"""
@@ -127,6 +136,16 @@ class AutonomousTaskScheduler:
         self.execution_history: List[TaskExecution] = []
         self.task_queue: asyncio.Queue = asyncio.Queue()
         
+        # Timer heap of (fire_at epoch seconds, sequence, task_id); an entry is current only
+        # while it matches _next_fire_at, so rescheduling just pushes a new entry
+        self._timer_heap: List[Tuple[float, int, str]] = []
+        self._next_fire_at: Dict[str, float] = {}
+        # Next occurrence per (cron_expression, after); per-agent tasks share a few expressions
+        self._next_occurrence_cache: Dict[Tuple[str, float], float] = {}
+        self._timer_sequence = 0
+        self._timers_changed = asyncio.Event()
+        self._last_completed: Dict[str, datetime] = {}
+        
         # Scheduler state
         self.is_running = False
         self.worker_count = 3  # Number of concurrent task workers
@@ -146,6 +165,9 @@ class AutonomousTaskScheduler:
         self.max_queue_size = 1000
         self.execution_history_limit = 10000
         self.cleanup_interval = 3600  # 1 hour
+        self.default_missed_run_policy = MissedRunPolicy.RUN_ONCE  # Per task: configuration['missed_run_policy']
+        self.misfire_grace_seconds = 5.0  # Lateness that still counts as on time
+        self.max_catchup_runs = 10
         
         self.is_initialized = False
         
@@ -518,20 +540,29 @@ class AutonomousTaskScheduler:
             raise
     
     async def _scheduler_loop(self):
-        """Main scheduler loop - checks for tasks to execute"""
+        """Main scheduler loop - sleeps until the earliest task is due"""
+        now = time.time()
+        for task_id in list(self.scheduled_tasks):
+            self._schedule_task(task_id, now)
+        
         while True:
             try:
-                await asyncio.sleep(1)  # Check every second
+                now = time.time()
+                due: List[Tuple[str, float]] = []
+                while self._timer_heap and self._timer_heap[0][0] <= now:
+                    fire_at, _, task_id = heapq.heappop(self._timer_heap)
+                    if self._next_fire_at.get(task_id) == fire_at:
+                        # Disarm, so another entry pushed for the same time does not fire it twice
+                        del self._next_fire_at[task_id]
+                        due.append((task_id, fire_at))
                 
-                current_time = datetime.now(timezone.utc)
-                
-                # Check each scheduled task
-                for task_id, task in self.scheduled_tasks.items():
-                    if not task.enabled:
+                for task_id, fire_at in due:
+                    task = self.scheduled_tasks.get(task_id)
+                    if not task or not task.enabled:
+                        self._unschedule_task(task_id)
                         continue
                     
-                    # Check if task should run now
-                    if self._should_task_run(task, current_time):
+                    for _ in range(self._advance_task_timer(task, fire_at, now)):
                         # Check dependencies
                         if await self._check_task_dependencies(task):
                             # Queue task for execution
@@ -539,22 +570,99 @@ class AutonomousTaskScheduler:
                         else:
                             logger.debug(f"Task {task_id} dependencies not met, skipping")
                 
+                # Sleep until the next timer, or until a task is added or rescheduled
+                self._timers_changed.clear()
+                timeout = max(0.0, self._timer_heap[0][0] - time.time()) if self._timer_heap else None
+                try:
+                    await asyncio.wait_for(self._timers_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
                 await asyncio.sleep(10)  # Wait longer on error
     
-    def _should_task_run(self, task: ScheduledTask, current_time: datetime) -> bool:
-        """Check if a task should run based on its cron expression"""
+    def _schedule_task(self, task_id: str, now: Optional[float] = None):
+        """Compute a task's next fire time and put it on the timer heap"""
+        task = self.scheduled_tasks.get(task_id)
+        if not task or not task.enabled:
+            self._unschedule_task(task_id)
+            return
+        
         try:
-            cron = croniter(task.cron_expression, current_time - timedelta(seconds=1))
-            next_run = cron.get_next(datetime)
-            
-            # If next run is within the last second, the task should run
-            return abs((next_run - current_time).total_seconds()) < 1
-            
+            self._push_timer(task_id, self._next_occurrence(task.cron_expression, now or time.time()))
         except Exception as e:
             logger.error(f"Error checking cron expression for task {task.task_id}: {e}")
-            return False
+            self._unschedule_task(task_id)
+    
+    def _unschedule_task(self, task_id: str):
+        # The heap entry stays behind and is discarded when it surfaces
+        self._next_fire_at.pop(task_id, None)
+    
+    def _next_occurrence(self, cron_expression: str, after: float) -> float:
+        """First occurrence of cron_expression strictly after the given epoch time"""
+        key = (cron_expression, after)
+        next_at = self._next_occurrence_cache.get(key)
+        if next_at is None:
+            if len(self._next_occurrence_cache) >= 10_000:
+                self._next_occurrence_cache.clear()
+            next_at = croniter(cron_expression, datetime.fromtimestamp(after, timezone.utc)).get_next(datetime).timestamp()
+            self._next_occurrence_cache[key] = next_at
+        return next_at
+    
+    def _push_timer(self, task_id: str, fire_at: float):
+        self._next_fire_at[task_id] = fire_at
+        self._timer_sequence += 1
+        heapq.heappush(self._timer_heap, (fire_at, self._timer_sequence, task_id))
+        if self._timer_heap[0][2] == task_id:
+            self._timers_changed.set()
+        
+        # Superseded entries are dropped lazily; compact if they come to dominate the heap
+        if len(self._timer_heap) > 2 * len(self._next_fire_at) + 1024:
+            self._timer_heap = [
+                entry for entry in self._timer_heap if self._next_fire_at.get(entry[2]) == entry[0]
+            ]
+            heapq.heapify(self._timer_heap)
+    
+    def _advance_task_timer(self, task: ScheduledTask, fire_at: float, now: float) -> int:
+        """Schedule the task's next future occurrence; returns how many runs are due now"""
+        policy = MissedRunPolicy(task.configuration.get('missed_run_policy', self.default_missed_run_policy.value))
+        
+        on_time = now - fire_at <= self.misfire_grace_seconds
+        missed = 0
+        next_fire_at = self._next_occurrence(task.cron_expression, fire_at)
+        while next_fire_at <= now:
+            missed += 1
+            if missed >= self.max_catchup_runs:
+                # Long outage: jump to the first occurrence after now instead of walking every one
+                next_fire_at = self._next_occurrence(task.cron_expression, now)
+                break
+            next_fire_at = self._next_occurrence(task.cron_expression, next_fire_at)
+        self._push_timer(task.task_id, next_fire_at)
+        
+        if missed or not on_time:
+            logger.warning(
+                f"Task {task.task_id} is {now - fire_at:.1f}s late with {missed} further missed run(s); "
+                f"applying {policy.value} policy"
+            )
+        if policy == MissedRunPolicy.RUN_ALL:
+            # The due occurrence counts towards the cap
+            return min(1 + missed, self.max_catchup_runs)
+        if policy == MissedRunPolicy.SKIP:
+            return 1 if on_time else 0
+        return 1
+    
+    async def add_task(self, task: ScheduledTask):
+        """Register (or replace) a scheduled task and arm its timer"""
+        self.scheduled_tasks[task.task_id] = task
+        await self._persist_task(task)
+        self._schedule_task(task.task_id)
+    
+    async def remove_task(self, task_id: str) -> bool:
+        """Stop scheduling a task; running executions are not interrupted"""
+        task = self.scheduled_tasks.pop(task_id, None)
+        self._unschedule_task(task_id)
+        return task is not None
     
     async def _check_task_dependencies(self, task: ScheduledTask) -> bool:
         """Check if task dependencies are satisfied"""
@@ -566,16 +674,10 @@ class AutonomousTaskScheduler:
             dependency_window = timedelta(minutes=5)  # Dependencies must complete within 5 minutes
             
             for dep_task_id in task.dependencies:
-                # Find recent successful execution of dependency
-                recent_executions = [
-                    exec for exec in self.execution_history
-                    if (exec.task_id == dep_task_id and 
-                        exec.status == TaskStatus.COMPLETED and
-                        exec.completed_at and
-                        (current_time - exec.completed_at) < dependency_window)
-                ]
+                # Most recent successful execution of dependency
+                last_completed = self._last_completed.get(dep_task_id)
                 
-                if not recent_executions:
+                if not last_completed or (current_time - last_completed) >= dependency_window:
                     logger.debug(f"Dependency {dep_task_id} not satisfied for task {task.task_id}")
                     return False
             
@@ -669,6 +771,7 @@ class AutonomousTaskScheduler:
             
             # Update metrics
             self.scheduler_metrics['successful_executions'] += 1
+            self._last_completed[task.task_id] = execution.completed_at
             
             logger.info(f"Task {task.task_id} completed successfully in {execution.execution_duration_seconds:.2f}s")
             
@@ -1786,6 +1889,11 @@ class AutonomousTaskScheduler:
             "active_executions": len(self.active_executions),
             "worker_count": self.worker_count,
             "queue_size": self.task_queue.qsize(),
+            "armed_timers": len(self._next_fire_at),
+            "next_fire_at": (
+                datetime.fromtimestamp(min(self._next_fire_at.values()), timezone.utc).isoformat()
+                if self._next_fire_at else None
+            ),
             "metrics": self.scheduler_metrics,
             "last_health_check": datetime.now(timezone.utc).isoformat()
         }
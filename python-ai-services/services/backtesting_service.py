@@ -10,12 +10,18 @@ from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import json
 import logging
+import time
 import numpy as np
 import pandas as pd
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
 import multiprocessing as mp
+from multiprocessing import shared_memory
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from numpy.lib.stride_tricks import sliding_window_view
 
 from pydantic import BaseModel, Field
 from fastapi import HTTPException
@@ -116,6 +122,18 @@ class MonteCarloResult(BaseModel):
     prob_beat_benchmark: float
     prob_target_return: Optional[float] = None
     
+    # Path-level risk
+    drawdown_percentiles: Dict[str, float] = Field(default_factory=dict)
+    ruin_threshold: float = 0.5
+    probability_of_ruin: float = 0.0
+    mean_time_to_ruin: Optional[float] = None  # days, over ruined paths
+    median_time_to_ruin: Optional[float] = None
+    
+    # Simulation settings
+    time_horizon_days: int = 252
+    sampling_method: str = "normal"
+    random_seed: Optional[int] = None
+    
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -141,10 +159,68 @@ class WalkForwardResult(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+@dataclass
+class OHLCVColumns:
+    """Columnar OHLCV series for a single symbol, used by the vectorized engine"""
+    symbol: str
+    timestamps: np.ndarray  # datetime64[us], UTC
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    tz_aware: bool = True
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @classmethod
+    def from_market_data(cls, market_data: List[MarketData]) -> "OHLCVColumns":
+        """Build columns from a single-symbol list of MarketData"""
+        symbols = {data.symbol for data in market_data}
+        if len(symbols) > 1:
+            raise ValueError(f"OHLCVColumns requires a single symbol, got {sorted(symbols)}")
+
+        tz_aware = bool(market_data) and market_data[0].timestamp.tzinfo is not None
+        timestamps = [
+            data.timestamp.astimezone(timezone.utc).replace(tzinfo=None) if tz_aware else data.timestamp
+            for data in market_data
+        ]
+
+        return cls(
+            symbol=market_data[0].symbol if market_data else "",
+            timestamps=np.array(timestamps, dtype="datetime64[us]"),
+            open=np.array([float(data.open) for data in market_data], dtype=np.float64),
+            high=np.array([float(data.high) for data in market_data], dtype=np.float64),
+            low=np.array([float(data.low) for data in market_data], dtype=np.float64),
+            close=np.array([float(data.close) for data in market_data], dtype=np.float64),
+            volume=np.array([float(data.volume) for data in market_data], dtype=np.float64),
+            tz_aware=tz_aware
+        )
+
+    def isoformat_timestamps(self) -> List[str]:
+        """Render timestamps exactly like datetime.isoformat() would"""
+        whole_seconds = self.timestamps.astype("datetime64[s]")
+        rendered = np.datetime_as_string(whole_seconds).astype("U26")
+        has_micros = (self.timestamps - whole_seconds).astype(np.int64) != 0
+        if has_micros.any():
+            rendered[has_micros] = np.datetime_as_string(self.timestamps[has_micros], unit="us")
+        if self.tz_aware:
+            rendered = np.char.add(rendered, "+00:00")
+        return rendered.tolist()
+
+
 class BacktestEngine:
     """Core backtesting engine"""
     
-    def __init__(self):
+    SIGNAL_MIN_BARS = 20
+    SHORT_MA_WINDOW = 5
+    LONG_MA_WINDOW = 20
+    
+    def __init__(self, mode: str = "loop"):
+        if mode not in ("loop", "vectorized"):
+            raise ValueError(f"Unknown backtest engine mode: {mode}")
+        self.mode = mode
         self.commission_rate = 0.001  # 0.1%
         self.slippage_rate = 0.0005   # 0.05%
         
@@ -155,6 +231,13 @@ class BacktestEngine:
         request: StrategyBacktestRequest
     ) -> BacktestResult:
         """Run comprehensive backtest"""
+        if self.mode == "vectorized" and market_data:
+            if len({data.symbol for data in market_data}) == 1:
+                return self.run_backtest_columnar(
+                    strategy, OHLCVColumns.from_market_data(market_data), request
+                )
+            logger.debug("Multi-symbol market data, falling back to bar-by-bar backtest")
+        
         start_time = datetime.now()
         
         # Initialize portfolio
@@ -376,23 +459,38 @@ class BacktestEngine:
         if not equity_curve:
             return {}
         
+        portfolio_values = np.array([point["portfolio_value"] for point in equity_curve], dtype=np.float64)
+        trade_pnls = np.array([t.get("pnl", 0) for t in trades], dtype=np.float64)
+        
+        return self._calculate_performance_metrics_from_arrays(
+            portfolio_values, trade_pnls, initial_capital, final_capital
+        )
+    
+    def _calculate_performance_metrics_from_arrays(
+        self,
+        portfolio_values: np.ndarray,
+        trade_pnls: np.ndarray,
+        initial_capital: Decimal,
+        final_capital: Decimal
+    ) -> Dict[str, Any]:
+        """Calculate performance metrics from an equity array and per-trade P&L (0 for entries)"""
+        if len(portfolio_values) == 0:
+            return {}
+        
         # Extract returns
-        portfolio_values = [point["portfolio_value"] for point in equity_curve]
-        returns = []
-        for i in range(1, len(portfolio_values)):
-            returns.append((portfolio_values[i] - portfolio_values[i-1]) / portfolio_values[i-1])
+        returns = np.diff(portfolio_values) / portfolio_values[:-1]
         
         # Basic metrics
         total_return = float((final_capital - initial_capital) / initial_capital)
         
         # Risk metrics
-        if returns:
+        if len(returns):
             volatility = np.std(returns) * np.sqrt(252)  # Annualized
             sharpe_ratio = (np.mean(returns) * 252) / volatility if volatility > 0 else 0
             
             # Downside deviation for Sortino ratio
-            negative_returns = [r for r in returns if r < 0]
-            downside_deviation = np.std(negative_returns) * np.sqrt(252) if negative_returns else 0
+            negative_returns = returns[returns < 0]
+            downside_deviation = np.std(negative_returns) * np.sqrt(252) if len(negative_returns) else 0
             sortino_ratio = (np.mean(returns) * 252) / downside_deviation if downside_deviation > 0 else 0
         else:
             volatility = 0
@@ -401,104 +499,377 @@ class BacktestEngine:
         
         # Drawdown analysis
         running_max = np.maximum.accumulate(portfolio_values)
-        drawdowns = (np.array(portfolio_values) - running_max) / running_max
+        drawdowns = (portfolio_values - running_max) / running_max
         max_drawdown = abs(np.min(drawdowns))
         
         # Trade statistics
-        winning_trades = [t for t in trades if t.get("pnl", 0) > 0]
-        losing_trades = [t for t in trades if t.get("pnl", 0) < 0]
+        wins = trade_pnls[trade_pnls > 0]
+        losses = trade_pnls[trade_pnls < 0]
         
-        total_trades = len(trades)
-        win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
+        total_trades = len(trade_pnls)
+        win_rate = len(wins) / total_trades if total_trades > 0 else 0
         
-        avg_win = np.mean([t["pnl"] for t in winning_trades]) if winning_trades else 0
-        avg_loss = abs(np.mean([t["pnl"] for t in losing_trades])) if losing_trades else 0
+        avg_win = np.mean(wins) if len(wins) else 0
+        avg_loss = abs(np.mean(losses)) if len(losses) else 0
         profit_factor = avg_win / avg_loss if avg_loss > 0 else 0
         
         return {
             "total_return": total_return,
-            "annualized_return": total_return * 252 / len(equity_curve) if equity_curve else 0,
+            "annualized_return": total_return * 252 / len(portfolio_values),
             "volatility": volatility,
             "sharpe_ratio": sharpe_ratio,
             "sortino_ratio": sortino_ratio,
             "calmar_ratio": total_return / max_drawdown if max_drawdown > 0 else 0,
             "max_drawdown": max_drawdown,
             "total_trades": total_trades,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
+            "winning_trades": len(wins),
+            "losing_trades": len(losses),
             "win_rate": win_rate,
             "profit_factor": profit_factor,
-            "average_trade": np.mean([t.get("pnl", 0) for t in trades]) if trades else 0
+            "average_trade": np.mean(trade_pnls) if total_trades else 0
         }
+    
+    # Vectorized engine
+    
+    def run_backtest_columnar(
+        self,
+        strategy: TradingStrategy,
+        columns: OHLCVColumns,
+        request: StrategyBacktestRequest
+    ) -> BacktestResult:
+        """
+        Array-backed equivalent of run_backtest for a single-symbol OHLCV series.
+        
+        Signals are computed for the whole series at once; fills are then applied
+        only on signal bars and the equity curve is reconstructed by forward-filling
+        cash and held quantity between fills.
+        """
+        start_time = datetime.now()
+        
+        closes = np.ascontiguousarray(columns.close, dtype=np.float64)
+        n = len(closes)
+        initial_capital = float(request.initial_capital)
+        
+        signals = self._generate_signals_vectorized(strategy, closes)
+        signals[:request.warmup_period] = 0
+        
+        # Apply fills on signal bars only
+        commission_rate = float(request.commission)
+        slippage_rate = float(request.slippage)
+        timestamps = None
+        capital = initial_capital
+        held_quantity = 0.0
+        open_lots: deque = deque()
+        trade_history = []
+        fill_bars = []
+        fill_capital = []
+        fill_quantity = []
+        commission_paid = 0.0
+        slippage_cost = 0.0
+        
+        close_values = closes.tolist()
+        for i in np.flatnonzero(signals).tolist():
+            position_size = min(capital * 0.1, 1000.0)
+            if position_size < 10.0:
+                continue
+            
+            commission = position_size * commission_rate
+            slippage = position_size * slippage_rate
+            total_cost = commission + slippage
+            price = close_values[i]
+            
+            if signals[i] > 0:
+                if capital < position_size + total_cost:
+                    continue
+                quantity = position_size / price
+                capital = capital - position_size - total_cost
+                trade_id = str(uuid.uuid4())
+                open_lots.append((trade_id, quantity, price))
+                held_quantity += quantity
+                trade = {
+                    "trade_id": trade_id,
+                    "action": "buy",
+                    "quantity": quantity,
+                    "price": price,
+                }
+            else:
+                if not open_lots:
+                    continue
+                trade_id, quantity, entry_price = open_lots.popleft()
+                exit_value = quantity * price
+                capital = capital + exit_value - total_cost
+                held_quantity = held_quantity - quantity if open_lots else 0.0
+                trade = {
+                    "trade_id": trade_id,
+                    "action": "sell",
+                    "quantity": quantity,
+                    "price": price,
+                }
+            
+            if timestamps is None:
+                timestamps = columns.isoformat_timestamps()
+            trade["timestamp"] = timestamps[i]
+            if trade["action"] == "sell":
+                trade["pnl"] = exit_value - quantity * entry_price
+            trade["commission"] = commission
+            trade["slippage"] = slippage
+            trade["new_capital"] = Decimal(str(capital))
+            trade_history.append(trade)
+            
+            commission_paid += commission
+            slippage_cost += slippage
+            fill_bars.append(i)
+            fill_capital.append(capital)
+            fill_quantity.append(held_quantity)
+        
+        # Reconstruct equity curve from cash/quantity step functions
+        bars = np.arange(min(request.warmup_period, n), n)
+        state_index = np.searchsorted(np.asarray(fill_bars, dtype=np.int64), bars, side="right") - 1
+        capital_series = np.where(
+            state_index >= 0, np.asarray(fill_capital + [initial_capital])[state_index], initial_capital
+        )
+        quantity_series = np.where(
+            state_index >= 0, np.asarray(fill_quantity + [0.0])[state_index], 0.0
+        )
+        portfolio_values = capital_series + quantity_series * closes[bars]
+        
+        if timestamps is None and len(bars):
+            timestamps = columns.isoformat_timestamps()
+        equity_curve = [
+            {
+                "timestamp": ts,
+                "portfolio_value": value,
+                "capital": cash,
+                "unrealized_pnl": value - initial_capital
+            }
+            for ts, value, cash in zip(
+                timestamps[bars[0]:] if len(bars) else [],
+                portfolio_values.tolist(),
+                capital_series.tolist()
+            )
+        ]
+        
+        final_value = capital + (held_quantity * close_values[-1] if n else 0.0)
+        final_capital = Decimal(str(final_value))
+        
+        trade_pnls = np.array([t.get("pnl", 0.0) for t in trade_history], dtype=np.float64)
+        performance_metrics = self._calculate_performance_metrics_from_arrays(
+            portfolio_values, trade_pnls, request.initial_capital, final_capital
+        )
+        
+        return BacktestResult(
+            strategy_id=strategy.strategy_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            initial_capital=request.initial_capital,
+            final_capital=final_capital,
+            trades=trade_history,
+            equity_curve=equity_curve,
+            commission_paid=Decimal(str(commission_paid)),
+            slippage_cost=Decimal(str(slippage_cost)),
+            execution_time=(datetime.now() - start_time).total_seconds(),
+            **performance_metrics
+        )
+    
+    def _generate_signals_vectorized(self, strategy: TradingStrategy, closes: np.ndarray) -> np.ndarray:
+        """Signal array (+1 buy, -1 sell, 0 none) matching _generate_signal_for_backtest per bar"""
+        signals = np.zeros(len(closes), dtype=np.int8)
+        if strategy.strategy_type.value != "momentum" or len(closes) < self.SIGNAL_MIN_BARS:
+            return signals
+        
+        # Windows ending at each bar i >= LONG_MA_WINDOW - 1
+        long_ma = sliding_window_view(closes, self.LONG_MA_WINDOW).mean(axis=1)
+        short_ma = sliding_window_view(closes, self.SHORT_MA_WINDOW).mean(axis=1)
+        short_ma = short_ma[self.LONG_MA_WINDOW - self.SHORT_MA_WINDOW:]
+        
+        tail = signals[self.SIGNAL_MIN_BARS - 1:]
+        tail[short_ma > long_ma * 1.01] = 1
+        tail[short_ma < long_ma * 0.99] = -1
+        return signals
 
 
 class MonteCarloSimulator:
     """Monte Carlo simulation engine"""
     
+    SAMPLING_METHODS = ("normal", "bootstrap", "block_bootstrap")
+    
+    def __init__(self, max_chunk_elements: int = 262_144):
+        # Simulations x horizon values per chunk; ~2MB float64 matrices stay cache-resident
+        self.max_chunk_elements = max_chunk_elements
+    
     def run_simulation(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        **simulation_options
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation"""
         if not historical_results:
             raise ValueError("No historical results provided for simulation")
         
-        # Extract historical returns
+        return self.simulate_returns(
+            strategy.strategy_id,
+            self.extract_returns(historical_results),
+            num_simulations,
+            time_horizon_days,
+            **simulation_options
+        )
+    
+    @staticmethod
+    def extract_returns(historical_results: List[BacktestResult]) -> np.ndarray:
+        """Concatenate bar-to-bar returns from the equity curves of historical results"""
         all_returns = []
         for result in historical_results:
-            if result.equity_curve:
-                values = [point["portfolio_value"] for point in result.equity_curve]
-                returns = []
-                for i in range(1, len(values)):
-                    returns.append((values[i] - values[i-1]) / values[i-1])
-                all_returns.extend(returns)
-        
-        if not all_returns:
+            if len(result.equity_curve) > 1:
+                values = np.fromiter(
+                    (point["portfolio_value"] for point in result.equity_curve),
+                    dtype=np.float64, count=len(result.equity_curve)
+                )
+                all_returns.append(np.diff(values) / values[:-1])
+        
+        return np.concatenate(all_returns) if all_returns else np.empty(0)
+    
+    def simulate_returns(
+        self,
+        strategy_id: str,
+        historical_returns: np.ndarray,
+        num_simulations: int = 1000,
+        time_horizon_days: int = 252,
+        method: str = "normal",
+        block_size: int = 20,
+        seed: Optional[int] = None,
+        ruin_threshold: float = 0.5,
+        benchmark_return: float = 0.0,
+        target_return: Optional[float] = None
+    ) -> MonteCarloResult:
+        """
+        Simulate equity paths from historical returns.
+        
+        Paths are drawn as (simulations x horizon) matrices in chunks bounded by
+        max_chunk_elements. method is "normal" (fitted Gaussian), "bootstrap"
+        (i.i.d. resampling) or "block_bootstrap" (moving blocks of block_size).
+        A path is ruined once its equity falls to (1 - ruin_threshold) of start.
+        """
+        historical_returns = np.asarray(historical_returns, dtype=np.float64)
+        if len(historical_returns) == 0:
             raise ValueError("No returns data available for simulation")
+        if method not in self.SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method: {method}")
+        if num_simulations < 1 or time_horizon_days < 1:
+            raise ValueError("num_simulations and time_horizon_days must be positive")
         
-        # Calculate distribution parameters
-        mean_return = np.mean(all_returns)
-        std_return = np.std(all_returns)
+        rng = np.random.default_rng(seed)
+        chunk_size = max(1, self.max_chunk_elements // time_horizon_days)
         
-        # Run simulations
-        simulation_results = []
+        final_returns = np.empty(num_simulations)
+        max_drawdowns = np.empty(num_simulations)
+        drawdown_durations = np.empty(num_simulations, dtype=np.int64)
+        ruin_days = np.zeros(num_simulations, dtype=np.int64)  # 0 = never ruined
         
-        for _ in range(num_simulations):
-            # Generate random returns
-            random_returns = np.random.normal(mean_return, std_return, time_horizon_days)
-            
-            # Calculate cumulative return
-            cumulative_return = np.prod(1 + random_returns) - 1
-            simulation_results.append(cumulative_return)
+        for start in range(0, num_simulations, chunk_size):
+            stop = min(start + chunk_size, num_simulations)
+            path_returns = self._draw_returns(
+                rng, historical_returns, stop - start, time_horizon_days, method, block_size
+            )
+            self._path_statistics(
+                path_returns,
+                1.0 - ruin_threshold,
+                final_returns[start:stop],
+                max_drawdowns[start:stop],
+                drawdown_durations[start:stop],
+                ruin_days[start:stop]
+            )
         
         # Calculate statistics
-        simulation_results = np.array(simulation_results)
-        
-        percentiles = {
-            "5th": np.percentile(simulation_results, 5),
-            "25th": np.percentile(simulation_results, 25),
-            "50th": np.percentile(simulation_results, 50),
-            "75th": np.percentile(simulation_results, 75),
-            "95th": np.percentile(simulation_results, 95)
-        }
+        percentile_levels = [5, 25, 50, 75, 95]
+        return_percentiles = np.percentile(final_returns, percentile_levels)
+        drawdown_percentiles = np.percentile(max_drawdowns, percentile_levels)
+        var_5 = return_percentiles[0]
+        ruined = ruin_days > 0
         
         return MonteCarloResult(
-            strategy_id=strategy.strategy_id,
+            strategy_id=strategy_id,
             num_simulations=num_simulations,
             confidence_level=0.95,
-            mean_return=float(np.mean(simulation_results)),
-            std_return=float(np.std(simulation_results)),
-            min_return=float(np.min(simulation_results)),
-            max_return=float(np.max(simulation_results)),
-            percentiles=percentiles,
-            probability_of_loss=float(np.sum(simulation_results < 0) / num_simulations),
-            var_confidence=float(np.percentile(simulation_results, 5)),
-            expected_shortfall=float(np.mean(simulation_results[simulation_results <= np.percentile(simulation_results, 5)])),
-            prob_positive_return=float(np.sum(simulation_results > 0) / num_simulations)
+            mean_return=float(np.mean(final_returns)),
+            std_return=float(np.std(final_returns)),
+            min_return=float(np.min(final_returns)),
+            max_return=float(np.max(final_returns)),
+            percentiles={f"{level}th": float(value) for level, value in zip(percentile_levels, return_percentiles)},
+            probability_of_loss=float(np.mean(final_returns < 0)),
+            var_confidence=float(var_5),
+            expected_shortfall=float(np.mean(final_returns[final_returns <= var_5])),
+            worst_drawdown=float(np.max(max_drawdowns)),
+            avg_drawdown=float(np.mean(max_drawdowns)),
+            max_drawdown_duration=int(np.max(drawdown_durations)),
+            prob_positive_return=float(np.mean(final_returns > 0)),
+            prob_beat_benchmark=float(np.mean(final_returns > benchmark_return)),
+            prob_target_return=float(np.mean(final_returns >= target_return)) if target_return is not None else None,
+            drawdown_percentiles={f"{level}th": float(value) for level, value in zip(percentile_levels, drawdown_percentiles)},
+            ruin_threshold=ruin_threshold,
+            probability_of_ruin=float(np.mean(ruined)),
+            mean_time_to_ruin=float(np.mean(ruin_days[ruined])) if ruined.any() else None,
+            median_time_to_ruin=float(np.median(ruin_days[ruined])) if ruined.any() else None,
+            time_horizon_days=time_horizon_days,
+            sampling_method=method,
+            random_seed=seed
         )
+    
+    def _draw_returns(
+        self,
+        rng: np.random.Generator,
+        historical_returns: np.ndarray,
+        num_paths: int,
+        horizon: int,
+        method: str,
+        block_size: int
+    ) -> np.ndarray:
+        """Draw a (num_paths x horizon) matrix of per-day returns"""
+        if method == "normal":
+            draws = rng.standard_normal(size=(num_paths, horizon))
+            draws *= historical_returns.std()
+            draws += historical_returns.mean()
+            return draws
+        
+        if method == "bootstrap":
+            return historical_returns[rng.integers(0, len(historical_returns), size=(num_paths, horizon))]
+        
+        # Moving block bootstrap: contiguous blocks preserve short-range autocorrelation
+        block_size = max(1, min(block_size, len(historical_returns)))
+        num_blocks = -(-horizon // block_size)
+        block_starts = rng.integers(0, len(historical_returns) - block_size + 1, size=(num_paths, num_blocks))
+        indices = (block_starts[:, :, None] + np.arange(block_size)).reshape(num_paths, -1)[:, :horizon]
+        return historical_returns[indices]
+    
+    @staticmethod
+    def _path_statistics(
+        path_returns: np.ndarray,
+        ruin_level: float,
+        final_returns: np.ndarray,
+        max_drawdowns: np.ndarray,
+        drawdown_durations: np.ndarray,
+        ruin_days: np.ndarray
+    ):
+        """Fill per-path outputs in place from a chunk of simulated returns (overwritten)"""
+        horizon = path_returns.shape[1]
+        days = np.arange(horizon)
+        
+        path_returns += 1.0
+        equity = np.cumprod(path_returns, axis=1, out=path_returns)
+        final_returns[:] = equity[:, -1] - 1.0
+        
+        # Running peak includes the starting equity of 1.0
+        peaks = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+        max_drawdowns[:] = np.max(1.0 - equity / peaks, axis=1)
+        
+        # Longest underwater stretch: days since the most recent peak
+        last_peak_day = np.maximum.accumulate(np.where(equity >= peaks, days, -1), axis=1)
+        drawdown_durations[:] = np.max(days - last_peak_day, axis=1)
+        
+        ruined = equity <= ruin_level
+        ruin_days[:] = np.where(ruined.any(axis=1), np.argmax(ruined, axis=1) + 1, 0)
 
 
 class WalkForwardAnalyzer:
@@ -512,8 +883,6 @@ class WalkForwardAnalyzer:
         step_size: int = 3      # months
     ) -> WalkForwardResult:
         """Run walk-forward analysis"""
-        periods = []
-        
         # Convert to monthly data for analysis
         df = pd.DataFrame([{
             "timestamp": data.timestamp,
@@ -524,6 +893,33 @@ class WalkForwardAnalyzer:
         df["timestamp"] = pd.to_datetime(df["timestamp"])
         df.set_index("timestamp", inplace=True)
         
+        return self._analyze_frame(strategy, df, window_size, step_size)
+    
+    def run_analysis_columnar(
+        self,
+        strategy: TradingStrategy,
+        columns: OHLCVColumns,
+        window_size: int = 12,
+        step_size: int = 3
+    ) -> WalkForwardResult:
+        """Run walk-forward analysis on a columnar OHLCV series"""
+        index = pd.DatetimeIndex(columns.timestamps, name="timestamp")
+        if columns.tz_aware:
+            index = index.tz_localize("UTC")
+        
+        df = pd.DataFrame({"close": columns.close, "volume": columns.volume}, index=index)
+        return self._analyze_frame(strategy, df, window_size, step_size)
+    
+    def _analyze_frame(
+        self,
+        strategy: TradingStrategy,
+        df: pd.DataFrame,
+        window_size: int,
+        step_size: int
+    ) -> WalkForwardResult:
+        """Walk-forward analysis over a timestamp-indexed close/volume frame"""
+        periods = []
+        
         # Resample to monthly
         monthly_data = df.resample("M").last()
         
@@ -586,6 +982,237 @@ class WalkForwardAnalyzer:
         )
 
 
+# Worker pool
+#
+# Jobs run in a long-lived process pool owned by BacktestingService. Single-symbol
+# market data is handed to workers through shared memory as OHLCV columns; only a
+# small descriptor is pickled per job.
+
+
+def _share_columns(columns: OHLCVColumns) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """Copy OHLCV columns into a new shared memory block and return it with its descriptor"""
+    length = len(columns)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, length * 8 * 6))
+    np.ndarray((length,), dtype="datetime64[us]", buffer=shm.buf)[:] = columns.timestamps
+    prices = np.ndarray((5, length), dtype=np.float64, buffer=shm.buf, offset=length * 8)
+    prices[:] = (columns.open, columns.high, columns.low, columns.close, columns.volume)
+    del prices
+    
+    descriptor = {
+        "shm_name": shm.name,
+        "length": length,
+        "symbol": columns.symbol,
+        "tz_aware": columns.tz_aware
+    }
+    return shm, descriptor
+
+
+def _attach_columns(descriptor: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, OHLCVColumns]:
+    """Attach to a shared memory block and expose it as zero-copy OHLCV columns"""
+    shm = shared_memory.SharedMemory(name=descriptor["shm_name"])
+    length = descriptor["length"]
+    prices = np.ndarray((5, length), dtype=np.float64, buffer=shm.buf, offset=length * 8)
+    
+    columns = OHLCVColumns(
+        symbol=descriptor["symbol"],
+        timestamps=np.ndarray((length,), dtype="datetime64[us]", buffer=shm.buf),
+        open=prices[0],
+        high=prices[1],
+        low=prices[2],
+        close=prices[3],
+        volume=prices[4],
+        tz_aware=descriptor["tz_aware"]
+    )
+    return shm, columns
+
+
+def _close_shared_memory(shm: shared_memory.SharedMemory):
+    """Detach from a shared memory block, tolerating views still held by a traceback"""
+    try:
+        shm.close()
+    except BufferError:
+        logger.debug(f"Shared memory {shm.name} still referenced; leaving mapping to process exit")
+
+
+def _run_backtest_job(
+    strategy: TradingStrategy,
+    descriptor: Dict[str, Any],
+    request: StrategyBacktestRequest
+) -> BacktestResult:
+    """Worker entry point for a shared-memory backtest"""
+    shm, columns = _attach_columns(descriptor)
+    try:
+        return BacktestEngine(mode="vectorized").run_backtest_columnar(strategy, columns, request)
+    finally:
+        # Views into the block must be released before it can be closed
+        del columns
+        _close_shared_memory(shm)
+
+
+def _run_walk_forward_job(
+    strategy: TradingStrategy,
+    descriptor: Dict[str, Any],
+    window_size: int,
+    step_size: int
+) -> WalkForwardResult:
+    """Worker entry point for a shared-memory walk-forward analysis"""
+    shm, columns = _attach_columns(descriptor)
+    try:
+        return WalkForwardAnalyzer().run_analysis_columnar(strategy, columns, window_size, step_size)
+    finally:
+        del columns
+        _close_shared_memory(shm)
+
+
+@dataclass
+class BacktestJob:
+    """Bookkeeping for a job submitted to the worker pool"""
+    job_id: str
+    job_type: str
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    
+    @property
+    def queue_seconds(self) -> Optional[float]:
+        if self.started_at is not None:
+            return self.started_at - self.submitted_at
+        if self.finished_at is not None:
+            return self.finished_at - self.submitted_at
+        return None
+    
+    @property
+    def run_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "queue_seconds": self.queue_seconds,
+            "run_seconds": self.run_seconds,
+            "error": self.error
+        }
+
+
+class BacktestWorkerPool:
+    """Long-lived process pool with job queueing, cancellation and a concurrency limit"""
+    
+    def __init__(self, max_workers: int = 4, max_concurrent_jobs: Optional[int] = None, job_history_size: int = 200):
+        self.max_workers = max_workers
+        self.max_concurrent_jobs = max_concurrent_jobs or max_workers
+        self.jobs: Dict[str, BacktestJob] = {}
+        self.job_history: deque = deque(maxlen=job_history_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        return self._semaphore
+    
+    def submit(self, job_type: str, fn, *args, cleanup=None) -> BacktestJob:
+        """Queue a job and return its handle; await job.task for the result"""
+        job = BacktestJob(job_id=str(uuid.uuid4()), job_type=job_type)
+        self.jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._run_job(job, fn, args, cleanup))
+        return job
+    
+    async def run(self, job_type: str, fn, *args, cleanup=None) -> Any:
+        """Queue a job and wait for its result"""
+        job = self.submit(job_type, fn, *args, cleanup=cleanup)
+        return await job.task
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. Queued jobs never start; a job already running in a worker
+        process cannot be interrupted, so its result is discarded instead.
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+    
+    async def _run_job(self, job: BacktestJob, fn, args: Tuple, cleanup) -> Any:
+        try:
+            async with self._get_semaphore():
+                job.status = "running"
+                job.started_at = time.monotonic()
+                loop = asyncio.get_running_loop()
+                try:
+                    result = await loop.run_in_executor(self._get_executor(), fn, *args)
+                except BrokenProcessPool:
+                    # A worker died; start a fresh pool for subsequent jobs
+                    self._executor = None
+                    raise
+            job.status = "completed"
+            return result
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            raise
+        finally:
+            job.finished_at = time.monotonic()
+            if cleanup:
+                cleanup()
+            self.jobs.pop(job.job_id, None)
+            self.job_history.append(job)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and per-job-type timing"""
+        active = list(self.jobs.values())
+        timing: Dict[str, Dict[str, Any]] = {}
+        for job_type in {job.job_type for job in self.job_history}:
+            finished = [job for job in self.job_history if job.job_type == job_type]
+            run_times = [job.run_seconds for job in finished if job.run_seconds is not None]
+            queue_times = [job.queue_seconds for job in finished if job.queue_seconds is not None]
+            timing[job_type] = {
+                "completed": sum(1 for job in finished if job.status == "completed"),
+                "failed": sum(1 for job in finished if job.status == "failed"),
+                "cancelled": sum(1 for job in finished if job.status == "cancelled"),
+                "avg_run_seconds": float(np.mean(run_times)) if run_times else 0.0,
+                "max_run_seconds": float(np.max(run_times)) if run_times else 0.0,
+                "avg_queue_seconds": float(np.mean(queue_times)) if queue_times else 0.0
+            }
+        
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "queue_depth": sum(1 for job in active if job.status == "queued"),
+            "running": sum(1 for job in active if job.status == "running"),
+            "active_jobs": [job.to_dict() for job in active],
+            "recent_jobs": [job.to_dict() for job in list(self.job_history)[-20:]],
+            "timing_by_job_type": timing
+        }
+    
+    async def shutdown(self):
+        """Cancel outstanding jobs and stop the worker processes"""
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
 class BacktestingService:
     """
     Advanced backtesting and strategy validation service
@@ -595,7 +1222,7 @@ class BacktestingService:
         self.supabase = get_supabase_client()
         
         # Engines
-        self.backtest_engine = BacktestEngine()
+        self.backtest_engine = BacktestEngine(mode="vectorized")
         self.monte_carlo_simulator = MonteCarloSimulator()
         self.walk_forward_analyzer = WalkForwardAnalyzer()
         
@@ -609,9 +1236,16 @@ class BacktestingService:
         
         # Configuration
         self.max_concurrent_backtests = 4
+        self.worker_pool_size = max(1, min(self.max_concurrent_backtests, mp.cpu_count()))
         self.result_retention_days = 90
         self._shutdown = False
         
+        # Shared process pool for backtest, Monte Carlo and walk-forward jobs
+        self.worker_pool = BacktestWorkerPool(
+            max_workers=self.worker_pool_size,
+            max_concurrent_jobs=self.max_concurrent_backtests
+        )
+        
     async def initialize(self):
         """Initialize the backtesting service"""
         try:
@@ -669,7 +1303,8 @@ class BacktestingService:
         self,
         strategy_id: str,
         num_simulations: int = 1000,
-        time_horizon_days: int = 252
+        time_horizon_days: int = 252,
+        **simulation_options
     ) -> MonteCarloResult:
         """Run Monte Carlo simulation for strategy"""
         try:
@@ -691,7 +1326,7 @@ class BacktestingService:
             
             # Run simulation
             result = await self._run_monte_carlo_async(
-                strategy, historical_results, num_simulations, time_horizon_days
+                strategy, historical_results, num_simulations, time_horizon_days, **simulation_options
             )
             
             # Store result
@@ -821,30 +1456,37 @@ class BacktestingService:
         market_data: List[MarketData],
         request: StrategyBacktestRequest
     ) -> BacktestResult:
-        """Run backtest asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, self.backtest_engine.run_backtest, strategy, market_data, request
+        """Run backtest in the worker pool"""
+        if len({data.symbol for data in market_data}) != 1:
+            return await self.worker_pool.run(
+                "backtest", self.backtest_engine.run_backtest, strategy, market_data, request
             )
-            return await future
+        
+        shm, descriptor = _share_columns(OHLCVColumns.from_market_data(market_data))
+        return await self.worker_pool.run(
+            "backtest", _run_backtest_job, strategy, descriptor, request,
+            cleanup=lambda: self._release_shared_memory(shm)
+        )
     
     async def _run_monte_carlo_async(
         self,
         strategy: TradingStrategy,
         historical_results: List[BacktestResult],
         num_simulations: int,
-        time_horizon_days: int
+        time_horizon_days: int,
+        **simulation_options
     ) -> MonteCarloResult:
-        """Run Monte Carlo simulation asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor, 
-                self.monte_carlo_simulator.run_simulation,
-                strategy, historical_results, num_simulations, time_horizon_days
-            )
-            return await future
+        """Run Monte Carlo simulation in the worker pool"""
+        # Only the return series is shipped to the worker, not the equity curves
+        historical_returns = self.monte_carlo_simulator.extract_returns(historical_results)
+        if len(historical_returns) == 0:
+            raise ValueError("No returns data available for simulation")
+        
+        return await self.worker_pool.run(
+            "monte_carlo",
+            partial(self.monte_carlo_simulator.simulate_returns, **simulation_options),
+            strategy.strategy_id, historical_returns, num_simulations, time_horizon_days
+        )
     
     async def _run_walk_forward_async(
         self,
@@ -853,15 +1495,52 @@ class BacktestingService:
         window_size: int,
         step_size: int
     ) -> WalkForwardResult:
-        """Run walk-forward analysis asynchronously"""
-        loop = asyncio.get_event_loop()
-        with ProcessPoolExecutor(max_workers=1) as executor:
-            future = loop.run_in_executor(
-                executor,
+        """Run walk-forward analysis in the worker pool"""
+        if len({data.symbol for data in market_data}) != 1:
+            return await self.worker_pool.run(
+                "walk_forward",
                 self.walk_forward_analyzer.run_analysis,
                 strategy, market_data, window_size, step_size
             )
-            return await future
+        
+        shm, descriptor = _share_columns(OHLCVColumns.from_market_data(market_data))
+        return await self.worker_pool.run(
+            "walk_forward", _run_walk_forward_job, strategy, descriptor, window_size, step_size,
+            cleanup=lambda: self._release_shared_memory(shm)
+        )
+    
+    def _release_shared_memory(self, shm: shared_memory.SharedMemory):
+        """Close and unlink a job's shared memory block"""
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    
+    # Job management
+    
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued or running worker pool job"""
+        return self.worker_pool.cancel(job_id)
+    
+    async def get_service_status(self) -> Dict[str, Any]:
+        """Get service status, worker pool queue depth and job timing"""
+        return {
+            "service": "backtesting_service",
+            "status": "stopped" if self._shutdown else "running",
+            "backtest_results": len(self.backtest_results),
+            "monte_carlo_results": len(self.monte_carlo_results),
+            "walk_forward_results": len(self.walk_forward_results),
+            "worker_pool": self.worker_pool.get_stats(),
+            "last_update": datetime.now(timezone.utc).isoformat()
+        }
+    
+    async def shutdown(self):
+        """Stop background work and the worker pool"""
+        logger.info("Shutting down Backtesting Service...")
+        self._shutdown = True
+        await self.worker_pool.shutdown()
+        logger.info("Backtesting Service shutdown complete")
     
     # Helper methods
     
@@ -7,9 +7,13 @@ import asyncio
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 import math
+from collections import defaultdict
 from decimal import Decimal, ROUND_HALF_UP
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
+import numpy as np
+
+from ..core import risk_kernels
 from ..core.service_registry import service_registry
 from ..core.logging_config import logger
 from ..database.connection import DatabaseManager
@@ -114,6 +118,42 @@ class CalculationService:
             self.logger.error(f"Error calculating portfolio performance: {e}")
             return self._get_default_performance_metrics()
     
+    async def calculate_portfolio_performance_batch(self, historical_values) -> List[PerformanceMetrics]:
+        """
+        calculate_portfolio_performance for many portfolios, returning metrics in row order.
+        Takes one value series per row; each group of equal-length series is one vectorized pass.
+        """
+        if isinstance(historical_values, np.ndarray):
+            historical_values = risk_kernels.as_matrix(historical_values)
+        series = list(historical_values)
+        metrics: List[Optional[PerformanceMetrics]] = [None] * len(series)
+        
+        rows_by_length = defaultdict(list)
+        for row, values in enumerate(series):
+            rows_by_length[len(values)].append(row)
+        for length, rows in rows_by_length.items():
+            block = self._performance_block([series[row] for row in rows]) if length >= 2 else []
+            for row, row_metrics in zip(rows, block or [None] * len(rows)):
+                metrics[row] = row_metrics or self._get_default_performance_metrics()
+        return metrics
+    
+    def _performance_block(self, historical_values: List[List[float]]) -> List[Optional[PerformanceMetrics]]:
+        """Metrics for equal-length series; None where the single-portfolio path falls back to defaults."""
+        try:
+            summary = risk_kernels.performance_summary(historical_values, self.risk_free_rate, self.trading_days_per_year)
+        except Exception as e:
+            self.logger.error(f"Error calculating batch portfolio performance: {e}")
+            return []
+        
+        # Undefined figures are where the single-portfolio path raises and falls back to defaults
+        undefined = np.isnan(summary["total_return"]) | np.isnan(summary["annualized_return"]) | np.isnan(summary["max_drawdown"])
+        names = [field.name for field in fields(PerformanceMetrics)]
+        columns = [summary[name].tolist() for name in names]
+        return [
+            None if undefined[row] else PerformanceMetrics(*(round(column[row], 2) for column in columns))
+            for row in range(len(historical_values))
+        ]
+    
     async def calculate_risk_metrics(self, positions: List[Dict[str, Any]], 
                                    correlations: Dict[str, Dict[str, float]] = None) -> RiskMetrics:
         """Calculate comprehensive risk metrics"""
@@ -341,21 +381,23 @@ class CalculationService:
         """Calculate correlation matrix for market data"""
         try:
             symbols = list(price_data.keys())
-            correlation_matrix = {}
-            
-            for symbol1 in symbols:
-                correlation_matrix[symbol1] = {}
-                for symbol2 in symbols:
-                    if symbol1 == symbol2:
-                        correlation_matrix[symbol1][symbol2] = 1.0
-                    else:
-                        correlation = self._calculate_correlation(
-                            price_data[symbol1], 
-                            price_data[symbol2]
-                        )
-                        correlation_matrix[symbol1][symbol2] = round(correlation, 3)
-            
-            return correlation_matrix
+            matrix = np.zeros((len(symbols), len(symbols)))
+            
+            # Series of different lengths are not compared (their correlation is 0), so
+            # each group of equal-length series is one matrix product
+            rows_by_length = defaultdict(list)
+            for row, symbol in enumerate(symbols):
+                rows_by_length[len(price_data[symbol])].append(row)
+            for length, rows in rows_by_length.items():
+                if length >= 2:
+                    block = risk_kernels.correlation_matrix([price_data[symbols[row]] for row in rows])
+                    matrix[np.ix_(rows, rows)] = block
+            np.fill_diagonal(matrix, 1.0)
+            
+            return {
+                symbol: dict(zip(symbols, correlations))
+                for symbol, correlations in zip(symbols, np.round(matrix, 3).tolist())
+            }
             
         except Exception as e:
             self.logger.error(f"Error calculating market correlation: {e}")
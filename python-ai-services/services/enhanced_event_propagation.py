@@ -6,7 +6,11 @@ Handles real-time events, notifications, and cross-service coordination
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Set, Callable, Union
+import itertools
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Any, Set, Callable, Union, Tuple, Awaitable, Iterable
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -14,7 +18,11 @@ import json
 import uuid
 import weakref
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter, itemgetter
 
+from ..core.latency_histogram import LatencyHistogram
 from ..core.service_registry import get_registry
 
 logger = logging.getLogger(__name__)
@@ -119,6 +127,41 @@ class EventSubscription:
         if self.created_at is None:
             self.created_at = datetime.now(timezone.utc)
 
+@dataclass
+class SubscriptionRoute:
+    """Subscription as held in the routing index, with its data filter precompiled"""
+    subscription: EventSubscription
+    matches_data: Optional[Callable[[Dict[str, Any]], bool]]
+    is_async: bool
+    order: int  # Subscription sequence, so merged candidate lists keep subscription order
+
+@dataclass
+class RouteTable:
+    """Candidate routes for one (event_type, scope, target_service), split by data filter"""
+    unkeyed: List[SubscriptionRoute]  # No data filter, or one whose first value is unhashable
+    by_field: Dict[str, Dict[Any, List[SubscriptionRoute]]]  # First filter key -> value -> routes
+
+def compile_data_filter(data_filter: Optional[Dict[str, Any]]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Build a predicate equivalent to checking every filter key against the event data"""
+    if not data_filter:
+        return None
+    
+    keys = tuple(data_filter)
+    if len(keys) == 1:
+        key, value = keys[0], data_filter[keys[0]]
+        return lambda data: key in data and data[key] == value
+    
+    get_values = itemgetter(*keys)
+    expected = tuple(data_filter[key] for key in keys)
+    
+    def matches(data: Dict[str, Any]) -> bool:
+        try:
+            return get_values(data) == expected
+        except KeyError:
+            return False
+    
+    return matches
+
 @dataclass
 class EventDeliveryStatus:
     """Event delivery tracking"""
@@ -155,13 +198,278 @@ class EventBuffer:
         self.last_flush = datetime.now(timezone.utc)
         return events
 
+class EventPersistenceMode(Enum):
+    """How published events reach the events table"""
+    SYNC = "sync"      # Inserted before publish_event returns
+    ASYNC = "async"    # Queued and written in batches by a background flusher
+    OFF = "off"        # Not persisted
+
+EVENT_COLUMNS = (
+    "event_id", "event_type", "source_service", "target_service", "priority", "scope", "timestamp",
+    "data", "metadata", "correlation_id", "parent_event_id", "retry_count", "max_retries", "ttl_seconds"
+)
+_TIMESTAMP_COLUMN = EVENT_COLUMNS.index("timestamp")
+
+def event_row(event: Event) -> tuple:
+    """Column values for one row of the events table"""
+    return (
+        event.event_id, event.event_type.value, event.source_service, event.target_service,
+        event.priority.value, event.scope.value, event.timestamp, json.dumps(event.data),
+        json.dumps(event.metadata), event.correlation_id, event.parent_event_id,
+        event.retry_count, event.max_retries, event.ttl_seconds
+    )
+
+class EventWriteBehindQueue:
+    """
+    Write-behind queue between publish_event and the events table.
+    
+    Publishing only appends to an in-memory queue; a background flusher writes
+    batches of up to max_batch_size rows when the batch fills or every
+    flush_interval seconds. At most max_pending events are held in memory: past
+    that, and for any batch the database rejects, rows are appended to a JSON-lines
+    spill file and written back once the database keeps up again. The spill file
+    survives restarts, so rows left there by a previous run are replayed too.
+    
+    Spilled rows carry their count of failed writes. After a failed replay the next
+    one waits, doubling up to max_replay_delay seconds, and a batch that has failed
+    max_attempts times moves to a dead-letter file so it stops blocking the rows
+    behind it. Lines left torn by a crash mid-write are skipped.
+    
+    File I/O runs on one dedicated thread, so the event loop never blocks on the
+    disk and spill and replay steps still happen in the order they were issued.
+    """
+    
+    def __init__(self, write_rows: Callable[[List[tuple]], Awaitable[None]], spill_path: str,
+                 max_batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 50_000,
+                 max_attempts: int = 8, max_replay_delay: float = 300.0):
+        self.write_rows = write_rows
+        self.spill_path = spill_path
+        self.replay_path = spill_path + ".replay"
+        self.dead_letter_path = spill_path + ".dead"
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.max_replay_delay = max_replay_delay
+        self.pending: deque = deque()
+        self.stats: Dict[str, int] = {
+            "persisted": 0, "batches": 0, "failed_batches": 0, "spilled": 0, "replayed": 0,
+            "dead_lettered": 0, "corrupt_lines": 0
+        }
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._replay_delay = 0.0
+        self._replay_after = 0.0  # time.monotonic() before which a failed replay is not retried
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-spill")
+        self._last_io: Optional[asyncio.Future] = None
+    
+    def put(self, event: Event):
+        """Queue an event for persistence; never waits on the database or the disk"""
+        if len(self.pending) >= self.max_pending:
+            rows = self._rows([event])
+            if rows:
+                self._run_io(self._spill_rows, rows, 0)
+                self.stats["spilled"] += len(rows)
+            return
+        self.pending.append(event)
+        if len(self.pending) >= self.max_batch_size:
+            self._batch_ready.set()
+    
+    async def run(self):
+        """Flush whenever a batch fills or flush_interval passes"""
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in event persistence flush: {e}")
+    
+    async def flush(self):
+        """Write everything queued, then any spilled rows, stopping at the first database failure"""
+        async with self._flush_lock:
+            while self.pending:
+                batch = [self.pending.popleft() for _ in range(min(self.max_batch_size, len(self.pending)))]
+                rows = self._rows(batch)
+                if rows and not await self._write(rows):
+                    await self._spill(rows, attempts=1)
+                    return
+            
+            # Rows spilled during a replay, or behind an interrupted one, are picked up by the next pass
+            while self._has_spill() and time.monotonic() >= self._replay_after:
+                await self._replay_spill()
+    
+    def close(self):
+        """Stop the I/O thread once the file writes already issued have finished"""
+        self._io_executor.shutdown(wait=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self.pending),
+            "spill_bytes": sum(
+                os.path.getsize(path) for path in (self.spill_path, self.replay_path) if os.path.exists(path)
+            ),
+            "dead_letter_bytes": os.path.getsize(self.dead_letter_path) if os.path.exists(self.dead_letter_path) else 0
+        }
+    
+    async def _write(self, rows: List[tuple]) -> bool:
+        try:
+            await self.write_rows(rows)
+            self.stats["persisted"] += len(rows)
+            self.stats["batches"] += 1
+            return True
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            logger.error(f"Failed to persist {len(rows)} events, spilling to disk: {e}")
+            return False
+    
+    def _rows(self, events: List[Event]) -> List[tuple]:
+        rows = []
+        for event in events:
+            try:
+                rows.append(event_row(event))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Dropping event {event.event_id} from persistence, data is not serializable: {e}")
+        return rows
+    
+    def _has_spill(self) -> bool:
+        return os.path.exists(self.spill_path) or os.path.exists(self.replay_path)
+    
+    def _run_io(self, fn: Callable, *args) -> asyncio.Future:
+        """Run a file operation on the I/O thread, after every operation issued before it"""
+        self._last_io = asyncio.get_running_loop().run_in_executor(self._io_executor, fn, *args)
+        return self._last_io
+    
+    async def _io_idle(self):
+        """Wait for every file operation issued so far"""
+        if self._last_io is not None:
+            await asyncio.shield(self._last_io)
+    
+    async def _spill(self, rows: List[tuple], attempts: int = 0):
+        if not rows:
+            return
+        await self._run_io(self._spill_rows, rows, attempts)
+        self.stats["spilled"] += len(rows)
+    
+    def _spill_rows(self, rows: List[tuple], attempts: int):
+        try:
+            _append_lines(self.spill_path, _spill_lines(rows, attempts))
+        except OSError as e:
+            logger.error(f"Failed to spill {len(rows)} events to {self.spill_path}, dropping them: {e}")
+    
+    def _parse_spill_lines(self, lines: List[str]) -> Tuple[int, List[tuple]]:
+        """Rows in spill lines, and the most failed writes any of them has had"""
+        attempts, rows = 0, []
+        for line in lines:
+            try:
+                record = json.loads(line)
+                values = record["row"]
+                values[_TIMESTAMP_COLUMN] = datetime.fromisoformat(values[_TIMESTAMP_COLUMN])
+            except (ValueError, TypeError, KeyError, IndexError) as e:
+                self.stats["corrupt_lines"] += 1
+                logger.warning(f"Skipping unreadable line in event spill file: {e}")
+                continue
+            attempts = max(attempts, record.get("attempts", 0))
+            rows.append(tuple(values))
+        return attempts, rows
+    
+    async def _replay_spill(self):
+        """Write spilled rows back in batches; rows not written go back to the spill file"""
+        replay_file = await self._run_io(self._open_replay)
+        try:
+            while True:
+                lines = await self._run_io(_read_lines, replay_file, self.max_batch_size)
+                if not lines:
+                    break
+                attempts, rows = self._parse_spill_lines(lines)
+                if not rows:
+                    continue
+                
+                if await self._write(rows):
+                    self.stats["replayed"] += len(rows)
+                    self._replay_delay = 0.0
+                    continue
+                
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    logger.error(f"Moving {len(rows)} events to {self.dead_letter_path} after {attempts} failed writes")
+                    await self._run_io(_append_lines, self.dead_letter_path, _spill_lines(rows, attempts))
+                    self.stats["dead_lettered"] += len(rows)
+                    continue
+                
+                await self._run_io(
+                    _append_lines, self.spill_path, itertools.chain(_spill_lines(rows, attempts), replay_file)
+                )
+                self._replay_delay = min(self.max_replay_delay, max(self.flush_interval, self._replay_delay * 2))
+                self._replay_after = time.monotonic() + self._replay_delay
+                break
+        except BaseException:
+            # Left in place, the replay file is finished first by the next pass
+            await self._run_io(replay_file.close)
+            raise
+        await self._run_io(self._finish_replay, replay_file)
+    
+    def _open_replay(self):
+        if not os.path.exists(self.replay_path):  # Otherwise a previous replay was interrupted; finish it first
+            os.replace(self.spill_path, self.replay_path)
+        return open(self.replay_path)
+    
+    def _finish_replay(self, replay_file):
+        replay_file.close()
+        os.remove(self.replay_path)
+
+def _read_lines(lines_file, count: int) -> List[str]:
+    return list(itertools.islice(lines_file, count))
+
+def default_spill_path() -> str:
+    """
+    Spill file for this process: EVENT_SPILL_DIR (default: the temp dir) holding one file per
+    EVENT_SPILL_INSTANCE (default: the pid), so workers sharing a directory never share a file.
+    Give each worker a stable instance id to have it replay what it spilled before a restart.
+    """
+    spill_dir = os.getenv("EVENT_SPILL_DIR", tempfile.gettempdir())
+    instance = os.getenv("EVENT_SPILL_INSTANCE") or str(os.getpid())
+    return os.path.join(spill_dir, f"enhanced_event_spill.{instance}.jsonl")
+
+def _spill_lines(rows: List[tuple], attempts: int) -> List[str]:
+    """JSON lines for spilled event rows, each with its count of failed writes"""
+    lines = []
+    for row in rows:
+        values = list(row)
+        values[_TIMESTAMP_COLUMN] = values[_TIMESTAMP_COLUMN].isoformat()
+        lines.append(json.dumps({"attempts": attempts, "row": values}) + "\n")
+    return lines
+
+def _append_lines(path: str, lines: Iterable[str]):
+    """Append to a JSON-lines file, first ending a line left torn by a crash mid-write"""
+    with open(path, "ab+") as lines_file:
+        if lines_file.seek(0, os.SEEK_END) > 0:
+            lines_file.seek(-1, os.SEEK_END)
+            if lines_file.read(1) != b"\n":
+                lines_file.write(b"\n")
+        lines_file.writelines(line.encode() for line in lines)
+
+@lru_cache(maxsize=64)
+def _insert_events_sql(row_count: int) -> str:
+    """Multi-row INSERT for the events table; duplicates from a replayed spill are ignored"""
+    width = len(EVENT_COLUMNS)
+    values = ", ".join(
+        "(" + ", ".join(f"${row * width + column + 1}" for column in range(width)) + ")"
+        for row in range(row_count)
+    )
+    return f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) VALUES {values} ON CONFLICT (event_id) DO NOTHING"
+
 class EnhancedEventPropagation:
     """
     Enhanced event propagation system for orchestration services
     Provides real-time event distribution, subscription management, and delivery tracking
     """
     
-    def __init__(self):
+    def __init__(self, persistence_mode: Optional[EventPersistenceMode] = None, spill_path: Optional[str] = None):
         # Service dependencies
         self.db_service = None
         self.websocket_service = None
@@ -172,6 +480,16 @@ class EnhancedEventPropagation:
         self.event_history: Dict[str, Event] = {}
         self.delivery_status: Dict[str, List[EventDeliveryStatus]] = defaultdict(list)
         
+        # Subscription routing: subscriptions by event type, plus the resolved route list
+        # per (event_type, scope, target_service), rebuilt lazily after any subscription change
+        self._subscriptions_by_type: Dict[EventType, Dict[str, SubscriptionRoute]] = defaultdict(dict)
+        self._route_cache: Dict[Tuple[EventType, EventScope, Optional[str]], RouteTable] = {}
+        self._subscription_sequence = itertools.count()
+        
+        # Async handlers run concurrently, at most this many in flight per subscriber service
+        self.max_concurrent_deliveries = 16
+        self._delivery_slots: Dict[str, asyncio.Semaphore] = {}
+        
         # Event buffering
         self.event_buffers: Dict[EventPriority, EventBuffer] = {
             EventPriority.LOW: EventBuffer(max_size=1000, flush_interval=10),
@@ -180,6 +498,12 @@ class EnhancedEventPropagation:
             EventPriority.CRITICAL: EventBuffer(max_size=10, flush_interval=1)
         }
         
+        # Event persistence; write-behind by default so publishing never waits on the database
+        self.persistence_mode = EventPersistenceMode(
+            persistence_mode or os.getenv("EVENT_PERSISTENCE_MODE", EventPersistenceMode.ASYNC.value)
+        )
+        self.event_store = EventWriteBehindQueue(self._store_events, spill_path=spill_path or default_spill_path())
+        
         # Performance tracking
         self.event_metrics: Dict[str, Any] = {
             "events_published": 0,
@@ -188,6 +512,7 @@ class EnhancedEventPropagation:
             "average_delivery_time": 0,
             "active_subscriptions": 0
         }
+        self.delivery_latency = LatencyHistogram()  # ms from publish to handler completion
         
         # Background tasks
         self.background_tasks: Set[asyncio.Task] = set()
@@ -237,6 +562,9 @@ class EnhancedEventPropagation:
         
         # Flush remaining events
         await self._flush_all_buffers()
+        if self.db_service:
+            await self.event_store.flush()
+        self.event_store.close()
         
         logger.info("Enhanced Event Propagation system shutdown complete")
     
@@ -279,7 +607,10 @@ class EnhancedEventPropagation:
             
             # Store in database
             if self.db_service:
-                await self._store_event(event)
+                if self.persistence_mode == EventPersistenceMode.ASYNC:
+                    self.event_store.put(event)
+                elif self.persistence_mode == EventPersistenceMode.SYNC:
+                    await self._store_event(event)
             
             logger.debug(f"Published event: {event.event_id} ({event_type.value})")
             return event.event_id
@@ -306,6 +637,7 @@ class EnhancedEventPropagation:
             
             # Store subscription
             self.subscriptions[subscription.subscription_id] = subscription
+            self._index_subscription(subscription)
             
             # Add to event handlers
             for event_type in event_types:
@@ -340,6 +672,7 @@ class EnhancedEventPropagation:
             
             # Remove subscription
             del self.subscriptions[subscription_id]
+            self._unindex_subscription(subscription)
             
             # Remove from database
             if self.db_service:
@@ -402,6 +735,9 @@ class EnhancedEventPropagation:
                 priority.value: len(buffer.buffer) 
                 for priority, buffer in self.event_buffers.items()
             },
+            "delivery_latency_ms": self.delivery_latency.summary(),
+            "route_cache_size": len(self._route_cache),
+            "persistence": {"mode": self.persistence_mode.value, **self.event_store.get_stats()},
             "event_history_size": len(self.event_history),
             "delivery_status_count": sum(len(statuses) for statuses in self.delivery_status.values())
         }
@@ -410,59 +746,115 @@ class EnhancedEventPropagation:
     async def _deliver_event(self, event: Event):
         """Deliver event to subscribers"""
         try:
-            # Find matching subscriptions
-            matching_subscriptions = self._find_matching_subscriptions(event)
+            # Handlers start in subscription order: consecutive async handlers run together,
+            # bounded per subscriber, and a sync handler waits for the async ones before it
+            concurrent = []
+            for route in self._match_routes(event):
+                if route.is_async:
+                    concurrent.append(self._deliver_bounded(event, route.subscription))
+                    continue
+                if concurrent:
+                    await self._gather_deliveries(concurrent)
+                    concurrent = []
+                await self._deliver_to_subscription(event, route.subscription)
             
-            # Deliver to each subscriber
-            for subscription in matching_subscriptions:
-                await self._deliver_to_subscription(event, subscription)
+            if concurrent:
+                await self._gather_deliveries(concurrent)
             
         except Exception as e:
             logger.error(f"Failed to deliver event {event.event_id}: {e}")
     
+    @staticmethod
+    async def _gather_deliveries(deliveries: List[Awaitable[None]]):
+        if len(deliveries) == 1:
+            await deliveries[0]
+        else:
+            await asyncio.gather(*deliveries)
+    
+    async def _deliver_bounded(self, event: Event, subscription: EventSubscription):
+        """Deliver while holding one of the subscriber's delivery slots"""
+        slots = self._delivery_slots.get(subscription.subscriber_service)
+        if slots is None:
+            slots = self._delivery_slots[subscription.subscriber_service] = asyncio.Semaphore(self.max_concurrent_deliveries)
+        async with slots:
+            await self._deliver_to_subscription(event, subscription)
+    
     def _find_matching_subscriptions(self, event: Event) -> List[EventSubscription]:
         """Find subscriptions that match the event"""
-        matching = []
+        return [route.subscription for route in self._match_routes(event)]
+    
+    def _match_routes(self, event: Event) -> List[SubscriptionRoute]:
+        """Index lookup by type, scope, target and data value, then the remaining per-subscription checks"""
+        table = self._routes_for(event.event_type, event.scope, event.target_service)
+        data = event.data
         
-        for subscription in self.subscriptions.values():
-            if not subscription.is_active:
-                continue
-            
-            # Check event type
-            if event.event_type not in subscription.event_types:
-                continue
-            
-            # Check priority filter
-            if subscription.priority_filter and event.priority != subscription.priority_filter:
-                continue
-            
-            # Check scope filter
-            if subscription.scope_filter and event.scope != subscription.scope_filter:
-                continue
-            
-            # Check target service
-            if event.target_service and event.target_service != subscription.subscriber_service:
-                continue
-            
-            # Check data filter
-            if subscription.data_filter and not self._matches_data_filter(event.data, subscription.data_filter):
-                continue
-            
-            matching.append(subscription)
+        candidates = table.unkeyed
+        if table.by_field:
+            groups = [candidates] if candidates else []
+            for field, by_value in table.by_field.items():
+                if field in data:
+                    try:
+                        routes = by_value.get(data[field])
+                    except TypeError:  # Unhashable value cannot equal any indexed filter value
+                        routes = None
+                    if routes:
+                        groups.append(routes)
+            if not groups:
+                return []
+            candidates = groups[0] if len(groups) == 1 else sorted(itertools.chain(*groups), key=attrgetter("order"))
         
-        return matching
+        priority = event.priority
+        return [
+            route for route in candidates
+            if route.subscription.is_active
+            and (not route.subscription.priority_filter or route.subscription.priority_filter == priority)
+            and (route.matches_data is None or route.matches_data(data))
+        ]
     
-    def _matches_data_filter(self, event_data: Dict[str, Any], filter_data: Dict[str, Any]) -> bool:
-        """Check if event data matches filter"""
-        for key, value in filter_data.items():
-            if key not in event_data or event_data[key] != value:
-                return False
-        return True
+    def _routes_for(self, event_type: EventType, scope: EventScope, target_service: Optional[str]) -> RouteTable:
+        """Subscriptions of event_type whose scope filter and service accept the event"""
+        key = (event_type, scope, target_service)
+        table = self._route_cache.get(key)
+        if table is None:
+            table = RouteTable(unkeyed=[], by_field={})
+            for route in self._subscriptions_by_type.get(event_type, {}).values():
+                subscription = route.subscription
+                if subscription.scope_filter and subscription.scope_filter != scope:
+                    continue
+                if target_service and target_service != subscription.subscriber_service:
+                    continue
+                
+                if subscription.data_filter:
+                    field, value = next(iter(subscription.data_filter.items()))
+                    try:
+                        table.by_field.setdefault(field, {}).setdefault(value, []).append(route)
+                        continue
+                    except TypeError:
+                        pass
+                table.unkeyed.append(route)
+            self._route_cache[key] = table
+        return table
+    
+    def _index_subscription(self, subscription: EventSubscription):
+        """Add a subscription to the routing index (its data filter is compiled here)"""
+        route = SubscriptionRoute(
+            subscription, compile_data_filter(subscription.data_filter),
+            asyncio.iscoroutinefunction(subscription.handler), next(self._subscription_sequence)
+        )
+        for event_type in subscription.event_types:
+            self._subscriptions_by_type[event_type][subscription.subscription_id] = route
+        self._route_cache.clear()
+    
+    def _unindex_subscription(self, subscription: EventSubscription):
+        """Remove a subscription from the routing index"""
+        for event_type in subscription.event_types:
+            self._subscriptions_by_type[event_type].pop(subscription.subscription_id, None)
+        self._route_cache.clear()
     
     async def _deliver_to_subscription(self, event: Event, subscription: EventSubscription):
         """Deliver event to a specific subscription"""
         try:
-            start_time = datetime.now(timezone.utc)
+            start_time = time.perf_counter()
             
             # Create delivery status
             delivery_status = EventDeliveryStatus(
@@ -473,10 +865,9 @@ class EnhancedEventPropagation:
             
             try:
                 # Call handler
-                if asyncio.iscoroutinefunction(subscription.handler):
-                    await subscription.handler(event)
-                else:
-                    subscription.handler(event)
+                result = subscription.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
                 
                 # Update delivery status
                 delivery_status.status = "delivered"
@@ -484,8 +875,8 @@ class EnhancedEventPropagation:
                 
                 # Update metrics
                 self.event_metrics["events_delivered"] += 1
-                delivery_time = (delivery_status.delivery_time - start_time).total_seconds()
-                self._update_average_delivery_time(delivery_time)
+                self._update_average_delivery_time(time.perf_counter() - start_time)
+                self.delivery_latency.record((delivery_status.delivery_time - event.timestamp).total_seconds() * 1000)
                 
             except Exception as e:
                 # Update delivery status
@@ -562,6 +953,11 @@ class EnhancedEventPropagation:
         # Metrics calculation
         task4 = asyncio.create_task(self._metrics_calculation_task())
         self.background_tasks.add(task4)
+        
+        # Write-behind event persistence
+        if self.db_service:
+            task5 = asyncio.create_task(self.event_store.run())
+            self.background_tasks.add(task5)
     
     async def _buffer_processing_task(self):
         """Process event buffers"""
@@ -748,18 +1144,16 @@ class EnhancedEventPropagation:
     async def _store_event(self, event: Event):
         """Store event in database"""
         try:
-            await self.db_service.execute_query("""
-                INSERT INTO events (event_id, event_type, source_service, target_service, priority, scope,
-                                  timestamp, data, metadata, correlation_id, parent_event_id, retry_count,
-                                  max_retries, ttl_seconds)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
-            """, event.event_id, event.event_type.value, event.source_service, event.target_service,
-                event.priority.value, event.scope.value, event.timestamp, json.dumps(event.data),
-                json.dumps(event.metadata), event.correlation_id, event.parent_event_id,
-                event.retry_count, event.max_retries, event.ttl_seconds)
+            await self._store_events([event_row(event)])
         except Exception as e:
             logger.error(f"Failed to store event {event.event_id}: {e}")
     
+    async def _store_events(self, rows: List[tuple]):
+        """Insert event rows with one multi-row statement"""
+        await self.db_service.execute_query(
+            _insert_events_sql(len(rows)), *itertools.chain.from_iterable(rows)
+        )
+    
     async def _store_subscription(self, subscription: EventSubscription):
         """Store subscription in database"""
         try:
@@ -812,6 +1206,7 @@ class EnhancedEventPropagation:
                 )
                 
                 self.subscriptions[subscription.subscription_id] = subscription
+                self._index_subscription(subscription)
             
             logger.info(f"Loaded {len(self.subscriptions)} subscriptions from database")
             
@@ -195,9 +195,9 @@ class EnhancedMarketDataService:
             total_value = Decimal("0")
             total_change = Decimal("0")
             
-            # Get data for all symbols
-            for symbol in symbols:
-                summary = await self.get_symbol_summary(symbol)
+            # Get data for all symbols concurrently so their quote requests share one batch
+            summaries = await asyncio.gather(*(self.get_symbol_summary(symbol) for symbol in symbols))
+            for summary in summaries:
                 if summary:
                     positions.append(summary)
                     # Assuming 1 share for each symbol for demo
@@ -232,14 +232,17 @@ class EnhancedMarketDataService:
         try:
             # Get major indices
             major_symbols = ["SPY", "QQQ", "IWM", "DIA"]
-            quotes = await self.get_multiple_quotes(major_symbols)
+            
+            # Requested together so both lists are fetched in one batch; trending is simplified
+            quotes, trending = await asyncio.gather(
+                self.get_multiple_quotes(major_symbols),
+                self.get_multiple_quotes(self.watchlist[:5])
+            )
             
             major_indices = {}
             for quote in quotes:
                 major_indices[quote.symbol] = quote.price
             
-            # Get trending symbols (simplified)
-            trending = await self.get_multiple_quotes(self.watchlist[:5])
             trending_symbols = [quote.symbol for quote in trending if quote.change_percent and quote.change_percent > 2]
             
             return MarketOverview(
@@ -356,6 +359,7 @@ class EnhancedMarketDataService:
                 "data_availability": data_availability,
                 "active_providers": healthy_providers,
                 "total_providers": len(provider_health),
+                "quote_coalescer": dict(self.provider_manager.quote_coalescer.stats),
                 "timestamp": datetime.utcnow().isoformat()
             }
             
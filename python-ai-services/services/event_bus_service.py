@@ -1,19 +1,124 @@
-from collections import defaultdict
-from typing import Dict, List, Callable, Awaitable
+from collections import defaultdict, deque
+from enum import IntEnum
+from typing import Dict, List, Callable, Awaitable, Deque, Literal, Optional, Tuple, Any
 import asyncio
+import time
 # Assuming Event model is in a sibling 'models' package
 from ..models.event_bus_models import Event
+from ..core.latency_histogram import LatencyHistogram
 from loguru import logger
 
+class EventLane(IntEnum):
+    """Delivery priority in queued mode; lower values are delivered first."""
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+# Lanes for the event types published in this codebase; anything else is NORMAL
+DEFAULT_EVENT_LANES: Dict[str, EventLane] = {
+    "RiskAlertEvent": EventLane.CRITICAL,
+    "RiskAssessmentRequest": EventLane.CRITICAL,
+    "RiskAssessmentResponse": EventLane.CRITICAL,
+    "AlertTriggeredEvent": EventLane.CRITICAL,
+    "TradeSignalEvent": EventLane.HIGH,
+    "NewFillRecordedEvent": EventLane.HIGH,
+    "MarketInsightEvent": EventLane.LOW,
+    "MarketConditionEvent": EventLane.LOW,
+    "NewsArticleEvent": EventLane.LOW,
+    "PortfolioSnapshotTakenEvent": EventLane.LOW,
+}
+
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+
+class SubscriberQueue:
+    """
+    Bounded per-subscriber queue with one FIFO per lane.
+    When full, the overflow policy decides: "block" makes the publisher wait for space,
+    "drop_newest" discards the incoming event, and "drop_oldest" evicts the oldest event
+    of the least urgent lane, unless that lane is more urgent than the incoming event,
+    in which case the incoming event is discarded.
+    """
+
+    def __init__(self, maxsize: int, overflow_policy: OverflowPolicy):
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self._lanes: List[Deque[Tuple[Event, float]]] = [deque() for _ in EventLane]
+        self._size = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.dropped = 0
+        self.in_flight = 0  # Taken by the worker but not yet handled
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def put(self, event: Event, lane: EventLane, published_at: float) -> bool:
+        """Returns False when the event was dropped by the overflow policy."""
+        while self._size >= self.maxsize:
+            if self.overflow_policy == "block":
+                self._not_full.clear()
+                await self._not_full.wait()
+                continue
+            if self.overflow_policy == "drop_oldest":
+                victim_lane = max(index for index, queued in enumerate(self._lanes) if queued)
+                if victim_lane >= lane:
+                    self._lanes[victim_lane].popleft()
+                    self._size -= 1
+                    self.dropped += 1
+                    break
+            self.dropped += 1
+            return False
+
+        self._lanes[lane].append((event, published_at))
+        self._size += 1
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> Tuple[Event, float]:
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        for queued in self._lanes:
+            if queued:
+                self._size -= 1
+                self._not_full.set()
+                return queued.popleft()
+        raise RuntimeError("SubscriberQueue size out of sync with its lanes")
+
 class EventBusService:
-    def __init__(self):
+    """
+    In-process publish/subscribe.
+
+    By default publish awaits every subscriber concurrently. With queued=True each
+    subscriber instead gets a bounded, lane-prioritized queue drained by its own worker
+    task, so publish returns once the event is enqueued and a slow subscriber only
+    delays itself. Publish and delivery latency histograms are kept per event type.
+    """
+
+    def __init__(self, queued: bool = False, queue_size: int = 1000, overflow_policy: OverflowPolicy = "drop_oldest",
+                 event_lanes: Optional[Dict[str, EventLane]] = None):
         self._subscribers: Dict[str, List[Callable[[Event], Awaitable[None]]]] = defaultdict(list)
-        logger.info("EventBusService initialized.")
+        self.queued = queued
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.event_lanes: Dict[str, EventLane] = {**DEFAULT_EVENT_LANES, **(event_lanes or {})}
+        self._subscriber_queues: Dict[Callable[[Event], Awaitable[None]], SubscriberQueue] = {}
+        self._queues: Dict[str, List[Tuple[Callable[[Event], Awaitable[None]], SubscriberQueue]]] = defaultdict(list)
+        self._workers: List[asyncio.Task] = []
+        # Milliseconds: publish = time spent in publish(), deliver = publish() call to callback completion
+        self._publish_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self._deliver_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        logger.info(f"EventBusService initialized ({'queued' if queued else 'inline'} delivery).")
 
-    async def subscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]]):
+    async def subscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]],
+                        queue_size: Optional[int] = None, overflow_policy: Optional[OverflowPolicy] = None):
         """
         Subscribes a callback to a specific event type.
         The callback must be an awaitable (async function).
+        In queued mode, queue_size and overflow_policy override the bus defaults for this
+        callback's queue when it is first subscribed.
         """
         # It's good practice to ensure the callback is awaitable if type hints specify Awaitable
         if not asyncio.iscoroutinefunction(callback):
@@ -26,13 +131,28 @@ class EventBusService:
         logger.debug(f"New subscription for event type '{event_type}' by callback: {getattr(callback, '__name__', repr(callback))}")
         self._subscribers[event_type].append(callback)
 
+        if self.queued and asyncio.iscoroutinefunction(callback):
+            # One queue per callback across all its event types, so lanes order its whole backlog
+            queue = self._subscriber_queues.get(callback)
+            if queue is None:
+                queue = self._subscriber_queues[callback] = SubscriberQueue(
+                    queue_size or self.queue_size, overflow_policy or self.overflow_policy
+                )
+                self._workers.append(asyncio.create_task(self._deliver_from_queue(callback, queue)))
+            self._queues[event_type].append((callback, queue))
+
     async def publish(self, event: Event):
         """
         Publishes an event to all subscribed awaitable callbacks for its message_type.
-        Executes callbacks concurrently and gathers results.
+        Executes callbacks concurrently and gathers results, or in queued mode enqueues
+        the event for each subscriber's worker.
         """
         event_type = event.message_type
         logger.info(f"Publishing event ID {event.event_id} of type '{event_type}' from agent {event.publisher_agent_id}. Payload keys: {list(event.payload.keys())}")
+        if self.queued:
+            await self._enqueue(event)
+            return
+        published_at = time.perf_counter()
 
         subscribers_for_type = self._subscribers.get(event_type, [])
         if not subscribers_for_type:
@@ -61,6 +181,9 @@ class EventBusService:
             return
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed_ms = (time.perf_counter() - published_at) * 1000
+        self._publish_latency[event_type].record(elapsed_ms)
+        self._deliver_latency[event_type].record(elapsed_ms)
 
         for i, result in enumerate(results):
             # Need to map result back to the original callback for logging, if tasks list was filtered.
@@ -88,3 +211,62 @@ class EventBusService:
 
         logger.debug(f"Finished publishing event ID {event.event_id} to {len(tasks)} subscriber(s).")
 
+
+    async def _enqueue(self, event: Event):
+        event_type = event.message_type
+        published_at = time.perf_counter()
+        queues = self._queues.get(event_type)
+        if not queues:
+            logger.debug(f"No subscribers for event type '{event_type}'. Event ID {event.event_id} not dispatched to any callback.")
+            return
+
+        lane = self.event_lanes.get(event_type, EventLane.NORMAL)
+        for callback, queue in queues:
+            if not await queue.put(event, lane, published_at):
+                callback_name = getattr(callback, '__name__', repr(callback))
+                logger.warning(f"Queue for subscriber '{callback_name}' is full; dropped an event of type '{event_type}' ({queue.overflow_policy}).")
+        self._publish_latency[event_type].record((time.perf_counter() - published_at) * 1000)
+
+    async def _deliver_from_queue(self, callback: Callable[[Event], Awaitable[None]], queue: SubscriberQueue):
+        callback_name = getattr(callback, '__name__', repr(callback))
+        while True:
+            event, published_at = await queue.get()
+            queue.in_flight += 1
+            try:
+                await callback(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in subscriber '{callback_name}' for event type '{event.message_type}' (Event ID: {event.event_id}): {e}", exc_info=e)
+            finally:
+                queue.in_flight -= 1
+            self._deliver_latency[event.message_type].record((time.perf_counter() - published_at) * 1000)
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Publish and deliver latency summaries (ms) per event type."""
+        return {
+            event_type: {
+                "publish": self._publish_latency[event_type].summary(),
+                "deliver": self._deliver_latency[event_type].summary(),
+            }
+            for event_type in sorted(set(self._publish_latency) | set(self._deliver_latency))
+        }
+
+    def get_queue_stats(self) -> List[Dict[str, Any]]:
+        """Depth and drop count of each subscriber queue (queued mode only)."""
+        return [
+            {"subscriber": getattr(callback, '__name__', repr(callback)), "depth": len(queue),
+             "in_flight": queue.in_flight, "dropped": queue.dropped}
+            for callback, queue in self._subscriber_queues.items()
+        ]
+
+    async def shutdown(self, drain_timeout: float = 5.0):
+        """Lets the workers drain their queues for up to drain_timeout seconds, then stops them."""
+        deadline = time.perf_counter() + drain_timeout
+        while any(len(queue) or queue.in_flight for queue in self._subscriber_queues.values()) \
+                and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
@@ -18,6 +18,7 @@ from ..core.redis_manager import RedisManager
 from ..core.logging_config import logger
 from ..database.connection import DatabaseManager
 from ..models.market_data_models import Kline, OrderBookSnapshot, Trade
+from ..providers.quote_coalescer import QuoteCoalescer
 
 try:
     from ..utils.hyperliquid_data_fetcher import HyperliquidMarketDataFetcher, HyperliquidMarketDataFetcherError
@@ -57,6 +58,9 @@ class MarketDataService:
         self.cache_ttl = 60  # 1 minute cache for market data
         self.historical_cache_ttl = 3600  # 1 hour cache for historical data
         
+        # Concurrent live price lookups are batched into one Binance ticker request
+        self.binance_quotes = QuoteCoalescer("binance", self._fetch_binance_prices)
+        
         # Initialize with mock data
         self._initialize_mock_data()
         
@@ -119,7 +123,7 @@ class MarketDataService:
             
             # Try to fetch from real provider
             if self.providers['binance']['enabled']:
-                price_data = await self._fetch_binance_price(symbol)
+                price_data = await self.binance_quotes.get(symbol)
                 if price_data:
                     await self.redis.set(cache_key, json.dumps(price_data), self.cache_ttl)
                     return price_data
@@ -485,23 +489,56 @@ class MarketDataService:
                 async with session.get(url, params=params) as response:
                     if response.status == 200:
                         data = await response.json()
-                        return {
-                            'symbol': symbol,
-                            'price': float(data['lastPrice']),
-                            'change_24h': float(data['priceChangePercent']),
-                            'volume_24h': float(data['volume']),
-                            'high_24h': float(data['highPrice']),
-                            'low_24h': float(data['lowPrice']),
-                            'bid': float(data['bidPrice']),
-                            'ask': float(data['askPrice']),
-                            'last_update': datetime.now().isoformat()
-                        }
+                        return self._parse_binance_ticker(symbol, data)
             return None
             
         except Exception as e:
             self.logger.error(f"Error fetching Binance price: {e}")
             return None
     
+    async def _fetch_binance_prices(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch prices for several symbols in one Binance API request"""
+        if len(symbols) == 1:
+            price_data = await self._fetch_binance_price(symbols[0])
+            return {symbols[0]: price_data} if price_data else {}
+        
+        try:
+            binance_symbols = {symbol.replace('/', ''): symbol for symbol in symbols}
+            
+            async with aiohttp.ClientSession() as session:
+                url = f"{self.providers['binance']['rest_url']}/ticker/24hr"
+                params = {'symbols': json.dumps(list(binance_symbols), separators=(',', ':'))}
+                
+                async with session.get(url, params=params) as response:
+                    if response.status == 200:
+                        return {
+                            binance_symbols[data['symbol']]: self._parse_binance_ticker(binance_symbols[data['symbol']], data)
+                            for data in await response.json()
+                            if data['symbol'] in binance_symbols
+                        }
+            
+            # Binance rejects the whole request if any symbol is unknown, so fall back to one request each
+            results = await asyncio.gather(*(self._fetch_binance_price(symbol) for symbol in symbols))
+            return {symbol: price_data for symbol, price_data in zip(symbols, results) if price_data}
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching Binance prices: {e}")
+            return {}
+    
+    def _parse_binance_ticker(self, symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Binance 24hr ticker to the service's price format"""
+        return {
+            'symbol': symbol,
+            'price': float(data['lastPrice']),
+            'change_24h': float(data['priceChangePercent']),
+            'volume_24h': float(data['volume']),
+            'high_24h': float(data['highPrice']),
+            'low_24h': float(data['lowPrice']),
+            'bid': float(data['bidPrice']),
+            'ask': float(data['askPrice']),
+            'last_update': datetime.now().isoformat()
+        }
+    
     def _generate_mock_price(self, symbol: str) -> Dict[str, Any]:
         """Generate mock price data"""
         base_prices = {
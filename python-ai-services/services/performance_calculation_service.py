@@ -1,6 +1,8 @@
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 from loguru import logger
+import asyncio
 import math # For checking isnan or isinf
 
 from ..models.dashboard_models import TradeLogItem, PortfolioSnapshotOutput # Added PortfolioSnapshotOutput
@@ -8,143 +10,233 @@ from ..models.performance_models import PerformanceMetrics
 from .trading_data_service import TradingDataService
 from .portfolio_snapshot_service import PortfolioSnapshotService # Added
 import numpy as np # Added
-import math # For checking isnan or isinf
-
-class PerformanceCalculationService:
-    def __init__(self, trading_data_service: TradingDataService, portfolio_snapshot_service: PortfolioSnapshotService): # Added portfolio_snapshot_service
-        self.trading_data_service = trading_data_service
-        self.portfolio_snapshot_service = portfolio_snapshot_service # Store it
-        logger.info("PerformanceCalculationService initialized with TradingDataService and PortfolioSnapshotService.")
-
-    async def calculate_performance_metrics(self, agent_id: str) -> PerformanceMetrics:
-        logger.info(f"Calculating performance metrics for agent_id: {agent_id}")
-
-        try:
-            # Fetch all trades for calculation. Using a large limit.
-            # In a real system, this might need pagination or date range filters.
-            trade_history = await self.trading_data_service.get_trade_history(agent_id, limit=10000)
-        except Exception as e:
-            logger.error(f"Error fetching trade history for agent {agent_id}: {e}", exc_info=True)
-            return PerformanceMetrics(
-                agent_id=agent_id,
-                notes=f"Failed to fetch trade history: {str(e)}"
-            )
-
-        if not trade_history:
-            logger.warning(f"No trade history found for agent {agent_id}. Returning empty metrics.")
-            return PerformanceMetrics(
-                agent_id=agent_id,
-                notes="No trade history available for calculation."
-            )
-
-        total_trades = 0
-        winning_trades = 0
-        losing_trades = 0
-        neutral_trades = 0
-        total_net_pnl = 0.0
-        current_gross_profit = 0.0
-        current_gross_loss = 0.0  # Store as positive sum of losses
-
-        min_timestamp: Optional[datetime] = None
-        max_timestamp: Optional[datetime] = None
-
-        pnl_data_available = False
-
-        for trade in trade_history:
-            total_trades += 1
-            if trade.timestamp:
-                if min_timestamp is None or trade.timestamp < min_timestamp:
-                    min_timestamp = trade.timestamp
-                if max_timestamp is None or trade.timestamp > max_timestamp:
-                    max_timestamp = trade.timestamp
-
-            if trade.realized_pnl is not None:
-                pnl_data_available = True
-                if not (math.isnan(trade.realized_pnl) or math.isinf(trade.realized_pnl)):
-                    total_net_pnl += trade.realized_pnl
-                    if trade.realized_pnl > 1e-9: # Avoid floating point issues around zero
-                        winning_trades += 1
-                        current_gross_profit += trade.realized_pnl
-                    elif trade.realized_pnl < -1e-9: # Avoid floating point issues around zero
-                        losing_trades += 1
-                        current_gross_loss += abs(trade.realized_pnl)
-                    else:
-                        neutral_trades += 1
-                else:
-                    logger.warning(f"Skipping trade {trade.trade_id} due to invalid PnL value: {trade.realized_pnl}")
-                    neutral_trades +=1 # Or handle as error / skip count
-            else:
-                # If PnL is None, count as neutral or skip based on desired logic
-                neutral_trades += 1
 
 
+@dataclass
+class PerformanceAccumulator:
+    """
+    Running trade-level performance state for one agent. Feed closed trades oldest exit first,
+    one at a time or in chunks; metrics are derived from the sums without revisiting trades.
+    """
+    initial_equity: Optional[float] = None
+
+    total_trades: int = 0
+    winning_trades: int = 0
+    losing_trades: int = 0
+    neutral_trades: int = 0
+    missing_pnl_trades: int = 0
+    total_net_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0 # Positive sum of losses
+
+    min_timestamp: Optional[datetime] = None
+    max_timestamp: Optional[datetime] = None
+    mock_data_seen: bool = False
+
+    # Drawdown over the cumulative realized PnL curve
+    peak_pnl: float = 0.0
+    max_drawdown_amount: float = 0.0
+    max_drawdown_fraction: float = 0.0 # Only tracked with initial_equity
+
+    # Welford running mean / sum of squared deviations of per-trade PnL, for the Sharpe ratio
+    pnl_count: int = 0
+    pnl_mean: float = 0.0
+    pnl_m2: float = 0.0
+
+    # (exit_timestamp, trade_id) of the last trade consumed; where the next fetch resumes
+    cursor: Optional[Tuple[datetime, str]] = None
+    # Trade ledger revision the cursor belongs to; a replay invalidates it
+    ledger_revision: int = 0
+
+    def update(self, trade: TradeLogItem):
+        self.total_trades += 1
+        timestamp = trade.exit_timestamp
+        if self.min_timestamp is None or timestamp < self.min_timestamp:
+            self.min_timestamp = timestamp
+        if self.max_timestamp is None or timestamp > self.max_timestamp:
+            self.max_timestamp = timestamp
+        if "MOCK_COIN" in trade.asset or "PAPER_COIN" in trade.asset:
+            self.mock_data_seen = True
+        self.cursor = (timestamp, trade.trade_id)
+
+        pnl = trade.realized_pnl
+        if pnl is None:
+            self.missing_pnl_trades += 1
+            self.neutral_trades += 1
+            return
+        if math.isnan(pnl) or math.isinf(pnl):
+            logger.warning(f"Skipping trade {trade.trade_id} due to invalid PnL value: {pnl}")
+            self.neutral_trades += 1
+            return
+
+        self.total_net_pnl += pnl
+        if pnl > 1e-9: # Avoid floating point issues around zero
+            self.winning_trades += 1
+            self.gross_profit += pnl
+        elif pnl < -1e-9:
+            self.losing_trades += 1
+            self.gross_loss += abs(pnl)
+        else:
+            self.neutral_trades += 1
+
+        self.pnl_count += 1
+        delta = pnl - self.pnl_mean
+        self.pnl_mean += delta / self.pnl_count
+        self.pnl_m2 += delta * (pnl - self.pnl_mean)
+
+        if self.total_net_pnl > self.peak_pnl:
+            self.peak_pnl = self.total_net_pnl
+        drawdown = self.peak_pnl - self.total_net_pnl
+        if drawdown > self.max_drawdown_amount:
+            self.max_drawdown_amount = drawdown
+        if self.initial_equity:
+            peak_equity = self.initial_equity + self.peak_pnl
+            if peak_equity > 0:
+                self.max_drawdown_fraction = max(self.max_drawdown_fraction, drawdown / peak_equity)
+
+    def update_many(self, trades: List[TradeLogItem]):
+        for trade in trades:
+            self.update(trade)
+
+    @property
+    def pnl_data_available(self) -> bool:
+        return self.missing_pnl_trades < self.total_trades
+
+    def annualized_sharpe_ratio(self) -> Optional[float]:
+        """Mean over standard deviation of per-trade PnL, scaled by the observed trades per year (Rf = 0)."""
+        if self.pnl_count < 2 or self.min_timestamp is None:
+            return None
+        duration_years = (self.max_timestamp - self.min_timestamp).total_seconds() / (365.25 * 24 * 60 * 60)
+        if duration_years < (1 / 365.25): # Less than a day of trades; annualizing would mislead
+            return None
+        std_dev = math.sqrt(self.pnl_m2 / (self.pnl_count - 1))
+        if std_dev < 1e-9:
+            return None
+        return self.pnl_mean / std_dev * math.sqrt(self.pnl_count / duration_years)
+
+    def to_metrics(self, agent_id: str) -> PerformanceMetrics:
         win_rate: Optional[float] = None
         loss_rate: Optional[float] = None
-        if total_trades > 0:
+        if self.total_trades > 0:
             # Calculate rates based on trades where PnL was determined (winning or losing)
-            determined_trades = winning_trades + losing_trades
-            if determined_trades > 0 :
-                win_rate = winning_trades / determined_trades if determined_trades > 0 else 0.0
-                loss_rate = losing_trades / determined_trades if determined_trades > 0 else 0.0
-            else: # All trades were neutral or PnL was None
-                 win_rate = 0.0
-                 loss_rate = 0.0
-
+            determined_trades = self.winning_trades + self.losing_trades
+            win_rate = self.winning_trades / determined_trades if determined_trades > 0 else 0.0
+            loss_rate = self.losing_trades / determined_trades if determined_trades > 0 else 0.0
 
-        average_win_amount: Optional[float] = None
-        if winning_trades > 0:
-            average_win_amount = current_gross_profit / winning_trades
-
-        average_loss_amount: Optional[float] = None
-        if losing_trades > 0:
-            average_loss_amount = current_gross_loss / losing_trades # current_gross_loss is positive
+        average_win_amount = self.gross_profit / self.winning_trades if self.winning_trades > 0 else None
+        average_loss_amount = self.gross_loss / self.losing_trades if self.losing_trades > 0 else None
 
         profit_factor: Optional[float] = None
-        if current_gross_loss > 1e-9: # Avoid division by zero
-            profit_factor = current_gross_profit / current_gross_loss
-        elif current_gross_profit > 1e-9 and current_gross_loss < 1e-9: # Profits but no losses
-            profit_factor = float('inf') # Or a large number, or None, depending on convention
+        if self.gross_loss > 1e-9: # Avoid division by zero
+            profit_factor = self.gross_profit / self.gross_loss
+        elif self.gross_profit > 1e-9: # Profits but no losses
+            profit_factor = float('inf')
 
         notes_list = []
-        if not pnl_data_available:
+        if not self.pnl_data_available:
             notes_list.append("Realized PnL data was missing for all trades; most metrics will be zero or None.")
-        if any(trade.realized_pnl is None for trade in trade_history):
-             notes_list.append("Some trades were missing realized PnL; these were treated as neutral.")
-        # Since TradeLogItem is mocked in TradingDataService, add a note about it.
-        # This check is conceptual as the service itself doesn't know if data was mocked by its dependency.
-        # This note should ideally be added if TradingDataService indicates mocked data.
-        # For now, we assume it might be mocked.
-        if "MOCK_COIN" in (trade_history[0].asset if trade_history else "") or \
-           "PAPER_COIN" in (trade_history[0].asset if trade_history else ""):
+        if self.missing_pnl_trades:
+            notes_list.append("Some trades were missing realized PnL; these were treated as neutral.")
+        if self.mock_data_seen:
             notes_list.append("Performance calculated using potentially mocked trade history data.")
 
-
+        pnl_data_available = self.pnl_data_available
         return PerformanceMetrics(
             agent_id=agent_id,
-            data_start_time=min_timestamp,
-            data_end_time=max_timestamp,
-            total_trades=total_trades,
-            winning_trades=winning_trades,
-            losing_trades=losing_trades,
-            neutral_trades=neutral_trades,
+            data_start_time=self.min_timestamp,
+            data_end_time=self.max_timestamp,
+            total_trades=self.total_trades,
+            winning_trades=self.winning_trades,
+            losing_trades=self.losing_trades,
+            neutral_trades=self.neutral_trades,
             win_rate=win_rate,
             loss_rate=loss_rate,
-            total_net_pnl=total_net_pnl,
-            gross_profit=current_gross_profit if pnl_data_available else None,
-            gross_loss=current_gross_loss if pnl_data_available else None,
+            total_net_pnl=self.total_net_pnl,
+            gross_profit=self.gross_profit if pnl_data_available else None,
+            gross_loss=self.gross_loss if pnl_data_available else None,
             average_win_amount=average_win_amount,
             average_loss_amount=average_loss_amount,
             profit_factor=profit_factor,
-            # max_drawdown_percentage and sharpe_ratio are placeholders
             notes="; ".join(notes_list) if notes_list else None,
-            # Initialize new advanced metric fields, to be populated below
-            max_drawdown_percentage=None,
-            annualized_sharpe_ratio=None,
+            max_drawdown_amount=self.max_drawdown_amount if pnl_data_available else None,
+            max_drawdown_percentage=self.max_drawdown_fraction * 100 if self.initial_equity and pnl_data_available else None,
+            annualized_sharpe_ratio=self.annualized_sharpe_ratio(),
             compounding_annual_return_percentage=None,
             annualized_volatility_percentage=None
         )
 
-        # --- Advanced Metrics Calculation using Portfolio Snapshots ---
+
+class PerformanceCalculationService:
+    def __init__(
+        self,
+        trading_data_service: TradingDataService,
+        portfolio_snapshot_service: Optional[PortfolioSnapshotService] = None,
+        chunk_size: int = 5000,
+        initial_equity: Optional[float] = None
+    ):
+        self.trading_data_service = trading_data_service
+        self.portfolio_snapshot_service = portfolio_snapshot_service # Store it
+        self.chunk_size = chunk_size
+        self.initial_equity = initial_equity
+        # Per-agent checkpoints: each call only folds in trades closed since the last one
+        self._accumulators: Dict[str, PerformanceAccumulator] = {}
+        self._agent_locks: Dict[str, asyncio.Lock] = {}
+        logger.info("PerformanceCalculationService initialized with TradingDataService and PortfolioSnapshotService.")
+
+    def reset_checkpoint(self, agent_id: str):
+        """Forget an agent's accumulated metrics; ledger replays are detected through the ledger revision."""
+        self._accumulators.pop(agent_id, None)
+
+    async def _catch_up(self, agent_id: str, accumulator: PerformanceAccumulator) -> int:
+        """Fold every trade after the accumulator's cursor into it, chunk by chunk; returns how many were added."""
+        added = 0
+        while True:
+            chunk = await self.trading_data_service.get_trade_history_since(
+                agent_id, after=accumulator.cursor, limit=self.chunk_size
+            )
+            accumulator.update_many(chunk)
+            added += len(chunk)
+            if len(chunk) < self.chunk_size:
+                return added
+
+    async def calculate_performance_metrics(self, agent_id: str) -> PerformanceMetrics:
+        logger.info(f"Calculating performance metrics for agent_id: {agent_id}")
+
+        lock = self._agent_locks.setdefault(agent_id, asyncio.Lock())
+        async with lock:
+            # Read before fetching: a replay committed mid-fetch then resets the next call
+            revision = await self.trading_data_service.get_ledger_revision(agent_id)
+            accumulator = self._accumulators.get(agent_id)
+            if accumulator is None or accumulator.ledger_revision != revision:
+                # Replayed trades may sit behind the cursor; fold the whole history in again
+                accumulator = PerformanceAccumulator(initial_equity=self.initial_equity, ledger_revision=revision)
+                self._accumulators[agent_id] = accumulator
+            try:
+                added = await self._catch_up(agent_id, accumulator)
+            except Exception as e:
+                # Chunks folded in before the failure stay checkpointed; the next call resumes after them
+                logger.error(f"Error fetching trade history for agent {agent_id}: {e}", exc_info=True)
+                return PerformanceMetrics(
+                    agent_id=agent_id,
+                    notes=f"Failed to fetch trade history: {str(e)}"
+                )
+            logger.debug(f"Folded {added} new trades into performance checkpoint for agent {agent_id}.")
+
+            if accumulator.total_trades == 0:
+                logger.warning(f"No trade history found for agent {agent_id}. Returning empty metrics.")
+                return PerformanceMetrics(
+                    agent_id=agent_id,
+                    notes="No trade history available for calculation."
+                )
+
+            metrics = accumulator.to_metrics(agent_id)
+
+        if self.portfolio_snapshot_service:
+            await self._add_snapshot_metrics(agent_id, metrics)
+        return metrics
+
+    async def _add_snapshot_metrics(self, agent_id: str, metrics: PerformanceMetrics):
+        """Portfolio-level drawdown, CAGR, volatility and Sharpe from equity snapshots, overriding the trade-based estimates."""
         snapshots: List[PortfolioSnapshotOutput] = []
         try:
             snapshots = await self.portfolio_snapshot_service.get_historical_snapshots(
@@ -155,7 +247,7 @@ class PerformanceCalculationService:
         except Exception as e_snap:
             logger.error(f"PCS: Error fetching snapshots for agent {agent_id}: {e_snap}", exc_info=True)
             metrics.notes = (metrics.notes + "; " if metrics.notes else "") + "Snapshot data unavailable for advanced metrics."
-            return metrics
+            return
 
         if len(snapshots) < 2:
             logger.info(f"PCS: Less than 2 snapshots for agent {agent_id}. Cannot calculate advanced portfolio metrics.")
@@ -230,6 +322,3 @@ class PerformanceCalculationService:
                                 metrics.annualized_sharpe_ratio = sharpe_periodic * np.sqrt(periods_per_year)
                     elif metrics.compounding_annual_return_percentage is not None and metrics.compounding_annual_return_percentage > 0 and metrics.annualized_volatility_percentage is not None and metrics.annualized_volatility_percentage < 1e-9 :
                         metrics.annualized_sharpe_ratio = float('inf') # Positive return with zero volatility
-
-        return metrics
-
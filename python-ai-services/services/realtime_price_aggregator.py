@@ -5,20 +5,22 @@ Supports Ethereum, Solana, Sui, Sonic, Hyperliquid, and Bitcoin ecosystems
 """
 
 import asyncio
+import heapq
 import logging
 import json
 import time
-from typing import Dict, List, Optional, Any, Set, Callable
+from typing import Dict, List, Optional, Any, Set, Callable, Tuple
 from datetime import datetime, timezone
 from decimal import Decimal
 from dataclasses import dataclass, asdict
 from enum import Enum
+from itertools import count
 import aiohttp
 import websockets
-from collections import defaultdict
-import statistics
+from collections import OrderedDict, defaultdict
 
 from ..core.service_registry import get_registry
+from ..core.latency_histogram import LatencyHistogram
 from .universal_dex_aggregator import Chain, DEXProtocol, TokenInfo
 
 logger = logging.getLogger(__name__)
@@ -49,7 +51,12 @@ class AggregatedPrice:
     total_liquidity: Decimal
     price_sources: int
     last_update: datetime
-    price_by_dex: Dict[str, PriceUpdate]
+    dex_prices: Tuple[Tuple[str, PriceUpdate], ...]  # (dex, latest update) pairs, fixed when the snapshot is taken
+
+    @property
+    def price_by_dex(self) -> Dict[str, PriceUpdate]:
+        """Latest update per DEX as a new dict, built only when read"""
+        return dict(self.dex_prices)
 
 class WebSocketFeed:
     """Base class for WebSocket price feeds"""
@@ -276,6 +283,128 @@ class HyperliquidFeed(WebSocketFeed):
             logger.error(f"Error parsing Hyperliquid message: {e}")
         return None
 
+class PairAggregate:
+    """
+    Running aggregates for one token pair across DEX sources.
+
+    A PriceUpdate replaces that DEX's previous contribution to the volume,
+    liquidity and price sums, and pushes its bid/ask onto lazily-invalidated
+    heaps, so applying it costs O(log k) for k sources instead of a rescan.
+    Snapshots are cached until the next update and carry the per-DEX updates
+    as an immutable tuple of pairs, so applying an update never copies the dict.
+    """
+
+    # Full recomputation of the Decimal sums every N updates bounds rounding drift
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, token_pair: str):
+        self.token_pair = token_pair
+        self.updates: Dict[str, PriceUpdate] = {}
+        self.total_volume = Decimal(0)
+        self.total_liquidity = Decimal(0)
+        self.price_volume_sum = Decimal(0)
+        self.price_sum = Decimal(0)
+        self.last_update: Optional[datetime] = None
+        self._bids: List[Tuple[Decimal, int, str]] = []  # (-bid, seq, dex)
+        self._asks: List[Tuple[Decimal, int, str]] = []  # (ask, seq, dex)
+        self._current_seq: Dict[str, int] = {}
+        self._sequence = count()
+        self._updates_since_resync = 0
+        self._snapshot: Optional[AggregatedPrice] = None
+
+    def apply(self, dex: str, update: PriceUpdate):
+        previous = self.updates.get(dex)
+        if previous is not None:
+            self.total_volume -= previous.volume_24h
+            self.total_liquidity -= previous.liquidity
+            self.price_volume_sum -= previous.price * previous.volume_24h
+            self.price_sum -= previous.price
+
+        self.updates[dex] = update
+        self.total_volume += update.volume_24h
+        self.total_liquidity += update.liquidity
+        self.price_volume_sum += update.price * update.volume_24h
+        self.price_sum += update.price
+
+        seq = next(self._sequence)
+        self._current_seq[dex] = seq
+        if update.bid:
+            heapq.heappush(self._bids, (-update.bid, seq, dex))
+        if update.ask:
+            heapq.heappush(self._asks, (update.ask, seq, dex))
+        if len(self._bids) + len(self._asks) > 8 * len(self.updates) + 32:
+            self._compact_heaps()
+
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= self.RESYNC_INTERVAL:
+            self._resync()
+
+        self.last_update = datetime.now(timezone.utc)
+        self._snapshot = None
+
+    def _is_current(self, entry: Tuple[Decimal, int, str]) -> bool:
+        return self._current_seq.get(entry[2]) == entry[1]
+
+    def _compact_heaps(self):
+        self._bids = [entry for entry in self._bids if self._is_current(entry)]
+        self._asks = [entry for entry in self._asks if self._is_current(entry)]
+        heapq.heapify(self._bids)
+        heapq.heapify(self._asks)
+
+    def _resync(self):
+        updates = self.updates.values()
+        self.total_volume = sum((u.volume_24h for u in updates), Decimal(0))
+        self.total_liquidity = sum((u.liquidity for u in updates), Decimal(0))
+        self.price_volume_sum = sum((u.price * u.volume_24h for u in updates), Decimal(0))
+        self.price_sum = sum((u.price for u in updates), Decimal(0))
+        self._updates_since_resync = 0
+
+    def best_bid(self) -> Decimal:
+        while self._bids and not self._is_current(self._bids[0]):
+            heapq.heappop(self._bids)
+        return -self._bids[0][0] if self._bids else Decimal(0)
+
+    def best_ask(self) -> Decimal:
+        while self._asks and not self._is_current(self._asks[0]):
+            heapq.heappop(self._asks)
+        return self._asks[0][0] if self._asks else Decimal(0)
+
+    def snapshot(self) -> Optional[AggregatedPrice]:
+        if not self.updates:
+            return None
+        if self._snapshot is not None:
+            return self._snapshot
+
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+
+        # Calculate mid price
+        if best_bid and best_ask:
+            mid_price = (best_bid + best_ask) / 2
+        else:
+            # Fallback to simple average
+            mid_price = self.price_sum / len(self.updates)
+
+        # Calculate volume-weighted price
+        if self.total_volume > 0:
+            volume_weighted_price = self.price_volume_sum / self.total_volume
+        else:
+            volume_weighted_price = mid_price
+
+        self._snapshot = AggregatedPrice(
+            token_pair=self.token_pair,
+            best_bid=best_bid,
+            best_ask=best_ask,
+            mid_price=mid_price,
+            volume_weighted_price=volume_weighted_price,
+            total_volume=self.total_volume,
+            total_liquidity=self.total_liquidity,
+            price_sources=len(self.updates),
+            last_update=self.last_update,
+            dex_prices=tuple(self.updates.items())
+        )
+        return self._snapshot
+
 class RealtimePriceAggregator:
     """
     Real-time price aggregation service with sub-50ms latency
@@ -284,13 +413,19 @@ class RealtimePriceAggregator:
     def __init__(self, alchemy_api_key: str = None):
         self.alchemy_api_key = alchemy_api_key or "vNg5BFKZV1TJcvFtMANru"
         self.feeds: List[WebSocketFeed] = []
-        self.price_cache: Dict[str, Dict[str, PriceUpdate]] = defaultdict(dict)
+        self.aggregates: Dict[str, PairAggregate] = {}
         self.subscribers: Dict[str, List[Callable]] = defaultdict(list)
         self.running = False
         
+        # Staleness tracking: (token_pair, dex) ordered by last receive time. The threshold is
+        # the same for every source, so the front of the queue is always the next to go stale.
+        self.stale_after_seconds = 60
+        self._last_seen: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.stale_sources: Set[Tuple[str, str]] = set()
+        
         # Performance metrics
-        self.update_latencies: List[float] = []
-        self.max_latency_samples = 1000
+        self.latency_histogram = LatencyHistogram()
+        self._interval_latency_histogram = LatencyHistogram()
         
         logger.info("Real-time Price Aggregator initialized")
     
@@ -337,101 +472,74 @@ class RealtimePriceAggregator:
     def _handle_price_update(self, update: PriceUpdate):
         """Handle incoming price update with latency tracking"""
         start_time = time.perf_counter()
+        token_pair = update.token_pair
+        dex = update.dex_protocol.value
         
-        # Update cache
-        self.price_cache[update.token_pair][update.dex_protocol.value] = update
+        # Update running aggregates
+        aggregate = self.aggregates.get(token_pair)
+        if aggregate is None:
+            aggregate = self.aggregates[token_pair] = PairAggregate(token_pair)
+        aggregate.apply(dex, update)
         
-        # Calculate aggregated price
-        aggregated = self._aggregate_prices(update.token_pair)
+        source = (token_pair, dex)
+        self._last_seen[source] = time.monotonic()
+        self._last_seen.move_to_end(source)
+        self.stale_sources.discard(source)
         
-        # Notify subscribers
-        for callback in self.subscribers[update.token_pair]:
-            try:
-                callback(aggregated)
-            except Exception as e:
-                logger.error(f"Error in price subscriber callback: {e}")
+        # Notify subscribers; the snapshot is only built when someone is listening
+        callbacks = self.subscribers.get(token_pair)
+        if callbacks:
+            aggregated = aggregate.snapshot()
+            for callback in callbacks:
+                try:
+                    callback(aggregated)
+                except Exception as e:
+                    logger.error(f"Error in price subscriber callback: {e}")
         
         # Track latency
         latency = (time.perf_counter() - start_time) * 1000  # ms
-        self.update_latencies.append(latency)
-        if len(self.update_latencies) > self.max_latency_samples:
-            self.update_latencies.pop(0)
+        self.latency_histogram.record(latency)
+        self._interval_latency_histogram.record(latency)
     
-    def _aggregate_prices(self, token_pair: str) -> AggregatedPrice:
-        """Aggregate prices across all DEXs for a token pair"""
-        dex_prices = self.price_cache[token_pair]
-        
-        if not dex_prices:
-            return None
-        
-        # Collect all prices and volumes
-        bids = []
-        asks = []
-        prices_with_volume = []
-        total_volume = Decimal(0)
-        total_liquidity = Decimal(0)
-        
-        for dex, update in dex_prices.items():
-            if update.bid:
-                bids.append(update.bid)
-            if update.ask:
-                asks.append(update.ask)
-            
-            prices_with_volume.append((update.price, update.volume_24h))
-            total_volume += update.volume_24h
-            total_liquidity += update.liquidity
-        
-        # Calculate best bid/ask
-        best_bid = max(bids) if bids else Decimal(0)
-        best_ask = min(asks) if asks else Decimal(0)
-        
-        # Calculate mid price
-        if best_bid and best_ask:
-            mid_price = (best_bid + best_ask) / 2
-        else:
-            # Fallback to simple average
-            mid_price = sum(p.price for p in dex_prices.values()) / len(dex_prices)
-        
-        # Calculate volume-weighted price
-        if total_volume > 0:
-            volume_weighted_price = sum(
-                price * volume for price, volume in prices_with_volume
-            ) / total_volume
-        else:
-            volume_weighted_price = mid_price
-        
-        return AggregatedPrice(
-            token_pair=token_pair,
-            best_bid=best_bid,
-            best_ask=best_ask,
-            mid_price=mid_price,
-            volume_weighted_price=volume_weighted_price,
-            total_volume=total_volume,
-            total_liquidity=total_liquidity,
-            price_sources=len(dex_prices),
-            last_update=datetime.now(timezone.utc),
-            price_by_dex=dex_prices.copy()
-        )
+    def _aggregate_prices(self, token_pair: str) -> Optional[AggregatedPrice]:
+        """Aggregated price across all DEXs for a token pair (cached until its next update)"""
+        aggregate = self.aggregates.get(token_pair)
+        return aggregate.snapshot() if aggregate else None
+    
+    def _detect_stale_prices(self) -> List[Tuple[str, str]]:
+        """Mark sources with no update within stale_after_seconds; O(1) per newly stale source"""
+        deadline = time.monotonic() - self.stale_after_seconds
+        newly_stale = []
+        while self._last_seen:
+            source, last_seen = next(iter(self._last_seen.items()))
+            if last_seen > deadline:
+                break
+            # Dropped from the queue until the source updates again, so each stale price is reported once
+            del self._last_seen[source]
+            self.stale_sources.add(source)
+            newly_stale.append(source)
+        return newly_stale
     
     async def _aggregation_loop(self):
         """Periodic aggregation and metrics calculation"""
         while self.running:
             try:
-                # Calculate latency metrics
-                if self.update_latencies:
-                    avg_latency = statistics.mean(self.update_latencies)
-                    p99_latency = statistics.quantiles(self.update_latencies, n=100)[98]
+                # Latency over the last interval
+                interval = self._interval_latency_histogram
+                if interval.count:
+                    avg_latency = interval.mean()
+                    p99_latency = interval.percentile(99)
                     
                     if avg_latency > 50:  # Alert if over 50ms
                         logger.warning(f"High latency detected: avg={avg_latency:.2f}ms, p99={p99_latency:.2f}ms")
+                    interval.reset()
                 
                 # Detect stale prices
                 now = datetime.now(timezone.utc)
-                for token_pair, dex_prices in self.price_cache.items():
-                    for dex, update in dex_prices.items():
-                        age = (now - update.timestamp).total_seconds()
-                        if age > 60:  # 1 minute stale threshold
-                            logger.warning(f"Stale price for {token_pair} on {dex}: {age:.1f}s old")
+                for token_pair, dex in self._detect_stale_prices():
+                    update = self.aggregates[token_pair].updates[dex]
+                    age = (now - update.timestamp).total_seconds()
+                    logger.warning(f"Stale price for {token_pair} on {dex}: {age:.1f}s old")
                 
                 await asyncio.sleep(10)  # Check every 10 seconds
                 
@@ -487,8 +595,8 @@ class RealtimePriceAggregator:
     def get_all_prices(self) -> Dict[str, AggregatedPrice]:
         """Get current aggregated prices for all token pairs"""
         return {
-            token_pair: self._aggregate_prices(token_pair)
-            for token_pair in self.price_cache.keys()
+            token_pair: aggregate.snapshot()
+            for token_pair, aggregate in self.aggregates.items()
         }
     
     def get_price(self, token_pair: str) -> Optional[AggregatedPrice]:
@@ -497,7 +605,7 @@ class RealtimePriceAggregator:
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get performance metrics"""
-        if not self.update_latencies:
+        if not self.latency_histogram.count:
             return {
                 "avg_latency_ms": 0,
                 "p50_latency_ms": 0,
@@ -506,16 +614,18 @@ class RealtimePriceAggregator:
                 "total_updates": 0
             }
         
-        quantiles = statistics.quantiles(self.update_latencies, n=100)
+        latency = self.latency_histogram.summary()
         
         return {
-            "avg_latency_ms": statistics.mean(self.update_latencies),
-            "p50_latency_ms": quantiles[49],
-            "p95_latency_ms": quantiles[94],
-            "p99_latency_ms": quantiles[98],
-            "total_updates": len(self.update_latencies),
+            "avg_latency_ms": latency["avg"],
+            "p50_latency_ms": latency["p50"],
+            "p95_latency_ms": latency["p95"],
+            "p99_latency_ms": latency["p99"],
+            "max_latency_ms": latency["max"],
+            "total_updates": latency["count"],
             "active_feeds": len([f for f in self.feeds if f.running]),
-            "tracked_pairs": len(self.price_cache)
+            "tracked_pairs": len(self.aggregates),
+            "stale_sources": len(self.stale_sources)
         }
     
     async def stop(self):
@@ -1,12 +1,14 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Optional, Dict, Deque, Callable, Any # Added Callable, Any
+from sqlalchemy import select, insert, update, delete, and_, or_
+from typing import List, Optional, Dict, Deque, Callable, Any, Tuple # Added Callable, Any
 from datetime import datetime, timezone
 from collections import deque
 
-from ..models.trade_history_models import TradeFillData
+from ..models.trade_history_models import TradeFillData, OpenLot
 from ..models.dashboard_models import TradeLogItem
-from ..models.db_models import TradeFillDB # New DB model import
+from ..models.db_models import TradeFillDB, TradeLotDB, ClosedTradeDB, TradeLedgerRevisionDB # New DB model import
 from ..services.event_bus_service import EventBusService # Added
 from ..models.event_bus_models import Event # Added
 from loguru import logger
@@ -14,16 +16,168 @@ from loguru import logger
 class TradeHistoryServiceError(Exception): # Custom error for the service
     pass
 
+QUANTITY_EPSILON = 1e-9
+CLOSED_TRADE_FIELDS = [column.name for column in ClosedTradeDB.__table__.columns]
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """SQLite hands back naive datetimes; fills are always stored in UTC."""
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp
+
+def _fill_order(fill: TradeFillData) -> Tuple[datetime, str]:
+    """Ledger order of fills: by timestamp, ties broken by fill_id as in the fill queries."""
+    return _as_utc(fill.timestamp), fill.fill_id
+
+def _lot_from_fill(fill: TradeFillData) -> TradeLotDB:
+    return TradeLotDB(
+        lot_id=fill.fill_id,
+        agent_id=fill.agent_id,
+        asset=fill.asset,
+        timestamp=fill.timestamp,
+        price=fill.price,
+        quantity=fill.quantity,
+        remaining_quantity=fill.quantity,
+        fee=fill.fee
+    )
+
+def match_sell_fifo(sell_fill: TradeFillData, open_lots: Deque[TradeLotDB]) -> List[TradeLogItem]:
+    """
+    Closes a sell fill against open buy lots, oldest first.
+    Consumes remaining_quantity on the lots and pops fully matched ones from the deque.
+    Fees are prorated by matched quantity over each fill's original quantity.
+    """
+    closed_trades: List[TradeLogItem] = []
+    sell_qty_remaining = sell_fill.quantity
+
+    while sell_qty_remaining > QUANTITY_EPSILON and open_lots:
+        oldest_lot = open_lots[0]
+        matched_qty = min(sell_qty_remaining, oldest_lot.remaining_quantity)
+
+        buy_fee_for_match = (matched_qty / oldest_lot.quantity) * oldest_lot.fee if oldest_lot.quantity > 0 else 0
+        sell_fee_for_match = (matched_qty / sell_fill.quantity) * sell_fill.fee if sell_fill.quantity > 0 else 0
+        total_fees_for_match = buy_fee_for_match + sell_fee_for_match
+
+        entry_price_avg = oldest_lot.price
+        exit_price_avg = sell_fill.price
+
+        initial_value = matched_qty * entry_price_avg
+        final_value = matched_qty * exit_price_avg
+
+        # PnL calculation: (exit_value - entry_value) - total_fees
+        pnl = final_value - initial_value - total_fees_for_match
+
+        percentage_pnl_val = (pnl / initial_value * 100) if initial_value != 0 else 0
+
+        entry_timestamp = _as_utc(oldest_lot.timestamp)
+        exit_timestamp = _as_utc(sell_fill.timestamp)
+
+        closed_trades.append(TradeLogItem(
+            agent_id=sell_fill.agent_id,
+            asset=sell_fill.asset,
+            trade_id=f"closed_{oldest_lot.lot_id}_{sell_fill.fill_id}", # Composite ID
+            opening_side="buy", # Current logic processes longs being closed
+            order_type="limit", # Placeholder, as fill data doesn't have order type
+            quantity=matched_qty,
+            entry_price_avg=entry_price_avg,
+            exit_price_avg=exit_price_avg,
+            entry_timestamp=entry_timestamp,
+            exit_timestamp=exit_timestamp,
+            holding_period_seconds=(exit_timestamp - entry_timestamp).total_seconds(),
+            initial_value_usd=initial_value,
+            final_value_usd=final_value,
+            realized_pnl=pnl,
+            percentage_pnl=percentage_pnl_val,
+            total_fees=total_fees_for_match
+        ))
+        logger.debug(f"Closed trade for {sell_fill.asset}: Matched Qty {matched_qty}, P&L {pnl:.2f}")
+
+        sell_qty_remaining -= matched_qty
+        oldest_lot.remaining_quantity -= matched_qty
+
+        if oldest_lot.remaining_quantity < QUANTITY_EPSILON:
+            open_lots.popleft()
+            logger.debug(f"Buy lot {oldest_lot.lot_id} fully matched and removed from open lots.")
+
+    if sell_qty_remaining > QUANTITY_EPSILON:
+        logger.debug(f"Sell fill {sell_fill.fill_id} for {sell_fill.asset} has remaining open quantity: {sell_qty_remaining} (potential start of short position)")
+
+    return closed_trades
+
+def replay_fills_fifo(fills: List[TradeFillData]) -> Tuple[List[TradeLogItem], Dict[str, Deque[TradeLotDB]]]:
+    """
+    Full FIFO replay of fills sorted by (timestamp, fill_id).
+    Returns the closed trades in match order and the open lots left per asset.
+    """
+    closed_trades: List[TradeLogItem] = []
+    open_lots_by_asset: Dict[str, Deque[TradeLotDB]] = {}
+
+    for fill in fills:
+        open_lots = open_lots_by_asset.setdefault(fill.asset, deque())
+        if fill.side == "buy":
+            open_lots.append(_lot_from_fill(fill))
+        elif fill.side == "sell":
+            closed_trades.extend(match_sell_fifo(fill, open_lots))
+
+    return closed_trades, open_lots_by_asset
+
 class TradeHistoryService:
-    def __init__(self, session_factory: Callable[[], Session], event_bus: Optional[EventBusService] = None): # Added event_bus
+    """
+    Fill recording and FIFO P&L queries.
+
+    Database work runs on a dedicated worker thread (one by default, which also
+    serializes ledger writes) so inserts and history reads never block the event
+    loop serving WebSockets and the trading loop.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], event_bus: Optional[EventBusService] = None, db_workers: int = 1): # Added event_bus
         self.session_factory = session_factory
         self.event_bus = event_bus # Store it
+        self._db_executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="trade-history-db")
         logger.info("TradeHistoryService initialized with database session factory.")
         if self.event_bus:
             logger.info("EventBusService available to TradeHistoryService.")
         else:
             logger.warning("EventBusService not available to TradeHistoryService. Fill events will not be published.")
 
+    async def _run_db(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    async def get_ledger_revision(self, agent_id: str) -> int:
+        """
+        Changes whenever the agent's closed trades were replayed (a backdated fill or
+        rebuild_ledger), so consumers paging with an (exit_timestamp, trade_id) cursor
+        know to start over. Read it before fetching. The counter lives in the database,
+        so replays by other workers or scripts/rebuild_trade_ledger.py are seen too.
+        """
+        return await self._run_db(self._get_ledger_revision_sync, agent_id)
+
+    def _get_ledger_revision_sync(self, agent_id: str) -> int:
+        db: Session = self.session_factory()
+        try:
+            revision = db.execute(
+                select(TradeLedgerRevisionDB.revision).where(TradeLedgerRevisionDB.agent_id == agent_id)
+            ).scalar_one_or_none()
+            return revision or 0
+        except Exception as e:
+            logger.error(f"Failed to read ledger revision for agent {agent_id} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error reading ledger revision: {e}")
+        finally:
+            db.close()
+
+    def _bump_ledger_revision(self, db: Session, agent_id: str) -> None:
+        """Increments the agent's ledger revision in the caller's transaction."""
+        bumped = db.execute(
+            update(TradeLedgerRevisionDB)
+            .where(TradeLedgerRevisionDB.agent_id == agent_id)
+            .values(revision=TradeLedgerRevisionDB.revision + 1)
+        )
+        if bumped.rowcount == 0:
+            db.add(TradeLedgerRevisionDB(agent_id=agent_id, revision=1))
+            db.flush() # A second replay in this transaction must update the row, not insert it again
+
+    async def cleanup(self) -> None:
+        """Stops the DB worker once queued work has finished."""
+        await asyncio.get_running_loop().run_in_executor(None, self._db_executor.shutdown)
+
     def _pydantic_fill_to_db_dict(self, fill_data: TradeFillData) -> Dict[str, Any]:
         """Converts TradeFillData Pydantic model to a dictionary suitable for TradeFillDB ORM model."""
         return fill_data.model_dump() # Pydantic's model_dump creates a dict
@@ -49,23 +203,21 @@ class TradeHistoryService:
         Records a single trade fill to the database for a specific agent.
         Returns the recorded TradeFillData object (which includes the client-generated fill_id).
         """
-        db: Session = self.session_factory()
-        logger.debug(f"Recording fill for agent {fill_data.agent_id}. Fill ID: {fill_data.fill_id}")
-        try:
-            db_fill_data_dict = self._pydantic_fill_to_db_dict(fill_data)
-            # Ensure timestamp is timezone-aware (UTC) before DB insertion if model doesn't enforce it
-            if isinstance(db_fill_data_dict.get("timestamp"), datetime) and \
-               db_fill_data_dict["timestamp"].tzinfo is None:
-                db_fill_data_dict["timestamp"] = db_fill_data_dict["timestamp"].replace(tzinfo=timezone.utc)
-
-            db_fill = TradeFillDB(**db_fill_data_dict)
-            db.add(db_fill)
-            db.commit()
-            # db.refresh(db_fill) # Not strictly needed if fill_id is client-generated and no other DB defaults are read back
-            logger.info(f"Fill {fill_data.fill_id} recorded to DB for agent {fill_data.agent_id}.")
+        await self.record_fills([fill_data])
+        return fill_data # Return the input Pydantic object
 
-            # Publish event if event_bus is available
-            if self.event_bus:
+    async def record_fills(self, fills: List[TradeFillData]) -> List[TradeFillData]:
+        """
+        Records a batch of fills with one multi-row insert and one ledger update,
+        in a single transaction. Publishes a NewFillRecordedEvent per fill.
+        """
+        if not fills:
+            return fills
+        await self._run_db(self._record_fills_sync, fills)
+
+        # Publish event if event_bus is available
+        if self.event_bus:
+            for fill_data in fills:
                 try:
                     event_payload_dict = fill_data.model_dump(mode='json') # Ensure datetimes are ISO strings
                     await self.event_bus.publish(Event(
@@ -76,29 +228,58 @@ class TradeHistoryService:
                     logger.debug(f"Published NewFillRecordedEvent for fill {fill_data.fill_id}, agent {fill_data.agent_id}")
                 except Exception as e_event:
                     logger.error(f"Error publishing NewFillRecordedEvent for fill {fill_data.fill_id}: {e_event}", exc_info=True)
+        return fills
 
-            return fill_data # Return the input Pydantic object
+    def _record_fills_sync(self, fills: List[TradeFillData]) -> None:
+        db: Session = self.session_factory()
+        fill_ids = ", ".join(f.fill_id for f in fills[:5]) + ("..." if len(fills) > 5 else "")
+        logger.debug(f"Recording {len(fills)} fills: {fill_ids}")
+        try:
+            rows = []
+            for fill_data in fills:
+                db_fill_data_dict = self._pydantic_fill_to_db_dict(fill_data)
+                # Ensure timestamp is timezone-aware (UTC) before DB insertion if model doesn't enforce it
+                db_fill_data_dict["timestamp"] = _as_utc(db_fill_data_dict["timestamp"])
+                rows.append(db_fill_data_dict)
+
+            db.execute(insert(TradeFillDB), rows)
+            self._apply_fills_to_ledger(db, fills)
+            db.commit()
+            logger.info(f"{len(fills)} fills recorded to DB ({fill_ids}).")
         except Exception as e: # Catch generic SQLAlchemy errors or other issues
             db.rollback()
-            logger.error(f"Failed to record fill {fill_data.fill_id} for agent {fill_data.agent_id} to DB: {e}", exc_info=True)
+            logger.error(f"Failed to record fills {fill_ids} to DB: {e}", exc_info=True)
             raise TradeHistoryServiceError(f"DB error recording fill: {e}")
         finally:
             db.close()
 
-    async def get_fills_for_agent(self, agent_id: str) -> List[TradeFillData]:
+    async def get_fills_for_agent(
+        self, agent_id: str, after: Optional[Tuple[datetime, str]] = None, limit: Optional[int] = None
+    ) -> List[TradeFillData]:
         """
-        Retrieves all trade fills for a specific agent from the database, sorted by timestamp.
+        Retrieves trade fills for a specific agent from the database, sorted by (timestamp, fill_id).
+        Pages with a keyset cursor: pass the (timestamp, fill_id) of the last fill received as `after`.
+        Without `limit`, returns every fill after the cursor.
         """
+        return await self._run_db(self._get_fills_for_agent_sync, agent_id, after, limit)
+
+    def _get_fills_for_agent_sync(self, agent_id: str, after: Optional[Tuple[datetime, str]], limit: Optional[int]) -> List[TradeFillData]:
         db: Session = self.session_factory()
-        fills_pydantic: List[TradeFillData] = []
-        logger.debug(f"Fetching fills from DB for agent {agent_id}.")
+        logger.debug(f"Fetching fills from DB for agent {agent_id} (after={after}, limit={limit}).")
         try:
-            stmt = select(TradeFillDB).where(TradeFillDB.agent_id == agent_id).order_by(TradeFillDB.timestamp)
-            db_results = db.execute(stmt).scalars().all()
-
-            for db_fill in db_results:
-                fills_pydantic.append(self._db_fill_to_pydantic(db_fill))
-
+            stmt = select(TradeFillDB).where(TradeFillDB.agent_id == agent_id)
+            if after is not None:
+                after_timestamp, after_fill_id = after
+                after_timestamp = _as_utc(after_timestamp)
+                stmt = stmt.where(or_(
+                    TradeFillDB.timestamp > after_timestamp,
+                    and_(TradeFillDB.timestamp == after_timestamp, TradeFillDB.fill_id > after_fill_id)
+                ))
+            stmt = stmt.order_by(TradeFillDB.timestamp, TradeFillDB.fill_id)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+
+            fills_pydantic = [self._db_fill_to_pydantic(db_fill) for db_fill in db.execute(stmt).scalars().all()]
             logger.info(f"Retrieved {len(fills_pydantic)} fills from DB for agent {agent_id}.")
             return fills_pydantic
         except Exception as e:
@@ -107,99 +288,265 @@ class TradeHistoryService:
         finally:
             db.close()
 
-    async def get_processed_trades(self, agent_id: str, limit: int = 100, offset: int = 0) -> List[TradeLogItem]:
+    def _apply_fills_to_ledger(self, db: Session, fills: List[TradeFillData]) -> None:
         """
-        Processes fills for an agent to calculate P&L for closed trades (FIFO).
-        Now fetches fills from the database.
+        Updates the lot ledger for newly inserted fills, in the caller's transaction.
+        A fill older than its asset's latest recorded fill would change earlier FIFO
+        matches, so that asset's ledger is replayed from its fills instead.
         """
-        logger.info(f"Processing trades for P&L for agent {agent_id} (limit={limit}, offset={offset}) using DB.")
-        all_fills = await self.get_fills_for_agent(agent_id) # This now calls the DB version
-        if not all_fills:
-            return []
-
-        # Fills from DB are already sorted by timestamp due to the query's order_by.
-        # No need to sort again if get_fills_for_agent guarantees it.
-
-        processed_trades: List[TradeLogItem] = []
-        fills_by_asset: Dict[str, Deque[TradeFillData]] = {}
-
-        for fill in all_fills:
-            if fill.asset not in fills_by_asset:
-                fills_by_asset[fill.asset] = deque()
-            fills_by_asset[fill.asset].append(fill)
-
-        for asset, asset_fills_deque in fills_by_asset.items():
-            logger.debug(f"Processing {len(asset_fills_deque)} DB fills for asset {asset}")
-            open_buys: Deque[TradeFillData] = deque()
-
-            while asset_fills_deque:
-                current_fill = asset_fills_deque.popleft()
-
-                if current_fill.side == "buy":
-                    open_buys.append(current_fill)
-                    logger.debug(f"Added to open_buys for {asset}: Qty {current_fill.quantity} @ Prc {current_fill.price} (ID: {current_fill.fill_id})")
-
-                elif current_fill.side == "sell":
-                    logger.debug(f"Processing SELL fill for {asset}: Qty {current_fill.quantity} @ Prc {current_fill.price} (ID: {current_fill.fill_id})")
-                    sell_qty_remaining = current_fill.quantity
-                    # total_sell_fees = current_fill.fee # Not used like this anymore
-
-                    while sell_qty_remaining > 1e-9 and open_buys:
-                        oldest_buy = open_buys[0]
-                        matched_qty = min(sell_qty_remaining, oldest_buy.quantity)
-
-                        buy_fee_for_match = (matched_qty / oldest_buy.quantity) * oldest_buy.fee if oldest_buy.quantity > 0 else 0
-                        sell_fee_for_match = (matched_qty / current_fill.quantity) * current_fill.fee if current_fill.quantity > 0 else 0
-                        total_fees_for_match = buy_fee_for_match + sell_fee_for_match
-
-                        entry_price_avg = oldest_buy.price
-                        exit_price_avg = current_fill.price
-
-                        initial_value = matched_qty * entry_price_avg
-                        final_value = matched_qty * exit_price_avg
+        fills_by_asset: Dict[Tuple[str, str], List[TradeFillData]] = {}
+        for fill_data in fills:
+            fills_by_asset.setdefault((fill_data.agent_id, fill_data.asset), []).append(fill_data)
+
+        for (agent_id, asset), asset_fills in fills_by_asset.items():
+            asset_fills.sort(key=_fill_order)
+            new_fill_ids = {f.fill_id for f in asset_fills}
+            first_timestamp, first_fill_id = _fill_order(asset_fills[0])
+
+            later_fill = db.execute(
+                select(TradeFillDB.fill_id)
+                .where(
+                    TradeFillDB.agent_id == agent_id,
+                    TradeFillDB.asset == asset,
+                    or_(
+                        TradeFillDB.timestamp > first_timestamp,
+                        and_(TradeFillDB.timestamp == first_timestamp, TradeFillDB.fill_id > first_fill_id)
+                    ),
+                    TradeFillDB.fill_id.not_in(new_fill_ids)
+                )
+                .limit(1)
+            ).first()
+
+            if later_fill is not None:
+                logger.info(f"Fills for {asset} predate recorded fills for agent {agent_id}; replaying ledger.")
+                replay = [f for f in self._load_fills(db, agent_id, asset) if f.fill_id not in new_fill_ids]
+                replay.extend(asset_fills)
+                replay.sort(key=_fill_order)
+                self._write_ledger(db, agent_id, replay, asset=asset)
+                continue
+
+            open_lots: Deque[TradeLotDB] = deque()
+            existing_lots: List[TradeLotDB] = []
+            if any(f.side == "sell" for f in asset_fills):
+                existing_lots = db.execute(
+                    select(TradeLotDB)
+                    .where(TradeLotDB.agent_id == agent_id, TradeLotDB.asset == asset)
+                    .order_by(TradeLotDB.timestamp, TradeLotDB.lot_id)
+                ).scalars().all()
+                open_lots.extend(existing_lots)
+
+            new_lots: List[TradeLotDB] = []
+            closed_trades: List[TradeLogItem] = []
+            for fill_data in asset_fills:
+                if fill_data.side == "buy":
+                    lot = _lot_from_fill(fill_data)
+                    open_lots.append(lot)
+                    new_lots.append(lot)
+                elif fill_data.side == "sell":
+                    closed_trades.extend(match_sell_fifo(fill_data, open_lots))
+
+            db.add_all([lot for lot in new_lots if lot.remaining_quantity >= QUANTITY_EPSILON])
+            db.add_all([ClosedTradeDB(**trade_log.model_dump()) for trade_log in closed_trades])
+            for lot in existing_lots:
+                if lot.remaining_quantity < QUANTITY_EPSILON:
+                    db.delete(lot)
+
+    def _load_fills(self, db: Session, agent_id: str, asset: Optional[str] = None) -> List[TradeFillData]:
+        stmt = select(TradeFillDB).where(TradeFillDB.agent_id == agent_id)
+        if asset is not None:
+            stmt = stmt.where(TradeFillDB.asset == asset)
+        stmt = stmt.order_by(TradeFillDB.timestamp, TradeFillDB.fill_id)
+        return [self._db_fill_to_pydantic(db_fill) for db_fill in db.execute(stmt).scalars().all()]
+
+    def _write_ledger(self, db: Session, agent_id: str, fills: List[TradeFillData], asset: Optional[str] = None) -> Tuple[int, int]:
+        """Replaces the agent's (or one asset's) ledger rows with a full replay of fills."""
+        lot_delete = delete(TradeLotDB).where(TradeLotDB.agent_id == agent_id)
+        trade_delete = delete(ClosedTradeDB).where(ClosedTradeDB.agent_id == agent_id)
+        if asset is not None:
+            lot_delete = lot_delete.where(TradeLotDB.asset == asset)
+            trade_delete = trade_delete.where(ClosedTradeDB.asset == asset)
+        db.execute(lot_delete)
+        db.execute(trade_delete)
+        # Committed or rolled back together with the rewritten rows
+        self._bump_ledger_revision(db, agent_id)
+
+        closed_trades, open_lots_by_asset = replay_fills_fifo(fills)
+        db.add_all(ClosedTradeDB(**trade_log.model_dump()) for trade_log in closed_trades)
+        open_lots = [lot for lots in open_lots_by_asset.values() for lot in lots]
+        db.add_all(open_lots)
+        return len(closed_trades), len(open_lots)
+
+    def _db_closed_trade_to_pydantic(self, db_trade: ClosedTradeDB) -> TradeLogItem:
+        values = {field: getattr(db_trade, field) for field in CLOSED_TRADE_FIELDS}
+        values["exit_timestamp"] = _as_utc(db_trade.exit_timestamp)
+        if db_trade.entry_timestamp is not None:
+            values["entry_timestamp"] = _as_utc(db_trade.entry_timestamp)
+        return TradeLogItem(**values)
+
+    async def get_processed_trades(
+        self, agent_id: str, limit: int = 100, offset: int = 0, before: Optional[Tuple[datetime, str]] = None
+    ) -> List[TradeLogItem]:
+        """
+        Returns FIFO-closed trades with P&L for an agent, newest exit first.
+        Reads the lot ledger maintained by record_fill, so cost depends on the page size
+        rather than on the agent's lifetime fill count. For deep pages pass the
+        (exit_timestamp, trade_id) of the last trade received as `before` instead of an offset.
+        """
+        return await self._run_db(self._get_processed_trades_sync, agent_id, limit, offset, before)
 
-                        # PnL calculation: (exit_value - entry_value) - total_fees
-                        pnl = final_value - initial_value - total_fees_for_match
+    def _get_processed_trades_sync(
+        self, agent_id: str, limit: int, offset: int, before: Optional[Tuple[datetime, str]]
+    ) -> List[TradeLogItem]:
+        db: Session = self.session_factory()
+        logger.debug(f"Fetching closed trades for agent {agent_id} (limit={limit}, offset={offset}, before={before}).")
+        try:
+            stmt = select(ClosedTradeDB).where(ClosedTradeDB.agent_id == agent_id)
+            if before is not None:
+                before_timestamp, before_trade_id = before
+                before_timestamp = _as_utc(before_timestamp)
+                stmt = stmt.where(or_(
+                    ClosedTradeDB.exit_timestamp < before_timestamp,
+                    and_(ClosedTradeDB.exit_timestamp == before_timestamp, ClosedTradeDB.trade_id > before_trade_id)
+                ))
+            stmt = (
+                stmt.order_by(ClosedTradeDB.exit_timestamp.desc(), ClosedTradeDB.trade_id)
+                .offset(offset)
+                .limit(limit)
+            )
+            return [self._db_closed_trade_to_pydantic(db_trade) for db_trade in db.execute(stmt).scalars().all()]
+        except Exception as e:
+            logger.error(f"Failed to retrieve closed trades for agent {agent_id} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error retrieving closed trades: {e}")
+        finally:
+            db.close()
 
-                        percentage_pnl_val = (pnl / initial_value * 100) if initial_value != 0 else 0
+    async def get_processed_trades_since(
+        self, agent_id: str, after: Optional[Tuple[datetime, str]] = None, limit: int = 1000
+    ) -> List[TradeLogItem]:
+        """
+        Returns closed trades oldest exit first, starting after the (exit_timestamp, trade_id) cursor.
+        Lets consumers walk an agent's full history in chunks and later pick up only new trades.
+        """
+        return await self._run_db(self._get_processed_trades_since_sync, agent_id, after, limit)
 
-                        holding_period_sec = (current_fill.timestamp - oldest_buy.timestamp).total_seconds()
+    def _get_processed_trades_since_sync(
+        self, agent_id: str, after: Optional[Tuple[datetime, str]], limit: int
+    ) -> List[TradeLogItem]:
+        db: Session = self.session_factory()
+        try:
+            stmt = select(ClosedTradeDB).where(ClosedTradeDB.agent_id == agent_id)
+            if after is not None:
+                after_timestamp, after_trade_id = after
+                after_timestamp = _as_utc(after_timestamp)
+                stmt = stmt.where(or_(
+                    ClosedTradeDB.exit_timestamp > after_timestamp,
+                    and_(ClosedTradeDB.exit_timestamp == after_timestamp, ClosedTradeDB.trade_id > after_trade_id)
+                ))
+            stmt = stmt.order_by(ClosedTradeDB.exit_timestamp, ClosedTradeDB.trade_id).limit(limit)
+            return [self._db_closed_trade_to_pydantic(db_trade) for db_trade in db.execute(stmt).scalars().all()]
+        except Exception as e:
+            logger.error(f"Failed to retrieve closed trades for agent {agent_id} after {after} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error retrieving closed trades: {e}")
+        finally:
+            db.close()
 
-                        trade_log = TradeLogItem(
-                            agent_id=agent_id,
-                            asset=asset,
-                            trade_id=f"closed_{oldest_buy.fill_id}_{current_fill.fill_id}", # Composite ID
-                            opening_side="buy", # Current logic processes longs being closed
-                            order_type="limit", # Placeholder, as fill data doesn't have order type
-                            quantity=matched_qty,
-                            entry_price_avg=entry_price_avg,
-                            exit_price_avg=exit_price_avg,
-                            entry_timestamp=oldest_buy.timestamp,
-                            exit_timestamp=current_fill.timestamp,
-                            holding_period_seconds=holding_period_sec,
-                            initial_value_usd=initial_value,
-                            final_value_usd=final_value,
-                            realized_pnl=pnl,
-                            percentage_pnl=percentage_pnl_val,
-                            total_fees=total_fees_for_match
-                        )
-                        processed_trades.append(trade_log)
-                        logger.debug(f"Closed trade for {asset}: Matched Qty {matched_qty}, P&L {pnl:.2f}")
+    async def get_open_lots(self, agent_id: str, asset: Optional[str] = None) -> List[OpenLot]:
+        """Returns the agent's unmatched buy quantity, oldest lot first."""
+        return await self._run_db(self._get_open_lots_sync, agent_id, asset)
 
-                        sell_qty_remaining -= matched_qty
-                        oldest_buy.quantity -= matched_qty
+    def _get_open_lots_sync(self, agent_id: str, asset: Optional[str]) -> List[OpenLot]:
+        db: Session = self.session_factory()
+        try:
+            stmt = select(TradeLotDB).where(TradeLotDB.agent_id == agent_id)
+            if asset is not None:
+                stmt = stmt.where(TradeLotDB.asset == asset)
+            return [
+                OpenLot(
+                    lot_id=lot.lot_id, agent_id=lot.agent_id, asset=lot.asset, timestamp=_as_utc(lot.timestamp),
+                    price=lot.price, quantity=lot.quantity, remaining_quantity=lot.remaining_quantity, fee=lot.fee or 0.0
+                )
+                for lot in db.execute(stmt.order_by(TradeLotDB.asset, TradeLotDB.timestamp, TradeLotDB.lot_id)).scalars().all()
+            ]
+        except Exception as e:
+            logger.error(f"Failed to retrieve open lots for agent {agent_id} from DB: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error retrieving open lots: {e}")
+        finally:
+            db.close()
 
-                        if oldest_buy.quantity < 1e-9:
-                            open_buys.popleft()
-                            logger.debug(f"Buy fill {oldest_buy.fill_id} fully matched and removed from open_buys.")
+    async def rebuild_ledger(self, agent_id: str) -> Dict[str, int]:
+        """Recomputes an agent's closed trades and open lots from all of its fills."""
+        return await self._run_db(self._rebuild_ledger_sync, agent_id)
 
-                        if sell_qty_remaining < 1e-9:
-                            break
+    def _rebuild_ledger_sync(self, agent_id: str) -> Dict[str, int]:
+        db: Session = self.session_factory()
+        try:
+            closed_count, open_count = self._write_ledger(db, agent_id, self._load_fills(db, agent_id))
+            db.commit()
+            logger.info(f"Rebuilt trade ledger for agent {agent_id}: {closed_count} closed trades, {open_count} open lots.")
+            return {"closed_trades": closed_count, "open_lots": open_count}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to rebuild trade ledger for agent {agent_id}: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error rebuilding ledger: {e}")
+        finally:
+            db.close()
 
-                    if sell_qty_remaining > 1e-9:
-                        logger.debug(f"Sell fill {current_fill.fill_id} for {asset} has remaining open quantity: {sell_qty_remaining} (potential start of short position)")
+    def _load_ledger_sync(self, agent_id: str) -> Tuple[List[TradeFillData], Dict[str, TradeLogItem], Dict[str, float]]:
+        db: Session = self.session_factory()
+        try:
+            fills = self._load_fills(db, agent_id)
+            stored_trades = {
+                db_trade.trade_id: self._db_closed_trade_to_pydantic(db_trade)
+                for db_trade in db.execute(select(ClosedTradeDB).where(ClosedTradeDB.agent_id == agent_id)).scalars().all()
+            }
+            stored_lots = {
+                lot.lot_id: lot.remaining_quantity
+                for lot in db.execute(select(TradeLotDB).where(TradeLotDB.agent_id == agent_id)).scalars().all()
+            }
+            return fills, stored_trades, stored_lots
+        except Exception as e:
+            logger.error(f"Failed to verify trade ledger for agent {agent_id}: {e}", exc_info=True)
+            raise TradeHistoryServiceError(f"DB error verifying ledger: {e}")
+        finally:
+            db.close()
 
-        processed_trades.sort(key=lambda t: t.timestamp, reverse=True)
-        logger.info(f"Generated {len(processed_trades)} processed (closed) trades for agent {agent_id} from DB data.")
-        return processed_trades[offset : offset + limit]
+    async def verify_ledger(self, agent_id: str, tolerance: float = 1e-6) -> Dict[str, Any]:
+        """
+        Compares the stored ledger against a full FIFO replay of the agent's fills.
+        Returns counts and the ids of any closed trades or lots that differ.
+        """
+        fills, stored_trades, stored_lots = await self._run_db(self._load_ledger_sync, agent_id)
+        expected_trades, expected_lots_by_asset = replay_fills_fifo(fills)
+
+        mismatched_trades = []
+        expected_trade_ids = set()
+        for expected in expected_trades:
+            expected_trade_ids.add(expected.trade_id)
+            stored = stored_trades.get(expected.trade_id)
+            if stored is None or any(
+                abs(getattr(stored, field) - getattr(expected, field)) > tolerance * max(1.0, abs(getattr(expected, field)))
+                if isinstance(getattr(expected, field), float)
+                else getattr(stored, field) != getattr(expected, field)
+                for field in CLOSED_TRADE_FIELDS
+            ):
+                mismatched_trades.append(expected.trade_id)
+        mismatched_trades.extend(sorted(set(stored_trades) - expected_trade_ids))
+
+        expected_lots = {lot.lot_id: lot.remaining_quantity for lots in expected_lots_by_asset.values() for lot in lots}
+        mismatched_lots = sorted(
+            lot_id for lot_id in set(expected_lots) | set(stored_lots)
+            if lot_id not in expected_lots or lot_id not in stored_lots
+            or abs(expected_lots[lot_id] - stored_lots[lot_id]) > tolerance
+        )
 
+        report = {
+            "agent_id": agent_id,
+            "consistent": not mismatched_trades and not mismatched_lots,
+            "closed_trades": len(expected_trades),
+            "open_lots": len(expected_lots),
+            "mismatched_trades": mismatched_trades,
+            "mismatched_lots": mismatched_lots
+        }
+        if not report["consistent"]:
+            logger.warning(f"Trade ledger for agent {agent_id} differs from fill replay: {len(mismatched_trades)} trades, {len(mismatched_lots)} lots.")
+        return report
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime, timezone
 import uuid # For mock data generation
 from loguru import logger
@@ -160,6 +160,16 @@ class TradingDataService:
             logger.error(f"Error fetching processed trades for agent {agent_id} from TradeHistoryService: {e}", exc_info=True)
             return [] # Return empty list on error, or re-raise depending on desired error handling
 
+    async def get_trade_history_since(
+        self, agent_id: str, after: Optional[Tuple[datetime, str]] = None, limit: int = 1000
+    ) -> List[TradeLogItem]:
+        """Closed trades oldest first after an (exit_timestamp, trade_id) cursor; errors propagate to the caller."""
+        return await self.trade_history_service.get_processed_trades_since(agent_id=agent_id, after=after, limit=limit)
+
+    async def get_ledger_revision(self, agent_id: str) -> int:
+        """Changes when the agent's closed trades were replayed; cursors from an older revision are stale."""
+        return await self.trade_history_service.get_ledger_revision(agent_id)
+
     async def get_open_orders(self, agent_id: str) -> List[OrderLogItem]:
         logger.info(f"Fetching open orders for agent {agent_id} from OrderHistoryService.")
         if not self.order_history_service:
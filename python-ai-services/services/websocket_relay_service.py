@@ -1,4 +1,4 @@
-from ..core.websocket_manager import ConnectionManager
+from ..core.websocket_manager import ConnectionManager, agent_topic, symbol_topic
 from ..services.event_bus_service import EventBusService
 from ..models.event_bus_models import Event
 # Import Pydantic models for type clarity on payloads, though they arrive as dicts
@@ -10,6 +10,12 @@ from loguru import logger
 from typing import Optional # For optional agent_id in event payload
 
 class WebSocketRelayService:
+    """
+    Relays event bus events to dashboard WebSockets through ConnectionManager topics:
+    agent updates go to ``agent:<agent_id>`` and fill prices to ``symbol:<asset>``.
+    Discrete events (fills, alerts) are never coalesced; state updates (portfolio
+    snapshots, latest fill price per symbol) are, so slow consumers only get the latest.
+    """
     def __init__(self, connection_manager: ConnectionManager, event_bus: EventBusService):
         self.connection_manager = connection_manager
         self.event_bus = event_bus
@@ -52,7 +58,12 @@ class WebSocketRelayService:
             agent_id=agent_id, # For client-side routing if dashboard handles multiple agents
             payload=event.payload # event.payload is already the dict of TradeFillData
         )
-        await self.connection_manager.send_to_client(agent_id, ws_envelope)
+        await self.connection_manager.publish(agent_topic(agent_id), ws_envelope, coalesce=False)
+
+        # Symbol subscribers follow the latest execution price, so older pending fills can be replaced
+        asset = event.payload.get('asset')
+        if asset:
+            await self.connection_manager.publish(symbol_topic(asset), ws_envelope)
 
     async def on_alert_triggered(self, event: Event):
         if not isinstance(event.payload, dict):
@@ -61,7 +72,7 @@ class WebSocketRelayService:
 
         agent_id = await self._get_agent_id_from_event(event)
         # For alerts, if agent_id is missing, we might choose to broadcast or handle differently.
-        # The current ConnectionManager.send_to_client will simply not send if agent_id is None.
+        # Without an agent_id there is no agent topic to publish to.
         # If a broadcast is desired for alerts without a specific agent_id, that logic would be here.
 
         logger.debug(f"WebSocketRelay: Relaying AlertTriggeredEvent for agent {agent_id or 'N/A'}. Alert Name: {event.payload.get('alert_name')}")
@@ -73,7 +84,7 @@ class WebSocketRelayService:
         )
 
         if agent_id:
-            await self.connection_manager.send_to_client(agent_id, ws_envelope)
+            await self.connection_manager.publish(agent_topic(agent_id), ws_envelope, coalesce=False)
         else:
             # Example: If agent_id is None, broadcast to all connected dashboard clients
             logger.info("WebSocketRelay: AlertTriggeredEvent has no specific agent_id, broadcasting to all clients.")
@@ -97,4 +108,5 @@ class WebSocketRelayService:
             agent_id=agent_id,
             payload=event.payload # event.payload is already dict of PortfolioSnapshotOutput
         )
-        await self.connection_manager.send_to_client(agent_id, ws_envelope)
+        # A newer snapshot supersedes a pending one
+        await self.connection_manager.publish(agent_topic(agent_id), ws_envelope)
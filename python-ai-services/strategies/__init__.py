@@ -6,6 +6,7 @@ from .williams_alligator import get_williams_alligator_signals, run_williams_all
 from .elliott_wave import get_elliott_wave_signals, run_elliott_wave_backtest
 from .heikin_ashi import get_heikin_ashi_signals, run_heikin_ashi_backtest, calculate_heikin_ashi_candles
 from .renko import get_renko_signals, run_renko_backtest, calculate_renko_bricks
+from .batch_signals import build_panel, panel_from_arrays, load_panel, panel_signals, batch_signals
 
 # SMA Crossover strategy might be missing in this merge, will be handled separately
 try:
@@ -27,6 +28,11 @@ __all__ = [
     "get_renko_signals",
     "run_renko_backtest",
     "calculate_renko_bricks",
+    "build_panel",
+    "panel_from_arrays",
+    "load_panel",
+    "panel_signals",
+    "batch_signals",
 ]
 
 # Add SMA crossover functions to __all__ if available
@@ -7,7 +7,7 @@ It provides common functionality and a standardized interface for strategy imple
 
 import abc
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple, Union
 import pandas as pd
 import numpy as np
 from loguru import logger
@@ -17,6 +17,8 @@ from ..models.trading_strategy import (
     TradingStrategy, TradingSignal, SignalType, 
     OHLCVData, TimeFrame, TechnicalIndicatorValue
 )
+if TYPE_CHECKING: # core/__init__ starts every service, so the bar store is imported where it is used
+    from ..core.ohlcv_store import OHLCVStore
 
 class BaseStrategy(abc.ABC):
     """
@@ -54,8 +56,9 @@ class BaseStrategy(abc.ABC):
         self.description = description
         self.metadata = metadata or {}
         
-        # Market data cache
+        # Market data cache, optionally backed by a local bar store (see add_market_data)
         self._market_data: Dict[str, pd.DataFrame] = {}
+        self.bar_store: Optional['OHLCVStore'] = None
         
         # Performance tracking
         self.signals: List[TradingSignal] = []
@@ -109,7 +112,15 @@ class BaseStrategy(abc.ABC):
             metadata=model.metadata or {}
         )
     
-    def add_market_data(self, symbol: str, timeframe: Union[str, TimeFrame], data: Union[pd.DataFrame, List[Dict[str, Any]], List[OHLCVData]]) -> None:
+    def add_market_data(
+        self,
+        symbol: str,
+        timeframe: Union[str, TimeFrame],
+        data: Optional[Union[pd.DataFrame, List[Dict[str, Any]], List[OHLCVData]]] = None,
+        bar_store: Optional['OHLCVStore'] = None,
+        start: Optional[Union[str, datetime]] = None,
+        end: Optional[Union[str, datetime]] = None
+    ) -> None:
         """
         Add market data for a symbol and timeframe.
         
@@ -117,8 +128,25 @@ class BaseStrategy(abc.ABC):
             symbol: The trading symbol (e.g., "AAPL", "BTC/USD").
             timeframe: The timeframe of the data (e.g., "1h", "1d").
             data: Market data as DataFrame or list of dictionaries/OHLCVData objects.
+                  When omitted, the bars between start and end are loaded from the bar store.
+            bar_store: Local bar store, defaulting to self.bar_store. Data passed in is also
+                       written to it, so later runs can load the same bars offline.
+            start: First bar time to load from the bar store (inclusive, optional).
+            end: Last bar time or date to load from the bar store (inclusive, optional).
         """
         key = f"{symbol}_{timeframe}"
+        bar_store = bar_store or self.bar_store
+        store_timeframe = timeframe.value if isinstance(timeframe, TimeFrame) else timeframe
+        loaded_from_store = data is None
+        
+        if loaded_from_store:
+            if bar_store is None:
+                raise ValueError(f"No market data or bar store provided for {symbol} {timeframe}")
+            stored = bar_store.read(symbol, store_timeframe, start, end)
+            if stored.empty:
+                logger.warning(f"No stored bars for {symbol} {timeframe} between {start} and {end}")
+                return
+            data = stored.rename(columns=str.lower).rename_axis("timestamp").reset_index()
         
         if isinstance(data, list):
             if not data:
@@ -153,6 +181,9 @@ class BaseStrategy(abc.ABC):
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
         
+        if bar_store is not None and not loaded_from_store:
+            bar_store.write(symbol, store_timeframe, df.dropna(subset=['open', 'high', 'low', 'close', 'volume']))
+        
         self._market_data[key] = df
         logger.info(f"Added market data for {symbol} {timeframe}: {len(df)} rows")
     
@@ -0,0 +1,281 @@
+"""
+Signals for a whole panel of symbols in one call.
+
+A panel is a wide DataFrame on one shared DatetimeIndex whose columns are a (field, symbol)
+MultiIndex over the fields Open/High/Low/Close/Volume; build_panel, panel_from_arrays and
+load_panel create one. A symbol's bars are the rows where any of its fields is present, so
+symbols listed later or delisted earlier simply have NaN rows at either end.
+
+Williams Alligator and Heikin Ashi are computed for every symbol at once on the 2D arrays and
+match the single-symbol functions as long as each symbol's bars are contiguous on the panel
+calendar. Darvas Box, Renko and Elliott Wave are path dependent, so they call the
+single-symbol functions once per symbol, fanned out over a process pool when n_jobs > 1.
+"""
+
+import itertools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+from ..models.trading_strategy import SignalType
+from .darvas_box import get_darvas_signals
+from .elliott_wave import get_elliott_wave_signals
+from .heikin_ashi import (
+    get_heikin_ashi_signals, DEFAULT_TREND_CONFIRMATION_CANDLES, DEFAULT_EXIT_CHANGE_CANDLES
+)
+from .renko import get_renko_signals
+from .williams_alligator import (
+    get_williams_alligator_signals, calculate_smma, DEFAULT_JAW_PERIOD, DEFAULT_JAW_OFFSET,
+    DEFAULT_TEETH_PERIOD, DEFAULT_TEETH_OFFSET, DEFAULT_LIPS_PERIOD, DEFAULT_LIPS_OFFSET
+)
+
+try:
+    from openbb import obb
+except ImportError:
+    obb = None
+
+logger = getLogger(__name__)
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+# Single-symbol signal functions, used directly for the per-symbol strategies
+SIGNAL_FUNCTIONS = {
+    "darvas_box": get_darvas_signals,
+    "williams_alligator": get_williams_alligator_signals,
+    "heikin_ashi": get_heikin_ashi_signals,
+    "renko": get_renko_signals,
+    "elliott_wave": get_elliott_wave_signals,
+}
+
+
+# --- Panel construction ---
+
+def build_panel(frames: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """Aligns per-symbol OHLCV frames on the union of their timestamps"""
+    from ..core.ohlcv_store import normalize_bars
+
+    columns = {}
+    for symbol, bars in frames.items():
+        bars = normalize_bars(bars)
+        for field in PANEL_FIELDS:
+            columns[(field, symbol)] = bars[field]
+    panel = pd.DataFrame(columns)
+    panel.columns = pd.MultiIndex.from_tuples(panel.columns, names=["field", "symbol"])
+    return panel.sort_index(axis=1, level="field", sort_remaining=False)
+
+
+def panel_from_arrays(index: Iterable, symbols: Iterable[str], open: np.ndarray, high: np.ndarray,
+                      low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> pd.DataFrame:
+    """Panel from (bars x symbols) arrays, one per field, with NaN for missing bars"""
+    index = pd.DatetimeIndex(index)
+    symbols = list(symbols)
+    blocks = [pd.DataFrame(np.asarray(values, dtype=float), index=index, columns=symbols)
+              for values in (open, high, low, close, volume)]
+    return pd.concat(blocks, axis=1, keys=list(PANEL_FIELDS), names=["field", "symbol"])
+
+
+def load_panel(bar_store: 'OHLCVStore', symbols: Iterable[str], start_date: str, end_date: str,
+               data_provider: str = "yfinance", timeframe: str = "1d") -> pd.DataFrame:
+    """Panel read from a local bar store, fetching only ranges the store does not cover yet"""
+    from ..core.ohlcv_store import openbb_bar_fetcher
+    fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+    frames = {}
+    for symbol in symbols:
+        bars = bar_store.get_bars(symbol, timeframe, start_date, end_date, fetch=fetch)
+        if bars.empty:
+            logger.warning(f"No {timeframe} bars for {symbol} from {start_date} to {end_date}; leaving it out of the panel")
+            continue
+        frames[symbol] = bars
+    return build_panel(frames)
+
+
+def panel_symbols(panel: pd.DataFrame) -> list:
+    return list(panel['Close'].columns)
+
+
+def symbol_bars(panel: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """One symbol's OHLCV bars, without the panel rows where it has no data"""
+    bars = pd.DataFrame({field: panel[(field, symbol)] for field in PANEL_FIELDS}, index=panel.index)
+    return bars.dropna(how="all")
+
+
+# --- Vectorized strategies ---
+
+def _present(panel: pd.DataFrame) -> pd.DataFrame:
+    """Rows where each symbol has a bar"""
+    present = panel['Open'].notna()
+    for field in PANEL_FIELDS[1:]:
+        present |= panel[field].notna()
+    return present
+
+
+def _rolling_all(condition: pd.DataFrame, window: int) -> pd.DataFrame:
+    return condition.astype(float).rolling(window=window, min_periods=window).sum().fillna(0) >= window
+
+
+def _previous_valid(values: pd.DataFrame, valid: pd.DataFrame) -> pd.DataFrame:
+    """values at each symbol's previous valid row (False before the first one)"""
+    return values.astype(float).where(valid).ffill().shift(1).fillna(0).astype(bool)
+
+
+def williams_alligator_panel(
+    panel: pd.DataFrame,
+    jaw_period: int = DEFAULT_JAW_PERIOD, jaw_offset: int = DEFAULT_JAW_OFFSET,
+    teeth_period: int = DEFAULT_TEETH_PERIOD, teeth_offset: int = DEFAULT_TEETH_OFFSET,
+    lips_period: int = DEFAULT_LIPS_PERIOD, lips_offset: int = DEFAULT_LIPS_OFFSET
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Entries and exits of get_williams_alligator_signals for every symbol in the panel"""
+    median_price = (panel['High'] + panel['Low']) / 2
+    jaw = calculate_smma(median_price, jaw_period).shift(jaw_offset)
+    teeth = calculate_smma(median_price, teeth_period).shift(teeth_offset)
+    lips = calculate_smma(median_price, lips_period).shift(lips_offset)
+
+    # The single-symbol function drops every row with a missing field or line
+    valid = jaw.notna() & teeth.notna() & lips.notna()
+    for field in PANEL_FIELDS:
+        valid &= panel[field].notna()
+
+    aligned = (lips > teeth) & (teeth > jaw) & valid
+    was_aligned = _previous_valid(aligned, valid)
+    entries = aligned & ~was_aligned
+    exits = valid & ~aligned & was_aligned
+    return entries, exits & ~entries
+
+
+def heikin_ashi_panel(
+    panel: pd.DataFrame,
+    trend_confirmation_candles: int = DEFAULT_TREND_CONFIRMATION_CANDLES,
+    exit_change_candles: int = DEFAULT_EXIT_CHANGE_CANDLES
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Entries and exits of get_heikin_ashi_signals for every symbol in the panel"""
+    open_, high, low, close = (panel[field].to_numpy(dtype=float) for field in ("Open", "High", "Low", "Close"))
+    present = _present(panel).to_numpy()
+    ha_close = (open_ + high + low + close) / 4.0
+
+    # HA open is a recurrence along time; step through the rows for all symbols at once,
+    # seeding each symbol at its first bar
+    first_bar = np.where(present.any(axis=0), present.argmax(axis=0), -1)
+    ha_open = np.full_like(ha_close, np.nan)
+    for i in range(len(ha_close)):
+        if i:
+            ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2.0
+        seeded = first_bar == i
+        if seeded.any():
+            ha_open[i, seeded] = (open_[i, seeded] + close[i, seeded]) / 2.0
+    ha_high = np.fmax(np.fmax(ha_open, ha_close), high)
+    ha_low = np.fmin(np.fmin(ha_open, ha_close), low)
+
+    valid = present & ~(np.isnan(ha_open) | np.isnan(ha_close) | np.isnan(ha_high) | np.isnan(ha_low))
+    green = pd.DataFrame((ha_close > ha_open) & (np.abs(ha_open - ha_low) < 1e-5) & valid, index=panel.index, columns=panel['Close'].columns)
+    red = pd.DataFrame((ha_close < ha_open) & valid, index=panel.index, columns=green.columns)
+
+    shifted_entry = _rolling_all(green, trend_confirmation_candles).shift(1, fill_value=False)
+    entries = shifted_entry & ~shifted_entry.shift(1, fill_value=False)
+    exits = _rolling_all(red, exit_change_candles).shift(1, fill_value=False) & ~entries
+
+    # Rows without a close are dropped from the single-symbol output after the signals are set
+    emitted = pd.DataFrame(valid, index=panel.index, columns=green.columns) & panel['Close'].notna()
+    return entries & emitted, exits & emitted
+
+
+VECTORIZED_STRATEGIES = {
+    "williams_alligator": williams_alligator_panel,
+    "heikin_ashi": heikin_ashi_panel,
+}
+
+
+# --- Per-symbol fan-out ---
+
+def _symbol_signals(strategy: str, symbol: str, bars: pd.DataFrame,
+                    params: Dict[str, Any]) -> Optional[Tuple[pd.Series, pd.Series]]:
+    """Runs one single-symbol signal function; kept at module level so it can run in worker processes"""
+    try:
+        output = SIGNAL_FUNCTIONS[strategy](symbol, "", "", price_data=bars, **params)
+    except Exception as e:
+        logger.error(f"{strategy} signals failed for {symbol}: {e}", exc_info=True)
+        return None
+    signals = output[0] if isinstance(output, tuple) else output
+    if signals is None or signals.empty:
+        return None
+    return signals['entries'].astype(bool), signals['exits'].astype(bool)
+
+
+def _per_symbol_panel(strategy: str, panel: pd.DataFrame, params: Dict[str, Any], n_jobs: int,
+                      executor: Optional[Executor]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    symbols = panel_symbols(panel)
+    frames = [symbol_bars(panel, symbol) for symbol in symbols]
+    n_jobs = max(1, n_jobs if n_jobs > 0 else (os.cpu_count() or 1))
+
+    if executor is None and n_jobs > 1 and len(symbols) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(symbols))) as pool:
+            return _per_symbol_panel(strategy, panel, params, n_jobs, pool)
+
+    args = (itertools.repeat(strategy), symbols, frames, itertools.repeat(params))
+    if executor is not None:
+        chunksize = max(1, len(symbols) // (n_jobs * 4))
+        results = list(executor.map(_symbol_signals, *args, chunksize=chunksize))
+    else:
+        results = list(map(_symbol_signals, *args))
+
+    entries = pd.DataFrame(False, index=panel.index, columns=symbols)
+    exits = pd.DataFrame(False, index=panel.index, columns=symbols)
+    for symbol, result in zip(symbols, results):
+        if result is not None:
+            entries[symbol] = result[0].reindex(panel.index, fill_value=False)
+            exits[symbol] = result[1].reindex(panel.index, fill_value=False)
+    return entries, exits
+
+
+# --- Public API ---
+
+def panel_signals(strategy: str, panel: pd.DataFrame, n_jobs: int = 1, executor: Optional[Executor] = None,
+                  **params: Any) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Wide boolean entries and exits (bars x symbols) of one strategy over the panel.
+
+    Args:
+        strategy: One of SIGNAL_FUNCTIONS ("darvas_box", "williams_alligator", "heikin_ashi", "renko", "elliott_wave").
+        panel: Wide OHLCV panel, see build_panel.
+        n_jobs: Worker processes for the per-symbol strategies; <= 0 uses every core.
+        executor: Existing executor to run the per-symbol strategies on, e.g. a pool kept across scans.
+        params: Strategy parameters, named as in the single-symbol function.
+    """
+    if strategy not in SIGNAL_FUNCTIONS:
+        raise ValueError(f"Unknown strategy '{strategy}'. Available: {sorted(SIGNAL_FUNCTIONS)}")
+    if strategy in VECTORIZED_STRATEGIES:
+        return VECTORIZED_STRATEGIES[strategy](panel, **params)
+    return _per_symbol_panel(strategy, panel, params, n_jobs, executor)
+
+
+def batch_signals(strategy: str, panel: pd.DataFrame, n_jobs: int = 1, executor: Optional[Executor] = None,
+                  since=None, **params: Any) -> pd.DataFrame:
+    """
+    Tidy signal table of one strategy over the panel: a row per signal with timestamp, symbol,
+    strategy, signal (BUY for entries, SELL for exits) and the bar's close, ordered by time.
+    since limits the table to signals at or after that time, e.g. the bars of the current scan.
+    """
+    entries, exits = panel_signals(strategy, panel, n_jobs=n_jobs, executor=executor, **params)
+    close = panel['Close'].reindex(columns=entries.columns).to_numpy(dtype=float)
+
+    parts = []
+    for signal_type, signals in ((SignalType.BUY, entries), (SignalType.SELL, exits)):
+        rows, cols = np.nonzero(signals.to_numpy(dtype=bool))
+        parts.append(pd.DataFrame({
+            "timestamp": signals.index[rows],
+            "symbol": signals.columns[cols],
+            "strategy": strategy,
+            "signal": signal_type.value,
+            "close": close[rows, cols],
+        }))
+    table = pd.concat(parts, ignore_index=True)
+    if since is not None:
+        table = table[table["timestamp"] >= pd.Timestamp(since)]
+    table = table.sort_values(["timestamp", "symbol", "signal"], kind="stable").reset_index(drop=True)
+    logger.info(f"{strategy}: {len(table)} signals across {entries.shape[1]} symbols")
+    return table
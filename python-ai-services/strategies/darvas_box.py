@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 import vectorbt as vbt
 from logging import getLogger
-from typing import Optional, Tuple, List
+from typing import TYPE_CHECKING, Optional, Tuple, List
 
 # Attempt to import OpenBB; if not available, this strategy can't fetch data.
 try:
@@ -10,6 +10,9 @@ try:
 except ImportError:
     obb = None # Allows module to load but data fetching will fail.
 
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+
 logger = getLogger(__name__)
 
 # Default parameters for Darvas Box
@@ -20,6 +23,95 @@ DEFAULT_VOLUME_INCREASE_FACTOR = 1.5
 DEFAULT_STOP_LOSS_ATR_MULTIPLIER = 2.0
 DEFAULT_ATR_PERIOD = 14
 
+def _run_darvas_state_machine(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+    prior_high_max: np.ndarray, prior_avg_volume: np.ndarray, atr: np.ndarray,
+    lookback_period: int, min_box_duration: int, volume_factor: float,
+    breakout_confirmation_bars: int, stop_loss_atr_multiplier: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Tuple[int, int, float, float, bool]]]:
+    """
+    Darvas box state machine over plain arrays.
+
+    prior_high_max[i] is the max High of the lookback_period bars before i and prior_avg_volume[i]
+    the rolling average volume up to bar i-1, both precomputed so each bar costs O(1) apart from the
+    breakout confirmation window. Scalars are read from Python lists and results written into
+    preallocated arrays. Returns box_top, box_bottom, entries, exits and the (start bar, end bar,
+    bottom, top, entered) span of every box that ended in an entry or was invalidated.
+    """
+    n = len(high)
+    box_top = np.full(n, np.nan)
+    box_bottom = np.full(n, np.nan)
+    entries = np.zeros(n, dtype=bool)
+    exits = np.zeros(n, dtype=bool)
+    box_spans: List[Tuple[int, int, float, float, bool]] = []
+
+    high_l, low_l, close_l, volume_l = high.tolist(), low.tolist(), close.tolist(), volume.tolist()
+    prior_max_l, prior_avg_volume_l, atr_l = prior_high_max.tolist(), prior_avg_volume.tolist(), atr.tolist()
+    nan = float("nan")
+
+    in_box = False
+    box_start_index = -1
+    current_box_top = nan
+    current_box_bottom = nan
+    entry_box_bottom_for_stop = nan
+
+    for i in range(lookback_period, n):
+        current_high = high_l[i]
+        current_low = low_l[i]
+        entered = False
+
+        if not in_box and current_high >= prior_max_l[i]:
+            # New N-day high starts a potential box; its low is the initial bottom
+            current_box_top = current_high
+            current_box_bottom = current_low
+            in_box = True
+            box_start_index = i
+
+        if in_box:
+            box_top[i] = current_box_top
+
+            if current_high > current_box_top:
+                # Top elevated: bottom needs reconfirmation and the duration restarts
+                current_box_top = current_high
+                current_box_bottom = current_low
+                box_start_index = i
+                box_top[i] = current_box_top
+            elif current_low < current_box_bottom:
+                if box_start_index != -1:
+                    box_spans.append((box_start_index, i, current_box_bottom, current_box_top, False))
+                in_box = False
+                current_box_top, current_box_bottom, entry_box_bottom_for_stop = nan, nan, nan
+            else:
+                box_bottom[i] = current_box_bottom
+
+                if i - box_start_index + 1 >= min_box_duration:
+                    # With confirmation bars, the closes from max(box start, i - bars + 1) through i must
+                    # all be above the top; without them any matured bar qualifies
+                    confirmed_breakout = True
+                    if breakout_confirmation_bars > 0:
+                        if close_l[i] > current_box_top:
+                            for j in range(max(box_start_index, i - breakout_confirmation_bars + 1), i):
+                                if not close_l[j] > current_box_top:
+                                    confirmed_breakout = False
+                                    break
+                        else:
+                            confirmed_breakout = False
+
+                    if confirmed_breakout and volume_l[i] > prior_avg_volume_l[i] * volume_factor:
+                        entries[i] = entered = True
+                        entry_box_bottom_for_stop = current_box_bottom
+                        box_spans.append((box_start_index, i, current_box_bottom, current_box_top, True))
+                        in_box = False
+                        current_box_top, current_box_bottom = nan, nan
+
+        # Stop-loss for the single open position, checked from the bar after entry
+        if not entered and entry_box_bottom_for_stop == entry_box_bottom_for_stop and atr_l[i] == atr_l[i]:
+            if current_low < entry_box_bottom_for_stop - atr_l[i] * stop_loss_atr_multiplier:
+                exits[i] = True
+                entry_box_bottom_for_stop = nan
+
+    return box_top, box_bottom, entries, exits, box_spans
+
 def get_darvas_signals(
     symbol: str,
     start_date: str,
@@ -30,47 +122,61 @@ def get_darvas_signals(
     breakout_confirmation_bars: int = DEFAULT_BOX_BREAKOUT_CONFIRMATION_BARS,
     stop_loss_atr_multiplier: float = DEFAULT_STOP_LOSS_ATR_MULTIPLIER,
     atr_period: int = DEFAULT_ATR_PERIOD,
-    data_provider: str = "yfinance" # Allow provider to be specified
+    data_provider: str = "yfinance", # Allow provider to be specified
+    price_data: Optional[pd.DataFrame] = None, # Pre-fetched OHLCV bars; skips the OpenBB fetch (e.g. shared across optimizer runs)
+    bar_store: Optional['OHLCVStore'] = None # Local bar store; OpenBB is only asked for bars it does not hold yet
 ) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
     logger.info(f"Generating Darvas Box signals for {symbol} from {start_date} to {end_date} using {data_provider}")
 
-    if obb is None:
-        logger.error("OpenBB SDK not available. Cannot fetch data for Darvas Box strategy.")
-        return None, None
-
-    try:
-        data_obb = obb.equity.price.historical(
-            symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d" # Darvas is typically daily
-        )
-        if not data_obb or not hasattr(data_obb, 'to_df'):
-            logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
-            return None, None
-
-        price_data = data_obb.to_df()
-        if price_data.empty:
-            logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date}")
-            return None, None
-
-        # Ensure standard column names, case-insensitive match from OpenBB common outputs
-        rename_map = {}
-        for col_map_from, col_map_to in {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}.items():
-            if col_map_from in price_data.columns:
-                rename_map[col_map_from] = col_map_to
-            elif col_map_to in price_data.columns: # Already in correct format
-                pass
-            else: # Try title case as another common variant from some providers
-                title_case_col = col_map_from.title()
-                if title_case_col in price_data.columns:
-                     rename_map[title_case_col] = col_map_to
-
-        price_data.rename(columns=rename_map, inplace=True)
+    if price_data is None and bar_store is not None:
+        from ..core.ohlcv_store import openbb_bar_fetcher
+        fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+        price_data = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
 
+    if price_data is not None:
         required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        if not all(col in price_data.columns for col in required_cols):
-            logger.error(f"DataFrame for {symbol} is missing one or more required columns after renaming: {required_cols}. Available: {price_data.columns.tolist()}")
+        if price_data.empty or not all(col in price_data.columns for col in required_cols):
+            logger.error(f"Provided price data for {symbol} is empty or missing one of {required_cols}.")
             return None, None
-
         price_data = price_data[required_cols].copy()
+    elif obb is None:
+        logger.error("OpenBB SDK not available. Cannot fetch data for Darvas Box strategy.")
+        return None, None
+
+    try:
+        if price_data is None:
+            data_obb = obb.equity.price.historical(
+                symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d" # Darvas is typically daily
+            )
+            if not data_obb or not hasattr(data_obb, 'to_df'):
+                logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
+                return None, None
+
+            price_data = data_obb.to_df()
+            if price_data.empty:
+                logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date}")
+                return None, None
+
+            # Ensure standard column names, case-insensitive match from OpenBB common outputs
+            rename_map = {}
+            for col_map_from, col_map_to in {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}.items():
+                if col_map_from in price_data.columns:
+                    rename_map[col_map_from] = col_map_to
+                elif col_map_to in price_data.columns: # Already in correct format
+                    pass
+                else: # Try title case as another common variant from some providers
+                    title_case_col = col_map_from.title()
+                    if title_case_col in price_data.columns:
+                         rename_map[title_case_col] = col_map_to
+
+            price_data.rename(columns=rename_map, inplace=True)
+
+            required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+            if not all(col in price_data.columns for col in required_cols):
+                logger.error(f"DataFrame for {symbol} is missing one or more required columns after renaming: {required_cols}. Available: {price_data.columns.tolist()}")
+                return None, None
+
+            price_data = price_data[required_cols].copy()
 
     except Exception as e:
         logger.error(f"Failed to fetch or process data for {symbol} using OpenBB: {e}", exc_info=True)
@@ -89,90 +195,29 @@ def get_darvas_signals(
         price_data['atr'] = np.nan
 
     avg_volume = price_data['Volume'].rolling(window=lookback_period, min_periods=1).mean()
-
-    in_box = False
-    box_start_index = -1
-    current_box_top = np.nan
-    current_box_bottom = np.nan
-    entry_box_bottom_for_stop = np.nan
-
-    plot_shapes_data = []
-
-    for i in range(lookback_period, len(price_data)):
-        current_high = price_data['High'].iloc[i]
-        current_low = price_data['Low'].iloc[i]
-        current_close = price_data['Close'].iloc[i]
-        current_volume = price_data['Volume'].iloc[i]
-
-        if not in_box:
-            # Potential new box: current high is a new N-day high (lookback_period)
-            if current_high >= price_data['High'].iloc[i-lookback_period:i].max():
-                current_box_top = current_high
-                current_box_bottom = current_low # Initial bottom is the low of this bar
-                in_box = True
-                box_start_index = i
-                logger.debug(f"{price_data.index[i]}: Potential box started. Top: {current_box_top:.2f}, Temp Bottom: {current_box_bottom:.2f}")
-
-        if in_box:
-            price_data.loc[price_data.index[i], 'box_top'] = current_box_top # Tentative top
-
-            if current_high > current_box_top:
-                current_box_top = current_high
-                current_box_bottom = current_low
-                box_start_index = i
-                price_data.loc[price_data.index[i], 'box_top'] = current_box_top
-                price_data.loc[price_data.index[i], 'box_bottom'] = np.nan # Mark bottom as needing reconfirmation
-                logger.debug(f"{price_data.index[i]}: Box top elevated to {current_box_top:.2f}, bottom reset to {current_box_bottom:.2f}, duration reset.")
-            elif current_low < current_box_bottom:
-                logger.debug(f"{price_data.index[i]}: Price {current_low:.2f} broke below current temp box bottom {current_box_bottom:.2f}. Box invalidated.")
-                if box_start_index != -1 : # Check if box_start_index was valid
-                     plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(255,0,0,0.1)", line_color="red", name="Invalidated Box Attempt"))
-                in_box = False
-                current_box_top, current_box_bottom, entry_box_bottom_for_stop = np.nan, np.nan, np.nan
-            else: # Price stays within current_box_top and current_box_bottom
-                price_data.loc[price_data.index[i], 'box_bottom'] = current_box_bottom # Confirmed bottom for this bar
-                box_duration_bars = i - box_start_index + 1 # Number of bars since box top was set/reset
-
-                if box_duration_bars >= min_box_duration: # Box has matured
-                    # Check for breakout BUY condition
-                    confirmed_breakout = True # Assume true, then check confirmation bars
-                    if breakout_confirmation_bars > 0:
-                        # Ensure all relevant close prices are above current_box_top for confirmation period
-                        # The confirmation period starts from the bar *after* the breakout bar up to `i`.
-                        # A simpler way: current bar closes above, and previous N-1 bars (if breakout_confirmation_bars > 1) also closed above.
-                        # For now, let's use: current close breaks out, and if confirmation >0, prior bars also support this.
-                        # The loop below checks from i-breakout_confirmation_bars+1 up to i (inclusive)
-                        # A more standard way: breakout bar at `j`, then check `j+1` to `j+confirmation_bars`.
-                        # The current logic is: if current bar `i` is a breakout, check `i` and `i-1`...`i-conf+1`.
-
-                        # If current bar is the breakout candidate:
-                        if current_close > current_box_top:
-                            if breakout_confirmation_bars > 0 : # If 0, current bar breakout is enough
-                                start_confirm_idx = max(box_start_index, i - breakout_confirmation_bars + 1)
-                                if not (price_data['Close'].iloc[start_confirm_idx : i+1] > current_box_top).all():
-                                    confirmed_breakout = False
-                        else: # Current bar is not breaking out
-                            confirmed_breakout = False
-
-                    if confirmed_breakout and current_volume > avg_volume.iloc[i-1] * volume_factor:
-                        logger.info(f"{price_data.index[i]}: BUY signal. Breakout above {current_box_top:.2f} (confirmed bottom {current_box_bottom:.2f}) with volume.")
-                        price_data.loc[price_data.index[i], 'entries'] = True
-                        entry_box_bottom_for_stop = current_box_bottom
-
-                        plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(0,255,0,0.2)", line_color="green", name="Entry Box"))
-
-                        in_box = False
-                        current_box_top, current_box_bottom = np.nan, np.nan
-
-        # Apply stop-loss logic if a position was entered
-        # This simple logic assumes only one position is active at a time.
-        if not np.isnan(entry_box_bottom_for_stop) and not price_data['entries'].iloc[i]: # If in an active trade (stop is set) AND not an entry bar
-             if not np.isnan(price_data['atr'].iloc[i]): # Ensure ATR is available
-                stop_price_level = entry_box_bottom_for_stop - (price_data['atr'].iloc[i] * stop_loss_atr_multiplier)
-                if current_low < stop_price_level:
-                    logger.info(f"{price_data.index[i]}: SELL (Stop-Loss) signal. Price {current_low:.2f} below stop {stop_price_level:.2f} (EntryBoxBottom: {entry_box_bottom_for_stop:.2f}, ATR: {price_data['atr'].iloc[i]:.2f})")
-                    price_data.loc[price_data.index[i], 'exits'] = True
-                    entry_box_bottom_for_stop = np.nan # Reset stop as position is exited
+    prior_high_max = price_data['High'].rolling(window=lookback_period, min_periods=1).max().shift(1)
+
+    box_top, box_bottom, entries, exits, box_spans = _run_darvas_state_machine(
+        price_data['High'].to_numpy(dtype=float), price_data['Low'].to_numpy(dtype=float),
+        price_data['Close'].to_numpy(dtype=float), price_data['Volume'].to_numpy(dtype=float),
+        prior_high_max.to_numpy(dtype=float), avg_volume.shift(1).to_numpy(dtype=float),
+        price_data['atr'].to_numpy(dtype=float),
+        lookback_period, min_box_duration, volume_factor, breakout_confirmation_bars, stop_loss_atr_multiplier
+    )
+    price_data['box_top'] = box_top
+    price_data['box_bottom'] = box_bottom
+    price_data['entries'] = entries
+    price_data['exits'] = exits
+
+    logger.info(f"Darvas Box for {symbol}: {int(entries.sum())} breakout entries, {int(exits.sum())} stop-loss exits")
+
+    index = price_data.index
+    plot_shapes_data = [
+        dict(x0=index[start_i], x1=index[end_i], y0=bottom, y1=top, fillcolor="rgba(0,255,0,0.2)", line_color="green", name="Entry Box")
+        if entered else
+        dict(x0=index[start_i], x1=index[end_i], y0=bottom, y1=top, fillcolor="rgba(255,0,0,0.1)", line_color="red", name="Invalidated Box Attempt")
+        for start_i, end_i, bottom, top, entered in box_spans
+    ]
 
     # Fill forward box_top and box_bottom for plotting continuity if needed
     # price_data['box_top'].ffill(inplace=True)
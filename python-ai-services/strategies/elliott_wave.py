@@ -2,13 +2,16 @@ import pandas as pd
 import numpy as np
 import vectorbt as vbt
 from logging import getLogger
-from typing import Optional, Tuple, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, Tuple, List, Dict, Any
 
 try:
     from openbb import obb
 except ImportError:
     obb = None
 
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+
 logger = getLogger(__name__)
 
 # --- Helper Functions for Swing Detection and Fibonacci ---
@@ -58,20 +61,29 @@ def get_elliott_wave_signals(
     start_date: str,
     end_date: str,
     swing_order: int = 5,
-    data_provider: str = "yfinance"
+    data_provider: str = "yfinance",
+    price_data: Optional[pd.DataFrame] = None, # Pre-fetched OHLCV bars; skips the OpenBB fetch
+    bar_store: Optional['OHLCVStore'] = None # Local bar store; OpenBB is only asked for bars it does not hold yet
 ) -> Optional[pd.DataFrame]:
     logger.info(f"Generating simplified Elliott Wave signals for {symbol} from {start_date} to {end_date} using provider {data_provider}")
 
-    if obb is None:
+    if obb is None and bar_store is None and price_data is None:
         logger.error("OpenBB SDK not available. Cannot fetch data.")
         return None
 
     try:
-        data_obb = obb.equity.price.historical(symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d")
-        if not data_obb or not hasattr(data_obb, 'to_df'):
-            logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
-            return None
-        price_data = data_obb.to_df()
+        if price_data is not None:
+            price_data = price_data.copy()
+        elif bar_store is not None:
+            from ..core.ohlcv_store import openbb_bar_fetcher
+            fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+            price_data = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
+        else:
+            data_obb = obb.equity.price.historical(symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d")
+            if not data_obb or not hasattr(data_obb, 'to_df'):
+                logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
+                return None
+            price_data = data_obb.to_df()
         if price_data.empty:
             logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date}")
             return None
@@ -2,13 +2,16 @@ import pandas as pd
 import numpy as np
 import vectorbt as vbt
 from logging import getLogger
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
 try:
     from openbb import obb
 except ImportError:
     obb = None
 
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+
 logger = getLogger(__name__)
 
 # Default parameters for Heikin Ashi
@@ -56,22 +59,31 @@ def get_heikin_ashi_signals(
     end_date: str,
     trend_confirmation_candles: int = DEFAULT_TREND_CONFIRMATION_CANDLES,
     exit_change_candles: int = DEFAULT_EXIT_CHANGE_CANDLES, # Number of opposite color candles for exit
-    data_provider: str = "yfinance"
+    data_provider: str = "yfinance",
+    price_data: Optional[pd.DataFrame] = None, # Pre-fetched OHLCV bars; skips the OpenBB fetch
+    bar_store: Optional['OHLCVStore'] = None # Local bar store; OpenBB is only asked for bars it does not hold yet
 ) -> Optional[pd.DataFrame]:
     logger.info(f"Generating Heikin Ashi signals for {symbol} from {start_date} to {end_date} using provider {data_provider}")
 
-    if obb is None:
+    if obb is None and bar_store is None and price_data is None:
         logger.error("OpenBB SDK not available. Cannot fetch data for Heikin Ashi strategy.")
         return None
 
     try:
-        data_obb = obb.equity.price.historical(
-            symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
-        )
-        if not data_obb or not hasattr(data_obb, 'to_df'):
-            logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
-            return None
-        price_data = data_obb.to_df()
+        if price_data is not None:
+            price_data = price_data.copy()
+        elif bar_store is not None:
+            from ..core.ohlcv_store import openbb_bar_fetcher
+            fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+            price_data = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
+        else:
+            data_obb = obb.equity.price.historical(
+                symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
+            )
+            if not data_obb or not hasattr(data_obb, 'to_df'):
+                logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date}")
+                return None
+            price_data = data_obb.to_df()
         if price_data.empty:
             logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date}")
             return None
@@ -121,8 +133,8 @@ def get_heikin_ashi_signals(
 
     # Trigger entry on the bar *after* the confirmation
     # Shift signals by 1 to enter on the open of the next bar after confirmation
-    shifted_entry_signal = entry_signal_active.shift(1).fillna(False)
-    price_data.loc[shifted_entry_signal & ~shifted_entry_signal.shift(1).fillna(False), 'entries'] = True
+    shifted_entry_signal = entry_signal_active.shift(1, fill_value=False)
+    price_data.loc[shifted_entry_signal & ~shifted_entry_signal.shift(1, fill_value=False), 'entries'] = True
 
 
     # Long Exit: N consecutive red HA candles (signifying trend change)
@@ -130,7 +142,7 @@ def get_heikin_ashi_signals(
     exit_signal_active = sell_condition.rolling(window=exit_change_candles, min_periods=exit_change_candles).apply(lambda x: x.all(), raw=True).fillna(0).astype(bool)
 
     # Trigger exit on the bar *after* exit confirmation
-    shifted_exit_signal = exit_signal_active.shift(1).fillna(False)
+    shifted_exit_signal = exit_signal_active.shift(1, fill_value=False)
     # Only exit if an entry signal was active previously (conceptual: must be in a trade)
     # This simplified logic doesn't track actual position state, vectorbt handles that.
     # We are providing signals. If an entry signal was active, and now an exit condition is met.
@@ -2,13 +2,16 @@ import pandas as pd
 import numpy as np
 import vectorbt as vbt
 from logging import getLogger
-from typing import Optional, Tuple, Literal
+from typing import TYPE_CHECKING, Optional, Tuple, Literal
 
 try:
     from openbb import obb
 except ImportError:
     obb = None
 
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+
 logger = getLogger(__name__)
 
 # Default parameters for Renko
@@ -16,6 +19,193 @@ DEFAULT_RENKO_BRICK_SIZE_MODE: Literal["fixed", "atr"] = "atr"
 DEFAULT_RENKO_ATR_PERIOD = 14
 DEFAULT_RENKO_FIXED_BRICK_SIZE = None # Must be set if mode is 'fixed'
 
+class RenkoBrickBuilder:
+    """
+    Streaming Renko brick builder.
+
+    Consumes prices one at a time (update) or as NumPy batches (extend) and keeps the bricks
+    formed so far in growable arrays: the input position of the bar that completed each brick,
+    its timestamp when one was given, its open/close and its type (1 up, -1 down). A brick's
+    high and low follow from its open and close. Bricks follow the rules of the original
+    calculate_renko_bricks: the first price is the reference, the first brick forms after a
+    move of one brick size, and a reversal needs a move of two.
+
+    update is O(1) per price plus the bricks it forms. extend skips runs of prices that stay
+    inside the current no-brick band with vectorized scans, so it only steps through the
+    prices that form bricks.
+    """
+
+    _MIN_CAPACITY = 64
+    _NO_TIME = np.iinfo(np.int64).min
+
+    def __init__(self, brick_size: float, capacity: int = _MIN_CAPACITY):
+        if brick_size <= 0:
+            logger.error(f"Brick size must be positive. Got: {brick_size}")
+            raise ValueError("Brick size must be positive.")
+        self.brick_size = brick_size
+        self.last_brick_close = np.nan
+        self.brick_type = 0 # 0: no direction yet, 1: up, -1: down
+        self.prices_seen = 0
+        self._count = 0
+        capacity = max(capacity, self._MIN_CAPACITY)
+        self._bar = np.empty(capacity, dtype=np.int64)
+        self._time = np.empty(capacity, dtype=np.int64)
+        self._open = np.empty(capacity, dtype=np.float64)
+        self._close = np.empty(capacity, dtype=np.float64)
+        self._type = np.empty(capacity, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _append(self, bar: int, time: int, brick_open: float, brick_close: float, brick_type: int) -> None:
+        if self._count == len(self._bar):
+            capacity = 2 * len(self._bar)
+            for name in ("_bar", "_time", "_open", "_close", "_type"):
+                grown = np.empty(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._count] = getattr(self, name)[:self._count]
+                setattr(self, name, grown)
+        i = self._count
+        self._bar[i], self._time[i] = bar, time
+        self._open[i], self._close[i], self._type[i] = brick_open, brick_close, brick_type
+        self._count += 1
+
+    def _band(self) -> Tuple[float, float]:
+        """Prices strictly between these two form no brick in the current state"""
+        size, last = self.brick_size, self.last_brick_close
+        if self.brick_type == 1:
+            return last - 2 * size, last + size
+        if self.brick_type == -1:
+            return last - size, last + 2 * size
+        return last - size, last + size
+
+    def _apply(self, price: float, bar: int, time: int) -> None:
+        """Forms the bricks for one price that left the band"""
+        size, last = self.brick_size, self.last_brick_close
+        if self.brick_type == 0: # Direction of the very first bricks
+            if price >= last + size:
+                self.brick_type = 1
+                for i in range(int((price - last) / size)):
+                    brick_open = last + i * size
+                    brick_close = brick_open + size
+                    self._append(bar, time, brick_open, brick_close, 1)
+                    self.last_brick_close = brick_close
+            elif price <= last - size:
+                self.brick_type = -1
+                for i in range(int((last - price) / size)):
+                    brick_open = last - i * size
+                    brick_close = brick_open - size
+                    self._append(bar, time, brick_open, brick_close, -1)
+                    self.last_brick_close = brick_close
+            return
+
+        if self.brick_type == 1:
+            if price >= last + size: # New UP brick(s)
+                for _ in range(int((price - last) / size)):
+                    self._append(bar, time, last, last + size, 1)
+                    last += size
+            elif price <= last - 2 * size: # Reversal; the first DOWN brick opens one level below the last close
+                self.brick_type = -1
+                brick_open = last - size
+                last = brick_open - size
+                self._append(bar, time, brick_open, last, -1)
+                for _ in range(int(np.floor((last - price) / size))):
+                    self._append(bar, time, last, last - size, -1)
+                    last -= size
+        else:
+            if price <= last - size: # New DOWN brick(s)
+                for _ in range(int((last - price) / size)):
+                    self._append(bar, time, last, last - size, -1)
+                    last -= size
+            elif price >= last + 2 * size: # Reversal to UP brick(s)
+                self.brick_type = 1
+                brick_open = last + size
+                last = brick_open + size
+                self._append(bar, time, brick_open, last, 1)
+                for _ in range(int(np.floor((price - last) / size))):
+                    self._append(bar, time, last, last + size, 1)
+                    last += size
+        self.last_brick_close = last
+
+    def update(self, price: float, timestamp=None) -> int:
+        """Consumes one price (tick or bar close) and returns the number of bricks it formed"""
+        bar = self.prices_seen
+        self.prices_seen += 1
+        if bar == 0:
+            self.last_brick_close = price
+        lower, upper = self._band()
+        if lower < price < upper or price != price:
+            return 0
+        before = self._count
+        self._apply(price, bar, self._NO_TIME if timestamp is None else pd.Timestamp(timestamp).as_unit("ns").value)
+        return self._count - before
+
+    def extend(self, prices, timestamps=None) -> int:
+        """Consumes a batch of prices (with optional matching timestamps) and returns the number of bricks formed"""
+        prices = np.asarray(prices, dtype=np.float64)
+        times = None if timestamps is None else pd.DatetimeIndex(timestamps).as_unit("ns").asi8
+        if len(prices) == 0:
+            return 0
+        first_bar = self.prices_seen
+        if first_bar == 0:
+            self.last_brick_close = prices[0]
+        self.prices_seen += len(prices)
+        before = self._count
+
+        price_list = prices.tolist()
+        i, n = 0, len(prices)
+        while i < n:
+            # Look for the next price outside the band: the next few one by one, since bricks often
+            # form on consecutive bars, then in vectorized windows that double in size
+            lower, upper = self._band()
+            hit, scalar_end = -1, min(n, i + 8)
+            while i < scalar_end:
+                if price_list[i] <= lower or price_list[i] >= upper:
+                    hit = i
+                    break
+                i += 1
+            step = 64
+            while hit < 0 and i < n:
+                window = prices[i:i + step]
+                outside = np.flatnonzero((window <= lower) | (window >= upper))
+                if outside.size:
+                    hit = i + int(outside[0])
+                    break
+                i += len(window)
+                step = min(step * 2, 1 << 16)
+            if hit < 0:
+                break
+            self._apply(price_list[hit], first_bar + hit, self._NO_TIME if times is None else int(times[hit]))
+            i = hit + 1
+        return self._count - before
+
+    def brick_bars(self, start: int = 0) -> np.ndarray:
+        """Input position of the price that completed each brick from start on"""
+        return self._bar[start:self._count].copy()
+
+    def to_frame(self, start: int = 0) -> pd.DataFrame:
+        """
+        Bricks from start on (e.g. len(builder) before an update, to get only the new ones) as
+        open/high/low/close/type, indexed by timestamp when every brick has one and by input
+        position otherwise.
+        """
+        end = self._count
+        brick_open, brick_close = self._open[start:end], self._close[start:end]
+        brick_type = self._type[start:end].astype(np.int64)
+        up = brick_type == 1
+        times = self._time[start:end]
+        if len(times) and (times != self._NO_TIME).all():
+            index = pd.DatetimeIndex(times.astype("datetime64[ns]"), name='timestamp')
+        else:
+            index = pd.Index(self._bar[start:end], name='timestamp')
+        return pd.DataFrame({
+            'open': brick_open,
+            'high': np.where(up, brick_close, brick_open),
+            'low': np.where(up, brick_open, brick_close),
+            'close': brick_close,
+            'type': brick_type,
+        }, index=index)
+
+
 def calculate_renko_bricks(
     price_series: pd.Series,
     brick_size: float # Brick size must be pre-calculated and positive
@@ -29,99 +219,13 @@ def calculate_renko_bricks(
     if price_series.empty:
         logger.warning("Input price_series is empty for Renko calculation.")
         return pd.DataFrame()
-    if brick_size <= 0:
-        logger.error(f"Brick size must be positive. Got: {brick_size}")
-        raise ValueError("Brick size must be positive.")
-
-    renko_bricks_list = []
-    # Initial reference price: first price in the series.
-    # Renko bricks traditionally start from a level that's a multiple of the brick size,
-    # or simply from the first price, and the first brick forms after a move of `brick_size`.
-    # For this implementation, we'll use the first price as the initial reference point (last_brick_close).
-    # The first actual brick will be plotted once the price moves `brick_size` away from this.
-
-    # More robust: start with the first price as the effective 'close' of a hypothetical zeroth brick.
-    last_brick_close = price_series.iloc[0]
-    brick_type = 0 # 0: no direction yet, 1: up, -1: down
-
-    for timestamp, current_price in price_series.items():
-        if brick_type == 0: # Determining direction for the very first brick
-            if current_price >= last_brick_close + brick_size:
-                brick_type = 1
-                num_bricks = int((current_price - last_brick_close) / brick_size)
-                for i in range(num_bricks):
-                    brick_open = last_brick_close + i * brick_size
-                    brick_close = brick_open + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                last_brick_close = brick_close # Update to the close of the last formed brick
-            elif current_price <= last_brick_close - brick_size:
-                brick_type = -1
-                num_bricks = int((last_brick_close - current_price) / brick_size)
-                for i in range(num_bricks):
-                    brick_open = last_brick_close - i * brick_size
-                    brick_close = brick_open - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                last_brick_close = brick_close
-            # If no brick formed yet, last_brick_close remains the initial price.
-            # If a brick did form, last_brick_close is updated.
-            continue # Move to next price point
-
-        # Subsequent bricks after the first one has formed
-        if brick_type == 1: # Last brick was UP
-            if current_price >= last_brick_close + brick_size: # New UP brick(s)
-                num_bricks = int((current_price - last_brick_close) / brick_size)
-                for _ in range(num_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                    last_brick_close = brick_close
-            elif current_price <= last_brick_close - 2 * brick_size: # Reversal to DOWN brick(s)
-                brick_type = -1
-                # First reversal brick opens one level down from previous close of the up brick
-                brick_open = last_brick_close - brick_size
-                brick_close = brick_open - brick_size
-                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                     'low': brick_close, 'close': brick_close, 'type': -1})
-                last_brick_close = brick_close
-                # Check for further down bricks if the drop was large enough
-                num_additional_bricks = int(np.floor((last_brick_close - current_price) / brick_size)) # Use floor for additional bricks
-                for _ in range(num_additional_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                    last_brick_close = brick_close
-
-        elif brick_type == -1: # Last brick was DOWN
-            if current_price <= last_brick_close - brick_size: # New DOWN brick(s)
-                num_bricks = int((last_brick_close - current_price) / brick_size)
-                for _ in range(num_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close - brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
-                                         'low': brick_close, 'close': brick_close, 'type': -1})
-                    last_brick_close = brick_close
-            elif current_price >= last_brick_close + 2 * brick_size: # Reversal to UP brick(s)
-                brick_type = 1
-                brick_open = last_brick_close + brick_size
-                brick_close = brick_open + brick_size
-                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                     'low': brick_open, 'close': brick_close, 'type': 1})
-                last_brick_close = brick_close
-                num_additional_bricks = int(np.floor((current_price - last_brick_close) / brick_size)) # Use floor
-                for _ in range(num_additional_bricks):
-                    brick_open = last_brick_close
-                    brick_close = last_brick_close + brick_size
-                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
-                                         'low': brick_open, 'close': brick_close, 'type': 1})
-                    last_brick_close = brick_close
-
-    if not renko_bricks_list:
+
+    builder = RenkoBrickBuilder(brick_size, capacity=len(price_series) // 4)
+    if not builder.extend(price_series.to_numpy(dtype=np.float64)):
         return pd.DataFrame()
-    return pd.DataFrame(renko_bricks_list).set_index('timestamp')
+    bricks = builder.to_frame()
+    bricks.index = price_series.index[builder.brick_bars()].rename('timestamp')
+    return bricks
 
 
 def get_renko_signals(
@@ -131,20 +235,29 @@ def get_renko_signals(
     brick_size_mode: Literal["fixed", "atr"] = DEFAULT_RENKO_BRICK_SIZE_MODE,
     brick_size_value: Optional[float] = None,
     atr_period: int = DEFAULT_RENKO_ATR_PERIOD,
-    data_provider: str = "yfinance"
+    data_provider: str = "yfinance",
+    price_data: Optional[pd.DataFrame] = None, # Pre-fetched OHLCV bars; skips the OpenBB fetch
+    bar_store: Optional['OHLCVStore'] = None # Local bar store; OpenBB is only asked for bars it does not hold yet
 ) -> Optional[pd.DataFrame]:
     logger.info(f"Generating Renko signals for {symbol} from {start_date} to {end_date}, mode: {brick_size_mode}")
 
-    if obb is None:
+    if obb is None and bar_store is None and price_data is None:
         logger.error("OpenBB SDK not available.")
         return None
 
     try:
-        price_obb = obb.equity.price.historical(symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d")
-        if not price_obb or not hasattr(price_obb, 'to_df'):
-            logger.warning(f"No data or unexpected data object returned for {symbol}")
-            return None
-        price_df_orig = price_obb.to_df()
+        if price_data is not None:
+            price_df_orig = price_data.copy()
+        elif bar_store is not None:
+            from ..core.ohlcv_store import openbb_bar_fetcher
+            fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+            price_df_orig = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
+        else:
+            price_obb = obb.equity.price.historical(symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d")
+            if not price_obb or not hasattr(price_obb, 'to_df'):
+                logger.warning(f"No data or unexpected data object returned for {symbol}")
+                return None
+            price_df_orig = price_obb.to_df()
         if price_df_orig.empty:
             logger.warning(f"No data for {symbol} from {start_date} to {end_date}")
             return None
@@ -201,9 +314,10 @@ def get_renko_signals(
         # Merge Renko brick type with original DataFrame
         # Need to align timestamps carefully. Renko bricks are timestamped with the original bar that COMPLETED them.
         # We want to make decisions on the NEXT bar's open after a Renko signal.
-        price_df_orig['renko_type'] = renko_df['type'].reindex(price_df_orig.index, method=None) # Get type for bars that completed a brick
-        price_df_orig['renko_type'].ffill(inplace=True) # Carry forward the type of the last completed brick
-        price_df_orig.fillna({'renko_type': 0}, inplace=True) # Bars before first brick have type 0
+        # Type of the last brick each bar completed (a large move completes several on one bar),
+        # carried forward to later bars; bars before the first brick have type 0
+        last_brick_type = renko_df['type'].groupby(level=0).last().reindex(price_df_orig.index)
+        price_df_orig['renko_type'] = last_brick_type.ffill().fillna(0)
 
         price_df_orig['entries'] = False
         price_df_orig['exits'] = False
@@ -2,13 +2,16 @@ import pandas as pd
 import numpy as np
 import vectorbt as vbt
 from logging import getLogger
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
 try:
     from openbb import obb
 except ImportError:
     obb = None
 
+if TYPE_CHECKING:
+    from ..core.ohlcv_store import OHLCVStore
+
 logger = getLogger(__name__)
 
 # Default parameters for Williams Alligator
@@ -32,45 +35,59 @@ def get_williams_alligator_signals(
     jaw_period: int = DEFAULT_JAW_PERIOD, jaw_offset: int = DEFAULT_JAW_OFFSET,
     teeth_period: int = DEFAULT_TEETH_PERIOD, teeth_offset: int = DEFAULT_TEETH_OFFSET,
     lips_period: int = DEFAULT_LIPS_PERIOD, lips_offset: int = DEFAULT_LIPS_OFFSET,
-    data_provider: str = "yfinance"
+    data_provider: str = "yfinance",
+    price_data: Optional[pd.DataFrame] = None, # Pre-fetched OHLCV bars; skips the OpenBB fetch
+    bar_store: Optional['OHLCVStore'] = None # Local bar store; OpenBB is only asked for bars it does not hold yet
 ) -> Optional[pd.DataFrame]:
     logger.info(f"Generating Williams Alligator signals for {symbol} from {start_date} to {end_date} using provider {data_provider}")
 
-    if obb is None:
-        logger.error("OpenBB SDK not available. Cannot fetch data for Williams Alligator strategy.")
-        return None
-
-    try:
-        data_obb = obb.equity.price.historical(
-            symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
-        )
-        if not data_obb or not hasattr(data_obb, 'to_df'):
-            logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date} by provider {data_provider}")
-            return None
-
-        price_data = data_obb.to_df()
-        if price_data.empty:
-            logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date} by provider {data_provider}")
-            return None
-
-        rename_map = {}
-        for col_map_from, col_map_to in {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}.items():
-            if col_map_from in price_data.columns:
-                rename_map[col_map_from] = col_map_to
-            elif col_map_to in price_data.columns:
-                pass
-            else:
-                title_case_col = col_map_from.title()
-                if title_case_col in price_data.columns:
-                     rename_map[title_case_col] = col_map_to
-        price_data.rename(columns=rename_map, inplace=True)
+    if price_data is None and bar_store is not None:
+        from ..core.ohlcv_store import openbb_bar_fetcher
+        fetch = openbb_bar_fetcher(data_provider) if obb is not None else None
+        price_data = bar_store.get_bars(symbol, "1d", start_date, end_date, fetch=fetch)
 
+    if price_data is not None:
         required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        if not all(col in price_data.columns for col in required_cols):
-            logger.error(f"DataFrame for {symbol} is missing one or more required columns: {required_cols}. Available: {price_data.columns.tolist()}")
+        if price_data.empty or not all(col in price_data.columns for col in required_cols):
+            logger.error(f"Provided price data for {symbol} is empty or missing one of {required_cols}.")
             return None
-
         price_data = price_data[required_cols].copy()
+    elif obb is None:
+        logger.error("OpenBB SDK not available. Cannot fetch data for Williams Alligator strategy.")
+        return None
+
+    try:
+        if price_data is None:
+            data_obb = obb.equity.price.historical(
+                symbol=symbol, start_date=start_date, end_date=end_date, provider=data_provider, interval="1d"
+            )
+            if not data_obb or not hasattr(data_obb, 'to_df'):
+                logger.warning(f"No data or unexpected data object returned for {symbol} from {start_date} to {end_date} by provider {data_provider}")
+                return None
+
+            price_data = data_obb.to_df()
+            if price_data.empty:
+                logger.warning(f"No data returned (empty DataFrame) for {symbol} from {start_date} to {end_date} by provider {data_provider}")
+                return None
+
+            rename_map = {}
+            for col_map_from, col_map_to in {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}.items():
+                if col_map_from in price_data.columns:
+                    rename_map[col_map_from] = col_map_to
+                elif col_map_to in price_data.columns:
+                    pass
+                else:
+                    title_case_col = col_map_from.title()
+                    if title_case_col in price_data.columns:
+                         rename_map[title_case_col] = col_map_to
+            price_data.rename(columns=rename_map, inplace=True)
+
+            required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+            if not all(col in price_data.columns for col in required_cols):
+                logger.error(f"DataFrame for {symbol} is missing one or more required columns: {required_cols}. Available: {price_data.columns.tolist()}")
+                return None
+
+            price_data = price_data[required_cols].copy()
 
         # Use median price (High+Low)/2 for Alligator calculations
         median_price = (price_data['High'] + price_data['Low']) / 2
@@ -96,12 +113,12 @@ def get_williams_alligator_signals(
         # is_bearish_aligned = (price_data['lips'] < price_data['teeth']) & (price_data['teeth'] < price_data['jaw']) # For short signals
 
         # Long entry: Previous state was not bullishly aligned, current state is.
-        price_data.loc[is_bullish_aligned & ~is_bullish_aligned.shift(1).fillna(False), 'entries'] = True
+        price_data.loc[is_bullish_aligned & ~is_bullish_aligned.shift(1, fill_value=False), 'entries'] = True
 
         # Exit long: Bullish alignment is lost (e.g., Lips cross below Teeth)
         # A more robust exit might be when lips cross below teeth, or teeth cross below jaw.
         # Simple version: if it's no longer bullishly aligned but was on the previous bar.
-        price_data.loc[~is_bullish_aligned & is_bullish_aligned.shift(1).fillna(False), 'exits'] = True
+        price_data.loc[~is_bullish_aligned & is_bullish_aligned.shift(1, fill_value=False), 'exits'] = True
 
         price_data.loc[price_data['entries'], 'exits'] = False
 
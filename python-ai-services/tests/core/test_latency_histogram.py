@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+from python_ai_services.core.latency_histogram import LatencyHistogram
+
+
+def test_percentiles_within_relative_error():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(0, 1.5) for _ in range(50_000)]
+    histogram = LatencyHistogram(relative_error=0.01)
+    for sample in samples:
+        histogram.record(sample)
+
+    for q in (50, 90, 95, 99, 99.9):
+        exact = np.percentile(samples, q, method="inverted_cdf")
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.011)
+    assert histogram.count == len(samples)
+    assert histogram.mean() == pytest.approx(np.mean(samples))
+    assert histogram.max == max(samples)
+
+
+def test_out_of_range_values_report_observed_extremes():
+    histogram = LatencyHistogram(min_value=1.0, max_value=100.0)
+    for value in (0.2, 0.5, 500.0):
+        histogram.record(value)
+
+    assert histogram.percentile(1) == pytest.approx(0.2)
+    assert histogram.percentile(100) == 500.0
+    assert histogram.summary()["max"] == 500.0
+
+
+def test_empty_reset_and_merge():
+    histogram = LatencyHistogram()
+    assert histogram.summary() == {"count": 0, "avg": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    other = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+        other.record(value + 100)
+    histogram.merge(other)
+    assert histogram.count == 200
+    assert histogram.percentile(50) == pytest.approx(100, rel=0.01)
+
+    histogram.reset()
+    assert histogram.count == 0 and histogram.percentile(99) == 0.0
+
+    with pytest.raises(ValueError):
+        histogram.merge(LatencyHistogram(min_value=0.1))
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_ai_services.core.ohlcv_store import OHLCVStore, bar_interval, normalize_bars
+
+
+def make_bars(start="2024-01-01", end="2024-03-29", freq="B"):
+    index = pd.date_range(start, end, freq=freq)
+    close = 100 + np.arange(len(index), dtype=float)
+    return pd.DataFrame(
+        {"open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": 1000.0},
+        index=index,
+    )
+
+
+class RecordingFetcher:
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, symbol, start, end):
+        self.calls.append((start, end))
+        return self.bars[(self.bars.index >= start) & (self.bars.index <= end)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path))
+
+
+def test_append_then_range_read(store):
+    bars = make_bars()
+    assert store.append("AAPL", "1d", bars.iloc[:30]) == 30
+    assert store.append("AAPL", "1d", bars) == len(bars) - 30
+
+    window = store.read("AAPL", "1d", "2024-02-01", "2024-02-09")
+    expected = normalize_bars(bars).loc["2024-02-01":"2024-02-09"]
+    pd.testing.assert_frame_equal(window, expected, check_freq=False, check_index_type=False)
+
+
+def test_merge_backfills_and_overwrites(store):
+    bars = make_bars()
+    store.append("AAPL", "1d", bars.iloc[10:])
+    corrected = bars.iloc[:12].copy()
+    corrected["close"] = -1.0
+
+    assert store.merge("AAPL", "1d", corrected) == len(bars)
+    stored = store.read("AAPL", "1d")
+    assert (stored["Close"].iloc[:12] == -1.0).all()
+    assert stored["Close"].iloc[12] == bars["close"].iloc[12]
+
+
+def test_get_bars_only_fetches_uncovered_ranges(store):
+    fetch = RecordingFetcher(make_bars())
+
+    first = store.get_bars("AAPL", "1d", "2024-02-01", "2024-02-29", fetch)
+    again = store.get_bars("AAPL", "1d", "2024-02-05", "2024-02-20", fetch)
+    assert len(fetch.calls) == 1
+    assert len(again) < len(first)
+
+    wider = store.get_bars("AAPL", "1d", "2024-01-15", "2024-03-15", fetch)
+    assert len(fetch.calls) == 3
+    assert wider.index[0] == pd.Timestamp("2024-01-15")
+    assert wider.index[-1] == pd.Timestamp("2024-03-15")
+
+    offline = OHLCVStore(str(store.root)).get_bars("AAPL", "1d", "2024-01-15", "2024-03-15")
+    pd.testing.assert_frame_equal(offline, wider)
+
+
+def test_failed_fetch_is_not_marked_covered(store):
+    def failing(symbol, start, end):
+        raise ConnectionError("provider down")
+
+    assert store.get_bars("AAPL", "1d", "2024-01-01", "2024-01-31", failing).empty
+
+    fetch = RecordingFetcher(make_bars())
+    assert len(store.get_bars("AAPL", "1d", "2024-01-01", "2024-01-31", fetch)) == 23
+    assert len(fetch.calls) == 1
+
+
+def test_get_bars_open_range_defaults_to_covered_range(store):
+    fetch = RecordingFetcher(make_bars())
+    covered = store.get_bars("AAPL", "1d", "2024-02-01", "2024-02-29", fetch)
+
+    pd.testing.assert_frame_equal(store.get_bars("AAPL", "1d", fetch=fetch), covered)
+    pd.testing.assert_frame_equal(store.get_bars("AAPL", "1d", start="2024-02-15", fetch=fetch), covered.loc["2024-02-15":])
+    pd.testing.assert_frame_equal(store.get_bars("AAPL", "1d", end="2024-02-09", fetch=fetch), covered.loc[:"2024-02-09"])
+    assert len(fetch.calls) == 1
+
+
+def test_get_bars_open_range_without_covered_range(store):
+    store.append("AAPL", "1d", make_bars().iloc[:10])
+
+    # Nothing to fetch: whatever is stored comes back
+    assert len(store.get_bars("AAPL", "1d")) == 10
+    with pytest.raises(ValueError, match="pass both start and end"):
+        store.get_bars("AAPL", "1d", end="2024-02-29", fetch=RecordingFetcher(make_bars()))
+
+
+def test_find_gaps(store):
+    bars = make_bars()
+    store.append("AAPL", "1d", bars.drop(bars.index[20:23]))
+    assert store.find_gaps("AAPL", "1d") == [(bars.index[19], bars.index[23])]
+    assert store.find_gaps("AAPL", "1d", holidays=bars.index[20:23]) == []
+
+    minutes = make_bars("2024-01-02 09:30", "2024-01-02 10:30", freq="min")
+    store.append("AAPL", "1min", minutes.drop(minutes.index[5]))
+    assert store.find_gaps("AAPL", "1min") == [(minutes.index[4], minutes.index[6])]
+
+
+def test_bar_interval():
+    assert bar_interval("15m") == pd.Timedelta(minutes=15)
+    assert bar_interval("1min") == pd.Timedelta(minutes=1)
+    assert bar_interval("4h") == pd.Timedelta(hours=4)
+    assert bar_interval("1d") is None
+    with pytest.raises(ValueError):
+        bar_interval("1y")
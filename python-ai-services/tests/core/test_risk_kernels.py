@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from python_ai_services.core import risk_kernels
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(3)
+    return 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, size=(25, 300)), axis=1)
+
+
+def test_matches_per_series_statistics(prices):
+    returns = risk_kernels.simple_returns(prices)
+
+    for row, series in enumerate(prices):
+        expected = [series[i] / series[i - 1] - 1 for i in range(1, len(series))]
+        assert returns[row] == pytest.approx(expected)
+        assert risk_kernels.volatility(returns)[row] == pytest.approx(np.std(expected, ddof=1))
+
+        peak, worst = series[0], 0.0
+        for price in series:
+            peak = max(peak, price)
+            worst = max(worst, (peak - price) / peak)
+        assert risk_kernels.max_drawdown(prices)[row] == pytest.approx(worst)
+
+        for confidence in (0.95, 0.99):
+            ordered = sorted(expected)
+            assert risk_kernels.value_at_risk(returns, confidence)[row] == \
+                ordered[int((1 - confidence) * len(ordered))]
+
+        gains = sum(r for r in expected if r > 0)
+        losses = -sum(r for r in expected if r < 0)
+        wins = risk_kernels.win_metrics(returns)
+        assert wins["win_rate"][row] == pytest.approx(100 * sum(r > 0 for r in expected) / len(expected))
+        assert wins["profit_factor"][row] == pytest.approx(gains / losses)
+
+
+def test_zero_prices_and_short_series_are_skipped_like_the_loops():
+    returns = risk_kernels.simple_returns([[1.0, 0.0, 2.0, 3.0]])
+    assert np.isnan(returns[0, 1])
+    assert risk_kernels.mean_returns(returns)[0] == pytest.approx((-1.0 + 0.5) / 2)
+
+    assert risk_kernels.volatility([[0.01]])[0] == 0.0
+    assert risk_kernels.sharpe_ratio([[0.01]], 0.05)[0] == 0.0
+    assert risk_kernels.value_at_risk([[np.nan]], 0.95)[0] == 0.0
+    assert risk_kernels.win_metrics([[0.01, 0.02]])["profit_factor"][0] == math.inf
+
+
+def test_correlation_matrix_matches_corrcoef(prices):
+    constant = np.full((1, prices.shape[1]), 5.0)
+    series = np.vstack([prices, constant])
+
+    correlations = risk_kernels.correlation_matrix(series)
+
+    assert correlations[:-1, :-1] == pytest.approx(np.corrcoef(prices))
+    assert np.all(correlations[-1, :-1] == 0.0)
+    assert np.all(np.diag(correlations) == 1.0)
+
+
+def test_performance_summary_flags_undefined_rows():
+    summary = risk_kernels.performance_summary([[100.0, 110.0, 99.0, 121.0], [0.0, 1.0, 2.0, 3.0]], 0.05)
+
+    assert summary["total_return"][0] == pytest.approx(21.0)
+    assert summary["annualized_return"][0] == pytest.approx((1.21 ** (252 / 3) - 1) * 100)
+    assert summary["max_drawdown"][0] == pytest.approx(10.0)
+    assert math.isnan(summary["total_return"][1])
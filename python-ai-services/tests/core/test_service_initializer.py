@@ -0,0 +1,252 @@
+import ast
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from python_ai_services.core import service_initializer as initializer_module
+from python_ai_services.core.service_initializer import ServiceInitializer
+from python_ai_services.core.service_registry import ServiceRegistry
+
+
+class FakeDatabaseManager:
+    def is_initialized(self):
+        return True
+
+    async def initialize_connections(self):
+        pass
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ServiceRegistry()
+    monkeypatch.setattr(initializer_module, "registry", registry)
+    monkeypatch.setattr(initializer_module, "db_manager", FakeDatabaseManager())
+    return registry
+
+
+def make_initializer(monkeypatch, order, dependencies, durations=None, failures=(), lazy=None):
+    """Initializer over made-up services whose init sleeps for its duration and records when it ran"""
+    initializer = ServiceInitializer()
+    initializer.initialization_order = list(order)
+    initializer.service_dependencies = dict(dependencies)
+    initializer.lazy_services = set(lazy or {})
+    durations = durations or {}
+    initializer.started = []
+    initializer.finished = []
+
+    async def initialize(service_name):
+        initializer.started.append(service_name)
+        await asyncio.sleep(durations.get(service_name, 0))
+        if service_name in failures:
+            raise RuntimeError(f"{service_name} broke")
+        initializer.finished.append(service_name)
+        return "initialized"
+
+    monkeypatch.setattr(initializer, "_initialize_service", initialize)
+    monkeypatch.setattr(initializer, "_register_connections", lambda: None)
+    monkeypatch.setattr(initializer, "_lazy_factory", lambda name: (lazy or {}).get(name))
+    return initializer
+
+
+def test_dependency_order_is_topological_and_stable(monkeypatch):
+    initializer = make_initializer(monkeypatch, [], {"c": ["a"], "b": ["c"], "e": ["b", "d"]})
+
+    order = initializer._dependency_order(["b", "c", "d", "a", "e"])
+    assert order == ["d", "a", "c", "b", "e"]
+
+    # Dependencies outside the given names are ignored
+    assert initializer._dependency_order(["b", "d"]) == ["b", "d"]
+
+
+def test_dependency_cycle_is_reported(monkeypatch):
+    initializer = make_initializer(monkeypatch, [], {"a": ["c"], "b": ["a"], "c": ["b"], "e": ["d"]})
+
+    with pytest.raises(ValueError, match="a, b, c"):
+        initializer._dependency_order(["a", "b", "c", "d", "e"])
+
+
+@pytest.mark.asyncio
+async def test_services_start_once_dependencies_are_ready(monkeypatch, registry):
+    initializer = make_initializer(
+        monkeypatch,
+        ["slow", "fast", "child", "grandchild"],
+        {"child": ["fast"], "grandchild": ["child", "slow"]},
+        durations={"slow": 0.2, "fast": 0.05, "child": 0.05, "grandchild": 0.01}
+    )
+
+    results = await initializer.initialize_all_services()
+
+    assert results == {name: "initialized" for name in ["slow", "fast", "child", "grandchild"]}
+    assert initializer.started.index("child") > initializer.finished.index("fast")
+    assert initializer.started[-1] == "grandchild" and initializer.finished[-2:] == ["slow", "grandchild"]
+
+    # Independent chains overlap, so wall time follows the longest chain rather than the sum
+    report = initializer.startup_report
+    assert report["critical_path"] == ["slow", "grandchild"]
+    assert report["wall_time"] < report["total_init_time"]
+    assert report["critical_path_time"] == pytest.approx(
+        report["durations"]["slow"] + report["durations"]["grandchild"]
+    )
+    assert registry.is_initialized()
+
+
+@pytest.mark.asyncio
+async def test_failed_dependency_skips_dependents(monkeypatch, registry):
+    initializer = make_initializer(
+        monkeypatch,
+        ["base", "child", "grandchild", "other"],
+        {"child": ["base"], "grandchild": ["child"]},
+        failures={"base"}
+    )
+
+    results = await initializer.initialize_all_services()
+
+    assert results["base"] == "failed: base broke"
+    assert results["child"] == "skipped - dependency failed: base"
+    assert results["grandchild"] == "skipped - dependency failed: child"
+    assert results["other"] == "initialized"
+    assert "child" not in initializer.started and "grandchild" not in initializer.started
+
+
+@pytest.mark.asyncio
+async def test_failed_critical_service_stops_services_not_yet_started(monkeypatch, registry):
+    initializer = make_initializer(
+        monkeypatch,
+        ["market_data", "running", "portfolio_tracker", "waiting", "late"],
+        {"portfolio_tracker": ["market_data"], "late": ["waiting"]},
+        durations={"market_data": 0.02, "running": 0.05, "waiting": 0.1},
+        failures={"market_data"}
+    )
+
+    results = await initializer.initialize_all_services()
+
+    assert results["market_data"] == "failed: market_data broke"
+    # Services already running finish; ones still waiting on dependencies are skipped
+    assert results["portfolio_tracker"] == "skipped - critical service market_data failed"
+    assert results["running"] == "initialized"
+    assert results["waiting"] == "initialized"
+    assert results["late"] == "skipped - critical service market_data failed"
+    assert "portfolio_tracker" not in initializer.started and "late" not in initializer.started
+
+
+@pytest.mark.asyncio
+async def test_service_timeout_is_reported_and_skips_dependents(monkeypatch, registry):
+    initializer = make_initializer(
+        monkeypatch,
+        ["hanging", "child", "other"],
+        {"child": ["hanging"]},
+        durations={"hanging": 5.0}
+    )
+    initializer.service_timeouts = {"hanging": 0.05}
+
+    results = await asyncio.wait_for(initializer.initialize_all_services(), 2.0)
+
+    assert results["hanging"] == "failed: timed out after 0.05s"
+    assert results["child"] == "skipped - dependency failed: hanging"
+    assert results["other"] == "initialized"
+
+
+@pytest.mark.asyncio
+async def test_deferred_services_are_built_on_first_use(monkeypatch, registry):
+    built = []
+
+    def factory():
+        built.append("watchlist")
+        return object()
+
+    initializer = make_initializer(
+        monkeypatch,
+        ["eager", "watchlist", "missing"],
+        {},
+        lazy={"watchlist": factory, "missing": None}
+    )
+
+    results = await initializer.initialize_all_services()
+
+    assert results == {
+        "eager": "initialized",
+        "watchlist": "deferred - initialized on first use",
+        "missing": "skipped - service not available"
+    }
+    assert initializer.started == ["eager"] and built == []
+    assert "watchlist" in registry.list_services() and "watchlist" not in registry.all_services
+
+    service = registry.get_service("watchlist")
+    assert registry.get_service("watchlist") is service
+    assert built == ["watchlist"]
+    assert registry.get_service("missing") is None
+
+
+def test_registry_prefers_registered_instance_over_factory():
+    registry = ServiceRegistry()
+    instance = object()
+    registry.register_service_factory("svc", lambda: pytest.fail("factory should not run"))
+    registry.register_service("svc", instance)
+
+    assert registry.get_service("svc") is instance
+
+
+# Dependencies as the services themselves declare them: registry lookups made while they initialize
+
+SERVICE_SOURCES = Path(initializer_module.__file__).resolve().parent.parent / "services"
+INIT_FUNCTIONS = {"__init__", "initialize"}
+
+
+def registry_lookups(node) -> set:
+    return {
+        call.args[0].value
+        for call in ast.walk(node)
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr == "get_service"
+        and call.args and isinstance(call.args[0], ast.Constant) and isinstance(call.args[0].value, str)
+    }
+
+
+def lookups_in_initializer() -> dict:
+    """get_service calls inside each `service_name == "..."` branch of _initialize_service"""
+    tree = ast.parse(Path(initializer_module.__file__).read_text())
+    method = next(
+        node for node in ast.walk(tree)
+        if isinstance(node, ast.AsyncFunctionDef) and node.name == "_initialize_service"
+    )
+    lookups = {}
+    for node in ast.walk(method):
+        if (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name) and node.test.left.id == "service_name"
+                and isinstance(node.test.comparators[0], ast.Constant)):
+            lookups[node.test.comparators[0].value] = set().union(*(registry_lookups(stmt) for stmt in node.body))
+    return lookups
+
+
+def lookups_in_service_module(service_name: str) -> set:
+    """get_service calls a services/<service_name>.py class makes while it is constructed or initialized"""
+    path = SERVICE_SOURCES / f"{service_name}.py"
+    if not path.exists():
+        return set()
+    tree = ast.parse(path.read_text())
+    return set().union(*(
+        registry_lookups(node) for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in INIT_FUNCTIONS
+    ))
+
+
+def test_declared_dependencies_cover_registry_lookups_during_init():
+    initializer = ServiceInitializer()
+    order = initializer.initialization_order
+    in_initializer = lookups_in_initializer()
+    lookups = {
+        name: (in_initializer.get(name, set()) | lookups_in_service_module(name)) & set(order) - {name}
+        for name in order
+    }
+    assert lookups["apscheduler_agent_service"] == {"autonomous_state_persistence", "enhanced_agent_wallet_service"}
+
+    missing = {
+        name: sorted(needed - set(initializer.service_dependencies.get(name, [])))
+        for name, needed in lookups.items()
+    }
+    assert {name: needed for name, needed in missing.items() if needed} == {}
+
+    # Every service starts after the services it looks up
+    start_order = initializer._dependency_order(order)
+    for name, needed in lookups.items():
+        assert all(start_order.index(d) < start_order.index(name) for d in needed), name
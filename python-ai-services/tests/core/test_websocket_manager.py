@@ -3,12 +3,20 @@ import pytest_asyncio # For async fixtures if needed, though manager methods are
 from unittest.mock import MagicMock, AsyncMock, patch
 import asyncio # For testing broadcast
 
-from fastapi import WebSocketDisconnect # Import for simulating disconnect
+from fastapi import WebSocket, WebSocketDisconnect # Import for simulating disconnect
+from loguru import logger
 # Adjust path based on your project structure
-from python_ai_services.core.websocket_manager import ConnectionManager
+from python_ai_services.core.websocket_manager import ConnectionManager, SlowConsumerPolicy, symbol_topic
 from python_ai_services.models.websocket_models import WebSocketEnvelope
 
 
+@pytest.fixture
+def caplog(caplog):
+    """The manager logs through loguru; forward its records into pytest's capture."""
+    handler_id = logger.add(caplog.handler, format="{message}", level=0)
+    yield caplog
+    logger.remove(handler_id)
+
 @pytest.fixture
 def manager() -> ConnectionManager:
     """Returns a fresh ConnectionManager instance for each test."""
@@ -31,7 +39,7 @@ async def test_connect_adds_client(manager: ConnectionManager, mock_websocket: M
     client_id = "client1"
     await manager.connect(mock_websocket, client_id)
     assert client_id in manager.active_connections
-    assert manager.active_connections[client_id] == mock_websocket
+    assert manager.active_connections[client_id][0].websocket is mock_websocket
     mock_websocket.accept.assert_called_once()
 
 # --- Test ConnectionManager.disconnect ---
@@ -50,11 +58,16 @@ async def test_disconnect_unknown_client(manager: ConnectionManager, caplog):
 
 @pytest.mark.asyncio
 async def test_disconnect_specific_websocket_instance(manager: ConnectionManager, mock_websocket: MagicMock):
-    # This test is more relevant if multiple WebSockets per client_id are supported.
-    # For the current simple dict, it behaves like normal disconnect.
     client_id = "client_multi_ws"
+    second_ws = MagicMock(spec=WebSocket); second_ws.accept = AsyncMock(); second_ws.send_text = AsyncMock()
     await manager.connect(mock_websocket, client_id)
-    manager.disconnect(client_id, mock_websocket) # Pass the websocket instance
+    await manager.connect(second_ws, client_id)
+    assert len(manager.active_connections[client_id]) == 2
+
+    manager.disconnect(client_id, mock_websocket) # Only this tab goes away
+    assert [c.websocket for c in manager.active_connections[client_id]] == [second_ws]
+
+    manager.disconnect(client_id, second_ws)
     assert client_id not in manager.active_connections
 
 
@@ -66,6 +79,7 @@ async def test_send_to_client_sends_message(manager: ConnectionManager, mock_web
 
     message_payload = WebSocketEnvelope(event_type="TEST_EVENT", payload={"data": "test_data"})
     await manager.send_to_client(client_id, message_payload)
+    await manager.drain()
 
     mock_websocket.send_text.assert_called_once_with(message_payload.model_dump_json())
 
@@ -84,30 +98,37 @@ async def test_send_to_client_handles_exception_and_disconnects(manager: Connect
 
     message_payload = WebSocketEnvelope(event_type="FAIL_EVENT", payload={"error": True})
     await manager.send_to_client(client_id, message_payload)
+    await manager.drain()
 
-    assert f"Error sending WebSocket message to client '{client_id}': Connection closed" in caplog.text
     assert client_id not in manager.active_connections # Client should be disconnected
+    assert f"Error sending WebSocket message to client '{client_id}': Connection closed" in caplog.text
 
 # --- Test ConnectionManager.broadcast_to_all ---
+def _socket(send_text=None) -> MagicMock:
+    ws = MagicMock(spec=WebSocket)
+    ws.accept = AsyncMock()
+    ws.close = AsyncMock()
+    ws.send_text = send_text or AsyncMock()
+    return ws
+
 @pytest.mark.asyncio
 async def test_broadcast_to_all_sends_to_multiple_clients(manager: ConnectionManager):
-    client1_ws = MagicMock(spec=WebSocket); client1_ws.send_text = AsyncMock()
-    client2_ws = MagicMock(spec=WebSocket); client2_ws.send_text = AsyncMock()
-
-    # Connect clients (accept is not called by manager.connect if ws is already MagicMock)
-    # To be precise, we should ensure accept is called if it's part of the connect contract.
-    # For these mocks, accept() is part of mock_websocket fixture, but not these direct MagicMocks.
-    # Let's assume they are "accepted" for this test's purpose.
-    manager.active_connections["clientB1"] = client1_ws
-    manager.active_connections["clientB2"] = client2_ws
+    client1_ws, client2_ws, client2_tab_ws = _socket(), _socket(), _socket()
+    await manager.connect(client1_ws, "clientB1")
+    await manager.connect(client2_ws, "clientB2")
+    await manager.connect(client2_tab_ws, "clientB2")
 
     message_payload = WebSocketEnvelope(event_type="BROADCAST_EVENT", payload={"global": "update"})
     message_json = message_payload.model_dump_json()
 
-    await manager.broadcast_to_all(message_payload)
+    with patch.object(WebSocketEnvelope, "model_dump_json", autospec=True, return_value=message_json) as dump:
+        await manager.broadcast_to_all(message_payload)
+    await manager.drain()
 
+    dump.assert_called_once() # Serialized once, not once per socket
     client1_ws.send_text.assert_called_once_with(message_json)
     client2_ws.send_text.assert_called_once_with(message_json)
+    client2_tab_ws.send_text.assert_called_once_with(message_json)
 
 @pytest.mark.asyncio
 async def test_broadcast_to_all_no_clients(manager: ConnectionManager, caplog):
@@ -116,25 +137,179 @@ async def test_broadcast_to_all_no_clients(manager: ConnectionManager, caplog):
     assert "No active WebSocket clients to broadcast to." in caplog.text
 
 @pytest.mark.asyncio
-async def test_broadcast_to_all_handles_send_exceptions_and_disconnects(manager: ConnectionManager, caplog):
-    client_ok_ws = MagicMock(spec=WebSocket); client_ok_ws.send_text = AsyncMock()
-    client_fail_ws = MagicMock(spec=WebSocket); client_fail_ws.send_text = AsyncMock(side_effect=Exception("Failed to send to this one"))
-
-    manager.active_connections["client_ok"] = client_ok_ws
-    manager.active_connections["client_fail"] = client_fail_ws
+async def test_broadcast_to_all_handles_send_exceptions_and_disconnects(manager: ConnectionManager):
+    client_ok_ws = _socket()
+    client_fail_ws = _socket(AsyncMock(side_effect=Exception("Failed to send to this one")))
+    await manager.connect(client_ok_ws, "client_ok")
+    await manager.connect(client_fail_ws, "client_fail")
 
     message_payload = WebSocketEnvelope(event_type="BROADCAST_MIXED", payload={"status": "mixed_results"})
     message_json = message_payload.model_dump_json()
 
     await manager.broadcast_to_all(message_payload)
+    await manager.drain()
 
     client_ok_ws.send_text.assert_called_once_with(message_json)
     client_fail_ws.send_text.assert_called_once_with(message_json) # Attempt was made
 
     assert "client_ok" in manager.active_connections # Should remain connected
     assert "client_fail" not in manager.active_connections # Should be disconnected
-    assert "Error sending during broadcast to client 'client_fail': Failed to send to this one" in caplog.text
-    assert "Broadcast to client 'client_fail' failed with exception: Failed to send to this one" in caplog.text
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_broadcast(manager: ConnectionManager):
+    release = asyncio.Event()
+
+    async def blocked_send(_):
+        await release.wait()
+
+    fast_ws, slow_ws = _socket(), _socket(AsyncMock(side_effect=blocked_send))
+    await manager.connect(fast_ws, "fast")
+    await manager.connect(slow_ws, "slow")
+
+    for i in range(3):
+        await manager.broadcast_to_all(WebSocketEnvelope(event_type="TICK", payload={"i": i}))
+    await manager.active_connections["fast"][0].wait_idle()
+
+    assert fast_ws.send_text.await_count == 3
+    assert slow_ws.send_text.await_count == 1 # Stuck on the first message
+    release.set()
+    await manager.drain()
+    assert slow_ws.send_text.await_count == 3
+
+# --- Test slow-consumer policies ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy, expected", [
+    (SlowConsumerPolicy.DROP_OLDEST, [0, 3, 4]),
+    (SlowConsumerPolicy.DROP_NEWEST, [0, 1, 2]),
+])
+async def test_full_queue_drop_policies(policy, expected):
+    manager = ConnectionManager(max_queue_size=2, slow_consumer_policy=policy)
+    release = asyncio.Event()
+    sent = []
+
+    async def send(text):
+        sent.append(WebSocketEnvelope.model_validate_json(text).payload["i"])
+        await release.wait()
+
+    ws = _socket(AsyncMock(side_effect=send))
+    await manager.connect(ws, "client")
+    await manager.broadcast_to_all(WebSocketEnvelope(event_type="TICK", payload={"i": 0}))
+    await asyncio.sleep(0) # Writer picks up message 0 and blocks on it
+    for i in range(1, 5):
+        await manager.broadcast_to_all(WebSocketEnvelope(event_type="TICK", payload={"i": i}))
+    release.set()
+    await manager.drain()
+
+    assert sent == expected
+    assert manager.get_stats()["dropped"] == 2
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_keeps_latest_per_topic():
+    manager = ConnectionManager(max_queue_size=10, slow_consumer_policy=SlowConsumerPolicy.COALESCE)
+    release = asyncio.Event()
+    sent = []
+
+    async def send(text):
+        envelope = WebSocketEnvelope.model_validate_json(text)
+        sent.append((envelope.payload["symbol"], envelope.payload["price"]))
+        await release.wait()
+
+    ws = _socket(AsyncMock(side_effect=send))
+    await manager.connect(ws, "client", topics=[symbol_topic("BTC-USD"), symbol_topic("ETH-USD")])
+    for price in (100, 101, 102):
+        for symbol in ("BTC-USD", "ETH-USD"):
+            await manager.publish(
+                symbol_topic(symbol),
+                WebSocketEnvelope(event_type="PRICE_UPDATE", payload={"symbol": symbol, "price": price})
+            )
+        await asyncio.sleep(0)
+    release.set()
+    await manager.drain()
+
+    # First update goes out immediately, the rest collapse to the latest price per symbol
+    assert sent == [("BTC-USD", 100), ("ETH-USD", 102), ("BTC-USD", 102)]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", [SlowConsumerPolicy.DROP_OLDEST, SlowConsumerPolicy.DROP_NEWEST])
+async def test_keyed_messages_are_not_merged_outside_coalesce_policy(policy):
+    manager = ConnectionManager(max_queue_size=10, slow_consumer_policy=policy)
+    release = asyncio.Event()
+    sent = []
+
+    async def send(text):
+        sent.append(WebSocketEnvelope.model_validate_json(text).payload["price"])
+        await release.wait()
+
+    ws = _socket(AsyncMock(side_effect=send))
+    await manager.connect(ws, "client", topics=[symbol_topic("BTC-USD")])
+    for price in (100, 101, 102, 103):
+        await manager.publish(symbol_topic("BTC-USD"), WebSocketEnvelope(event_type="PRICE_UPDATE", payload={"price": price}))
+        await asyncio.sleep(0)
+    release.set()
+    await manager.drain()
+
+    assert sent == [100, 101, 102, 103]
+    stats = manager.get_stats()
+    assert (stats["enqueued"], stats["sent"], stats["coalesced"], stats["dropped"]) == (4, 4, 0, 0)
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_slow_consumer():
+    manager = ConnectionManager(max_queue_size=1, slow_consumer_policy=SlowConsumerPolicy.DISCONNECT)
+    release = asyncio.Event()
+
+    async def blocked_send(_):
+        await release.wait()
+
+    ws = _socket(AsyncMock(side_effect=blocked_send))
+    await manager.connect(ws, "slow")
+
+    for i in range(3):
+        await manager.broadcast_to_all(WebSocketEnvelope(event_type="TICK", payload={"i": i}))
+        await asyncio.sleep(0)
+
+    assert "slow" not in manager.active_connections
+    assert manager.get_stats()["disconnected_slow_consumers"] == 1
+    release.set()
+    await asyncio.sleep(0.01)
+    ws.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_stalled_send_times_out():
+    manager = ConnectionManager(send_timeout=0.05)
+    never = asyncio.Event()
+
+    async def stalled_send(_):
+        await never.wait()
+
+    await manager.connect(_socket(AsyncMock(side_effect=stalled_send)), "stalled")
+    await manager.broadcast_to_all(WebSocketEnvelope(event_type="TICK", payload={}))
+    await asyncio.sleep(0.2)
+
+    assert "stalled" not in manager.active_connections
+
+# --- Test topic subscriptions ---
+@pytest.mark.asyncio
+async def test_publish_only_reaches_topic_subscribers(manager: ConnectionManager):
+    btc_ws, eth_ws = _socket(), _socket()
+    await manager.connect(btc_ws, "btc_watcher")
+    await manager.connect(eth_ws, "eth_watcher")
+    assert manager.subscribe("btc_watcher", [symbol_topic("BTC-USD")])
+    assert manager.subscribe("eth_watcher", [symbol_topic("ETH-USD")])
+    assert not manager.subscribe("unknown", [symbol_topic("BTC-USD")])
+
+    message = WebSocketEnvelope(event_type="PRICE_UPDATE", payload={"symbol": "BTC-USD"})
+    assert await manager.publish(symbol_topic("BTC-USD"), message) == 1
+    await manager.drain()
+
+    btc_ws.send_text.assert_called_once_with(message.model_dump_json())
+    eth_ws.send_text.assert_not_called()
+
+    manager.unsubscribe("btc_watcher", [symbol_topic("BTC-USD")])
+    assert await manager.publish(symbol_topic("BTC-USD"), message) == 0
+    assert symbol_topic("BTC-USD") not in manager.topic_subscribers
+
+    manager.disconnect("eth_watcher")
+    assert symbol_topic("ETH-USD") not in manager.topic_subscribers
 
 # --- Test ConnectionManager as a Singleton ---
 # (This is more of an integration aspect, but can be conceptually checked)
@@ -145,4 +320,3 @@ def test_connection_manager_singleton_instance_exists():
         assert isinstance(global_manager_instance, ConnectionManager)
     except ImportError:
         pytest.fail("Could not import global connection_manager instance from core.websocket_manager")
-
@@ -0,0 +1,299 @@
+import random
+
+import pytest
+
+from python_ai_services.mcp_servers import market_microstructure
+from python_ai_services.mcp_servers.market_microstructure import (
+    BookSide, BookSnapshotRing, L2OrderBook, LiquidityType, MarketMicrostructure, OrderSide, Trade, TradeRing
+)
+
+
+class NaiveBook:
+    """Reference book: one dict per side, everything recomputed from scratch"""
+
+    def __init__(self, reference_price=100.0):
+        self.bids = {}
+        self.asks = {}
+        self.reference_price = reference_price
+
+    def apply(self, side, levels):
+        for price, size, orders in levels:
+            if size > 0:
+                side[price] = (size, orders)
+            else:
+                side.pop(price, None)
+
+    def load(self, bids, asks):
+        # A snapshot lists the levels that exist; empty entries are skipped, not deletes
+        self.bids = {price: (size, orders) for price, size, orders in bids if size > 0}
+        self.asks = {price: (size, orders) for price, size, orders in asks if size > 0}
+
+    @property
+    def best_bid(self):
+        return max(self.bids) if self.bids else None
+
+    @property
+    def best_ask(self):
+        return min(self.asks) if self.asks else None
+
+    @property
+    def mid_price(self):
+        if self.bids and self.asks:
+            return (self.best_bid + self.best_ask) / 2
+        return self.reference_price
+
+    @property
+    def spread(self):
+        if self.bids and self.asks:
+            return self.best_ask - self.best_bid
+        return L2OrderBook.DEFAULT_SPREAD
+
+    @property
+    def imbalance(self):
+        if not self.bids or not self.asks:
+            return 0.0
+        bid_size = self.bids[self.best_bid][0]
+        ask_size = self.asks[self.best_ask][0]
+        return (bid_size - ask_size) / (bid_size + ask_size)
+
+    @property
+    def depth(self):
+        mid = self.mid_price
+        depth = {"bbo": (self.bids[self.best_bid][0] if self.bids else 0.0) +
+                        (self.asks[self.best_ask][0] if self.asks else 0.0)}
+        for bps in L2OrderBook.DEPTH_BANDS_BPS:
+            price_range = mid * (bps / 10000)
+            depth[f"{bps}bps"] = (
+                sum(size for price, (size, _) in self.bids.items() if price >= mid - price_range) +
+                sum(size for price, (size, _) in self.asks.items() if price <= mid + price_range)
+            )
+        return depth
+
+    def levels(self, side, best_first_key):
+        return [(price, side[price][0], side[price][1]) for price in sorted(side, key=best_first_key)]
+
+
+def random_levels(rng, center, is_bid, count):
+    levels = []
+    for _ in range(count):
+        offset = rng.randint(1, 60) / 100
+        price = round(center - offset if is_bid else center + offset, 2)
+        size = 0.0 if rng.random() < 0.25 else float(rng.randint(1, 500))
+        levels.append((price, size, rng.randint(1, 9)))
+    return levels
+
+
+def as_tuples(levels):
+    return [(level.price, level.size, level.orders) for level in levels]
+
+
+def assert_books_match(book, naive):
+    assert book.best_bid == naive.best_bid
+    assert book.best_ask == naive.best_ask
+    assert book.mid_price == pytest.approx(naive.mid_price)
+    assert book.spread == pytest.approx(naive.spread)
+    assert book.imbalance == pytest.approx(naive.imbalance)
+    assert book.bid_side.total_size == pytest.approx(sum(size for size, _ in naive.bids.values()))
+    assert book.ask_side.total_size == pytest.approx(sum(size for size, _ in naive.asks.values()))
+    assert book.depth == pytest.approx(naive.depth)
+    assert as_tuples(book.bids) == naive.levels(naive.bids, lambda price: -price)
+    assert as_tuples(book.asks) == naive.levels(naive.asks, lambda price: price)
+
+
+def test_book_side_orders_levels_best_last():
+    bids, asks = BookSide(is_bid=True), BookSide(is_bid=False)
+    for price in (99.5, 99.9, 99.7):
+        bids.set_level(price, 10, 1)
+    for price in (100.5, 100.1, 100.3):
+        asks.set_level(price, 20, 2)
+
+    assert (bids.best_price(), asks.best_price()) == (99.9, 100.1)
+    assert [level.price for level in bids.levels("t")] == [99.9, 99.7, 99.5]
+    assert [level.price for level in asks.levels("t", max_levels=2)] == [100.1, 100.3]
+    assert bids.size_within(99.7) == 20 and asks.size_within(100.3) == 40
+    assert bids.top_size(1) == 10
+
+    bids.set_level(99.9, 0)
+    asks.set_level(100.1, -1)
+    bids.set_level(98.0, 0)  # Removing a missing level is a no-op
+    assert (bids.best_price(), asks.best_price()) == (99.7, 100.3)
+    assert (bids.total_size, asks.total_size) == (20, 40)
+
+
+def test_book_side_load_merges_duplicates_and_drops_empty_levels():
+    side = BookSide(is_bid=False)
+    side.set_level(101.0, 5)
+    side.load([(100.2, 10, 1), (100.1, 0, 1), (100.2, 30, 3), (100.4, 7, 2)])
+
+    assert as_tuples(side.levels("t")) == [(100.2, 30, 3), (100.4, 7, 2)]
+    assert side.total_size == 37
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_deltas_match_naive_book(seed):
+    rng = random.Random(seed)
+    book, naive = L2OrderBook("TEST"), NaiveBook()
+    for step in range(300):
+        center = 100 + rng.randint(-20, 20) / 100
+        bids = random_levels(rng, center, True, rng.randint(0, 4))
+        asks = random_levels(rng, center, False, rng.randint(0, 4))
+        if step % 50 == 49:
+            book.load_snapshot(bids, asks, timestamp=f"t{step}")
+            naive.load(bids, asks)
+        else:
+            book.apply_delta(bids, asks, timestamp=f"t{step}")
+            naive.apply(naive.bids, bids)
+            naive.apply(naive.asks, asks)
+        assert_books_match(book, naive)
+
+
+def test_one_sided_book_falls_back_to_reference_price():
+    book, naive = L2OrderBook("TEST", reference_price=250.0), NaiveBook(reference_price=250.0)
+    assert_books_match(book, naive)
+
+    book.apply_delta(bids=[(249.9, 100, 1)])
+    naive.apply(naive.bids, [(249.9, 100, 1)])
+    assert_books_match(book, naive)
+    assert book.microstructure_signals["order_imbalance"] == 0.0
+
+    book.mid_price = 249.95
+    assert book.mid_price == 249.95
+
+
+def test_derived_values_are_recomputed_after_update():
+    book = L2OrderBook("TEST")
+    book.apply_delta(bids=[(99.99, 100, 1)], asks=[(100.01, 100, 1)])
+    first = book.depth
+    assert book.depth is first
+
+    book.apply_delta(asks=[(100.01, 300, 1)])
+    assert book.depth is not first
+    assert book.depth["bbo"] == 400
+
+    snapshot = book.to_order_book(max_levels=1)
+    assert snapshot.depth == book.depth and snapshot.imbalance == book.imbalance
+
+
+def test_snapshot_ring_keeps_latest_rows_in_order():
+    ring = BookSnapshotRing(capacity=4)
+    book = L2OrderBook("TEST")
+    for i in range(6):
+        book.apply_delta(bids=[(99.0 + i, 10 + i, 1)], asks=[(101.0 + i, 20, 1)])
+        ring.record(book, epoch=float(i))
+
+    assert len(ring) == 4
+    assert ring.column("epoch").tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert ring.column("best_bid", 2).tolist() == [103.0, 104.0]
+    assert ring.column("bbo_depth", 1).tolist() == [35.0]
+    assert ring.latest(10).shape == (4, len(BookSnapshotRing.FIELDS))
+
+
+@pytest.fixture
+def microstructure(monkeypatch):
+    monkeypatch.setattr(market_microstructure.np.random, "uniform", lambda low, high: 100.0)
+    return MarketMicrostructure()
+
+
+def test_apply_book_update_creates_book_and_records_snapshot(microstructure):
+    book = microstructure.apply_book_update("NEW", [(99.0, 10, 1)], [(101.0, 5, 1)], timestamp="t1", is_delta=True)
+    assert microstructure.order_books["NEW"] is book
+
+    microstructure.apply_book_update("NEW", [(99.5, 20, 2)], [], timestamp="t2", is_delta=True)
+    assert (book.best_bid, book.best_ask, book.timestamp) == (99.5, 101.0, "t2")
+
+    microstructure.apply_book_update("NEW", [(98.0, 1, 1)], [(102.0, 1, 1)], is_delta=False)
+    assert as_tuples(book.bids) == [(98.0, 1, 1)] and as_tuples(book.asks) == [(102.0, 1, 1)]
+    assert microstructure.order_book_snapshots["NEW"].column("mid_price").tolist() == [100.0, 100.25, 100.0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bids, asks", [([], []), ([(99.0, 100, 1)], []), ([(90.0, 100, 1)], [(110.0, 100, 1)])])
+async def test_logarithmic_impact_with_no_depth_takes_the_cap(microstructure, bids, asks):
+    book = L2OrderBook("TEST")
+    book.load_snapshot(bids, asks)
+    assert book.depth["5bps"] == 0
+
+    impact = await microstructure._logarithmic_impact_model(1000, book, 0.1, {})
+    assert impact == 0.1
+
+
+def make_trade(rng, i):
+    side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+    return Trade(
+        id=f"t{i}", symbol="TEST", timestamp="", price=100 + rng.uniform(-1, 1), size=float(rng.randint(1, 100)),
+        side=side, trade_type=LiquidityType.TAKER, market_impact=rng.uniform(-0.01, 0.01),
+        vwap_deviation=rng.uniform(-0.5, 0.5), aggressor_flag=True
+    )
+
+
+def naive_totals(trades):
+    buys = [trade for _, trade in trades if trade.side == OrderSide.BUY]
+    return {
+        "count": len(trades),
+        "buy_count": len(buys),
+        "buy_volume": sum(trade.size for trade in buys),
+        "sell_volume": sum(trade.size for _, trade in trades if trade.side == OrderSide.SELL),
+        "notional": sum(trade.price * trade.size for _, trade in trades),
+        "impact": sum(trade.market_impact for _, trade in trades),
+        "impact_sq": sum(trade.market_impact ** 2 for _, trade in trades),
+        "abs_impact": sum(abs(trade.market_impact) for _, trade in trades),
+        "abs_deviation": sum(abs(trade.vwap_deviation) for _, trade in trades)
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_trade_ring_matches_naive_trade_list(seed, monkeypatch):
+    # A small resync interval exercises the rebuild from columns alongside the running sums
+    monkeypatch.setattr(TradeRing, "RESYNC_INTERVAL", 37)
+    rng = random.Random(seed)
+    windows = {"short": 5.0, "long": 40.0}
+    ring = TradeRing(capacity=64, windows=windows)
+    history = []
+    epoch = now = 1_000.0
+    for i in range(500):
+        # Occasional late trades are stamped with the newest epoch seen so far
+        epoch += rng.uniform(-0.5, 1.0)
+        trade = make_trade(rng, i)
+        ring.append(trade, epoch=epoch)
+        history.append((max(epoch, history[-1][0]) if history else epoch, trade))
+
+        retained = history[-64:]
+        # Queries run on the wall clock, which only moves forward
+        now = max(now, history[-1][0] + rng.uniform(0, 3))
+        for label, seconds in windows.items():
+            in_window = [(stamp, trade) for stamp, trade in retained if stamp >= now - seconds]
+            assert ring.window_totals(label, now) == pytest.approx(naive_totals(in_window))
+            assert ring.window_column("size", label, now).tolist() == [trade.size for _, trade in in_window]
+
+        cutoff = history[-1][0] - rng.uniform(0, 20)
+        assert ring.since(cutoff) == sum(1 for stamp, _ in retained if stamp >= cutoff)
+
+    assert len(ring) == 64
+    assert ring.column("epoch").tolist() == [stamp for stamp, _ in history[-64:]]
+    assert ring.column("price", 3).tolist() == [trade.price for _, trade in history[-3:]]
+    assert ring.column("side", 2).tolist() == [1.0 if trade.side == OrderSide.BUY else -1.0 for _, trade in history[-2:]]
+    assert ring.latest_trades(5) == [trade for _, trade in history[-5:]]
+    assert ring.latest_trades() == [trade for _, trade in history[-64:]]
+
+
+def test_trade_ring_clamps_out_of_order_epochs():
+    rng = random.Random(0)
+    ring = TradeRing(capacity=8, windows={"1m": 60})
+    ring.append(make_trade(rng, 0), epoch=100.0)
+    ring.append(make_trade(rng, 1), epoch=90.0)
+
+    assert ring.column("epoch").tolist() == [100.0, 100.0]
+    assert ring.last_epoch == 100.0
+    assert ring.window_totals("1m", now=150.0)["count"] == 2
+    assert ring.window_totals("1m", now=161.0)["count"] == 0
+    assert ring.since(100.0) == 2
+
+
+def test_empty_trade_ring():
+    ring = TradeRing(capacity=8, windows={"1m": 60})
+
+    assert len(ring) == 0
+    assert ring.window_totals("1m", now=0.0)["count"] == 0
+    assert ring.column("price").size == 0
+    assert ring.latest_trades() == [] and ring.latest_trades(3) == []
+    assert ring.since(0.0) == 0
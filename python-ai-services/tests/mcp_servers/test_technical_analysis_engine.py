@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_ai_services.mcp_servers.technical_analysis_engine import TechnicalAnalysisEngine
+
+SYMBOL = "TEST"
+
+
+def make_bars(count, start=pd.Timestamp("2024-01-01"), seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, count))
+    spread = np.abs(rng.normal(0, 0.005, count))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=count, freq=pd.Timedelta(hours=1)),
+        "open": closes, "high": closes * (1 + spread), "low": closes * (1 - spread), "close": closes,
+        "volume": rng.lognormal(15, 1, count).astype(int)
+    })
+
+
+def reference_columns(df, cfg):
+    """Every indicator column as the per-request pandas code computed it"""
+    close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
+    columns = {"close": close}
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=cfg["rsi"]["period"]).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=cfg["rsi"]["period"]).mean()
+    columns["rsi"] = 100 - (100 / (1 + gain / loss))
+
+    macd_line = close.ewm(span=cfg["macd"]["fast"]).mean() - close.ewm(span=cfg["macd"]["slow"]).mean()
+    signal_line = macd_line.ewm(span=cfg["macd"]["signal"]).mean()
+    columns.update(macd=macd_line, macd_signal=signal_line, macd_histogram=macd_line - signal_line)
+
+    sma = close.rolling(window=cfg["bollinger"]["period"]).mean()
+    std = close.rolling(window=cfg["bollinger"]["period"]).std()
+    columns["bollinger_upper"] = sma + std * cfg["bollinger"]["std_dev"]
+    columns["bollinger_lower"] = sma - std * cfg["bollinger"]["std_dev"]
+
+    k_period = cfg["stochastic"]["k_period"]
+    low_min, high_max = low.rolling(window=k_period).min(), high.rolling(window=k_period).max()
+    columns["stochastic_k"] = 100 * ((close - low_min) / (high_max - low_min))
+    columns["stochastic_d"] = columns["stochastic_k"].rolling(window=cfg["stochastic"]["d_period"]).mean()
+
+    period = cfg["williams_r"]["period"]
+    low_min, high_max = low.rolling(window=period).min(), high.rolling(window=period).max()
+    columns["williams_r"] = -100 * ((high_max - close) / (high_max - low_min))
+
+    true_range = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    period = cfg["adx"]["period"]
+    high_diff, low_diff = high.diff(), low.diff().abs()
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+    atr = true_range.rolling(window=period).mean()
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    columns.update(adx=dx.rolling(window=period).mean(), plus_di=plus_di, minus_di=minus_di)
+    columns["atr"] = true_range.rolling(window=cfg["atr"]["period"]).mean()
+
+    obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
+    columns.update(obv=obv, obv_trend=obv.rolling(window=20).mean(), close_trend=close.rolling(window=20).mean())
+    columns["vwap"] = (((high + low + close) / 3) * volume).cumsum() / volume.cumsum()
+
+    ichimoku = cfg["ichimoku"]
+    def midpoint(window):
+        return (high.rolling(window=window).max() + low.rolling(window=window).min()) / 2
+    tenkan_sen, kijun_sen = midpoint(ichimoku["tenkan"]), midpoint(ichimoku["kijun"])
+    columns.update(tenkan_sen=tenkan_sen, kijun_sen=kijun_sen)
+    columns["senkou_a"] = ((tenkan_sen + kijun_sen) / 2).shift(ichimoku["kijun"])
+    columns["senkou_b"] = midpoint(ichimoku["senkou"]).shift(ichimoku["kijun"])
+    return columns
+
+
+def assert_state_matches_reference(engine, df):
+    state = engine._indicator_states[SYMBOL, "1h"]
+    expected = reference_columns(df, engine.indicator_configs)
+    assert set(state.tail) == set(expected)
+    for column, series in expected.items():
+        np.testing.assert_allclose(
+            state.tail[column], series.to_numpy(dtype=float)[-2:], rtol=1e-9, atol=1e-9, err_msg=column
+        )
+
+
+@pytest.fixture
+def engine():
+    return TechnicalAnalysisEngine()
+
+
+@pytest.fixture
+def all_indicators(engine):
+    return list(engine._indicator_interpreters)
+
+
+async def request(engine, indicators):
+    return await engine._calculate_indicators(engine.market_data[SYMBOL], indicators, SYMBOL)
+
+
+@pytest.mark.asyncio
+async def test_cold_columns_match_pandas(engine, all_indicators):
+    engine.market_data[SYMBOL] = make_bars(300)
+
+    indicators = await request(engine, all_indicators)
+
+    assert len(indicators) == len(all_indicators)
+    assert engine.indicator_cache_stats["full_recomputes"] == 1
+    assert_state_matches_reference(engine, engine.market_data[SYMBOL])
+
+
+@pytest.mark.asyncio
+async def test_appended_bars_advance_incrementally_and_match_pandas(engine, all_indicators):
+    bars = make_bars(400)
+    engine.market_data[SYMBOL] = bars.iloc[:300].reset_index(drop=True)
+    await request(engine, all_indicators)
+
+    # One bar at a time, then several bars at once
+    for i in range(300, 340):
+        engine.append_market_bars(SYMBOL, bars.iloc[i:i + 1])
+        await request(engine, all_indicators)
+        assert_state_matches_reference(engine, engine.market_data[SYMBOL])
+    engine.append_market_bars(SYMBOL, bars.iloc[340:350])
+    await request(engine, all_indicators)
+    assert_state_matches_reference(engine, engine.market_data[SYMBOL])
+
+    assert engine.indicator_cache_stats["full_recomputes"] == 1
+    assert engine.indicator_cache_stats["incremental_updates"] == 41
+
+
+@pytest.mark.asyncio
+async def test_unchanged_last_bar_is_served_from_cache(engine, all_indicators):
+    engine.market_data[SYMBOL] = make_bars(300)
+    first = await request(engine, all_indicators)
+    stats = dict(engine.indicator_cache_stats)
+
+    second = await request(engine, all_indicators)
+
+    assert all(a is b for a, b in zip(first, second)) and len(first) == len(second)
+    assert engine.indicator_cache_stats["hits"] == stats["hits"] + len(all_indicators)
+    assert engine.indicator_cache_stats["misses"] == stats["misses"]
+    assert engine.indicator_cache_stats["full_recomputes"] == stats["full_recomputes"]
+
+
+@pytest.mark.asyncio
+async def test_revised_last_bar_misses_cache(engine, all_indicators):
+    engine.market_data[SYMBOL] = make_bars(300)
+    await request(engine, all_indicators)
+    stats = dict(engine.indicator_cache_stats)
+
+    # Same timestamp, new close: the bar is still forming
+    engine.market_data[SYMBOL].loc[299, "close"] *= 1.01
+    await request(engine, all_indicators)
+
+    assert engine.indicator_cache_stats["hits"] == stats["hits"]
+    assert engine.indicator_cache_stats["misses"] == stats["misses"] + len(all_indicators)
+    assert engine.indicator_cache_stats["full_recomputes"] == stats["full_recomputes"] + 1
+    assert_state_matches_reference(engine, engine.market_data[SYMBOL])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("change", ["revised_history", "replaced_history", "long_gap"])
+async def test_non_append_change_recomputes_in_full(engine, all_indicators, change):
+    bars = make_bars(600)
+    engine.market_data[SYMBOL] = bars.iloc[:300].reset_index(drop=True)
+    await request(engine, all_indicators)
+    stats = dict(engine.indicator_cache_stats)
+
+    if change == "revised_history":
+        # A bar behind the cached state was corrected before a new one arrived
+        revised = bars.iloc[:301].copy()
+        revised.loc[299, "close"] *= 0.98
+        engine.market_data[SYMBOL] = revised
+    elif change == "replaced_history":
+        engine.market_data[SYMBOL] = make_bars(301, seed=1)
+    else:
+        # More new bars than the lookback covers
+        engine.append_market_bars(SYMBOL, bars.iloc[300:300 + engine._indicator_lookback() + 1])
+    await request(engine, all_indicators)
+
+    assert engine.indicator_cache_stats["full_recomputes"] == stats["full_recomputes"] + 1
+    assert engine.indicator_cache_stats["incremental_updates"] == stats["incremental_updates"]
+    assert_state_matches_reference(engine, engine.market_data[SYMBOL])
+
+
+@pytest.mark.asyncio
+async def test_config_change_recomputes_and_misses_cache(engine):
+    engine.market_data[SYMBOL] = make_bars(300)
+    await request(engine, ["rsi"])
+    stats = dict(engine.indicator_cache_stats)
+
+    engine.indicator_configs["rsi"] = {**engine.indicator_configs["rsi"], "period": 7}
+    await request(engine, ["rsi"])
+
+    assert engine.indicator_cache_stats["misses"] == stats["misses"] + 1
+    assert engine.indicator_cache_stats["full_recomputes"] == stats["full_recomputes"] + 1
+    assert_state_matches_reference(engine, engine.market_data[SYMBOL])
@@ -0,0 +1 @@
+# This file makes the 'optimization' directory under 'tests' a Python package.
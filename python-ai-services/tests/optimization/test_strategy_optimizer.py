@@ -0,0 +1,167 @@
+import json
+
+import pytest
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+from python_ai_services.optimization.strategy_optimizer import StrategyOptimizer, StrategyOptimizerError
+
+FETCH_CALLS = []
+BACKTEST_CALLS = []
+
+
+def fake_fetch(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    FETCH_CALLS.append(symbol)
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000.0
+    }, index=pd.date_range("2022-01-01", periods=300, freq="D"))
+
+
+def fake_signals(symbol: str, start_date: str, end_date: str, fast: int = 5, slow: int = 20,
+                 price_data: Optional[pd.DataFrame] = None):
+    """Signal function whose score peaks at fast=10, slow=30; records the bars it saw."""
+    df = price_data.copy()
+    df['entries'] = False
+    df['exits'] = False
+    df.iloc[0, df.columns.get_loc('entries')] = True
+    df['score'] = -((fast - 10) ** 2) - ((slow - 30) ** 2) / 10
+    return df, None
+
+
+def fake_backtest(price_data_with_signals: pd.DataFrame, init_cash: float, commission_pct: float):
+    BACKTEST_CALLS.append(len(price_data_with_signals))
+    return {"Sharpe Ratio": float(price_data_with_signals['score'].iloc[0]), "Bars": len(price_data_with_signals)}
+
+
+PARAM_GRID = {"fast": [2, 5, 10, 15], "slow": [10, 20, 30, 40, 50]}
+
+
+@pytest.fixture
+def optimizer() -> StrategyOptimizer:
+    FETCH_CALLS.clear()
+    BACKTEST_CALLS.clear()
+    return StrategyOptimizer("Fake", signal_func=fake_signals, backtest_func=fake_backtest, data_fetch_func=fake_fetch)
+
+
+def test_grid_search_fetches_price_data_once(optimizer: StrategyOptimizer):
+    result = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID)
+
+    assert FETCH_CALLS == ["AAPL"]
+    assert result["best_parameters"] == {"fast": 10, "slow": 30}
+    assert result["best_metric_value"] == 0.0
+    assert len(result["all_run_results"]) == 20
+    assert result["best_stats"]["Bars"] == 300
+
+
+def test_grid_search_parallel_matches_sequential(optimizer: StrategyOptimizer):
+    sequential = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID)
+    parallel = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, n_jobs=2)
+
+    assert parallel["all_run_results"] == sequential["all_run_results"]
+    assert parallel["best_parameters"] == sequential["best_parameters"]
+
+
+def test_grid_search_resumes_from_checkpoint(optimizer: StrategyOptimizer, tmp_path):
+    checkpoint = str(tmp_path / "search.jsonl")
+    first = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=checkpoint)
+    BACKTEST_CALLS.clear()
+
+    resumed = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=checkpoint)
+    assert BACKTEST_CALLS == []
+    assert resumed["best_parameters"] == first["best_parameters"]
+
+    with pytest.raises(StrategyOptimizerError):
+        optimizer.run_grid_search("MSFT", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=checkpoint)
+
+
+def shifted_fetch(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    bars = fake_fetch(symbol, start_date, end_date)
+    bars.iloc[-1, bars.columns.get_loc('Close')] += 1.0
+    return bars
+
+
+@pytest.mark.parametrize("change", ["init_cash", "commission_pct", "param_grid", "price_data", "backtest_func_kwargs"])
+def test_checkpoint_belongs_to_one_set_of_search_inputs(optimizer: StrategyOptimizer, tmp_path, change):
+    checkpoint = str(tmp_path / "search.jsonl")
+    optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=checkpoint)
+
+    kwargs = {}
+    param_grid = PARAM_GRID
+    if change == "init_cash":
+        kwargs["init_cash"] = 50000
+    elif change == "commission_pct":
+        kwargs["commission_pct"] = 0.002
+    elif change == "param_grid":
+        param_grid = {**PARAM_GRID, "slow": [10, 20, 30]}
+    elif change == "price_data":
+        optimizer.data_fetch_func = shifted_fetch
+    else:
+        kwargs["backtest_func_kwargs"] = {"freq": "1D"}
+
+    with pytest.raises(StrategyOptimizerError):
+        optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", param_grid, checkpoint_path=checkpoint, **kwargs)
+
+
+def test_checkpoint_appends_one_line_per_result_and_survives_a_torn_write(optimizer: StrategyOptimizer, tmp_path):
+    checkpoint = tmp_path / "search.jsonl"
+    first = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=str(checkpoint))
+
+    lines = checkpoint.read_text().splitlines()
+    assert "header" in json.loads(lines[0])
+    assert len(lines) == 1 + len(first["all_run_results"])
+
+    # Drop the last two results and cut the one before them off mid-line, as an interrupted run leaves it
+    torn = "\n".join(lines[:-3]) + "\n" + lines[-3][:20]
+    checkpoint.write_text(torn)
+    BACKTEST_CALLS.clear()
+
+    resumed = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=str(checkpoint))
+
+    assert len(BACKTEST_CALLS) == 3
+    assert resumed["all_run_results"] == first["all_run_results"]
+    again = optimizer.run_grid_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, checkpoint_path=str(checkpoint))
+    assert len(BACKTEST_CALLS) == 3
+    assert again["all_run_results"] == first["all_run_results"]
+
+
+def test_random_search_is_seeded_subset(optimizer: StrategyOptimizer):
+    first = optimizer.run_random_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, n_iter=8, seed=3)
+    second = optimizer.run_random_search("AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, n_iter=8, seed=3)
+
+    assert len(first["all_run_results"]) == 8
+    assert first["all_run_results"] == second["all_run_results"]
+    assert first["search_method"] == "random"
+
+
+def test_successive_halving_prunes_and_finishes_on_full_data(optimizer: StrategyOptimizer):
+    result = optimizer.run_successive_halving(
+        "AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, min_data_fraction=0.25, reduction_factor=3
+    )
+
+    assert result["best_parameters"] == {"fast": 10, "slow": 30}
+    assert result["best_stats"]["Bars"] == 300
+    assert [rung["data_fraction"] for rung in result["rungs"]] == [0.25, 0.75, 1.0]
+    assert [rung["candidates"] for rung in result["rungs"]] == [20, 6, 2]
+    assert result["pruned_count"] == 18
+
+
+def test_successive_halving_requires_price_data_injection():
+    def signals_without_injection(symbol, start_date, end_date, fast=5):
+        return None, None
+
+    optimizer = StrategyOptimizer("NoInjection", signal_func=signals_without_injection, backtest_func=fake_backtest)
+    with pytest.raises(StrategyOptimizerError):
+        optimizer.run_successive_halving("AAPL", "2022-01-01", "2022-12-31", {"fast": [1, 2]})
+
+
+def test_bayesian_search_finds_optimum_within_budget(optimizer: StrategyOptimizer):
+    pytest.importorskip("sklearn")
+    result = optimizer.run_bayesian_search(
+        "AAPL", "2022-01-01", "2022-12-31", PARAM_GRID, n_iter=12, n_initial=5, seed=1
+    )
+
+    assert len(result["all_run_results"]) == 12
+    assert result["best_parameters"]["fast"] == 10
@@ -0,0 +1,181 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from python_ai_services.models.enhanced_market_data_models import PriceData, MarketDataProvider, AssetType
+from python_ai_services.providers.base_market_provider import ProviderManager, MarketDataProviderError
+from python_ai_services.providers.quote_coalescer import QuoteCoalescer, QuoteCache
+
+
+class RecordingFetcher:
+    def __init__(self, missing=(), error=None, delay=0.0):
+        self.missing = set(missing)
+        self.error = error
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, symbols):
+        self.calls.append(list(symbols))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {symbol: f"quote:{symbol}" for symbol in symbols if symbol not in self.missing}
+
+
+def make_coalescer(fetch, **kwargs):
+    return QuoteCoalescer("test", fetch, cache=QuoteCache(), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    fetch = RecordingFetcher()
+    coalescer = make_coalescer(fetch)
+
+    quotes = await asyncio.gather(
+        coalescer.get("AAPL"), coalescer.get("MSFT"), coalescer.get("AAPL"), coalescer.get_many(["MSFT", "TSLA"])
+    )
+
+    assert quotes[:3] == ["quote:AAPL", "quote:MSFT", "quote:AAPL"]
+    assert quotes[3] == {"MSFT": "quote:MSFT", "TSLA": "quote:TSLA"}
+    assert fetch.calls == [["AAPL", "MSFT", "TSLA"]]
+    assert coalescer.stats["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_in_flight_and_cached_symbols_are_not_refetched():
+    fetch = RecordingFetcher(delay=0.02)
+    coalescer = make_coalescer(fetch, ttl=60)
+
+    first = asyncio.ensure_future(coalescer.get("AAPL"))
+    await asyncio.sleep(0.01)  # batch dispatched, fetch still running
+    assert await coalescer.get("AAPL") == "quote:AAPL"
+    await first
+    assert await coalescer.get("AAPL") == "quote:AAPL"
+
+    assert fetch.calls == [["AAPL"]]
+    assert coalescer.stats["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_quotes_and_max_batch_size():
+    fetch = RecordingFetcher()
+    coalescer = make_coalescer(fetch, ttl=0, max_batch_size=2)
+
+    await coalescer.get_many(["A", "B", "C"])
+    await coalescer.get("A")
+
+    assert fetch.calls == [["A", "B"], ["C"], ["A"]]
+
+
+@pytest.mark.asyncio
+async def test_missing_symbols_and_failures():
+    coalescer = make_coalescer(RecordingFetcher(missing={"XXX"}))
+    assert await coalescer.get_many(["AAPL", "XXX"]) == {"AAPL": "quote:AAPL", "XXX": None}
+
+    fetch = RecordingFetcher(error=ConnectionError("provider down"))
+    coalescer = make_coalescer(fetch)
+    results = await asyncio.gather(coalescer.get("AAPL"), coalescer.get("AAPL"), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    # Failures are not cached
+    fetch.error = None
+    assert await coalescer.get("AAPL") == "quote:AAPL"
+    assert len(fetch.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_request():
+    coalescer = make_coalescer(RecordingFetcher(delay=0.02))
+
+    first = asyncio.ensure_future(coalescer.get("AAPL"))
+    second = asyncio.ensure_future(coalescer.get("AAPL"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "quote:AAPL"
+
+
+class FakeProvider:
+    def __init__(self, name, known, rate_limited=False):
+        self.name = name
+        self.known = set(known)
+        self.rate_limited = rate_limited
+        self.calls = []
+        self.status = type("Status", (), {"is_active": True})()
+
+    def get_provider_name(self):
+        return self.name
+
+    async def _check_rate_limit(self):
+        return not self.rate_limited
+
+    async def get_quotes(self, symbols):
+        self.calls.append(list(symbols))
+        return [
+            PriceData(symbol=symbol, price=Decimal("1"), timestamp=datetime.utcnow(),
+                      provider=self.name, asset_type=AssetType.STOCK)
+            for symbol in symbols if symbol in self.known
+        ]
+
+
+def make_manager(*providers):
+    manager = ProviderManager()
+    manager.quote_coalescer.cache = QuoteCache()
+    for provider in providers:
+        manager.register_provider(provider)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_provider_manager_batches_and_fails_over_missing_symbols():
+    primary = FakeProvider(MarketDataProvider.YFINANCE, {"AAPL"})
+    fallback = FakeProvider(MarketDataProvider.POLYGON, {"AAPL", "MSFT"})
+    manager = make_manager(primary, fallback)
+
+    quote, quotes = await asyncio.gather(manager.get_quote("AAPL"), manager.get_quotes(["AAPL", "MSFT", "NOPE"]))
+
+    assert quote.provider == MarketDataProvider.YFINANCE
+    assert [q.symbol for q in quotes] == ["AAPL", "MSFT"]
+    assert quotes[1].provider == MarketDataProvider.POLYGON
+    assert primary.calls == [["AAPL", "MSFT", "NOPE"]]
+    assert fallback.calls == [["MSFT", "NOPE"]]
+
+    with pytest.raises(MarketDataProviderError):
+        await manager.get_quote("NOPE")
+
+
+@pytest.mark.asyncio
+async def test_provider_manager_skips_rate_limited_providers():
+    primary = FakeProvider(MarketDataProvider.YFINANCE, {"AAPL"}, rate_limited=True)
+    fallback = FakeProvider(MarketDataProvider.POLYGON, {"AAPL"})
+    manager = make_manager(primary, fallback)
+
+    assert (await manager.get_quote("AAPL")).provider == MarketDataProvider.POLYGON
+    assert primary.calls == []
+
+
+@pytest.mark.asyncio
+async def test_provider_manager_raises_when_no_quote_comes_back():
+    primary = FakeProvider(MarketDataProvider.YFINANCE, {"AAPL"})
+    manager = make_manager(primary)
+
+    with pytest.raises(MarketDataProviderError):
+        await manager.get_quotes(["NOPE", "XXX"])
+    assert [q.symbol for q in await manager.get_quotes(["AAPL", "NOPE"])] == ["AAPL"]
+    assert await manager.get_quotes([]) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("unavailable", ["rate_limited", "inactive", "none_registered"])
+async def test_provider_manager_raises_when_no_provider_is_tried(unavailable):
+    provider = FakeProvider(MarketDataProvider.YFINANCE, {"AAPL"}, rate_limited=unavailable == "rate_limited")
+    provider.status.is_active = unavailable != "inactive"
+    manager = make_manager() if unavailable == "none_registered" else make_manager(provider)
+
+    with pytest.raises(MarketDataProviderError, match="no active provider"):
+        await manager.get_quotes(["AAPL", "MSFT"])
+    with pytest.raises(MarketDataProviderError, match="no active provider"):
+        await manager.get_quote("AAPL")
+    assert provider.calls == []
@@ -0,0 +1,198 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from python_ai_services.services import autonomous_task_scheduler
+from python_ai_services.services.autonomous_task_scheduler import (
+    AutonomousTaskScheduler, MissedRunPolicy, ScheduledTask, TaskPriority, TaskType
+)
+
+# A minute boundary, so every-minute cron occurrences fall on T + k * 60
+T = datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(T - 10)
+    monkeypatch.setattr(autonomous_task_scheduler.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def scheduler():
+    return AutonomousTaskScheduler()
+
+
+def make_task(task_id="task", cron_expression="* * * * *", policy=None):
+    configuration = {"missed_run_policy": policy.value} if policy else {}
+    now = datetime.now(timezone.utc)
+    return ScheduledTask(
+        task_id=task_id, name=task_id, task_type=TaskType.HEALTH_CHECK, cron_expression=cron_expression,
+        priority=TaskPriority.MEDIUM, enabled=True, max_runtime_seconds=60, retry_attempts=0,
+        retry_delay_seconds=0, timeout_seconds=60, dependencies=[], configuration=configuration,
+        created_at=now, updated_at=now
+    )
+
+
+def queued_task_ids(scheduler):
+    return [task.task_id for task, _ in scheduler.task_queue._queue]
+
+
+@pytest.mark.parametrize("policy", list(MissedRunPolicy))
+def test_on_time_fire_runs_once_and_arms_next_occurrence(scheduler, policy):
+    task = make_task(policy=policy)
+
+    assert scheduler._advance_task_timer(task, T, T + 0.5) == 1
+    assert scheduler._next_fire_at[task.task_id] == T + 60
+
+
+@pytest.mark.parametrize("policy, runs", [
+    (MissedRunPolicy.SKIP, 1), (MissedRunPolicy.RUN_ONCE, 1), (MissedRunPolicy.RUN_ALL, 1)
+])
+def test_late_within_grace_counts_as_on_time(scheduler, policy, runs):
+    scheduler.misfire_grace_seconds = 5.0
+
+    assert scheduler._advance_task_timer(make_task(policy=policy), T, T + 5.0) == runs
+
+
+@pytest.mark.parametrize("policy, runs", [
+    (MissedRunPolicy.SKIP, 0), (MissedRunPolicy.RUN_ONCE, 1), (MissedRunPolicy.RUN_ALL, 1)
+])
+def test_late_beyond_grace_before_next_occurrence(scheduler, policy, runs):
+    task = make_task(policy=policy)
+
+    assert scheduler._advance_task_timer(task, T, T + 30) == runs
+    assert scheduler._next_fire_at[task.task_id] == T + 60
+
+
+@pytest.mark.parametrize("policy, runs", [
+    (MissedRunPolicy.SKIP, 0), (MissedRunPolicy.RUN_ONCE, 1), (MissedRunPolicy.RUN_ALL, 4)
+])
+def test_missed_occurrences_follow_policy(scheduler, policy, runs):
+    task = make_task(policy=policy)
+
+    # Occurrences at T + 60, T + 120 and T + 180 also passed
+    assert scheduler._advance_task_timer(task, T, T + 185) == runs
+    assert scheduler._next_fire_at[task.task_id] == T + 240
+
+
+def test_catchup_runs_are_capped(scheduler):
+    scheduler.max_catchup_runs = 3
+    task = make_task(policy=MissedRunPolicy.RUN_ALL)
+
+    assert scheduler._advance_task_timer(task, T, T + 3600 + 1) == 3
+    assert scheduler._next_fire_at[task.task_id] == T + 3660
+
+
+@pytest.mark.parametrize("minutes_late, runs", [(0, 1), (1, 2), (2, 3), (3, 3), (4, 3)])
+def test_catchup_cap_counts_the_due_run(scheduler, minutes_late, runs):
+    scheduler.max_catchup_runs = 3
+    task = make_task(policy=MissedRunPolicy.RUN_ALL)
+
+    assert scheduler._advance_task_timer(task, T, T + 60 * minutes_late + 1) == runs
+    assert scheduler._next_fire_at[task.task_id] == T + 60 * (minutes_late + 1)
+
+
+def test_default_policy_applies_without_task_configuration(scheduler):
+    scheduler.default_missed_run_policy = MissedRunPolicy.SKIP
+
+    assert scheduler._advance_task_timer(make_task(), T, T + 30) == 0
+
+
+def test_push_timer_wakes_loop_only_for_new_earliest_timer(scheduler):
+    scheduler._push_timer("a", T + 60)
+    assert scheduler._timers_changed.is_set()
+
+    scheduler._timers_changed.clear()
+    scheduler._push_timer("b", T + 120)
+    assert not scheduler._timers_changed.is_set()
+
+    # Rescheduling leaves the old entry behind; it no longer matches _next_fire_at
+    scheduler._push_timer("b", T + 30)
+    assert scheduler._timers_changed.is_set()
+    assert len(scheduler._timer_heap) == 3 and scheduler._next_fire_at == {"a": T + 60, "b": T + 30}
+
+
+def test_push_timer_compacts_superseded_entries(scheduler):
+    for i in range(1100):
+        scheduler._push_timer("a", T + i)
+
+    assert len(scheduler._timer_heap) <= 2 * len(scheduler._next_fire_at) + 1024
+    assert [entry for entry in scheduler._timer_heap if entry[2] == "a" and entry[0] == T + 1099]
+
+
+async def wake(scheduler):
+    """Let the scheduler loop observe the patched clock"""
+    scheduler._timers_changed.set()
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_loop_fires_once_per_occurrence(scheduler, clock):
+    task = make_task(policy=MissedRunPolicy.RUN_ALL)
+    await scheduler.add_task(task)
+    loop = asyncio.create_task(scheduler._scheduler_loop())
+    try:
+        await wake(scheduler)
+        assert queued_task_ids(scheduler) == []
+
+        clock.now = T + 0.1
+        await wake(scheduler)
+        assert queued_task_ids(scheduler) == ["task"]
+
+        # Waking again before the next occurrence does not fire a second time
+        clock.now = T + 30
+        await wake(scheduler)
+        await wake(scheduler)
+        assert queued_task_ids(scheduler) == ["task"]
+
+        clock.now = T + 60.1
+        await wake(scheduler)
+        assert queued_task_ids(scheduler) == ["task", "task"]
+    finally:
+        loop.cancel()
+
+
+@pytest.mark.asyncio
+async def test_loop_applies_policy_after_outage(scheduler, clock):
+    await scheduler.add_task(make_task("skip", policy=MissedRunPolicy.SKIP))
+    await scheduler.add_task(make_task("once", policy=MissedRunPolicy.RUN_ONCE))
+    await scheduler.add_task(make_task("all", policy=MissedRunPolicy.RUN_ALL))
+    loop = asyncio.create_task(scheduler._scheduler_loop())
+    try:
+        await wake(scheduler)
+        # The loop is stalled past the first occurrence and two more
+        clock.now = T + 125
+        await wake(scheduler)
+        assert sorted(queued_task_ids(scheduler)) == ["all", "all", "all", "once"]
+        assert set(scheduler._next_fire_at.values()) == {T + 180}
+    finally:
+        loop.cancel()
+
+
+@pytest.mark.asyncio
+async def test_removed_task_does_not_fire(scheduler, clock):
+    await scheduler.add_task(make_task("kept"))
+    await scheduler.add_task(make_task("removed"))
+    loop = asyncio.create_task(scheduler._scheduler_loop())
+    try:
+        await wake(scheduler)
+        assert await scheduler.remove_task("removed")
+        assert not await scheduler.remove_task("removed")
+
+        clock.now = T + 0.1
+        await wake(scheduler)
+        assert queued_task_ids(scheduler) == ["kept"]
+        assert list(scheduler._next_fire_at) == ["kept"]
+    finally:
+        loop.cancel()
@@ -0,0 +1,113 @@
+from dataclasses import asdict
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from python_ai_services.services.calculation_service import CalculationService
+
+
+# calculate_market_correlation before the grouped matrix products, kept as the reference
+
+async def old_calculate_market_correlation(service: CalculationService, price_data):
+    symbols = list(price_data.keys())
+    correlation_matrix = {}
+    for symbol1 in symbols:
+        correlation_matrix[symbol1] = {}
+        for symbol2 in symbols:
+            if symbol1 == symbol2:
+                correlation_matrix[symbol1][symbol2] = 1.0
+            else:
+                correlation = service._calculate_correlation(price_data[symbol1], price_data[symbol2])
+                correlation_matrix[symbol1][symbol2] = round(correlation, 3)
+    return correlation_matrix
+
+
+def value_series(length: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return (1000 * np.cumprod(1 + rng.normal(0.001, 0.02, length))).tolist()
+
+
+# Mixed lengths, with series the single-portfolio path rejects mixed in
+MIXED_PORTFOLIOS = [
+    value_series(120, seed=0),
+    value_series(60, seed=1),
+    [],
+    value_series(120, seed=2),
+    [1000.0],
+    value_series(60, seed=3),
+    [0.0, 10.0, 20.0], # Zero starting value
+    [100.0, 110.0, 90.0],
+    [100.0, 90.0, 80.0, 70.0, 60.0, -10.0], # Negative value ratio
+]
+
+
+@pytest.fixture
+def service():
+    with patch("python_ai_services.services.calculation_service.DatabaseManager"):
+        return CalculationService()
+
+
+async def per_portfolio(service: CalculationService, portfolios):
+    return [await service.calculate_portfolio_performance([], values) for values in portfolios]
+
+
+def assert_same_metrics(batch, expected):
+    assert len(batch) == len(expected)
+    for row, (batch_metrics, expected_metrics) in enumerate(zip(batch, expected)):
+        # Both round to 2 decimals; summation order can tip a value across a rounding boundary
+        assert asdict(batch_metrics) == pytest.approx(asdict(expected_metrics), abs=0.011), row
+
+
+@pytest.mark.asyncio
+async def test_batch_performance_matches_per_portfolio_on_mixed_lengths(service):
+    batch = await service.calculate_portfolio_performance_batch(MIXED_PORTFOLIOS)
+
+    assert_same_metrics(batch, await per_portfolio(service, MIXED_PORTFOLIOS))
+    default = asdict(service._get_default_performance_metrics())
+    assert [asdict(metrics) == default for metrics in batch] == [False, False, True, False, True, False, True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_batch_performance_matches_per_portfolio_on_matrix(service):
+    values = np.array([value_series(250, seed) for seed in range(8)])
+
+    batch = await service.calculate_portfolio_performance_batch(values)
+
+    assert_same_metrics(batch, await per_portfolio(service, values.tolist()))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("portfolios", [[], np.empty((0, 5))])
+async def test_batch_performance_of_no_portfolios_is_empty(service, portfolios):
+    assert await service.calculate_portfolio_performance_batch(portfolios) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_performance_of_empty_portfolio_is_default(service):
+    batch = await service.calculate_portfolio_performance_batch([[]])
+
+    assert batch == [service._get_default_performance_metrics()]
+    assert batch == await per_portfolio(service, [[]])
+
+
+@pytest.mark.asyncio
+async def test_market_correlation_matches_pairwise_on_mixed_lengths(service):
+    price_data = {f"SYM{i}": values for i, values in enumerate(MIXED_PORTFOLIOS)}
+    price_data["FLAT"] = [5.0] * 120
+    price_data["MIRROR"] = [-value for value in MIXED_PORTFOLIOS[0]]
+
+    correlations = await service.calculate_market_correlation(price_data)
+
+    expected = await old_calculate_market_correlation(service, price_data)
+    assert list(correlations) == list(expected)
+    for symbol, row in expected.items():
+        assert correlations[symbol] == pytest.approx(row, abs=0.0011), symbol
+    assert correlations["SYM0"]["MIRROR"] == -1.0
+    assert correlations["SYM0"]["SYM1"] == 0.0 # Different lengths are not compared
+
+
+@pytest.mark.asyncio
+async def test_market_correlation_of_empty_market_is_empty(service):
+    assert await service.calculate_market_correlation({}) == {}
+    assert await service.calculate_market_correlation({"ONLY": []}) == {"ONLY": {"ONLY": 1.0}}
@@ -0,0 +1,423 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from python_ai_services.services import enhanced_event_propagation
+from python_ai_services.services.enhanced_event_propagation import (
+    EnhancedEventPropagation, Event, EventPersistenceMode, EventPriority, EventScope, EventType,
+    EventWriteBehindQueue, event_row
+)
+
+
+def linear_matches(propagation: EnhancedEventPropagation, event: Event):
+    """The pre-index matcher: every filter checked against every subscription"""
+    matching = []
+    for subscription in propagation.subscriptions.values():
+        if not subscription.is_active or event.event_type not in subscription.event_types:
+            continue
+        if subscription.priority_filter and event.priority != subscription.priority_filter:
+            continue
+        if subscription.scope_filter and event.scope != subscription.scope_filter:
+            continue
+        if event.target_service and event.target_service != subscription.subscriber_service:
+            continue
+        if subscription.data_filter and any(
+            key not in event.data or event.data[key] != value for key, value in subscription.data_filter.items()
+        ):
+            continue
+        matching.append(subscription)
+    return matching
+
+
+def make_event(event_type, data, scope=EventScope.SERVICE, priority=EventPriority.MEDIUM, target_service=None):
+    return Event(
+        event_id=str(uuid.uuid4()), event_type=event_type, source_service="test", target_service=target_service,
+        priority=priority, scope=scope, timestamp=datetime.now(timezone.utc), data=data, metadata={}
+    )
+
+
+SYMBOLS = ["AAPL", "MSFT", "BTC", ["BTC"], None]
+VENUES = ["nyse", "nasdaq", {"name": "nyse"}]
+
+
+def random_data_filter(rng):
+    roll = rng.random()
+    if roll < 0.2:
+        return None
+    if roll < 0.6:
+        return {"symbol": rng.choice(SYMBOLS)}
+    if roll < 0.8:
+        return {"symbol": rng.choice(SYMBOLS), "venue": rng.choice(VENUES)}
+    return {"venue": rng.choice(VENUES), "side": rng.choice(["buy", "sell"])}
+
+
+def random_event_data(rng):
+    data = {}
+    for key, values in (("symbol", SYMBOLS), ("venue", VENUES), ("side", ["buy", "sell"])):
+        if rng.random() < 0.8:
+            data[key] = rng.choice(values)
+    return data
+
+
+@pytest.fixture
+def propagation():
+    return EnhancedEventPropagation()
+
+
+@pytest.mark.asyncio
+async def test_index_matches_linear_scan(propagation):
+    rng = random.Random(3)
+    event_types = list(EventType)
+    services = [f"service_{i}" for i in range(6)]
+
+    def handler(event):
+        pass
+
+    async def async_handler(event):
+        pass
+
+    for _ in range(400):
+        subscription_id = await propagation.subscribe(
+            subscriber_service=rng.choice(services),
+            event_types=rng.sample(event_types, rng.randint(1, 3)),
+            handler=async_handler if rng.random() < 0.5 else handler,
+            priority_filter=rng.choice(list(EventPriority)) if rng.random() < 0.2 else None,
+            scope_filter=rng.choice(list(EventScope)) if rng.random() < 0.4 else None,
+            data_filter=random_data_filter(rng)
+        )
+        if rng.random() < 0.05:
+            propagation.subscriptions[subscription_id].is_active = False
+
+    matched = 0
+    for _ in range(3000):
+        event = make_event(
+            rng.choice(event_types), random_event_data(rng), scope=rng.choice(list(EventScope)),
+            priority=rng.choice(list(EventPriority)),
+            target_service=rng.choice(services) if rng.random() < 0.3 else None
+        )
+        expected = linear_matches(propagation, event)
+        assert propagation._find_matching_subscriptions(event) == expected
+        matched += len(expected)
+    assert matched > 0
+
+
+@pytest.mark.asyncio
+async def test_route_cache_follows_subscription_changes(propagation):
+    def handler(event):
+        pass
+
+    event = make_event(EventType.AGENT_DECISION_MADE, {"symbol": "AAPL", "venue": "nyse"})
+    first = await propagation.subscribe("a", [event.event_type], handler, data_filter={"symbol": "AAPL"})
+    assert [s.subscription_id for s in propagation._find_matching_subscriptions(event)] == [first]
+    assert propagation._route_cache
+
+    second = await propagation.subscribe("b", [event.event_type], handler,
+                                         data_filter={"venue": "nyse", "symbol": "AAPL"})
+    unkeyed = await propagation.subscribe("c", [event.event_type], handler)
+    assert [s.subscription_id for s in propagation._find_matching_subscriptions(event)] == [first, second, unkeyed]
+
+    assert await propagation.unsubscribe(first)
+    assert [s.subscription_id for s in propagation._find_matching_subscriptions(event)] == [second, unkeyed]
+
+    # Targeted events only reach the target service's subscriptions
+    targeted = make_event(event.event_type, event.data, target_service="c")
+    assert [s.subscription_id for s in propagation._find_matching_subscriptions(targeted)] == [unkeyed]
+    assert propagation._find_matching_subscriptions(event) == linear_matches(propagation, event)
+
+
+@pytest.mark.asyncio
+async def test_unhashable_filter_and_event_values(propagation):
+    def handler(event):
+        pass
+
+    event_type = EventType.AGENT_DECISION_MADE
+    listed = await propagation.subscribe("a", [event_type], handler, data_filter={"symbol": ["BTC", "ETH"]})
+    keyed = await propagation.subscribe("b", [event_type], handler, data_filter={"symbol": "BTC"})
+
+    def matches(data):
+        return [s.subscription_id for s in propagation._find_matching_subscriptions(make_event(event_type, data))]
+
+    assert matches({"symbol": ["BTC", "ETH"]}) == [listed]
+    assert matches({"symbol": "BTC"}) == [keyed]
+    assert matches({"symbol": {"nested": True}}) == []
+    assert matches({}) == []
+
+
+@pytest.mark.asyncio
+async def test_handlers_run_in_subscription_order(propagation):
+    log = []
+    event_type = EventType.AGENT_DECISION_MADE
+
+    def sync_handler(name):
+        def handle(event):
+            log.append(f"{name} sync")
+        return handle
+
+    def async_handler(name, delay):
+        async def handle(event):
+            log.append(f"{name} start")
+            await asyncio.sleep(delay)
+            log.append(f"{name} end")
+        return handle
+
+    await propagation.subscribe("s", [event_type], async_handler("a1", 0.02))
+    await propagation.subscribe("s", [event_type], async_handler("a2", 0.01))
+    await propagation.subscribe("s", [event_type], sync_handler("s1"))
+    await propagation.subscribe("s", [event_type], async_handler("a3", 0))
+    await propagation.subscribe("s", [event_type], sync_handler("s2"))
+
+    await propagation._deliver_event(make_event(event_type, {}))
+
+    # Async handlers between two sync ones overlap, but none crosses a sync handler
+    assert log[:2] == ["a1 start", "a2 start"]
+    assert set(log[2:4]) == {"a1 end", "a2 end"}
+    assert log[4:] == ["s1 sync", "a3 start", "a3 end", "s2 sync"]
+    assert propagation.event_metrics["events_delivered"] == 5
+
+
+class FakeEventStore:
+    """write_rows stand-in that records each batch and can be told to fail"""
+
+    def __init__(self, fail_calls=0, poison_ids=()):
+        self.batches = []
+        self.fail_calls = fail_calls
+        self.poison_ids = set(poison_ids)
+
+    async def __call__(self, rows):
+        if self.fail_calls:
+            self.fail_calls -= 1
+            raise ConnectionError("database unavailable")
+        if any(row[0] in self.poison_ids for row in rows):
+            raise ValueError("row rejected")
+        self.batches.append([row[0] for row in rows])
+
+    @property
+    def written(self):
+        return [event_id for batch in self.batches for event_id in batch]
+
+
+class FakeMonotonic:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeMonotonic()
+    monkeypatch.setattr(enhanced_event_propagation.time, "monotonic", fake)
+    return fake
+
+
+def make_queue(tmp_path, store, **options):
+    return EventWriteBehindQueue(store, spill_path=str(tmp_path / "spill.jsonl"), **options)
+
+
+def events(count):
+    return [make_event(EventType.AGENT_DECISION_MADE, {"i": i}) for i in range(count)]
+
+
+def spill_ids(path):
+    with open(path) as spill_file:
+        return [json.loads(line)["row"][0] for line in spill_file]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_full_batches_immediately(tmp_path):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_batch_size=3, flush_interval=60)
+    runner = asyncio.create_task(queue.run())
+    try:
+        batch = events(4)
+        for event in batch[:3]:
+            queue.put(event)
+        await asyncio.sleep(0.05)
+        assert store.batches == [[event.event_id for event in batch[:3]]]
+
+        queue.put(batch[3])
+        await asyncio.sleep(0.05)
+        assert len(store.batches) == 1 and len(queue.pending) == 1
+    finally:
+        runner.cancel()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_partial_batch_after_interval(tmp_path):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_batch_size=100, flush_interval=0.05)
+    runner = asyncio.create_task(queue.run())
+    try:
+        event = events(1)[0]
+        queue.put(event)
+        assert store.batches == []
+        await asyncio.sleep(0.2)
+        assert store.batches == [[event.event_id]]
+    finally:
+        runner.cancel()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_overflow_spills_and_replays(tmp_path, clock):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_batch_size=2, max_pending=2)
+    batch = events(5)
+    for event in batch:
+        queue.put(event)
+    await queue._io_idle()
+
+    assert len(queue.pending) == 2 and queue.stats["spilled"] == 3
+    assert spill_ids(queue.spill_path) == [event.event_id for event in batch[2:]]
+
+    await queue.flush()
+    assert store.written == [event.event_id for event in batch]
+    assert not os.path.exists(queue.spill_path) and not os.path.exists(queue.replay_path)
+    assert queue.get_stats()["spill_bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_write_behind_failed_batch_is_replayed_exactly_once(tmp_path, clock):
+    store = FakeEventStore(fail_calls=1)
+    queue = make_queue(tmp_path, store, max_batch_size=2)
+    batch = events(4)
+    for event in batch:
+        queue.put(event)
+
+    await queue.flush()
+    assert store.written == []
+    assert spill_ids(queue.spill_path) == [event.event_id for event in batch[:2]]
+    assert len(queue.pending) == 2
+
+    await queue.flush()
+    await queue.flush()
+    assert sorted(store.written) == sorted(event.event_id for event in batch)
+    assert len(store.written) == len(set(store.written))
+    assert queue.stats["replayed"] == 2 and not queue._has_spill()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_finishes_interrupted_replay_first(tmp_path, clock):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_batch_size=10)
+    interrupted, spilled = events(2), events(1)
+    enhanced_event_propagation._append_lines(
+        queue.replay_path, enhanced_event_propagation._spill_lines([event_row(e) for e in interrupted], 1)
+    )
+    await queue._spill([event_row(e) for e in spilled])
+
+    await queue.flush()
+    assert store.batches == [[e.event_id for e in interrupted], [e.event_id for e in spilled]]
+    assert not queue._has_spill()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_backs_off_then_dead_letters_a_failing_batch(tmp_path, clock):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_batch_size=1, flush_interval=1.0, max_attempts=3)
+    poison, *good = events(3)
+    store.poison_ids.add(poison.event_id)
+    await queue._spill([event_row(e) for e in [poison] + good])
+
+    await queue.flush()
+    assert store.written == [] and queue._replay_delay == 1.0
+
+    # No replay until the backoff has passed
+    await queue.flush()
+    assert queue.stats["failed_batches"] == 1
+    clock.now += 1.0
+    await queue.flush()
+    assert queue.stats["failed_batches"] == 2 and queue._replay_delay == 2.0
+
+    clock.now += 2.0
+    await queue.flush()
+    assert store.written == [e.event_id for e in good]
+    assert queue.stats["dead_lettered"] == 1 and not queue._has_spill()
+    with open(queue.dead_letter_path) as dead_letter_file:
+        records = [json.loads(line) for line in dead_letter_file]
+    assert [(record["attempts"], record["row"][0]) for record in records] == [(3, poison.event_id)]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_skips_torn_spill_line(tmp_path, clock):
+    store = FakeEventStore()
+    queue = make_queue(tmp_path, store, max_pending=0)
+    before, after = events(2)
+    await queue._spill([event_row(before)])
+    with open(queue.spill_path, "a") as spill_file:
+        spill_file.write('{"attempts": 0, "row": ["torn')  # Crash mid-write
+
+    queue.put(after)  # Spills past the torn line onto a fresh one
+    await queue.flush()
+
+    assert store.written == [before.event_id, after.event_id]
+    assert queue.stats["corrupt_lines"] == 1 and not queue._has_spill()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_file_io_runs_off_the_event_loop(tmp_path, clock, monkeypatch):
+    store = FakeEventStore(fail_calls=1)
+    queue = make_queue(tmp_path, store, max_batch_size=1, max_pending=1)
+    io_threads = []
+    append_lines = enhanced_event_propagation._append_lines
+    def recording_append(path, lines):
+        io_threads.append(threading.get_ident())
+        append_lines(path, lines)
+    monkeypatch.setattr(enhanced_event_propagation, "_append_lines", recording_append)
+
+    for event in events(3):
+        queue.put(event)  # Two past max_pending spill without touching the disk here
+    await queue.flush()  # The first batch fails and is spilled as well
+    clock.now += queue._replay_delay
+    await queue.flush()
+
+    assert len(store.written) == 3 and not queue._has_spill()
+    assert io_threads and threading.get_ident() not in io_threads
+    queue.close()
+
+
+def test_spill_path_is_per_process_unless_given_an_instance(tmp_path, monkeypatch):
+    monkeypatch.setenv("EVENT_SPILL_DIR", str(tmp_path))
+    monkeypatch.delenv("EVENT_SPILL_INSTANCE", raising=False)
+    assert enhanced_event_propagation.default_spill_path() == str(tmp_path / f"enhanced_event_spill.{os.getpid()}.jsonl")
+
+    monkeypatch.setenv("EVENT_SPILL_INSTANCE", "worker-2")
+    assert EnhancedEventPropagation().event_store.spill_path == str(tmp_path / "enhanced_event_spill.worker-2.jsonl")
+    assert EnhancedEventPropagation(spill_path=str(tmp_path / "own.jsonl")).event_store.spill_path == str(tmp_path / "own.jsonl")
+
+
+def test_persistence_mode_comes_from_argument_or_environment(monkeypatch):
+    monkeypatch.delenv("EVENT_PERSISTENCE_MODE", raising=False)
+    assert EnhancedEventPropagation().persistence_mode == EventPersistenceMode.ASYNC
+
+    monkeypatch.setenv("EVENT_PERSISTENCE_MODE", "sync")
+    assert EnhancedEventPropagation().persistence_mode == EventPersistenceMode.SYNC
+    assert EnhancedEventPropagation(persistence_mode=EventPersistenceMode.OFF).persistence_mode == EventPersistenceMode.OFF
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", list(EventPersistenceMode))
+async def test_publish_persistence_modes(tmp_path, mode):
+    propagation = EnhancedEventPropagation()
+    propagation.db_service = MagicMock()
+    propagation.db_service.execute_query = AsyncMock()
+    propagation.event_store.spill_path = str(tmp_path / "spill.jsonl")
+    propagation.persistence_mode = mode
+
+    event_id = await propagation.publish_event(EventType.AGENT_DECISION_MADE, {"symbol": "AAPL"}, "test")
+
+    if mode == EventPersistenceMode.SYNC:
+        propagation.db_service.execute_query.assert_awaited_once()
+        assert event_id in propagation.db_service.execute_query.await_args.args
+    else:
+        propagation.db_service.execute_query.assert_not_awaited()
+    assert [event.event_id for event in propagation.event_store.pending] == (
+        [event_id] if mode == EventPersistenceMode.ASYNC else []
+    )
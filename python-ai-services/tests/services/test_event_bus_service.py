@@ -169,3 +169,100 @@ async def test_publish_with_non_async_subscriber_is_skipped(event_bus: EventBusS
         args, _ = mock_log_error.call_args
         assert "is not an async function as expected. Skipping." in args[0]
 
+
+# --- Tests for queued mode ---
+@pytest_asyncio.fixture
+async def queued_bus():
+    bus = EventBusService(queued=True, queue_size=3)
+    yield bus
+    await bus.shutdown(drain_timeout=1.0)
+
+@pytest.mark.asyncio
+async def test_queued_publish_does_not_wait_for_slow_subscriber(queued_bus: EventBusService):
+    release = asyncio.Event()
+    received = []
+
+    async def slow_callback(event: Event):
+        await release.wait()
+        received.append(event.event_id)
+
+    await queued_bus.subscribe("NewFillRecordedEvent", slow_callback)
+    event = Event(publisher_agent_id="agent_q", message_type="NewFillRecordedEvent", payload={})
+    await asyncio.wait_for(queued_bus.publish(event), timeout=0.5)
+    assert received == []
+
+    release.set()
+    await queued_bus.shutdown(drain_timeout=1.0)
+    assert received == [event.event_id]
+    stats = queued_bus.get_latency_stats()["NewFillRecordedEvent"]
+    assert stats["publish"]["count"] == 1
+    assert stats["deliver"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_queued_delivery_prefers_higher_lanes(queued_bus: EventBusService):
+    received = []
+    gate = asyncio.Event()
+
+    async def record(event: Event):
+        await gate.wait()
+        received.append(event.message_type)
+
+    for event_type in ("MarketInsightEvent", "RiskAlertEvent", "TradeSignalEvent"):
+        await queued_bus.subscribe(event_type, record, queue_size=10)
+
+    await queued_bus.publish(Event(publisher_agent_id="a", message_type="MarketInsightEvent", payload={}))
+    await asyncio.sleep(0)  # The worker takes the first event and waits on the gate
+    for event_type in ("MarketInsightEvent", "TradeSignalEvent", "RiskAlertEvent"):
+        await queued_bus.publish(Event(publisher_agent_id="a", message_type=event_type, payload={}))
+    gate.set()
+    await queued_bus.shutdown(drain_timeout=1.0)
+
+    assert received == ["MarketInsightEvent", "RiskAlertEvent", "TradeSignalEvent", "MarketInsightEvent"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy, expected", [
+    ("drop_newest", [0, 1, 2, 3]),
+    ("drop_oldest", [0, 3, 4, 5]),
+])
+async def test_queued_overflow_policies(policy: str, expected: list):
+    bus = EventBusService(queued=True, queue_size=3, overflow_policy=policy)
+    gate = asyncio.Event()
+    received = []
+
+    async def record(event: Event):
+        await gate.wait()
+        received.append(event.payload["n"])
+
+    await bus.subscribe("Tick", record)
+    await bus.publish(Event(publisher_agent_id="a", message_type="Tick", payload={"n": 0}))
+    await asyncio.sleep(0)  # Event 0 is in flight, so the queue holds the next three
+    for n in range(1, 6):
+        await bus.publish(Event(publisher_agent_id="a", message_type="Tick", payload={"n": n}))
+    gate.set()
+    await bus.shutdown(drain_timeout=1.0)
+
+    assert received == expected
+    assert bus.get_queue_stats()[0]["dropped"] == 2
+
+@pytest.mark.asyncio
+async def test_queued_block_policy_applies_backpressure():
+    bus = EventBusService(queued=True, queue_size=1, overflow_policy="block")
+    gate = asyncio.Event()
+    received = []
+
+    async def record(event: Event):
+        await gate.wait()
+        received.append(event.payload["n"])
+
+    await bus.subscribe("Tick", record)
+    await bus.publish(Event(publisher_agent_id="a", message_type="Tick", payload={"n": 0}))
+    await asyncio.sleep(0)
+    await bus.publish(Event(publisher_agent_id="a", message_type="Tick", payload={"n": 1}))
+    blocked = asyncio.create_task(bus.publish(Event(publisher_agent_id="a", message_type="Tick", payload={"n": 2})))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    gate.set()
+    await asyncio.wait_for(blocked, timeout=1.0)
+    await bus.shutdown(drain_timeout=1.0)
+    assert received == [0, 1, 2]
@@ -2,10 +2,19 @@ import pytest
 import pytest_asyncio
 from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 import math
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-from python_ai_services.services.performance_calculation_service import PerformanceCalculationService
+from python_ai_services.core.database import Base
+from python_ai_services.services.performance_calculation_service import PerformanceCalculationService, PerformanceAccumulator
 from python_ai_services.services.trading_data_service import TradingDataService
+from python_ai_services.services.trade_history_service import TradeHistoryService
+from python_ai_services.models.trade_history_models import TradeFillData
 from python_ai_services.models.dashboard_models import TradeLogItem
 from python_ai_services.models.performance_models import PerformanceMetrics
 
@@ -20,14 +29,14 @@ def performance_service(mock_trading_data_service: TradingDataService) -> Perfor
 def create_mock_trade(pnl: Optional[float], timestamp_offset_days: int, asset: str = "TEST_ASSET") -> TradeLogItem:
     return TradeLogItem(
         trade_id=str(uuid.uuid4()),
-        timestamp=datetime.now(timezone.utc) - timedelta(days=timestamp_offset_days),
+        exit_timestamp=datetime.now(timezone.utc) - timedelta(days=timestamp_offset_days),
         agent_id="test_agent",
         asset=asset,
-        side="buy",
+        opening_side="buy",
         order_type="market",
         quantity=1.0,
-        price=100.0,
-        total_value=100.0,
+        entry_price_avg=100.0,
+        exit_price_avg=100.0 + (pnl or 0.0),
         realized_pnl=pnl
     )
 
@@ -37,7 +46,7 @@ async def test_calculate_performance_no_trades(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_no_trades"
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=[])
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=[])
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
@@ -46,7 +55,7 @@ async def test_calculate_performance_no_trades(
     assert metrics.total_trades == 0
     assert metrics.total_net_pnl == 0.0
     assert "No trade history available" in metrics.notes
-    mock_trading_data_service.get_trade_history.assert_called_once_with(agent_id, limit=10000)
+    mock_trading_data_service.get_trade_history_since.assert_called_once_with(agent_id, after=None, limit=5000)
 
 @pytest.mark.asyncio
 async def test_calculate_performance_failed_to_fetch_trades(
@@ -54,7 +63,7 @@ async def test_calculate_performance_failed_to_fetch_trades(
     mock_trading_data_service: MagicMock
 ):
     agent_id = "agent_fetch_fail"
-    mock_trading_data_service.get_trade_history = AsyncMock(side_effect=Exception("DB Error"))
+    mock_trading_data_service.get_trade_history_since = AsyncMock(side_effect=Exception("DB Error"))
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
     assert metrics.agent_id == agent_id
@@ -74,7 +83,7 @@ async def test_calculate_performance_with_pnl_data(
         create_mock_trade(pnl=0.0, timestamp_offset_days=1),  # Neutral
         create_mock_trade(pnl=None, timestamp_offset_days=0, asset="MOCK_COIN") # PnL missing
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=trades)
 
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
@@ -86,8 +95,8 @@ async def test_calculate_performance_with_pnl_data(
     assert math.isclose(metrics.gross_profit, 25.0)  # 10 + 15
     assert math.isclose(metrics.gross_loss, 5.0)    # abs(-5)
 
-    assert metrics.data_start_time == trades[0].timestamp
-    assert metrics.data_end_time == trades[-1].timestamp # latest trade
+    assert metrics.data_start_time == trades[0].exit_timestamp
+    assert metrics.data_end_time == trades[-1].exit_timestamp # latest trade
 
     # Win rate = winning / (winning + losing)
     assert math.isclose(metrics.win_rate, 2 / 3)
@@ -112,7 +121,7 @@ async def test_calculate_performance_all_wins(
         create_mock_trade(pnl=10.0, timestamp_offset_days=1),
         create_mock_trade(pnl=20.0, timestamp_offset_days=0)
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=trades)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.winning_trades == 2
@@ -132,7 +141,7 @@ async def test_calculate_performance_all_losses(
         create_mock_trade(pnl=-10.0, timestamp_offset_days=1),
         create_mock_trade(pnl=-20.0, timestamp_offset_days=0)
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=trades)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.winning_trades == 0
@@ -152,7 +161,7 @@ async def test_calculate_performance_no_pnl_data(
         create_mock_trade(pnl=None, timestamp_offset_days=1),
         create_mock_trade(pnl=None, timestamp_offset_days=0)
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=trades)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.total_trades == 2
@@ -177,7 +186,7 @@ async def test_calculate_performance_invalid_pnl_values(
         create_mock_trade(pnl=float('inf'), timestamp_offset_days=0),
         create_mock_trade(pnl=10.0, timestamp_offset_days=2) # One valid trade
     ]
-    mock_trading_data_service.get_trade_history = AsyncMock(return_value=trades)
+    mock_trading_data_service.get_trade_history_since = AsyncMock(return_value=trades)
     metrics = await performance_service.calculate_performance_metrics(agent_id)
 
     assert metrics.total_trades == 3
@@ -187,5 +196,106 @@ async def test_calculate_performance_invalid_pnl_values(
     assert math.isclose(metrics.total_net_pnl, 10.0)
 
 
+@pytest.mark.asyncio
+async def test_calculate_performance_reads_history_in_chunks_and_resumes_from_checkpoint(
+    mock_trading_data_service: MagicMock
+):
+    agent_id = "agent_chunked"
+    trades = [create_mock_trade(pnl=float(pnl), timestamp_offset_days=10 - i) for i, pnl in enumerate([5, -3, 8, -6, 2])]
+    new_trade = create_mock_trade(pnl=-1.0, timestamp_offset_days=0)
+    history = trades + [new_trade]
+    visible = len(trades)
+
+    async def trades_since(agent, after=None, limit=1000):
+        ordered = history[:visible]
+        start = 0 if after is None else next(i for i, t in enumerate(ordered) if (t.exit_timestamp, t.trade_id) == after) + 1
+        return ordered[start:start + limit]
+    mock_trading_data_service.get_trade_history_since = AsyncMock(side_effect=trades_since)
+    service = PerformanceCalculationService(trading_data_service=mock_trading_data_service, chunk_size=2)
+
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 5
+    assert math.isclose(metrics.total_net_pnl, 6.0)
+    assert mock_trading_data_service.get_trade_history_since.call_count == 3 # 2 + 2 + 1
+
+    visible = len(history)
+    mock_trading_data_service.get_trade_history_since.reset_mock()
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 6
+    assert math.isclose(metrics.total_net_pnl, 5.0)
+    mock_trading_data_service.get_trade_history_since.assert_called_once_with(
+        agent_id, after=(trades[-1].exit_timestamp, trades[-1].trade_id), limit=2
+    )
+
+@pytest.mark.asyncio
+async def test_backdated_fill_resets_checkpoint():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    trade_history_service = TradeHistoryService(session_factory=sessionmaker(bind=engine))
+    trading_data_service = TradingDataService(
+        agent_service=MagicMock(), trade_history_service=trade_history_service, order_history_service=MagicMock()
+    )
+    service = PerformanceCalculationService(trading_data_service=trading_data_service)
+    agent_id = "agent_backdated"
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    async def record(side: str, price: float, minutes: int):
+        await trade_history_service.record_fill(TradeFillData(
+            agent_id=agent_id, timestamp=start + timedelta(minutes=minutes),
+            asset="BTC/USD", side=side, quantity=1.0, price=price, fee=0.0
+        ))
+
+    await record("buy", 50000.0, 10)
+    await record("sell", 51000.0, 20)
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 1
+    assert math.isclose(metrics.total_net_pnl, 1000.0)
+
+    # An older buy arrives late and the ledger replays: the closed trade is rewritten behind
+    # the checkpoint's (exit_timestamp, trade_id) cursor with the same exit timestamp
+    await record("buy", 40000.0, 0)
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 1
+    assert math.isclose(metrics.total_net_pnl, 11000.0)
+
+    await trade_history_service.rebuild_ledger(agent_id)
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 1
+    assert math.isclose(metrics.total_net_pnl, 11000.0)
+
+    # Another worker's replay is seen through the revision stored with the ledger
+    other_worker = TradeHistoryService(session_factory=sessionmaker(bind=engine))
+    await other_worker.record_fill(TradeFillData(
+        agent_id=agent_id, timestamp=start - timedelta(minutes=5),
+        asset="BTC/USD", side="buy", quantity=1.0, price=30000.0, fee=0.0
+    ))
+    metrics = await service.calculate_performance_metrics(agent_id)
+    assert metrics.total_trades == 1
+    assert math.isclose(metrics.total_net_pnl, 21000.0)
+    await other_worker.cleanup()
+    await trade_history_service.cleanup()
+
+def test_performance_accumulator_drawdown_and_sharpe_match_full_pass():
+    pnls = [5.0, -3.0, 8.0, -6.0, -4.0, 2.0, 7.0]
+    trades = [create_mock_trade(pnl=pnl, timestamp_offset_days=len(pnls) - i) for i, pnl in enumerate(pnls)]
+
+    single_pass = PerformanceAccumulator(initial_equity=100.0)
+    single_pass.update_many(trades)
+    chunked = PerformanceAccumulator(initial_equity=100.0)
+    for start in range(0, len(trades), 3):
+        chunked.update_many(trades[start:start + 3])
+
+    metrics = chunked.to_metrics("agent")
+    assert metrics == single_pass.to_metrics("agent").copy(update={"calculation_timestamp": metrics.calculation_timestamp})
+    # Cumulative PnL 5, 2, 10, 4, 0, 2, 9: the worst fall is from 10 to 0
+    assert math.isclose(metrics.max_drawdown_amount, 10.0)
+    assert math.isclose(metrics.max_drawdown_percentage, 10.0 / 110.0 * 100)
+
+    duration_years = (trades[-1].exit_timestamp - trades[0].exit_timestamp).total_seconds() / (365.25 * 86400)
+    expected_sharpe = np.mean(pnls) / np.std(pnls, ddof=1) * math.sqrt(len(pnls) / duration_years)
+    assert math.isclose(metrics.annualized_sharpe_ratio, expected_sharpe)
+
+
 # Need uuid for helper
 import uuid
+import numpy as np
@@ -0,0 +1,155 @@
+import random
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from python_ai_services.services.realtime_price_aggregator import (
+    RealtimePriceAggregator, PriceUpdate, PairAggregate
+)
+from python_ai_services.services.universal_dex_aggregator import Chain, DEXProtocol
+
+
+DEXES = [DEXProtocol.UNISWAP_V3, DEXProtocol.JUPITER, DEXProtocol.HYPERLIQUID_PERP]
+
+
+def make_update(dex: DEXProtocol, price: str, volume: str = "10", liquidity: str = "1000",
+                bid: str = None, ask: str = None, pair: str = "ETH/USDT") -> PriceUpdate:
+    return PriceUpdate(
+        dex_protocol=dex,
+        chain=Chain.ETHEREUM,
+        token_pair=pair,
+        price=Decimal(price),
+        volume_24h=Decimal(volume),
+        liquidity=Decimal(liquidity),
+        timestamp=datetime.now(timezone.utc),
+        bid=Decimal(bid) if bid else None,
+        ask=Decimal(ask) if ask else None
+    )
+
+
+def reference_aggregate(updates):
+    """Full rescan, as the aggregator computed it before running aggregates"""
+    bids = [u.bid for u in updates if u.bid]
+    asks = [u.ask for u in updates if u.ask]
+    total_volume = sum((u.volume_24h for u in updates), Decimal(0))
+    best_bid = max(bids) if bids else Decimal(0)
+    best_ask = min(asks) if asks else Decimal(0)
+    if best_bid and best_ask:
+        mid = (best_bid + best_ask) / 2
+    else:
+        mid = sum(u.price for u in updates) / len(updates)
+    vwap = sum(u.price * u.volume_24h for u in updates) / total_volume if total_volume > 0 else mid
+    return {
+        "best_bid": best_bid, "best_ask": best_ask, "mid_price": mid, "volume_weighted_price": vwap,
+        "total_volume": total_volume,
+        "total_liquidity": sum((u.liquidity for u in updates), Decimal(0)),
+    }
+
+
+@pytest.fixture
+def aggregator() -> RealtimePriceAggregator:
+    return RealtimePriceAggregator(alchemy_api_key="test")
+
+
+def test_incremental_aggregates_match_full_rescan(aggregator: RealtimePriceAggregator):
+    rng = random.Random(3)
+    latest = {}
+    for _ in range(3000):
+        dex = rng.choice(DEXES)
+        price = Decimal(rng.randint(190_000, 210_000)) / 100
+        with_book = rng.random() < 0.8
+        update = make_update(
+            dex, str(price), volume=str(rng.randint(0, 500)), liquidity=str(rng.randint(0, 10_000)),
+            bid=str(price - Decimal("0.5")) if with_book else None,
+            ask=str(price + Decimal("0.5")) if with_book else None
+        )
+        aggregator._handle_price_update(update)
+        latest[dex.value] = update
+
+        aggregated = aggregator.get_price("ETH/USDT")
+        expected = reference_aggregate(list(latest.values()))
+        for field, value in expected.items():
+            assert getattr(aggregated, field) == value, field
+        assert aggregated.price_sources == len(latest)
+        assert dict(aggregated.price_by_dex) == latest
+
+
+def test_best_bid_recovers_when_best_source_worsens():
+    aggregate = PairAggregate("BTC/USD")
+    aggregate.apply("a", make_update(DEXES[0], "100", bid="99", ask="101"))
+    aggregate.apply("b", make_update(DEXES[1], "105", bid="104", ask="106"))
+    assert aggregate.snapshot().best_bid == Decimal("104")
+
+    aggregate.apply("b", make_update(DEXES[1], "95", bid="94", ask="96"))
+    snapshot = aggregate.snapshot()
+    assert (snapshot.best_bid, snapshot.best_ask) == (Decimal("99"), Decimal("96"))
+
+
+def test_snapshots_are_cached_and_immutable(aggregator: RealtimePriceAggregator):
+    first_update = make_update(DEXES[0], "2000", bid="1999", ask="2001")
+    aggregator._handle_price_update(first_update)
+    snapshot = aggregator.get_price("ETH/USDT")
+    assert aggregator.get_price("ETH/USDT") is snapshot  # No recomputation without an update
+    assert snapshot.dex_prices == ((DEXES[0].value, first_update),)
+    snapshot.price_by_dex["other"] = first_update  # A reader's dict is its own copy
+    assert snapshot.price_sources == len(snapshot.price_by_dex) == 1
+
+    aggregator._handle_price_update(make_update(DEXES[0], "2100", bid="2099", ask="2101"))
+    aggregator._handle_price_update(make_update(DEXES[1], "2050"))
+
+    # The earlier snapshot still describes the state it was taken from
+    assert dict(snapshot.price_by_dex) == {DEXES[0].value: first_update}
+    assert snapshot.best_bid == Decimal("1999")
+    assert aggregator.get_price("ETH/USDT").price_sources == 2
+
+
+def test_snapshot_converts_to_dict(aggregator: RealtimePriceAggregator):
+    update = make_update(DEXES[0], "2000", bid="1999", ask="2001")
+    aggregator._handle_price_update(update)
+
+    as_dict = asdict(aggregator.get_price("ETH/USDT"))
+
+    assert as_dict["dex_prices"] == ((DEXES[0].value, asdict(update)),)
+    assert as_dict["best_bid"] == Decimal("1999")
+
+
+def test_subscribers_receive_aggregates(aggregator: RealtimePriceAggregator):
+    received = []
+    aggregator.subscribe("ETH/USDT", received.append)
+    aggregator._handle_price_update(make_update(DEXES[0], "2000"))
+    aggregator._handle_price_update(make_update(DEXES[0], "2000", pair="SOL/USDT"))
+
+    assert [a.token_pair for a in received] == ["ETH/USDT"]
+    assert received[0].mid_price == Decimal("2000")
+
+
+def test_stale_sources_reported_once_until_they_update(aggregator: RealtimePriceAggregator, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    aggregator._handle_price_update(make_update(DEXES[0], "2000"))
+    clock[0] += 30
+    aggregator._handle_price_update(make_update(DEXES[1], "2001"))
+
+    clock[0] += 31  # First source is 61s old, second 31s
+    assert aggregator._detect_stale_prices() == [("ETH/USDT", DEXES[0].value)]
+    assert aggregator._detect_stale_prices() == []
+
+    aggregator._handle_price_update(make_update(DEXES[0], "2002"))
+    assert aggregator.stale_sources == set()
+    clock[0] += 30
+    assert aggregator._detect_stale_prices() == [("ETH/USDT", DEXES[1].value)]
+
+
+def test_performance_metrics_use_streaming_histogram(aggregator: RealtimePriceAggregator):
+    assert aggregator.get_performance_metrics()["total_updates"] == 0
+    for i in range(2500):
+        aggregator._handle_price_update(make_update(DEXES[i % 3], "2000"))
+
+    metrics = aggregator.get_performance_metrics()
+    assert metrics["total_updates"] == 2500  # Not capped at a sample window
+    assert 0 < metrics["p50_latency_ms"] <= metrics["p99_latency_ms"] <= metrics["max_latency_ms"]
+    assert metrics["tracked_pairs"] == 1
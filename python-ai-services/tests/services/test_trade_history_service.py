@@ -2,11 +2,13 @@ import pytest
 import pytest_asyncio
 from datetime import datetime, timezone, timedelta
 import uuid
-from typing import List, Callable
+import random
+from typing import List, Callable, Dict, Optional
 
 # SQLAlchemy imports for testing with in-memory DB
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from python_ai_services.core.database import Base # Your declarative base
 from python_ai_services.models.db_models import TradeFillDB # The DB model to test against
 
@@ -19,7 +21,8 @@ from unittest.mock import MagicMock, AsyncMock # Added for mock_event_bus
 
 # --- In-Memory SQLite Test Database Setup ---
 DATABASE_URL_TEST = "sqlite:///:memory:"
-engine_test = create_engine(DATABASE_URL_TEST, connect_args={"check_same_thread": False})
+# StaticPool shares one connection, so the service's DB worker thread sees the same in-memory database
+engine_test = create_engine(DATABASE_URL_TEST, connect_args={"check_same_thread": False}, poolclass=StaticPool)
 TestSessionLocal: Callable[[], Session] = sessionmaker(autocommit=False, autoflush=False, bind=engine_test) # type: ignore
 
 # --- Fixtures ---
@@ -66,7 +69,7 @@ def create_fill_pydantic(
 # --- Test Cases ---
 
 @pytest.mark.asyncio
-async def test_record_fill_db(service: TradeHistoryService, db_session: Session):
+async def test_record_fill_db(service: TradeHistoryService, db_session: Session, mock_event_bus: MagicMock):
     agent_id = "agent_db_record"
     fill_to_record = create_fill_pydantic(agent_id, "BTC/USD", "buy", 1.0, 50000.0)
 
@@ -134,7 +137,7 @@ async def test_record_fill_db_error_handling(service: TradeHistoryService):
     with pytest.raises(TradeHistoryServiceError, match="DB error recording fill: DB commit error"):
         await service.record_fill(fill_data)
 
-    mock_session.add.assert_called_once()
+    mock_session.execute.assert_called()
     mock_session.commit.assert_called_once()
     mock_session.rollback.assert_called_once() # Ensure rollback was attempted
     mock_session.close.assert_called_once()
@@ -291,7 +294,7 @@ async def test_get_processed_trades_multiple_assets_db(service: TradeHistoryServ
     assert pytest.approx(btc_trades[0].realized_pnl) == expected_pnl_btc
 
     # Check ETH P&L (sum of two closing parts)
-    eth_trades.sort(key=lambda t: t.timestamp) # Oldest exit first for easier assertion
+    eth_trades.sort(key=lambda t: t.exit_timestamp) # Oldest exit first for easier assertion
 
     # PNL from first ETH sell (5 units @ $3100 against 10 units @ $3000)
     eth_buy_fill_original_qty = 10.0 # Original quantity of the ETH buy
@@ -323,6 +326,180 @@ async def test_get_processed_trades_multiple_assets_db(service: TradeHistoryServ
     assert trade_log_eth2.entry_price_avg == pytest.approx(3000.0)
 
 
+
+# --- Tests for the incremental lot ledger ---
+
+@pytest.mark.asyncio
+async def test_processed_trades_paginate_newest_exit_first_db(service: TradeHistoryService):
+    agent_id = "agent_ledger_pagination"
+    fills_config = [{"asset": "SOL/USD", "side": "buy", "qty": 10, "price": 100.0, "offset": 100}]
+    fills_config += [{"asset": "SOL/USD", "side": "sell", "qty": 1, "price": 100.0 + i, "offset": 50 - i} for i in range(5)]
+    await _setup_fills_for_pnl_test(service, agent_id, fills_config)
+
+    first_page = await service.get_processed_trades(agent_id, limit=2, offset=0)
+    second_page = await service.get_processed_trades(agent_id, limit=2, offset=2)
+    assert [t.exit_price_avg for t in first_page] == [104.0, 103.0]
+    assert [t.exit_price_avg for t in second_page] == [102.0, 101.0]
+
+    open_lots = await service.get_open_lots(agent_id)
+    assert len(open_lots) == 1
+    assert open_lots[0].remaining_quantity == pytest.approx(5.0)
+    assert open_lots[0].quantity == pytest.approx(10.0)
+
+@pytest.mark.asyncio
+async def test_fully_matched_lots_are_removed_db(service: TradeHistoryService):
+    agent_id = "agent_ledger_lots"
+    fills_config = [
+        {"asset": "ADA/USD", "side": "buy", "qty": 3, "price": 1.0, "offset": 30},
+        {"asset": "ADA/USD", "side": "buy", "qty": 2, "price": 1.1, "offset": 20},
+        {"asset": "ADA/USD", "side": "sell", "qty": 4, "price": 1.2, "offset": 10},
+    ]
+    await _setup_fills_for_pnl_test(service, agent_id, fills_config)
+
+    trades = await service.get_processed_trades(agent_id)
+    assert sorted(t.quantity for t in trades) == pytest.approx([1.0, 3.0])
+    open_lots = await service.get_open_lots(agent_id, asset="ADA/USD")
+    assert [(lot.price, lot.remaining_quantity) for lot in open_lots] == [(1.1, pytest.approx(1.0))]
+
+@pytest.mark.asyncio
+async def test_backdated_fill_replays_asset_ledger_db(service: TradeHistoryService):
+    agent_id = "agent_ledger_backdated"
+    await _setup_fills_for_pnl_test(service, agent_id, [
+        {"asset": "BTC/USD", "side": "buy", "qty": 1, "price": 50000, "offset": 20},
+        {"asset": "BTC/USD", "side": "sell", "qty": 1, "price": 51000, "offset": 5},
+    ])
+    assert (await service.get_ledger_revision(agent_id)) == 0 # In-order fills only append
+    # An older, cheaper buy arrives late: FIFO now matches the sell against it instead
+    await _setup_fills_for_pnl_test(service, agent_id, [
+        {"asset": "BTC/USD", "side": "buy", "qty": 1, "price": 40000, "offset": 30},
+    ])
+    assert (await service.get_ledger_revision(agent_id)) == 1
+
+    trades = await service.get_processed_trades(agent_id)
+    assert len(trades) == 1
+    assert trades[0].entry_price_avg == pytest.approx(40000)
+    open_lots = await service.get_open_lots(agent_id)
+    assert [lot.price for lot in open_lots] == [50000]
+    assert (await service.verify_ledger(agent_id))["consistent"]
+
+@pytest.mark.asyncio
+async def test_equal_timestamp_fills_match_in_fill_id_order_db(service: TradeHistoryService):
+    agent_id = "agent_ledger_ties"
+    timestamp = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    def fill(fill_id, side, price, seconds=0):
+        return create_fill_pydantic(agent_id, "ETH/USD", side, 1.0, price, fill_id=fill_id).model_copy(
+            update={"timestamp": timestamp + timedelta(seconds=seconds)}
+        )
+
+    # Recorded in reverse fill_id order; the ledger must match the (timestamp, fill_id) replay order
+    await service.record_fill(fill("fill_b", "buy", 100.0))
+    await service.record_fill(fill("fill_a", "buy", 90.0))
+    await service.record_fill(fill("fill_c", "sell", 110.0, seconds=10))
+
+    trades = await service.get_processed_trades(agent_id)
+    assert [(t.trade_id, t.entry_price_avg) for t in trades] == [("closed_fill_a_fill_c", pytest.approx(90.0))]
+    assert [lot.lot_id for lot in await service.get_open_lots(agent_id)] == ["fill_b"]
+    assert (await service.verify_ledger(agent_id))["consistent"]
+
+@pytest.mark.asyncio
+async def test_verify_and_rebuild_ledger_db(service: TradeHistoryService, db_session: Session):
+    agent_id = "agent_ledger_rebuild"
+    rng = random.Random(7)
+    for i in range(60):
+        fill = create_fill_pydantic(
+            agent_id, rng.choice(["ETH/USD", "BTC/USD"]), rng.choice(["buy", "buy", "sell"]),
+            quantity=rng.uniform(0.1, 3.0), price=rng.uniform(90, 110), fee=rng.uniform(0, 0.5),
+            timestamp_offset_seconds=rng.randint(0, 1000)  # Arrives out of timestamp order
+        )
+        await service.record_fill(fill)
+
+    report = await service.verify_ledger(agent_id)
+    assert report["consistent"], report
+    assert report["closed_trades"] > 0
+
+    # Fills written behind the service's back leave the ledger stale until rebuilt
+    db_session.add(TradeFillDB(**service._pydantic_fill_to_db_dict(
+        create_fill_pydantic(agent_id, "ETH/USD", "sell", 1.0, 120.0)
+    )))
+    db_session.commit()
+    assert not (await service.verify_ledger(agent_id))["consistent"]
+
+    revision = await service.get_ledger_revision(agent_id)
+    counts = await service.rebuild_ledger(agent_id)
+    assert (await service.get_ledger_revision(agent_id)) == revision + 1
+    report = await service.verify_ledger(agent_id)
+    assert report["consistent"]
+    assert counts == {"closed_trades": report["closed_trades"], "open_lots": report["open_lots"]}
+
+@pytest.mark.asyncio
+async def test_ledger_revision_is_shared_through_db(service: TradeHistoryService, monkeypatch):
+    agent_id = "agent_ledger_shared"
+    await _setup_fills_for_pnl_test(service, agent_id, [
+        {"asset": "BTC/USD", "side": "buy", "qty": 1, "price": 50000, "offset": 20},
+        {"asset": "BTC/USD", "side": "sell", "qty": 1, "price": 51000, "offset": 5},
+    ])
+    # A second instance stands in for another worker or scripts/rebuild_trade_ledger.py
+    other_worker = TradeHistoryService(session_factory=TestSessionLocal)
+    await other_worker.rebuild_ledger(agent_id)
+    assert await service.get_ledger_revision(agent_id) == 1
+
+    # A replay that fails rolls the bump back with the rewritten rows
+    def failing_replay(fills):
+        raise RuntimeError("replay failed")
+    monkeypatch.setattr("python_ai_services.services.trade_history_service.replay_fills_fifo", failing_replay)
+    with pytest.raises(TradeHistoryServiceError):
+        await other_worker.rebuild_ledger(agent_id)
+    assert await service.get_ledger_revision(agent_id) == 1
+    assert await service.get_ledger_revision("agent_without_fills") == 0
+    await other_worker.cleanup()
+
+@pytest.mark.asyncio
+async def test_record_fills_batch_matches_single_fills_db(service: TradeHistoryService, mock_event_bus: MagicMock):
+    rng = random.Random(11)
+    fills = [
+        create_fill_pydantic(
+            "agent_batch", rng.choice(["ETH/USD", "BTC/USD"]), rng.choice(["buy", "buy", "sell"]),
+            quantity=rng.uniform(0.1, 3.0), price=rng.uniform(90, 110),
+            timestamp_offset_seconds=rng.randint(0, 1000)
+        )
+        for _ in range(40)
+    ]
+    await service.record_fills(fills[:25])
+    await service.record_fills(fills[25:])
+    assert mock_event_bus.publish.call_count == 40
+
+    for fill in fills:
+        await service.record_fill(fill.model_copy(update={"fill_id": str(uuid.uuid4()), "agent_id": "agent_single"}))
+
+    batched = await service.get_processed_trades("agent_batch", limit=1000)
+    single = await service.get_processed_trades("agent_single", limit=1000)
+    # Trades closed by one sell share an exit timestamp, so compare independent of trade_id order
+    assert sorted((t.asset, round(t.quantity, 9), round(t.realized_pnl, 6)) for t in batched) == \
+        sorted((t.asset, round(t.quantity, 9), round(t.realized_pnl, 6)) for t in single)
+    assert (await service.verify_ledger("agent_batch"))["consistent"]
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_db(service: TradeHistoryService):
+    agent_id = "agent_keyset"
+    fills_config = [{"asset": "SOL/USD", "side": "buy", "qty": 10, "price": 100.0, "offset": 100}]
+    fills_config += [{"asset": "SOL/USD", "side": "sell", "qty": 1, "price": 100.0 + i, "offset": 50 - i} for i in range(5)]
+    await _setup_fills_for_pnl_test(service, agent_id, fills_config)
+
+    all_fills = await service.get_fills_for_agent(agent_id)
+    first_fills = await service.get_fills_for_agent(agent_id, limit=4)
+    rest_fills = await service.get_fills_for_agent(agent_id, after=(first_fills[-1].timestamp, first_fills[-1].fill_id))
+    assert [f.fill_id for f in first_fills + rest_fills] == [f.fill_id for f in all_fills]
+
+    first_page = await service.get_processed_trades(agent_id, limit=2)
+    cursor = (first_page[-1].exit_timestamp, first_page[-1].trade_id)
+    second_page = await service.get_processed_trades(agent_id, limit=2, before=cursor)
+    assert [t.exit_price_avg for t in first_page + second_page] == [104.0, 103.0, 102.0, 101.0]
+
+    oldest = await service.get_processed_trades_since(agent_id, limit=3)
+    newer = await service.get_processed_trades_since(agent_id, after=(oldest[-1].exit_timestamp, oldest[-1].trade_id))
+    assert [t.exit_price_avg for t in oldest + newer] == [100.0, 101.0, 102.0, 103.0, 104.0]
+
 # Optional: Import for type hinting if not already present
 from typing import Optional
 from unittest.mock import MagicMock, AsyncMock # Ensure these are at the top if used by new fixtures
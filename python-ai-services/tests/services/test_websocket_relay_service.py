@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 import uuid
 
 from python_ai_services.services.websocket_relay_service import WebSocketRelayService
-from python_ai_services.core.websocket_manager import ConnectionManager
+from python_ai_services.core.websocket_manager import ConnectionManager, agent_topic, symbol_topic
 from python_ai_services.services.event_bus_service import EventBusService
 from python_ai_services.models.event_bus_models import Event
 from python_ai_services.models.websocket_models import WebSocketEnvelope
@@ -21,6 +21,7 @@ def mock_connection_manager() -> MagicMock:
     manager.send_to_client = AsyncMock()
     manager.broadcast_json = AsyncMock() # If WebSocketMessage is used directly for broadcast
     manager.broadcast_to_all = AsyncMock() # If WebSocketEnvelope is used for broadcast
+    manager.publish = AsyncMock(return_value=1)
     return manager
 
 @pytest_asyncio.fixture
@@ -63,14 +64,19 @@ async def test_on_new_fill_recorded(websocket_relay_service: WebSocketRelayServi
 
     await websocket_relay_service.on_new_fill_recorded(event)
 
-    mock_connection_manager.send_to_client.assert_called_once()
-    call_args = mock_connection_manager.send_to_client.call_args[0]
-    assert call_args[0] == agent_id # client_id to send to
+    assert mock_connection_manager.publish.call_count == 2
+    agent_call, symbol_call = mock_connection_manager.publish.call_args_list
+    assert agent_call.args[0] == agent_topic(agent_id)
+    assert agent_call.kwargs == {"coalesce": False} # every fill reaches the agent's clients
+    assert symbol_call.args[0] == symbol_topic("BTC/USD")
+    assert symbol_call.kwargs == {} # symbol subscribers only need the latest fill price
 
-    ws_envelope: WebSocketEnvelope = call_args[1]
+    ws_envelope: WebSocketEnvelope = agent_call.args[1]
     assert ws_envelope.event_type == "NEW_FILL"
     assert ws_envelope.agent_id == agent_id
     assert ws_envelope.payload == fill_payload_dict
+    assert symbol_call.args[1] is ws_envelope
+    mock_connection_manager.send_to_client.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_on_new_fill_recorded_no_agent_id(websocket_relay_service: WebSocketRelayService, mock_connection_manager: MagicMock, caplog):
@@ -81,7 +87,7 @@ async def test_on_new_fill_recorded_no_agent_id(websocket_relay_service: WebSock
         payload=fill_payload_dict
     )
     await websocket_relay_service.on_new_fill_recorded(event)
-    mock_connection_manager.send_to_client.assert_not_called()
+    mock_connection_manager.publish.assert_not_called()
     assert "Skipping NewFillRecordedEvent relay as agent_id is missing" in caplog.text
 
 
@@ -101,11 +107,12 @@ async def test_on_alert_triggered_with_agent_id(websocket_relay_service: WebSock
 
     await websocket_relay_service.on_alert_triggered(event)
 
-    mock_connection_manager.send_to_client.assert_called_once()
-    call_args = mock_connection_manager.send_to_client.call_args[0]
-    assert call_args[0] == agent_id
+    mock_connection_manager.publish.assert_called_once()
+    call_args = mock_connection_manager.publish.call_args
+    assert call_args.args[0] == agent_topic(agent_id)
+    assert call_args.kwargs == {"coalesce": False}
 
-    ws_envelope: WebSocketEnvelope = call_args[1]
+    ws_envelope: WebSocketEnvelope = call_args.args[1]
     assert ws_envelope.event_type == "ALERT_TRIGGERED"
     assert ws_envelope.agent_id == agent_id
     assert ws_envelope.payload == alert_payload_dict
@@ -123,7 +130,7 @@ async def test_on_alert_triggered_no_agent_id_broadcasts(websocket_relay_service
 
     await websocket_relay_service.on_alert_triggered(event)
 
-    mock_connection_manager.send_to_client.assert_not_called()
+    mock_connection_manager.publish.assert_not_called()
     mock_connection_manager.broadcast_to_all.assert_called_once()
     ws_envelope: WebSocketEnvelope = mock_connection_manager.broadcast_to_all.call_args[0][0]
     assert ws_envelope.event_type == "ALERT_TRIGGERED"
@@ -147,11 +154,12 @@ async def test_on_portfolio_snapshot_taken(websocket_relay_service: WebSocketRel
 
     await websocket_relay_service.on_portfolio_snapshot_taken(event)
 
-    mock_connection_manager.send_to_client.assert_called_once()
-    call_args = mock_connection_manager.send_to_client.call_args[0]
-    assert call_args[0] == agent_id
+    mock_connection_manager.publish.assert_called_once()
+    call_args = mock_connection_manager.publish.call_args
+    assert call_args.args[0] == agent_topic(agent_id)
+    assert call_args.kwargs == {} # snapshots coalesce: the latest one supersedes a pending one
 
-    ws_envelope: WebSocketEnvelope = call_args[1]
+    ws_envelope: WebSocketEnvelope = call_args.args[1]
     assert ws_envelope.event_type == "PORTFOLIO_SNAPSHOT"
     assert ws_envelope.agent_id == agent_id
     assert ws_envelope.payload == snapshot_payload_dict
@@ -165,7 +173,7 @@ async def test_on_portfolio_snapshot_taken_no_agent_id(websocket_relay_service:
         payload=snapshot_payload_dict
     )
     await websocket_relay_service.on_portfolio_snapshot_taken(event)
-    mock_connection_manager.send_to_client.assert_not_called()
+    mock_connection_manager.publish.assert_not_called()
     assert "Skipping PortfolioSnapshotTakenEvent relay as agent_id is missing" in caplog.text
 
 @pytest.mark.asyncio
@@ -176,5 +184,36 @@ async def test_event_handler_invalid_payload_type(websocket_relay_service: WebSo
         payload="this is a string, not a dict"
     )
     await websocket_relay_service.on_new_fill_recorded(event_invalid_payload)
-    mock_connection_manager.send_to_client.assert_not_called()
+    mock_connection_manager.publish.assert_not_called()
     assert "Invalid payload type for NewFillRecordedEvent: <class 'str'>. Expected dict." in caplog.text
+
+@pytest.mark.asyncio
+async def test_relay_delivers_through_topic_queues(mock_event_bus: MagicMock):
+    from fastapi import WebSocket
+
+    def socket() -> MagicMock:
+        ws = MagicMock(spec=WebSocket)
+        ws.accept = AsyncMock()
+        ws.close = AsyncMock()
+        ws.send_text = AsyncMock()
+        return ws
+
+    manager = ConnectionManager()
+    relay = WebSocketRelayService(connection_manager=manager, event_bus=mock_event_bus)
+    agent_ws, symbol_ws, other_ws = socket(), socket(), socket()
+    await manager.connect(agent_ws, "agent_a", topics=[agent_topic("agent_a")])
+    await manager.connect(symbol_ws, "viewer", topics=[symbol_topic("BTC/USD")])
+    await manager.connect(other_ws, "agent_b", topics=[agent_topic("agent_b")])
+
+    fill = TradeFillData(agent_id="agent_a", asset="BTC/USD", side="buy", quantity=0.1, price=50000).model_dump(mode='json')
+    await relay.on_new_fill_recorded(Event(publisher_agent_id="agent_a", message_type="NewFillRecordedEvent", payload=fill))
+    snapshot = PortfolioSnapshotOutput(agent_id="agent_a", timestamp=datetime.now(timezone.utc), total_equity_usd=1.0).model_dump(mode='json')
+    await relay.on_portfolio_snapshot_taken(Event(publisher_agent_id="agent_a", message_type="PortfolioSnapshotTakenEvent", payload=snapshot))
+    await manager.drain()
+
+    agent_events = [WebSocketEnvelope.model_validate_json(c.args[0]).event_type for c in agent_ws.send_text.call_args_list]
+    symbol_events = [WebSocketEnvelope.model_validate_json(c.args[0]).event_type for c in symbol_ws.send_text.call_args_list]
+    assert agent_events == ["NEW_FILL", "PORTFOLIO_SNAPSHOT"]
+    assert symbol_events == ["NEW_FILL"]
+    other_ws.send_text.assert_not_called()
+    assert manager.get_stats()["enqueued"] == 3
@@ -0,0 +1,116 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_ai_services.strategies.batch_signals import (
+    build_panel, panel_signals, batch_signals, symbol_bars, _per_symbol_panel
+)
+
+
+def synthetic_bars(num_bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, num_bars)))
+    open_ = close * (1 + rng.normal(0, 0.004, num_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, num_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, num_bars)))
+    volume = rng.lognormal(13, 0.3, num_bars) * np.where(rng.random(num_bars) < 0.08, 2.5, 1.0)
+    index = pd.bdate_range("2000-01-03", periods=num_bars)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def build_universe(num_symbols: int, num_bars: int) -> pd.DataFrame:
+    """A third of the symbols list late and a third delist early, so the panel is ragged at both ends"""
+    frames = {}
+    for i in range(num_symbols):
+        bars = synthetic_bars(num_bars, seed=i)
+        if i % 3 == 1:
+            bars = bars.iloc[num_bars // 10 + i:]
+        elif i % 3 == 2:
+            bars = bars.iloc[:num_bars - num_bars // 10 - i]
+        frames[f"SYM{i:03d}"] = bars
+    return build_panel(frames)
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return build_universe(9, 400)
+
+
+def test_universe_is_ragged(panel):
+    present = panel['Close'].notna()
+    assert not present.iloc[0].all() and not present.iloc[-1].all()
+    assert len(symbol_bars(panel, "SYM001")) < len(panel) and len(symbol_bars(panel, "SYM002")) < len(panel)
+
+
+@pytest.mark.parametrize("strategy, params", [
+    ("williams_alligator", {}),
+    ("williams_alligator", dict(jaw_period=8, jaw_offset=5, teeth_period=5, teeth_offset=3, lips_period=3, lips_offset=2)),
+    ("heikin_ashi", {}),
+    ("heikin_ashi", dict(trend_confirmation_candles=2, exit_change_candles=1)),
+])
+def test_panel_signals_match_per_symbol_calls(panel, strategy, params):
+    entries, exits = panel_signals(strategy, panel, **params)
+    loop_entries, loop_exits = _per_symbol_panel(strategy, panel, params, 1, None)
+
+    pd.testing.assert_frame_equal(entries, loop_entries, check_names=False)
+    pd.testing.assert_frame_equal(exits, loop_exits, check_names=False)
+    assert entries.values.any() and exits.values.any()
+    # Late listings and early delistings are covered, not only full-length symbols
+    assert entries[["SYM001", "SYM002"]].values.any()
+
+
+def test_panel_signals_on_symbol_without_overlap(panel):
+    # A symbol whose whole history sits before every other symbol's first bar
+    frames = {symbol: symbol_bars(panel, symbol) for symbol in ("SYM000", "SYM001")}
+    frames["OLD"] = synthetic_bars(200, seed=42).set_axis(pd.bdate_range("1990-01-01", periods=200))
+    ragged = build_panel(frames)
+
+    for strategy in ("williams_alligator", "heikin_ashi"):
+        entries, exits = panel_signals(strategy, ragged)
+        loop_entries, loop_exits = _per_symbol_panel(strategy, ragged, {}, 1, None)
+        pd.testing.assert_frame_equal(entries, loop_entries, check_names=False)
+        pd.testing.assert_frame_equal(exits, loop_exits, check_names=False)
+
+
+def test_per_symbol_strategy_on_executor_matches_sequential(panel):
+    params = {"breakout_confirmation_bars": 0, "min_box_duration": 1, "volume_factor": 1.0}
+    sequential = batch_signals("darvas_box", panel, n_jobs=1, **params)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        fanned_out = batch_signals("darvas_box", panel, executor=executor, n_jobs=3, **params)
+
+    pd.testing.assert_frame_equal(sequential, fanned_out)
+    assert len(sequential) > 0
+
+
+def test_batch_signals_table_lists_every_signal(panel):
+    entries, exits = panel_signals("heikin_ashi", panel)
+    table = batch_signals("heikin_ashi", panel)
+
+    assert len(table) == entries.values.sum() + exits.values.sum()
+    assert table["timestamp"].is_monotonic_increasing
+    for row in table.itertuples():
+        assert (entries if row.signal == "BUY" else exits).at[row.timestamp, row.symbol]
+        assert row.close == panel[("Close", row.symbol)].at[row.timestamp]
+
+    since = panel.index[len(panel) // 2]
+    assert batch_signals("heikin_ashi", panel, since=since).equals(
+        table[table["timestamp"] >= since].reset_index(drop=True)
+    )
+
+
+def test_unknown_strategy_is_rejected(panel):
+    with pytest.raises(ValueError):
+        panel_signals("not_a_strategy", panel)
+
+
+def test_strategies_import_without_core_services():
+    # core/__init__ starts the service registry; the bar store is only imported once bars are fetched
+    code = (
+        "import sys, python_ai_services.strategies, python_ai_services.optimization.strategy_optimizer; "
+        "sys.exit('python_ai_services.core' in sys.modules)"
+    )
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import pytest
+import vectorbt as vbt
+
+from python_ai_services.strategies.darvas_box import (
+    get_darvas_signals, DEFAULT_LOOKBACK_PERIOD_DAYS, DEFAULT_MIN_BOX_DURATION_DAYS, DEFAULT_VOLUME_INCREASE_FACTOR,
+    DEFAULT_BOX_BREAKOUT_CONFIRMATION_BARS, DEFAULT_STOP_LOSS_ATR_MULTIPLIER, DEFAULT_ATR_PERIOD
+)
+
+
+def synthetic_bars(num_bars: int, seed: int) -> pd.DataFrame:
+    """Random walk with occasional volume spikes, so boxes form, break out and get stopped out"""
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, num_bars)))
+    open_ = close * (1 + rng.normal(0, 0.004, num_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, num_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, num_bars)))
+    volume = rng.lognormal(13, 0.3, num_bars) * np.where(rng.random(num_bars) < 0.08, 2.5, 1.0)
+    index = pd.bdate_range("2000-01-03", periods=num_bars)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def with_missing_values(bars: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """Blank out single fields and whole bars, as gaps in provider data do"""
+    rng = np.random.default_rng(seed)
+    bars = bars.copy()
+    for column in ['High', 'Low', 'Close', 'Volume']:
+        bars.loc[rng.random(len(bars)) < 0.03, column] = np.nan
+    bars.loc[rng.random(len(bars)) < 0.01, :] = np.nan
+    return bars
+
+
+# The per-row loop get_darvas_signals ran before the state machine, kept as the reference
+
+def old_darvas_signals(
+    price_data: pd.DataFrame,
+    lookback_period: int = DEFAULT_LOOKBACK_PERIOD_DAYS,
+    min_box_duration: int = DEFAULT_MIN_BOX_DURATION_DAYS,
+    volume_factor: float = DEFAULT_VOLUME_INCREASE_FACTOR,
+    breakout_confirmation_bars: int = DEFAULT_BOX_BREAKOUT_CONFIRMATION_BARS,
+    stop_loss_atr_multiplier: float = DEFAULT_STOP_LOSS_ATR_MULTIPLIER,
+    atr_period: int = DEFAULT_ATR_PERIOD
+):
+    price_data = price_data.copy()
+    price_data['box_top'] = np.nan
+    price_data['box_bottom'] = np.nan
+    price_data['entries'] = False
+    price_data['exits'] = False
+    atr_indicator = vbt.ATR.run(price_data['High'], price_data['Low'], price_data['Close'], window=atr_period, ewm=False)
+    price_data['atr'] = atr_indicator.atr.values
+    avg_volume = price_data['Volume'].rolling(window=lookback_period, min_periods=1).mean()
+
+    in_box = False
+    box_start_index = -1
+    current_box_top = np.nan
+    current_box_bottom = np.nan
+    entry_box_bottom_for_stop = np.nan
+    plot_shapes_data = []
+
+    for i in range(lookback_period, len(price_data)):
+        current_high = price_data['High'].iloc[i]
+        current_low = price_data['Low'].iloc[i]
+        current_close = price_data['Close'].iloc[i]
+        current_volume = price_data['Volume'].iloc[i]
+
+        if not in_box:
+            if current_high >= price_data['High'].iloc[i-lookback_period:i].max():
+                current_box_top = current_high
+                current_box_bottom = current_low
+                in_box = True
+                box_start_index = i
+
+        if in_box:
+            price_data.loc[price_data.index[i], 'box_top'] = current_box_top
+            if current_high > current_box_top:
+                current_box_top = current_high
+                current_box_bottom = current_low
+                box_start_index = i
+                price_data.loc[price_data.index[i], 'box_top'] = current_box_top
+                price_data.loc[price_data.index[i], 'box_bottom'] = np.nan
+            elif current_low < current_box_bottom:
+                if box_start_index != -1:
+                    plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(255,0,0,0.1)", line_color="red", name="Invalidated Box Attempt"))
+                in_box = False
+                current_box_top, current_box_bottom, entry_box_bottom_for_stop = np.nan, np.nan, np.nan
+            else:
+                price_data.loc[price_data.index[i], 'box_bottom'] = current_box_bottom
+                box_duration_bars = i - box_start_index + 1
+                if box_duration_bars >= min_box_duration:
+                    confirmed_breakout = True
+                    if breakout_confirmation_bars > 0:
+                        if current_close > current_box_top:
+                            start_confirm_idx = max(box_start_index, i - breakout_confirmation_bars + 1)
+                            if not (price_data['Close'].iloc[start_confirm_idx : i+1] > current_box_top).all():
+                                confirmed_breakout = False
+                        else:
+                            confirmed_breakout = False
+                    if confirmed_breakout and current_volume > avg_volume.iloc[i-1] * volume_factor:
+                        price_data.loc[price_data.index[i], 'entries'] = True
+                        entry_box_bottom_for_stop = current_box_bottom
+                        plot_shapes_data.append(dict(x0=price_data.index[box_start_index], x1=price_data.index[i], y0=current_box_bottom, y1=current_box_top, fillcolor="rgba(0,255,0,0.2)", line_color="green", name="Entry Box"))
+                        in_box = False
+                        current_box_top, current_box_bottom = np.nan, np.nan
+
+        if not np.isnan(entry_box_bottom_for_stop) and not price_data['entries'].iloc[i]:
+            if not np.isnan(price_data['atr'].iloc[i]):
+                stop_price_level = entry_box_bottom_for_stop - (price_data['atr'].iloc[i] * stop_loss_atr_multiplier)
+                if current_low < stop_price_level:
+                    price_data.loc[price_data.index[i], 'exits'] = True
+                    entry_box_bottom_for_stop = np.nan
+
+    plot_shapes_df = pd.DataFrame(plot_shapes_data) if plot_shapes_data else pd.DataFrame()
+    return price_data, plot_shapes_df
+
+
+def assert_same_signals(bars: pd.DataFrame, **params):
+    old_signals, old_shapes = old_darvas_signals(bars, **params)
+    new_signals, new_shapes = get_darvas_signals("TEST", "", "", price_data=bars, **params)
+    pd.testing.assert_frame_equal(new_signals, old_signals)
+    pd.testing.assert_frame_equal(new_shapes, old_shapes)
+    return new_signals
+
+
+# Short boxes without a volume hurdle, so a few hundred bars hold many entries and stop-losses
+ACTIVE_PARAMS = dict(min_box_duration=1, volume_factor=1.0)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("confirmation_bars", [0, 1, 3])
+def test_state_machine_matches_row_loop(seed, confirmation_bars):
+    bars = synthetic_bars(600, seed)
+
+    signals = assert_same_signals(bars, breakout_confirmation_bars=confirmation_bars, **ACTIVE_PARAMS)
+
+    if confirmation_bars == 0:
+        # Make sure the comparison covered breakouts and stop-losses, not just empty columns
+        assert signals['entries'].any() and signals['exits'].any()
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("confirmation_bars", [0, 2])
+def test_state_machine_matches_row_loop_with_nan_bars(seed, confirmation_bars):
+    bars = with_missing_values(synthetic_bars(600, seed), seed)
+
+    signals = assert_same_signals(bars, breakout_confirmation_bars=confirmation_bars, **ACTIVE_PARAMS)
+
+    if confirmation_bars == 0:
+        assert signals['entries'].any() and signals['exits'].any()
+
+
+@pytest.mark.parametrize("params", [
+    dict(lookback_period=5, min_box_duration=1, volume_factor=1.5),
+    dict(lookback_period=40, min_box_duration=6, volume_factor=2.0, stop_loss_atr_multiplier=0.5, atr_period=5),
+])
+def test_state_machine_matches_row_loop_across_parameters(params):
+    assert_same_signals(synthetic_bars(400, seed=7), breakout_confirmation_bars=0, **params)
+
+
+def test_state_machine_matches_row_loop_on_short_history():
+    # Fewer bars than the lookback: no bar is evaluated
+    signals = assert_same_signals(synthetic_bars(DEFAULT_LOOKBACK_PERIOD_DAYS - 5, seed=1))
+    assert not signals['entries'].any()
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_ai_services.strategies.renko import RenkoBrickBuilder, calculate_renko_bricks
+
+
+# calculate_renko_bricks before RenkoBrickBuilder, kept as the reference
+
+def old_calculate_renko_bricks(price_series: pd.Series, brick_size: float) -> pd.DataFrame:
+    if price_series.empty:
+        return pd.DataFrame()
+    renko_bricks_list = []
+    last_brick_close = price_series.iloc[0]
+    brick_type = 0
+
+    for timestamp, current_price in price_series.items():
+        if brick_type == 0:
+            if current_price >= last_brick_close + brick_size:
+                brick_type = 1
+                num_bricks = int((current_price - last_brick_close) / brick_size)
+                for i in range(num_bricks):
+                    brick_open = last_brick_close + i * brick_size
+                    brick_close = brick_open + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                last_brick_close = brick_close
+            elif current_price <= last_brick_close - brick_size:
+                brick_type = -1
+                num_bricks = int((last_brick_close - current_price) / brick_size)
+                for i in range(num_bricks):
+                    brick_open = last_brick_close - i * brick_size
+                    brick_close = brick_open - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                last_brick_close = brick_close
+            continue
+
+        if brick_type == 1:
+            if current_price >= last_brick_close + brick_size:
+                num_bricks = int((current_price - last_brick_close) / brick_size)
+                for _ in range(num_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                    last_brick_close = brick_close
+            elif current_price <= last_brick_close - 2 * brick_size:
+                brick_type = -1
+                brick_open = last_brick_close - brick_size
+                brick_close = brick_open - brick_size
+                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                     'low': brick_close, 'close': brick_close, 'type': -1})
+                last_brick_close = brick_close
+                num_additional_bricks = int(np.floor((last_brick_close - current_price) / brick_size))
+                for _ in range(num_additional_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                    last_brick_close = brick_close
+
+        elif brick_type == -1:
+            if current_price <= last_brick_close - brick_size:
+                num_bricks = int((last_brick_close - current_price) / brick_size)
+                for _ in range(num_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close - brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_open,
+                                         'low': brick_close, 'close': brick_close, 'type': -1})
+                    last_brick_close = brick_close
+            elif current_price >= last_brick_close + 2 * brick_size:
+                brick_type = 1
+                brick_open = last_brick_close + brick_size
+                brick_close = brick_open + brick_size
+                renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                     'low': brick_open, 'close': brick_close, 'type': 1})
+                last_brick_close = brick_close
+                num_additional_bricks = int(np.floor((current_price - last_brick_close) / brick_size))
+                for _ in range(num_additional_bricks):
+                    brick_open = last_brick_close
+                    brick_close = last_brick_close + brick_size
+                    renko_bricks_list.append({'timestamp': timestamp, 'open': brick_open, 'high': brick_close,
+                                         'low': brick_open, 'close': brick_close, 'type': 1})
+                    last_brick_close = brick_close
+
+    if not renko_bricks_list:
+        return pd.DataFrame()
+    return pd.DataFrame(renko_bricks_list).set_index('timestamp')
+
+
+def random_walk(num_bars: int, seed: int, scale: float = 0.5) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, scale, num_bars))
+    return pd.Series(closes, index=pd.date_range("2020-01-01", periods=num_bars, freq="min"))
+
+
+def gapping_series() -> pd.Series:
+    """Each bar jumps several brick sizes, so one bar forms several bricks, reversals included"""
+    closes = [100.0, 103.5, 96.2, 110.0, 100.5, 89.9, 90.4, 93.1, 85.0]
+    return pd.Series(closes, index=pd.date_range("2024-01-01", periods=len(closes), freq="h"))
+
+
+SERIES = {
+    "random_walk": random_walk(3000, seed=7),
+    "volatile_walk": random_walk(1000, seed=3, scale=3.0),
+    "gaps": gapping_series(),
+}
+
+
+def stream(closes: pd.Series, brick_size: float) -> RenkoBrickBuilder:
+    builder = RenkoBrickBuilder(brick_size)
+    for timestamp, price in zip(closes.index, closes.to_numpy()):
+        builder.update(price, timestamp)
+    return builder
+
+
+@pytest.mark.parametrize("name", list(SERIES))
+@pytest.mark.parametrize("brick_size", [0.25, 1.0, 4.0])
+def test_extend_matches_old_calculation(name, brick_size):
+    closes = SERIES[name]
+
+    pd.testing.assert_frame_equal(calculate_renko_bricks(closes, brick_size), old_calculate_renko_bricks(closes, brick_size))
+
+
+@pytest.mark.parametrize("name", list(SERIES))
+@pytest.mark.parametrize("brick_size", [0.25, 1.0, 4.0])
+def test_update_matches_old_calculation(name, brick_size):
+    closes = SERIES[name]
+
+    builder = stream(closes, brick_size)
+
+    pd.testing.assert_frame_equal(builder.to_frame(), old_calculate_renko_bricks(closes, brick_size), check_index_type=False)
+
+
+def test_update_forms_several_bricks_on_one_bar():
+    closes = gapping_series()
+    builder = RenkoBrickBuilder(1.0)
+
+    formed = [builder.update(price, timestamp) for timestamp, price in closes.items()]
+
+    old = old_calculate_renko_bricks(closes, 1.0)
+    assert sum(formed) == len(builder) == len(old)
+    assert formed == [int((old.index == timestamp).sum()) for timestamp in closes.index]
+    assert max(formed) > 1
+    # Bricks formed by one bar share its position and timestamp
+    assert list(builder.brick_bars()) == [closes.index.get_loc(timestamp) for timestamp in old.index]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_extend_in_chunks_and_mixed_with_update_matches_one_pass(seed):
+    closes = SERIES["volatile_walk"]
+    rng = np.random.default_rng(seed)
+    builder = RenkoBrickBuilder(1.0)
+
+    position = 0
+    while position < len(closes):
+        if rng.random() < 0.3:
+            builder.update(closes.iloc[position], closes.index[position])
+            position += 1
+        else:
+            chunk = closes.iloc[position:position + int(rng.integers(1, 200))]
+            before = len(builder)
+            formed = builder.extend(chunk.to_numpy(), chunk.index)
+            assert formed == len(builder.to_frame(start=before))
+            position += len(chunk)
+
+    assert builder.prices_seen == len(closes)
+    pd.testing.assert_frame_equal(builder.to_frame(), old_calculate_renko_bricks(closes, 1.0), check_index_type=False)
+
+
+def test_prices_without_timestamps_are_indexed_by_position():
+    closes = gapping_series()
+    builder = RenkoBrickBuilder(1.0)
+    builder.extend(closes.to_numpy())
+
+    bricks = builder.to_frame()
+
+    assert list(bricks.index) == list(builder.brick_bars())
+    expected = old_calculate_renko_bricks(closes, 1.0)
+    np.testing.assert_array_equal(bricks.to_numpy(), expected.to_numpy())
+
+
+def test_missing_prices_form_no_bricks():
+    closes = SERIES["volatile_walk"].copy()
+    closes.iloc[np.random.default_rng(0).choice(np.arange(1, len(closes)), 50, replace=False)] = np.nan
+
+    expected = old_calculate_renko_bricks(closes, 1.0)
+    pd.testing.assert_frame_equal(calculate_renko_bricks(closes, 1.0), expected)
+    pd.testing.assert_frame_equal(stream(closes, 1.0).to_frame(), expected, check_index_type=False)
+
+
+def test_moves_exactly_one_and_two_bricks_form_bricks():
+    builder = RenkoBrickBuilder(1.0)
+
+    assert builder.update(10.0) == 0
+    assert builder.update(11.0) == 1 # Exactly one brick up
+    assert builder.update(10.0) == 0 # One brick back is inside the reversal band
+    assert builder.update(9.0) == 1 # Exactly two bricks down reverses
+    assert list(builder.to_frame()['type']) == [1, -1]
+
+
+def test_flat_prices_form_no_bricks():
+    closes = pd.Series(100.0 + np.sin(np.arange(50)) * 0.4, index=pd.date_range("2024-01-01", periods=50, freq="min"))
+
+    assert calculate_renko_bricks(closes, 1.0).empty
+    assert len(stream(closes, 1.0)) == 0
+
+
+@pytest.mark.parametrize("brick_size", [0.0, -1.0])
+def test_brick_size_must_be_positive(brick_size):
+    with pytest.raises(ValueError):
+        RenkoBrickBuilder(brick_size)
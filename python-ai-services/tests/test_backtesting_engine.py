@@ -0,0 +1,298 @@
+"""
+Parity tests for the vectorized BacktestEngine mode against the bar-by-bar loop
+"""
+
+import pytest
+import asyncio
+import time
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+import numpy as np
+
+from services.backtesting_service import (
+    BacktestEngine, OHLCVColumns, BacktestWorkerPool, MonteCarloSimulator,
+    _share_columns, _attach_columns, _close_shared_memory, _run_backtest_job
+)
+from models.trading_strategy_models import (
+    TradingStrategy, StrategyType, StrategyBacktestRequest, MarketData, RiskLevel
+)
+
+
+def make_strategy(strategy_type: StrategyType = StrategyType.MOMENTUM) -> TradingStrategy:
+    return TradingStrategy(
+        name="Parity Strategy",
+        description="Vectorized parity test strategy",
+        strategy_type=strategy_type,
+        max_position_size=Decimal("1000"),
+        max_portfolio_allocation=0.1,
+        risk_level=RiskLevel.MODERATE
+    )
+
+
+def make_market_data(num_bars: int, seed: int, start_price: float = 100.0) -> list:
+    rng = np.random.default_rng(seed)
+    closes = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, num_bars)))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        MarketData(
+            symbol="BTCUSD",
+            timestamp=start + timedelta(hours=i),
+            open=Decimal(str(round(close * 0.999, 6))),
+            high=Decimal(str(round(close * 1.005, 6))),
+            low=Decimal(str(round(close * 0.995, 6))),
+            close=Decimal(str(round(close, 6))),
+            volume=Decimal("1000")
+        )
+        for i, close in enumerate(closes)
+    ]
+
+
+def make_request(**overrides) -> StrategyBacktestRequest:
+    params = dict(
+        strategy_id="parity",
+        start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        end_date=datetime(2024, 3, 1, tzinfo=timezone.utc),
+        initial_capital=Decimal("100000"),
+        warmup_period=100
+    )
+    params.update(overrides)
+    return StrategyBacktestRequest(**params)
+
+
+def assert_results_match(loop_result, vector_result):
+    assert float(vector_result.final_capital) == pytest.approx(float(loop_result.final_capital), rel=1e-9)
+    assert float(vector_result.commission_paid) == pytest.approx(float(loop_result.commission_paid), rel=1e-9)
+    assert float(vector_result.slippage_cost) == pytest.approx(float(loop_result.slippage_cost), rel=1e-9)
+
+    assert len(vector_result.trades) == len(loop_result.trades)
+    for loop_trade, vector_trade in zip(loop_result.trades, vector_result.trades):
+        assert vector_trade["action"] == loop_trade["action"]
+        assert vector_trade["timestamp"] == loop_trade["timestamp"]
+        assert vector_trade["price"] == pytest.approx(loop_trade["price"], rel=1e-12)
+        assert vector_trade["quantity"] == pytest.approx(loop_trade["quantity"], rel=1e-9)
+        assert vector_trade.get("pnl", 0) == pytest.approx(loop_trade.get("pnl", 0), rel=1e-6, abs=1e-9)
+        assert float(vector_trade["new_capital"]) == pytest.approx(float(loop_trade["new_capital"]), rel=1e-9)
+
+    assert len(vector_result.equity_curve) == len(loop_result.equity_curve)
+    for loop_point, vector_point in zip(loop_result.equity_curve, vector_result.equity_curve):
+        assert vector_point["timestamp"] == loop_point["timestamp"]
+        assert vector_point["portfolio_value"] == pytest.approx(loop_point["portfolio_value"], rel=1e-9)
+        assert vector_point["capital"] == pytest.approx(loop_point["capital"], rel=1e-9)
+
+    for metric in (
+        "total_return", "annualized_return", "volatility", "sharpe_ratio", "sortino_ratio",
+        "calmar_ratio", "max_drawdown", "win_rate", "profit_factor", "average_trade"
+    ):
+        assert getattr(vector_result, metric) == pytest.approx(getattr(loop_result, metric), rel=1e-6, abs=1e-9)
+    for metric in ("total_trades", "winning_trades", "losing_trades"):
+        assert getattr(vector_result, metric) == getattr(loop_result, metric)
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_vectorized_matches_loop_momentum(seed):
+    strategy = make_strategy()
+    market_data = make_market_data(1500, seed)
+    request = make_request()
+
+    loop_result = BacktestEngine(mode="loop").run_backtest(strategy, market_data, request)
+    vector_result = BacktestEngine(mode="vectorized").run_backtest(strategy, market_data, request)
+
+    assert loop_result.total_trades > 0
+    assert_results_match(loop_result, vector_result)
+
+
+def test_vectorized_matches_loop_small_capital_and_costs():
+    strategy = make_strategy()
+    market_data = make_market_data(800, 3)
+    request = make_request(initial_capital=Decimal("500"), commission=0.002, slippage=0.0015, warmup_period=10)
+
+    loop_result = BacktestEngine(mode="loop").run_backtest(strategy, market_data, request)
+    vector_result = BacktestEngine(mode="vectorized").run_backtest(strategy, market_data, request)
+
+    assert_results_match(loop_result, vector_result)
+
+
+def test_vectorized_non_momentum_strategy_has_no_trades():
+    strategy = make_strategy(StrategyType.MEAN_REVERSION)
+    market_data = make_market_data(300, 5)
+    request = make_request()
+
+    loop_result = BacktestEngine(mode="loop").run_backtest(strategy, market_data, request)
+    vector_result = BacktestEngine(mode="vectorized").run_backtest(strategy, market_data, request)
+
+    assert vector_result.total_trades == 0
+    assert_results_match(loop_result, vector_result)
+
+
+def test_columnar_input_matches_market_data_input():
+    strategy = make_strategy()
+    market_data = make_market_data(600, 11)
+    request = make_request()
+    engine = BacktestEngine(mode="vectorized")
+
+    from_objects = engine.run_backtest(strategy, market_data, request)
+    from_columns = engine.run_backtest_columnar(strategy, OHLCVColumns.from_market_data(market_data), request)
+
+    assert_results_match(from_objects, from_columns)
+
+
+def test_columns_reject_multiple_symbols():
+    market_data = make_market_data(50, 2)
+    market_data[10] = market_data[10].model_copy(update={"symbol": "ETHUSD"})
+
+    with pytest.raises(ValueError):
+        OHLCVColumns.from_market_data(market_data)
+
+
+def test_unknown_engine_mode_rejected():
+    with pytest.raises(ValueError):
+        BacktestEngine(mode="gpu")
+
+
+# Worker pool
+
+
+def _slow_square(value: float, delay: float) -> float:
+    time.sleep(delay)
+    return value * value
+
+
+def test_shared_memory_columns_roundtrip():
+    columns = OHLCVColumns.from_market_data(make_market_data(250, 9))
+    shm, descriptor = _share_columns(columns)
+    try:
+        worker_shm, attached = _attach_columns(descriptor)
+        assert attached.symbol == columns.symbol
+        assert attached.tz_aware == columns.tz_aware
+        np.testing.assert_array_equal(attached.timestamps, columns.timestamps)
+        np.testing.assert_array_equal(attached.close, columns.close)
+        np.testing.assert_array_equal(attached.volume, columns.volume)
+        del attached
+        _close_shared_memory(worker_shm)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_jobs_and_reports_timing():
+    pool = BacktestWorkerPool(max_workers=2)
+    try:
+        results = await asyncio.gather(*[pool.run("square", _slow_square, float(i), 0.01) for i in range(4)])
+        assert results == [0.0, 1.0, 4.0, 9.0]
+
+        stats = pool.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["running"] == 0
+        assert stats["timing_by_job_type"]["square"]["completed"] == 4
+        assert stats["timing_by_job_type"]["square"]["avg_run_seconds"] > 0
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_concurrency_limit_and_cancel_queued_job():
+    pool = BacktestWorkerPool(max_workers=2, max_concurrent_jobs=1)
+    cleaned_up = []
+    try:
+        running = pool.submit("square", _slow_square, 2.0, 0.5)
+        queued = pool.submit("square", _slow_square, 3.0, 0.0, cleanup=lambda: cleaned_up.append(True))
+        await asyncio.sleep(0.1)
+
+        stats = pool.get_stats()
+        assert stats["running"] == 1
+        assert stats["queue_depth"] == 1
+
+        assert pool.cancel(queued.job_id)
+        with pytest.raises(asyncio.CancelledError):
+            await queued.task
+        assert queued.status == "cancelled"
+        assert cleaned_up == [True]
+
+        assert await running.task == 4.0
+        assert pool.cancel(running.job_id) is False
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shared_memory_backtest_job_matches_loop():
+    strategy = make_strategy()
+    market_data = make_market_data(1000, 21)
+    request = make_request()
+    loop_result = BacktestEngine(mode="loop").run_backtest(strategy, market_data, request)
+
+    pool = BacktestWorkerPool(max_workers=1)
+    shm, descriptor = _share_columns(OHLCVColumns.from_market_data(market_data))
+    try:
+        pool_result = await pool.run("backtest", _run_backtest_job, strategy, descriptor, request)
+    finally:
+        await pool.shutdown()
+        shm.close()
+        shm.unlink()
+
+    assert_results_match(loop_result, pool_result)
+
+
+# Monte Carlo
+
+
+def test_monte_carlo_from_backtest_results():
+    strategy = make_strategy()
+    backtest = BacktestEngine(mode="vectorized").run_backtest(strategy, make_market_data(1000, 4), make_request())
+
+    result = MonteCarloSimulator().run_simulation(strategy, [backtest], num_simulations=2000, seed=7)
+
+    assert result.num_simulations == 2000
+    assert result.random_seed == 7
+    assert result.min_return <= result.percentiles["50th"] <= result.max_return
+    assert 0.0 <= result.avg_drawdown <= result.worst_drawdown <= 1.0
+    assert 0 <= result.max_drawdown_duration <= result.time_horizon_days
+
+
+@pytest.mark.parametrize("method", ["normal", "bootstrap", "block_bootstrap"])
+def test_monte_carlo_seeded_and_chunk_invariant(method):
+    returns = np.random.default_rng(0).normal(0.0005, 0.02, 500)
+
+    first = MonteCarloSimulator().simulate_returns("s", returns, 3000, 100, method=method, seed=11)
+    again = MonteCarloSimulator().simulate_returns("s", returns, 3000, 100, method=method, seed=11)
+    small_chunks = MonteCarloSimulator(max_chunk_elements=1000).simulate_returns(
+        "s", returns, 3000, 100, method=method, seed=11
+    )
+    other_seed = MonteCarloSimulator().simulate_returns("s", returns, 3000, 100, method=method, seed=12)
+
+    assert first.percentiles == again.percentiles == small_chunks.percentiles
+    assert first.drawdown_percentiles == small_chunks.drawdown_percentiles
+    assert first.mean_return != other_seed.mean_return
+
+
+def test_monte_carlo_bootstrap_only_resamples_history():
+    returns = np.array([0.01, 0.02, 0.005])
+
+    result = MonteCarloSimulator().simulate_returns("s", returns, 500, 50, method="bootstrap", seed=1)
+
+    assert result.probability_of_loss == 0.0
+    assert result.worst_drawdown == 0.0
+    assert result.max_drawdown_duration == 0
+    assert result.min_return >= 1.005 ** 50 - 1 - 1e-12
+    assert result.max_return <= 1.02 ** 50 - 1 + 1e-12
+
+
+def test_monte_carlo_time_to_ruin():
+    returns = np.full(10, -0.1)
+
+    result = MonteCarloSimulator().simulate_returns(
+        "s", returns, 100, 30, method="block_bootstrap", block_size=5, seed=1, ruin_threshold=0.5
+    )
+
+    # 0.9 ** 7 is the first equity level at or below half the starting capital
+    assert result.probability_of_ruin == 1.0
+    assert result.mean_time_to_ruin == 7
+    assert result.median_time_to_ruin == 7
+    assert result.max_drawdown_duration == 30
+    assert result.worst_drawdown == pytest.approx(1 - 0.9 ** 30)
+
+
+def test_monte_carlo_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        MonteCarloSimulator().simulate_returns("s", np.array([0.01]), 10, 10, method="garch")
@@ -0,0 +1,268 @@
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from python_ai_services import optimization_engine
+from python_ai_services.optimization_engine import (
+    CacheTier, MemoryCacheTier, RedisCacheTier, DiskCacheTier, CacheType, estimate_size
+)
+
+
+class FakeClock:
+    """Strictly increasing time.time() replacement so access order never ties"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(optimization_engine.time, "time", fake)
+    return fake
+
+
+def tier_config(policy="lru", max_size=3, **extra):
+    return {"max_size": max_size, "ttl": 60, "eviction_policy": policy, **extra}
+
+
+@pytest.fixture
+def disk_tier(tmp_path):
+    tiers = []
+
+    def make(policy="lru", max_size=3, **extra):
+        tier = DiskCacheTier("l3", tier_config(policy, max_size, **extra), path=str(tmp_path / "cache.sqlite"))
+        tiers.append(tier)
+        return tier
+
+    yield make
+    for tier in tiers:
+        tier.close()
+
+
+@pytest.fixture
+def redis_tier(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        optimization_engine.aioredis, "from_url", lambda url: fakeredis.aioredis.FakeRedis(server=server)
+    )
+
+    def make(policy="lru", max_size=3, **extra):
+        return RedisCacheTier("l2", tier_config(policy, max_size, **extra), redis_url="redis://fake")
+
+    return make
+
+
+async def keys_present(tier, keys):
+    # Reads through the internal getter so the checks do not count as accesses in the stats
+    present = []
+    for key in keys:
+        if await tier._get(key) is not None:
+            present.append(key)
+    return present
+
+
+def test_cache_tier_is_abstract():
+    with pytest.raises(TypeError):
+        CacheTier("l0", CacheType.MEMORY, tier_config())
+
+    with pytest.raises(ValueError):
+        MemoryCacheTier("l1", tier_config(policy="fifo"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis", "disk"])
+async def test_lru_evicts_least_recently_used(backend, clock, redis_tier, disk_tier):
+    tier = {"memory": lambda: MemoryCacheTier("l1", tier_config("lru")), "redis": lambda: redis_tier("lru"),
+            "disk": lambda: disk_tier("lru")}[backend]()
+    for key in ("a", "b", "c"):
+        await tier.set(key, {"key": key})
+    await tier.get("a")
+    await tier.set("d", {"key": "d"})
+
+    assert await keys_present(tier, "abcd") == ["a", "c", "d"]
+    assert tier.stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis", "disk"])
+async def test_lfu_evicts_least_frequently_used(backend, clock, redis_tier, disk_tier):
+    tier = {"memory": lambda: MemoryCacheTier("l1", tier_config("lfu")), "redis": lambda: redis_tier("lfu"),
+            "disk": lambda: disk_tier("lfu")}[backend]()
+    for key in ("a", "b", "c"):
+        await tier.set(key, key)
+    for key in ("a", "a", "b", "c"):
+        await tier.get(key)
+    await tier.get("b")
+    await tier.set("d", "d")
+
+    assert await keys_present(tier, "abcd") == ["a", "b", "d"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis", "disk"])
+async def test_ttl_policy_evicts_soonest_expiry(backend, clock, redis_tier, disk_tier):
+    tier = {"memory": lambda: MemoryCacheTier("l1", tier_config("ttl")), "redis": lambda: redis_tier("ttl"),
+            "disk": lambda: disk_tier("ttl")}[backend]()
+    await tier.set("a", 1, ttl=300)
+    await tier.set("b", 2, ttl=30)
+    await tier.set("c", 3, ttl=120)
+    await tier.set("d", 4, ttl=600)
+
+    assert await keys_present(tier, "abcd") == ["a", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_memory_ttl_expiry(clock):
+    tier = MemoryCacheTier("l1", tier_config())
+    await tier.set("short", "value", ttl=10)
+    await tier.set("long", "value", ttl=100)
+    clock.advance(11)
+
+    assert await tier.get("short") is None
+    assert await tier.get("long") == "value"
+    assert len(tier) == 1
+    assert tier.total_bytes == estimate_size("value")
+
+
+@pytest.mark.asyncio
+async def test_disk_ttl_expiry(clock, disk_tier):
+    tier = disk_tier()
+    await tier.set("short", "value", ttl=10)
+    await tier.set("long", "value", ttl=100)
+    clock.advance(11)
+
+    assert await tier.get("short") is None
+    assert await tier.get("long") == "value"
+    assert len(tier) == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_byte_budget(clock):
+    value = "x" * 1000
+    size = estimate_size(value)
+    tier = MemoryCacheTier("l1", tier_config(max_size=100, max_bytes=2 * size + size // 2))
+    for key in ("a", "b", "c"):
+        assert await tier.set(key, value)
+
+    assert await keys_present(tier, "abc") == ["b", "c"]
+    assert tier.total_bytes == 2 * size <= tier.config["max_bytes"]
+    assert not await tier.set("huge", "x" * 10_000)
+    assert "huge" not in tier.entries
+
+    # Replacing a key releases its old size before charging the new one
+    await tier.set("c", "y")
+    assert tier.total_bytes == size + estimate_size("y")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["redis", "disk"])
+async def test_serialized_byte_budget(backend, clock, redis_tier, disk_tier):
+    value = "x" * 1000
+    tier = redis_tier(max_size=100) if backend == "redis" else disk_tier(max_size=100)
+    size = len(tier._serialize(value))
+    tier.config["max_bytes"] = 2 * size + size // 2
+    for key in ("a", "b", "c"):
+        assert await tier.set(key, value)
+
+    assert await keys_present(tier, "abc") == ["b", "c"]
+    usage = await tier._usage()
+    assert usage["entries"] == 2 and usage["bytes"] == 2 * size
+    assert not await tier.set("huge", "x" * 10_000)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", [False, True])
+@pytest.mark.parametrize("backend", ["redis", "disk"])
+async def test_round_trip_preserves_types(backend, compression, clock, redis_tier, disk_tier):
+    tier = redis_tier(compression=compression) if backend == "redis" else disk_tier(compression=compression)
+    value = {
+        "price": Decimal("101.25"),
+        "at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "levels": (1, 2.5, None),
+        "tags": {"a", "b"}
+    }
+    await tier.set("quote", value)
+
+    cached = await tier.get("quote")
+    assert cached == value
+    assert isinstance(cached["price"], Decimal) and isinstance(cached["at"], datetime)
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_persists_across_reopen(clock, disk_tier):
+    tier = disk_tier()
+    await tier.set("a", [1, 2, 3])
+    tier.close()
+
+    reopened = disk_tier()
+    assert len(reopened) == 1
+    assert await reopened.get("a") == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_redis_unavailable_degrades_to_misses(monkeypatch):
+    class Unreachable:
+        async def ping(self):
+            raise ConnectionError("refused")
+
+        async def aclose(self):
+            pass
+
+    monkeypatch.setattr(optimization_engine.aioredis, "from_url", lambda url: Unreachable())
+    tier = RedisCacheTier("l2", tier_config(), redis_url="redis://down")
+
+    assert not await tier.set("a", 1)
+    assert await tier.get("a") is None
+    assert (await tier._usage())["available"] is False
+
+
+@pytest.mark.asyncio
+async def test_redis_forget_after_connection_lost_is_a_noop(clock, redis_tier):
+    tier = redis_tier()
+    await tier.set("a", 1)
+    tier._mark_unavailable()
+
+    assert await tier._forget(["a"]) == 0
+    assert await tier.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_eviction_without_policy_victim_falls_back_to_oldest(clock):
+    tier = MemoryCacheTier("l1", tier_config("ttl"))
+    for key in "abc":
+        await tier.set(key, key)
+    tier.policy.heap.clear()
+
+    assert await tier.set("d", "d")
+    assert sorted(tier.entries) == ["b", "c", "d"]
+    assert tier.stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stats(clock):
+    tier = MemoryCacheTier("l1", tier_config(max_size=2))
+    await tier.set("a", 1)
+    await tier.set("b", 2)
+    await tier.set("c", 3)
+    await tier.get("c")
+    await tier.get("a")
+    await tier.get("missing")
+
+    stats = await tier.get_stats()
+    assert (stats["hits"], stats["misses"], stats["sets"], stats["evictions"]) == (1, 2, 3, 1)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    assert stats["entries"] == 2
+    assert stats["bytes"] == estimate_size(2) + estimate_size(3)
+    assert set(stats["get_latency_ms"]) == {"avg", "p50", "p99"}
+    assert stats["type"] == CacheType.MEMORY
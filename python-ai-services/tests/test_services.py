@@ -278,6 +278,91 @@ async def test_delete_agent_state_refactored(agent_state_manager: AgentStateMana
     mock_persistence_service.delete_realtime_state_from_redis.assert_called_once_with(agent_id)
     assert agent_id not in agent_state_manager.in_memory_cache
 
+@pytest.mark.asyncio
+async def test_in_memory_cache_evicts_least_recently_used(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, cache_max_size=2)
+    manager.in_memory_cache["a"] = {"agent_id": "a"}
+    manager.in_memory_cache["b"] = {"agent_id": "b"}
+
+    await manager.get_agent_state("a") # Touch "a" so "b" is the oldest
+    manager.in_memory_cache["c"] = {"agent_id": "c"}
+
+    assert list(manager.in_memory_cache) == ["a", "c"]
+    assert manager.get_cache_stats()["evictions"] == 1
+    assert manager.get_cache_stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_update_agent_state_coalesces_writes(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_coalescing_interval=60)
+    agent_id = "agent_coalesce"
+    mock_persistence_service.save_agent_state_to_supabase.side_effect = (
+        lambda agent, strategy, state, refs: {"agent_id": agent, "state": state, "strategy_type": strategy}
+    )
+
+    for tick in range(3):
+        result = await manager.update_agent_state(agent_id, {"tick": tick}, "momentum")
+        assert result["state"] == {"tick": tick}
+    mock_persistence_service.save_agent_state_to_supabase.assert_not_called()
+    assert (await manager.get_agent_state(agent_id))["state"] == {"tick": 2}
+
+    assert await manager.flush_pending_writes() == 1
+    mock_persistence_service.save_agent_state_to_supabase.assert_called_once_with(
+        agent_id, "momentum", {"tick": 2}, None
+    )
+    assert manager.in_memory_cache[agent_id] == {"agent_id": agent_id, "state": {"tick": 2}, "strategy_type": "momentum"}
+    assert manager.get_cache_stats()["coalesced_updates"] == 2
+
+@pytest.mark.asyncio
+async def test_coalesced_write_is_retried_after_failure(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_coalescing_interval=60)
+    mock_persistence_service.save_agent_state_to_supabase.return_value = None
+
+    await manager.update_agent_state("agent_retry", {"tick": 1})
+
+    assert await manager.flush_pending_writes() == 0
+    assert manager.get_cache_stats()["pending_writes"] == 1
+
+@pytest.mark.asyncio
+async def test_invalidation_from_other_worker_drops_cached_state(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service)
+    manager.in_memory_cache["remote"] = {"agent_id": "remote"}
+    manager.in_memory_cache["local"] = {"agent_id": "local"}
+
+    async def invalidations():
+        yield {"agent_id": "remote", "origin": "other-worker"}
+        yield {"agent_id": "local", "origin": manager.instance_id}
+    mock_persistence_service.listen_agent_state_invalidations = invalidations
+
+    await manager._invalidation_listener()
+
+    assert "remote" not in manager.in_memory_cache
+    assert "local" in manager.in_memory_cache
+
+@pytest.mark.asyncio
+async def test_invalidation_listener_resubscribes_and_clears_cache(mock_persistence_service: mock.AsyncMock):
+    manager = AgentStateManager(persistence_service=mock_persistence_service, write_coalescing_interval=60)
+    manager.invalidation_retry_initial = 0
+    manager.in_memory_cache["stale"] = {"agent_id": "stale"}
+    subscriptions = []
+
+    async def invalidations():
+        subscriptions.append(len(subscriptions))
+        if len(subscriptions) == 1:
+            yield {"agent_id": "remote", "origin": "other-worker"}
+            raise ConnectionError("Redis went away")
+        if len(subscriptions) == 2:
+            raise ConnectionError("still down")
+        yield {"agent_id": "remote", "origin": "other-worker"}
+    mock_persistence_service.listen_agent_state_invalidations = invalidations
+    await manager.update_agent_state("pending", {"tick": 1})  # Coalesced, not yet written
+
+    await manager._invalidation_listener()
+
+    assert len(subscriptions) == 3
+    # Updates missed while unsubscribed could concern any agent; only unflushed local updates stay cached
+    assert "stale" not in manager.in_memory_cache
+    assert manager.in_memory_cache["pending"]["state"] == {"tick": 1}
+
 @pytest.mark.asyncio
 async def test_save_trading_decision_refactored(agent_state_manager: AgentStateManager, mock_persistence_service: mock.AsyncMock):
     agent_id = "agent_decision"